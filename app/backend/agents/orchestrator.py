@@ -0,0 +1,111 @@
+"""
+Chat orchestrator interface
+
+The LangGraph orchestrator streams what it does as ChatEvents: agent steps
+as they start and finish, LLM tokens as they arrive, and a final answer.
+Consumers iterate the stream; cancelling the iteration (client went away,
+timeout) must cancel the in-flight agent and LLM work, which asyncio does
+as long as implementations await their calls instead of detaching them.
+"""
+
+import logging
+import os
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+AGENT_CONFIG_PATH = Path(__file__).resolve().parents[3] / "shared" / "configs" / "agent_config.yaml"
+
+# Event types
+EVENT_STEP = "step"  # Agent started/finished a step: {agent, status, iteration, ...}
+EVENT_TOKEN = "token"  # LLM output delta: {agent, text}
+EVENT_FINAL = "final"  # Answer: {response, sources, trace}
+EVENT_ERROR = "error"  # {detail, code: "failed" | "timeout"}
+
+
+def load_agent_config(path: Path = AGENT_CONFIG_PATH) -> Dict[str, Any]:
+    """
+    Parsed agent_config.yaml
+
+    Raises:
+        OSError: If the file can't be read
+    """
+    import yaml
+
+    with open(path, encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+@dataclass
+class ChatEvent:
+    """One event of a chat run"""
+
+    type: str
+    data: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class OrchestratorSettings:
+    """Orchestrator limits (agent_config.yaml `orchestrator` section)"""
+
+    max_iterations: int = 10
+    timeout_seconds: float = 300.0
+
+    @classmethod
+    def load(cls, path: Path = AGENT_CONFIG_PATH) -> "OrchestratorSettings":
+        """Read settings from the agent config, falling back to defaults"""
+        settings = cls()
+        try:
+            section = load_agent_config(path).get("orchestrator", {})
+            settings = cls(
+                max_iterations=int(section.get("max_iterations", settings.max_iterations)),
+                timeout_seconds=float(section.get("timeout_seconds", settings.timeout_seconds)),
+            )
+        except (OSError, ImportError, ValueError) as e:
+            logger.warning(f"Using default orchestrator settings ({e})")
+        timeout = os.getenv("CHAT_TIMEOUT_SECONDS")
+        if timeout:
+            settings.timeout_seconds = float(timeout)
+        return settings
+
+
+class ChatOrchestrator(ABC):
+    """Multi-agent chat backend"""
+
+    def __init__(self, settings: Optional[OrchestratorSettings] = None):
+        self.settings = settings or OrchestratorSettings.load()
+
+    @abstractmethod
+    def stream(
+        self,
+        message: str,
+        conversation_id: Optional[str] = None,
+        city_context: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[ChatEvent]:
+        """
+        Run the agents on a message, yielding events as they are produced
+
+        Implementations are async generators; they should end with one
+        EVENT_FINAL and stop after settings.max_iterations agent steps.
+        """
+
+
+_orchestrator: Optional[ChatOrchestrator] = None
+
+
+def get_orchestrator() -> Optional[ChatOrchestrator]:
+    """
+    Orchestrator installed with set_orchestrator
+
+    None until one is installed; the chat endpoint then answers 501.
+    """
+    return _orchestrator
+
+
+def set_orchestrator(orchestrator: Optional[ChatOrchestrator]) -> None:
+    """Install the orchestrator used by the chat endpoint"""
+    global _orchestrator
+    _orchestrator = orchestrator
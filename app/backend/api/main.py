@@ -1,30 +1,66 @@
 """Urban Evolution AI Platform - FastAPI Application"""
 
+import asyncio
 import sys
 from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Dict
+from typing import Any, Dict
 
-import uvicorn
 from fastapi import FastAPI, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy import text
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
-# Add project root to path for shared imports
-project_root = Path(__file__).parent.parent.parent.parent
-sys.path.insert(0, str(project_root))
+# Add project root to path for shared imports (once, so --reload doesn't stack entries)
+project_root = str(Path(__file__).resolve().parent.parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
 
 # Import routers with relative imports
-from api.routers import buildings, chat, cities, ethics, growth, news, scenarios
+from api.middleware.compression import CompressionMiddleware
+from api.middleware.metrics import MetricsMiddleware
+from api.middleware.rate_limit import RATE_LIMIT_ENABLED, RateLimitMiddleware
+from api.middleware.request_timing import RequestTimingMiddleware
+from api.models.schema import DB_AUTO_MIGRATE, upgrade_database
+from api.models.session import engine
+from api.routers import (
+    buildings,
+    chat,
+    cities,
+    debug,
+    ethics,
+    growth,
+    jobs,
+    models,
+    news,
+    scenarios,
+)
+from api.utils.admission import admission_controller
+from api.utils.metrics import METRICS_ENABLED, app_stats, render_metrics
+from api.utils.profiling import instrument_engine
+from api.utils.response_cache import create_backend, response_cache
+from api.utils.serialization import FastJSONResponse
+from services.building_tiles import building_tile_service
+from services.generation_telemetry import get_generation_telemetry
+from services.heatmap_tiles import heatmap_tile_service
+from services.inference_pool import get_inference
+from services.job_handlers import register_job_handlers
+from services.job_queue import job_manager
+from services.model_registry import warmup_model_names
+from services.news_ingestion import news_ingestor
 
 # Setup simple logger (middleware will be added later)
 import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Readiness probes must answer quickly even when a dependency hangs
+HEALTH_CHECK_TIMEOUT = 2.0
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -34,11 +70,15 @@ async def lifespan(app: FastAPI):
     
     # Initialize database
     logger.info("📊 Initializing database...")
-    # TODO: Initialize database connection
+    if DB_AUTO_MIGRATE:
+        await run_in_threadpool(upgrade_database)
     
-    # Load ML models
-    logger.info("🤖 Loading ML models...")
-    # TODO: Load YOLO, SAM, LSTM, XGBoost models
+    # ML models load lazily on first use; optionally warm some up in the background.
+    # With INFERENCE_POOL_ADDRESS set they live in the shared inference server instead.
+    inference = get_inference()
+    logger.info(f"🤖 ML models load on first use ({inference.mode} inference)")
+    if inference.mode == "local":
+        inference.warm_up(warmup_model_names())
     
     # Initialize agent system
     logger.info("🧠 Initializing multi-agent system...")
@@ -46,7 +86,21 @@ async def lifespan(app: FastAPI):
     
     # Initialize Redis connection
     logger.info("💾 Connecting to Redis...")
-    # TODO: Initialize Redis client
+    await response_cache.configure(await create_backend())
+    
+    # Start background job workers
+    logger.info("⚙️ Starting background job workers...")
+    register_job_handlers(job_manager)
+    await job_manager.start()
+    
+    # Component gauges are read from their owners on each /metrics scrape
+    app_stats.set_db_engine(engine)
+    app_stats.add_cache("response", response_cache.stats)
+    app_stats.add_cache("building_tiles", building_tile_service.stats)
+    app_stats.add_cache("heatmap_tiles", heatmap_tile_service.stats)
+    app_stats.set_job_queue(job_manager.stats)
+    app_stats.set_models(lambda: get_inference().status())
+    app_stats.set_admission(admission_controller.stats)
     
     logger.info("✅ Application startup complete")
     
@@ -54,6 +108,12 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("🛑 Shutting down Urban Evolution AI Platform...")
+    await job_manager.stop()
+    await response_cache.backend.close()
+    await news_ingestor.aclose()
+    telemetry = get_generation_telemetry()
+    if telemetry is not None:
+        telemetry.stop()
     # TODO: Cleanup resources
     logger.info("✅ Shutdown complete")
 
@@ -86,8 +146,14 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
+# Shed excess load per route class and rate limit clients (429/503 + Retry-After);
+# added before CORS so shed responses carry the CORS headers browsers need to read them
+if RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -102,12 +168,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress responses per Accept-Encoding (skips small bodies, images and SSE)
+app.add_middleware(CompressionMiddleware)
+
 # Add custom middleware
 # TODO: Implement and enable custom middleware
 # app.add_middleware(LoggingMiddleware)
-# app.add_middleware(RateLimitMiddleware)
 # app.add_middleware(AuthMiddleware)  # Enable after implementing auth
 
+# Per-route latency, throughput and error metrics (served at /metrics);
+# outermost so shed requests are counted too
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Admin-only profiling endpoints (off by default; cost nothing unless enabled)
+debug_enabled = debug.DEBUG_ENDPOINTS_ENABLED and bool(debug.DEBUG_ADMIN_TOKEN)
+if debug.DEBUG_ENDPOINTS_ENABLED and not debug.DEBUG_ADMIN_TOKEN:
+    logger.warning(
+        "DEBUG_ENDPOINTS_ENABLED is set without DEBUG_ADMIN_TOKEN; debug endpoints stay off"
+    )
+if debug_enabled:
+    app.add_middleware(RequestTimingMiddleware)
+    instrument_engine(engine)
+
 # Include routers
 app.include_router(cities.router, prefix="/api/cities", tags=["Cities"])
 app.include_router(buildings.router, prefix="/api/buildings", tags=["Buildings"])
@@ -116,6 +199,10 @@ app.include_router(scenarios.router, prefix="/api/scenarios", tags=["Scenarios"]
 app.include_router(chat.router, prefix="/api/chat", tags=["Multi-Agent Chat"])
 app.include_router(news.router, prefix="/api/news", tags=["Urban News"])
 app.include_router(ethics.router, prefix="/api/ethics", tags=["Ethics & Safety"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["Background Jobs"])
+app.include_router(models.router, prefix="/api/models", tags=["ML Models"])
+if debug_enabled:
+    app.include_router(debug.router, prefix="/debug", tags=["Debug"])
 
 
 @app.get("/", tags=["Root"])
@@ -129,16 +216,95 @@ async def root() -> Dict[str, str]:
     }
 
 
+def _check_database() -> Dict[str, Any]:
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    pool = engine.pool
+    checked_out = pool.checkedout() if hasattr(pool, "checkedout") else None
+    return {"status": "healthy", "pool_checked_out": checked_out}
+
+
+def _check_models() -> Dict[str, Any]:
+    # Unloaded models are fine (they load on first use); failed loads are not
+    inference_status = get_inference().status()
+    failed = [m["name"] for m in inference_status["models"] if m["state"] == "failed"]
+    loaded = [m["name"] for m in inference_status["models"] if m["state"] == "loaded"]
+    return {
+        "status": "degraded" if failed else "healthy",
+        "mode": inference_status["mode"],
+        "loaded": loaded,
+        "failed": failed,
+    }
+
+
+def _check_job_queue() -> Dict[str, Any]:
+    if not job_manager.started:
+        return {"status": "unhealthy", "error": "Job workers not started"}
+    queue_status = "degraded" if job_manager.queue_depth >= job_manager.max_pending else "healthy"
+    return {
+        "status": queue_status,
+        "queue_depth": job_manager.queue_depth,
+        "max_pending": job_manager.max_pending,
+    }
+
+
+async def _run_check(check) -> Dict[str, Any]:
+    try:
+        return await asyncio.wait_for(run_in_threadpool(check), timeout=HEALTH_CHECK_TIMEOUT)
+    except asyncio.TimeoutError:
+        return {"status": "unhealthy", "error": f"Timed out after {HEALTH_CHECK_TIMEOUT}s"}
+    except Exception as e:
+        return {"status": "unhealthy", "error": str(e)}
+
+
 @app.get("/health", tags=["Health"])
-async def health_check() -> Dict[str, str]:
-    """Health check endpoint"""
+async def health_check() -> Response:
+    """
+    Readiness check: database, model registry and job queue
+
+    Returns 503 when a dependency is unhealthy so load balancers stop routing
+    to this worker; "degraded" (e.g. a model failed to load, queue full)
+    still returns 200.
+    """
+    names = ("database", "models", "job_queue")
+    results = await asyncio.gather(
+        _run_check(_check_database), _run_check(_check_models), _run_check(_check_job_queue)
+    )
+    checks = dict(zip(names, results))
+    states = {check["status"] for check in checks.values()}
+    overall = (
+        "unhealthy" if "unhealthy" in states else "degraded" if "degraded" in states else "healthy"
+    )
+    return FastJSONResponse(
+        status_code=(
+            status.HTTP_503_SERVICE_UNAVAILABLE if overall == "unhealthy" else status.HTTP_200_OK
+        ),
+        content={
+            "status": overall,
+            "timestamp": datetime.utcnow().isoformat(),
+            "service": "urban-evolution-ai",
+            "checks": checks,
+        },
+    )
+
+
+@app.get("/health/live", tags=["Health"])
+async def liveness_check() -> Dict[str, str]:
+    """Liveness check: the process is up and serving requests"""
     return {
-        "status": "healthy",
+        "status": "alive",
         "timestamp": datetime.utcnow().isoformat(),
         "service": "urban-evolution-ai",
     }
 
 
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def metrics() -> Response:
+    """Prometheus metrics"""
+    body, content_type = await run_in_threadpool(render_metrics)
+    return Response(content=body, headers={"Content-Type": content_type})
+
+
 # Exception handlers
 @app.exception_handler(StarletteHTTPException)
 async def http_exception_handler(request: Request, exc: StarletteHTTPException):
@@ -151,6 +317,8 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException):
             "status_code": exc.status_code,
             "timestamp": datetime.utcnow().isoformat(),
         },
+        # e.g. Retry-After on 503/429, WWW-Authenticate on 401
+        headers=getattr(exc, "headers", None),
     )
 
 
@@ -184,6 +352,8 @@ async def general_exception_handler(request: Request, exc: Exception):
 
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
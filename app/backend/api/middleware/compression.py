@@ -0,0 +1,151 @@
+"""
+Content-negotiated response compression (zstd, brotli, gzip)
+
+Pure ASGI middleware so streaming responses are compressed chunk by chunk
+instead of being buffered. Responses are left untouched when they are
+small, already encoded (e.g. pre-compressed cache variants), or of a media
+type that is already compressed (PNG/WebP tiles, scenario images) or must
+stream unbuffered (SSE).
+"""
+
+import logging
+from typing import Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from api.utils.compression import (
+    MINIMUM_SIZE,
+    STREAM_LEVELS,
+    StreamCompressor,
+    available_encodings,
+    compress,
+    is_compressible,
+    negotiate,
+    variant_etag,
+)
+
+logger = logging.getLogger(__name__)
+
+# Larger bodies are compressed in a worker thread to keep the event loop free
+THREADPOOL_THRESHOLD = 256 * 1024
+
+
+class CompressionMiddleware:
+    """Compress responses according to the request's Accept-Encoding"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = MINIMUM_SIZE,
+        encodings: Optional[Tuple[str, ...]] = None,
+    ):
+        """
+        Initialize compression middleware
+
+        Args:
+            app: Wrapped ASGI app
+            minimum_size: Bodies smaller than this (bytes) are sent as-is
+            encodings: Offered codings in preference order (all installed if None)
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = encodings or available_encodings()
+        logger.info(f"Response compression enabled: {', '.join(self.encodings)}")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope.get("method") == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"), self.encodings)
+        responder = _CompressionResponder(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """Per-response state machine wrapping the ASGI send callable"""
+
+    def __init__(self, send: Send, encoding: Optional[str], minimum_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start: Optional[Message] = None
+        self.compressor: Optional[StreamCompressor] = None
+        self.passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if self.passthrough:
+            await self._send(message)
+            return
+
+        if message["type"] == "http.response.start":
+            headers = MutableHeaders(raw=message["headers"])
+            eligible = (
+                message["status"] not in (204, 206, 304)
+                and "content-encoding" not in headers
+                and is_compressible(headers.get("content-type"))
+            )
+            if eligible and "accept-encoding" not in headers.get("vary", "").lower():
+                # The representation varies by Accept-Encoding even when sent uncompressed
+                headers.add_vary_header("Accept-Encoding")
+            if not eligible or self.encoding is None:
+                self.passthrough = True
+                await self._send(message)
+                return
+            self.start = message  # Held until the first body chunk decides
+            return
+
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            if not more_body:
+                await self._send_whole(body)
+                return
+            await self._begin_stream()
+
+        chunk = self.compressor.compress(body)
+        if not more_body:
+            chunk += self.compressor.finish()
+        if chunk or not more_body:
+            await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    async def _send_whole(self, body: bytes) -> None:
+        headers = MutableHeaders(raw=self.start["headers"])
+        if len(body) < self.minimum_size:
+            await self._send(self.start)
+            await self._send({"type": "http.response.body", "body": body})
+            return
+
+        level = STREAM_LEVELS[self.encoding]
+        if len(body) >= THREADPOOL_THRESHOLD:
+            compressed = await run_in_threadpool(compress, body, self.encoding, level)
+        else:
+            compressed = compress(body, self.encoding, level)
+        headers["Content-Encoding"] = self.encoding
+        headers["Content-Length"] = str(len(compressed))
+        _set_variant_etag(headers, self.encoding)
+        await self._send(self.start)
+        await self._send({"type": "http.response.body", "body": compressed})
+
+    async def _begin_stream(self) -> None:
+        headers = MutableHeaders(raw=self.start["headers"])
+        headers["Content-Encoding"] = self.encoding
+        if "content-length" in headers:
+            del headers["Content-Length"]
+        _set_variant_etag(headers, self.encoding)
+        self.compressor = StreamCompressor(self.encoding)
+        await self._send(self.start)
+
+
+def _set_variant_etag(headers: MutableHeaders, encoding: str) -> None:
+    """Give the encoded representation its own ETag"""
+    etag = headers.get("etag")
+    if etag:
+        headers["ETag"] = variant_etag(etag, encoding)
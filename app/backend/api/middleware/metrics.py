@@ -0,0 +1,65 @@
+"""
+Request instrumentation middleware
+
+Records per-route latency histograms, request and error counters, and the
+number of in-flight requests. Routes are labelled by their template
+("/api/cities/{city_id}"), never the raw path, to keep label cardinality
+bounded.
+"""
+
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from api.utils.metrics import (
+    http_request_duration_seconds,
+    http_request_errors_total,
+    http_requests_in_progress,
+    http_requests_total,
+)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def route_template(scope: Scope) -> str:
+    """Route path template of a handled request (set by the router)"""
+    return getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+
+
+class MetricsMiddleware:
+    """Prometheus request metrics"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        in_progress = http_requests_in_progress.labels(method)
+        in_progress.inc()
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        error = None
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            in_progress.dec()
+            endpoint = route_template(scope)
+            http_requests_total.labels(method, endpoint, str(status_code)).inc()
+            http_request_duration_seconds.labels(method, endpoint).observe(duration)
+            if error is not None or status_code >= 500:
+                http_request_errors_total.labels(method, endpoint, error or str(status_code)).inc()
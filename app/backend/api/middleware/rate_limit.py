@@ -0,0 +1,130 @@
+"""
+Admission control and load shedding
+
+Requests are classified before routing into route classes (heavy, chat,
+tiles, bulk, default), each with its own concurrency limit and bounded queue,
+so saturated Gemini/prediction endpoints cannot starve cheap reads such as
+/api/cities. Excess load is rejected up front:
+
+- 429 + Retry-After when a client exceeds its token bucket
+- 503 + Retry-After when a route class's queue is full or the wait for a
+  slot exceeds its queue timeout
+"""
+
+import logging
+import os
+import re
+import time
+from datetime import datetime
+from typing import Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from api.utils.admission import AdmissionController, Overloaded, admission_controller
+from api.utils.metrics import http_requests_shed_total
+from api.utils.profiling import record_stage
+from api.utils.serialization import FastJSONResponse
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Use the first X-Forwarded-For address as the client (only behind a trusted proxy)
+TRUST_FORWARDED = os.getenv("API_RATE_LIMIT_TRUST_PROXY", "false").lower() in ("1", "true", "yes")
+
+# Probes, metrics, docs and admin debug endpoints are never limited
+EXEMPT_PATHS = {"/health", "/health/live", "/metrics", "/docs", "/redoc", "/openapi.json"}
+EXEMPT_PREFIXES = ("/debug/",)
+
+# (route class, methods, path pattern); first match wins, anything else is "default"
+ROUTE_CLASSES = [
+    ("heavy", {"POST"}, re.compile(r"^/api/scenarios/generate/?$")),
+    ("heavy", {"POST"}, re.compile(r"^/api/growth/predict/?$")),
+    ("chat", {"POST"}, re.compile(r"^/api/chat/?$")),
+    ("heavy", {"POST"}, re.compile(r"^/api/ethics/check/?$")),
+    ("heavy", {"POST"}, re.compile(r"^/api/models/[^/]+/warmup/?$")),
+    ("heavy", {"POST"}, re.compile(r"^/api/news/refresh/?$")),
+    ("tiles", {"GET"}, re.compile(r"^/api/(buildings|growth)/[^/]+/tiles/")),
+    ("bulk", {"GET"}, re.compile(r"^/api/buildings/[^/]+/?$")),
+    ("bulk", {"GET"}, re.compile(r"^/api/growth/[^/]+/heatmap\.geojson$")),
+    # Long-lived, mostly idle event streams: rate limited but hold no slot
+    ("stream", {"GET"}, re.compile(r"^/api/jobs/[^/]+/events/?$")),
+]
+
+
+def classify(method: str, path: str) -> Optional[str]:
+    """Route class of a request, or None if it is exempt"""
+    if method == "OPTIONS" or path in EXEMPT_PATHS or path.startswith(EXEMPT_PREFIXES):
+        return None
+    for route_class, methods, pattern in ROUTE_CLASSES:
+        if method in methods and pattern.match(path):
+            return route_class
+    return "default"
+
+
+def client_id(scope: Scope) -> str:
+    """Client address used as the rate-limit key"""
+    if TRUST_FORWARDED:
+        for name, value in scope.get("headers", []):
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class RateLimitMiddleware:
+    """Per-client rate limiting and per-route-class admission control"""
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController = admission_controller):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route_class = classify(scope["method"], scope["path"])
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.controller.limiters.get(route_class)
+        try:
+            if self.controller.rate_limiter is not None:
+                cost = limiter.config.cost if limiter is not None else 1.0
+                self.controller.rate_limiter.check(client_id(scope), cost, route_class)
+            if limiter is not None:
+                wait_start = time.perf_counter()
+                await limiter.acquire()
+                record_stage("admission_wait", time.perf_counter() - wait_start)
+        except Overloaded as e:
+            http_requests_shed_total.labels(route_class, e.reason).inc()
+            logger.warning(f"Shed {scope['method']} {scope['path']} ({route_class}: {e.reason})")
+            await _rejection(e)(scope, receive, send)
+            return
+
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.perf_counter() - start)
+
+
+def _rejection(error: Overloaded) -> FastJSONResponse:
+    detail = (
+        "Too many requests" if error.status_code == 429 else "Server is overloaded, retry later"
+    )
+    return FastJSONResponse(
+        status_code=error.status_code,
+        content={
+            "detail": detail,
+            "status_code": error.status_code,
+            "timestamp": datetime.utcnow().isoformat(),
+        },
+        headers={"Retry-After": str(error.retry_after)},
+    )
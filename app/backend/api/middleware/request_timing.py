@@ -0,0 +1,42 @@
+"""
+Per-request stage timings for the debug endpoints
+
+Installed only when the debug endpoints are enabled. Each request gets a
+RequestTimings in a context variable; stage() blocks and SQL execution add
+to it, and the finished request goes to the slow request log.
+"""
+
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from api.utils.profiling import RequestTimings, current_timings, slow_requests
+
+
+class RequestTimingMiddleware:
+    """Record request durations and stage breakdowns"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings(method=scope["method"], path=scope["path"], started_at=time.time())
+        token = current_timings.set(timings)
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                timings.status = message["status"]
+                timings.add("time_to_headers", time.perf_counter() - start)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            timings.duration = time.perf_counter() - start
+            current_timings.reset(token)
+            slow_requests.add(timings)
@@ -13,13 +13,17 @@ from sqlalchemy import (
     Enum,
     Float,
     ForeignKey,
+    Index,
     Integer,
+    LargeBinary,
     String,
     Text,
+    UniqueConstraint,
+    text,
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 
 Base = declarative_base()
@@ -39,6 +43,14 @@ class TileStatus(str, enum.Enum):
     ALIGNMENT_ERROR = "alignment_error"
 
 
+class JobStatus(str, enum.Enum):
+    """Background job status"""
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
 class BuildingType(str, enum.Enum):
     """Building classification types"""
     RESIDENTIAL = "residential"
@@ -165,39 +177,49 @@ class Building(Base):
 
 class GrowthPrediction(Base):
     """Urban growth prediction model"""
-    
+
     __tablename__ = "growth_predictions"
-    
+
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     city_id = Column(UUID(as_uuid=True), ForeignKey("cities.id"), nullable=False, index=True)
-    
+
     # Prediction parameters
     target_year = Column(Integer, nullable=False, index=True)
     base_year = Column(Integer, nullable=False, default=2024)
-    
+
     # Outputs
     heatmap_path = Column(String(500), nullable=True)  # Path to GeoTIFF
     heatmap_geojson = Column(JSON, nullable=True)  # GeoJSON polygons
-    
+    # Pre-encoded, precision-trimmed heatmap_geojson
+    heatmap_geojson_bytes = Column(LargeBinary, nullable=True)
+
     # Population forecast
     population_forecast = Column(Integer, nullable=True)
     confidence_interval_low = Column(Integer, nullable=True)
     confidence_interval_high = Column(Integer, nullable=True)
-    
+
     # News-based adjustments
     announced_projects = Column(JSON, nullable=True)  # Array of projects
     news_analysis_date = Column(DateTime(timezone=True), nullable=True)
-    
+
     # Model information
     model_version = Column(String(50), nullable=True)
     prediction_confidence = Column(Float, nullable=True)
-    
+
     # Metadata
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    
+
     # Relationships
     city = relationship("City", back_populates="growth_predictions")
-    
+
+    @validates("heatmap_geojson")
+    def _encode_heatmap_geojson(self, key, value):
+        """Keep heatmap_geojson_bytes in sync so reads skip re-encoding"""
+        from api.utils.geojson import encode_geojson
+
+        self.heatmap_geojson_bytes = encode_geojson(value)
+        return value
+
     def __repr__(self):
         return f"<GrowthPrediction(city={self.city_id}, year={self.target_year}, pop={self.population_forecast})>"
 
@@ -249,6 +271,10 @@ class NewsCache(Base):
     """Cached urban development news"""
     
     __tablename__ = "news_cache"
+    __table_args__ = (
+        # One row per article and city, however the URL was decorated
+        UniqueConstraint("city_id", "url_hash", name="uq_news_cache_city_url_hash"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     city_id = Column(UUID(as_uuid=True), ForeignKey("cities.id"), nullable=False, index=True)
@@ -257,6 +283,7 @@ class NewsCache(Base):
     title = Column(String(500), nullable=False)
     summary = Column(Text, nullable=True)
     url = Column(String(1000), nullable=False)
+    url_hash = Column(String(64), nullable=False)  # SHA-256 of the normalized URL
     source = Column(String(200), nullable=True)
     
     # Sentiment analysis
@@ -264,6 +291,7 @@ class NewsCache(Base):
     
     # Extracted projects
     projects_extracted = Column(JSON, nullable=True)  # Array of project objects
+    content_hash = Column(String(64), nullable=True, index=True)  # Extraction cache key
     
     # Timestamps
     published_at = Column(DateTime(timezone=True), nullable=True)
@@ -274,3 +302,91 @@ class NewsCache(Base):
     
     def __repr__(self):
         return f"<NewsCache(id={self.id}, title={self.title[:50]}...)>"
+
+
+class NewsFeedState(Base):
+    """HTTP validators of a news feed as last processed for a city, for conditional re-fetching"""
+    
+    __tablename__ = "news_feed_state"
+    
+    city_id = Column(
+        UUID(as_uuid=True), ForeignKey("cities.id", ondelete="CASCADE"), primary_key=True
+    )
+    url = Column(String(1000), primary_key=True)
+    etag = Column(String(500), nullable=True)
+    last_modified = Column(String(100), nullable=True)
+    last_status = Column(Integer, nullable=True)
+    last_fetched_at = Column(DateTime(timezone=True), nullable=True)  # Last successful fetch
+    last_attempted_at = Column(DateTime(timezone=True), nullable=True)  # Including failed ones
+    
+    def __repr__(self):
+        return f"<NewsFeedState(city={self.city_id}, url={self.url}, status={self.last_status})>"
+
+
+class GeocodeCache(Base):
+    """Geocoding result (or miss) for a normalized address within a city"""
+
+    __tablename__ = "geocode_cache"
+
+    city_id = Column(
+        UUID(as_uuid=True), ForeignKey("cities.id", ondelete="CASCADE"), primary_key=True
+    )
+    address_key = Column(String(500), primary_key=True)  # Normalized address
+    query = Column(String(500), nullable=False)  # Address as first seen
+
+    # Result (found=False caches a miss)
+    found = Column(Boolean, nullable=False)
+    lat = Column(Float, nullable=True)
+    lon = Column(Float, nullable=True)
+    confidence = Column(Float, nullable=True)  # 0 to 1
+    source = Column(String(50), nullable=True)  # e.g., "nominatim"
+    display_name = Column(String(500), nullable=True)
+
+    resolved_at = Column(DateTime(timezone=True), nullable=False)
+
+    def __repr__(self):
+        return f"<GeocodeCache(address={self.address_key}, found={self.found})>"
+
+
+class Job(Base):
+    """Background job (growth prediction, scenario generation, news refresh)"""
+    
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # At most one active job per key, so submissions from several processes coalesce
+        Index(
+            "uq_jobs_active_dedupe_key",
+            "dedupe_key",
+            unique=True,
+            postgresql_where=text("status IN ('PENDING', 'RUNNING')"),
+            sqlite_where=text("status IN ('PENDING', 'RUNNING')"),
+        ),
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    kind = Column(String(50), nullable=False, index=True)  # e.g., "growth_prediction"
+    status = Column(Enum(JobStatus), default=JobStatus.PENDING, nullable=False, index=True)
+    
+    # Inputs and outputs
+    params = Column(JSON, nullable=False)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    dedupe_key = Column(String(64), nullable=True, index=True)  # Hash of kind, version and inputs
+    
+    # Progress reporting
+    progress = Column(Float, default=0.0, nullable=False)  # 0 to 1
+    message = Column(String(500), nullable=True)
+    
+    # Execution bookkeeping (for recovery after restarts)
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=2, nullable=False)
+    worker_id = Column(String(100), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Metadata
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    
+    def __repr__(self):
+        return f"<Job(id={self.id}, kind={self.kind}, status={self.status})>"
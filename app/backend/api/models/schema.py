@@ -0,0 +1,44 @@
+"""Database schema migrations (Alembic, see database/migrations)"""
+
+import logging
+import os
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+# Apply pending migrations when the API starts (off: run `alembic upgrade head` when deploying)
+DB_AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "true").lower() in ("1", "true", "yes")
+
+
+def _alembic_config():
+    from alembic.config import Config
+
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "database" / "migrations"))
+    config.attributes["configure_logging"] = False
+    return config
+
+
+def upgrade_database(revision: str = "head") -> None:
+    """
+    Apply pending migrations (alembic upgrade head)
+
+    Safe to run from several workers at once on PostgreSQL: they queue on an
+    advisory lock and the later ones find nothing to do.
+    """
+    from alembic import command
+
+    command.upgrade(_alembic_config(), revision)
+    logger.info(f"Database schema at revision {current_revision()}")
+
+
+def current_revision() -> str:
+    """Revision the database is at ("" for an unmigrated database)"""
+    from alembic.runtime.migration import MigrationContext
+
+    from api.models.session import engine
+
+    with engine.connect() as connection:
+        return MigrationContext.configure(connection).get_current_revision() or ""
@@ -0,0 +1,26 @@
+"""Database engine and session management"""
+
+import os
+from typing import Generator
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./urban_evolution.db")
+
+# SQLite connections are bound to the creating thread unless told otherwise;
+# routers hand sessions to the threadpool for CPU-heavy work.
+_connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
+
+engine = create_engine(DATABASE_URL, pool_pre_ping=True, connect_args=_connect_args)
+
+SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+
+def get_db() -> Generator[Session, None, None]:
+    """Get database session (FastAPI dependency)"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -1,28 +1,142 @@
 """Buildings API Router"""
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-import logging
+from api.models.database import Building, City
+from api.models.session import get_db
+from api.utils.geojson import GEOJSON_MEDIA_TYPE, encode_feature_collection, feature
+from api.utils.response_cache import response_cache
+from api.utils.tiles import is_valid_tile
+from services.building_tiles import (
+    MAX_ZOOM,
+    building_tile_service,
+    geometry_to_geojson,
+    tile_entities,
+)
+
+import logging
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+
+
+def get_city_by_name(db: Session, city_name: str) -> City:
+    """Look up a city by case-insensitive name or raise 404"""
+    city = db.query(City).filter(func.lower(City.name) == city_name.lower()).first()
+    if city is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"City not found: {city_name}"
+        )
+    return city
+
+
+def encode_city_buildings(db: Session, city_id) -> bytes:
+    """Encode all buildings of a city as a GeoJSON FeatureCollection"""
+    rows = db.query(
+        Building.id,
+        Building.geometry,
+        Building.building_type,
+        Building.building_type_confidence,
+        Building.estimated_height,
+        Building.num_floors,
+        Building.building_area_sqm,
+        Building.year_detected,
+    ).filter(Building.city_id == city_id)
+    features = [
+        feature(
+            geometry_to_geojson(row.geometry),
+            {
+                "building_type": row.building_type.value if row.building_type else None,
+                "building_type_confidence": row.building_type_confidence,
+                "estimated_height": row.estimated_height,
+                "num_floors": row.num_floors,
+                "building_area_sqm": row.building_area_sqm,
+                "year_detected": row.year_detected,
+            },
+            feature_id=str(row.id),
+        )
+        for row in rows.yield_per(5000)
+    ]
+    return encode_feature_collection(features)
 
 
-@router.get("/{city_name}")
-async def get_buildings(city_name: str):
+@router.get(
+    "/{city_name}",
+    response_class=Response,
+    responses={200: {"content": {GEOJSON_MEDIA_TYPE: {}}}},
+)
+async def get_buildings(city_name: str, request: Request, db: Session = Depends(get_db)):
     """
     Get buildings detected in a city
     
+    The encoded FeatureCollection is cached until the city's buildings
+    change; clients revalidate with If-None-Match.
+    
     Args:
         city_name: Name of the city
     
     Returns:
-        List of buildings with geometries and classifications
+        GeoJSON FeatureCollection of buildings with classifications
     """
     logger.info(f"Fetching buildings for city: {city_name}")
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Building detection not implemented yet"
+    city = get_city_by_name(db, city_name)
+    
+    async def produce():
+        return await run_in_threadpool(encode_city_buildings, db, city.id)
+    
+    return await response_cache.serve(
+        request,
+        key=f"buildings:{city.id}:geojson",
+        depends_on=[f"buildings:{city.id}"],
+        producer=produce,
+        media_type=GEOJSON_MEDIA_TYPE,
     )
 
+
+@router.get(
+    "/{city_name}/tiles/{z}/{x}/{y}.mvt",
+    response_class=Response,
+    responses={200: {"content": {MVT_MEDIA_TYPE: {}}}},
+)
+async def get_building_tile(
+    city_name: str,
+    z: int,
+    x: int,
+    y: int,
+    db: Session = Depends(get_db),
+):
+    """
+    Get building footprints of one XYZ tile as a Mapbox Vector Tile
+
+    Geometries are clipped, simplified and quantized to the tile, so a map
+    view costs kilobytes instead of the full-precision city GeoJSON.
+
+    Args:
+        city_name: Name of the city
+        z, x, y: Web Mercator tile address
+
+    Returns:
+        MVT protobuf with a `buildings` layer (204 if the tile is empty)
+    """
+    if not is_valid_tile(z, x, y, max_zoom=MAX_ZOOM):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid tile address: {z}/{x}/{y}"
+        )
+
+    city = get_city_by_name(db, city_name)
+    # Read before rendering: a write committing meanwhile bumps past these
+    await response_cache.wait_invalidations()
+    versions = await response_cache.versions(tile_entities(city.id, z, x, y))
+    tile = await run_in_threadpool(building_tile_service.get_tile, db, city.id, z, x, y, versions)
+
+    headers = {"Cache-Control": "public, max-age=300"}
+    if not tile:
+        return Response(status_code=status.HTTP_204_NO_CONTENT, headers=headers)
+    return Response(content=tile, media_type=MVT_MEDIA_TYPE, headers=headers)
@@ -1,28 +1,123 @@
 """Multi-Agent Chat API Router"""
 
-from fastapi import APIRouter, HTTPException, status
+import asyncio
+from typing import AsyncIterator, Dict
 
-import logging
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+
+from agents.orchestrator import EVENT_ERROR, EVENT_FINAL, EVENT_STEP, get_orchestrator
+from api.utils.sse import SSE_HEADERS, SSE_MEDIA_TYPE, format_sse, sse_comment
+from services.chat_stream import run_chat
+
+import logging
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
+async def _wait_for_disconnect(http_request: Request) -> None:
+    """Return when the client goes away (the request body is already read)"""
+    while True:
+        message = await http_request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def _answer(events: AsyncIterator) -> Dict:
+    """Final answer of a chat event stream, with the agent steps that led to it"""
+    steps = []
+    try:
+        async for event in events:
+            if event is None:
+                continue  # Heartbeat; disconnects are watched separately
+            elif event.type == EVENT_STEP:
+                steps.append(event.data)
+            elif event.type == EVENT_ERROR:
+                raise HTTPException(
+                    status_code=(
+                        status.HTTP_504_GATEWAY_TIMEOUT
+                        if event.data.get("code") == "timeout"
+                        else status.HTTP_502_BAD_GATEWAY
+                    ),
+                    detail=event.data.get("detail"),
+                )
+            elif event.type == EVENT_FINAL:
+                return {**event.data, "steps": steps}
+    finally:
+        await events.aclose()
+    raise HTTPException(
+        status_code=status.HTTP_502_BAD_GATEWAY,
+        detail="Chat ended without a response"
+    )
+
 
 @router.post("/")
-async def chat(request: dict):
+async def chat(request: dict, http_request: Request, stream: bool = False):
     """
     Chat with multi-agent system
-    
+
+    With `?stream=true` or `Accept: text/event-stream`, agent steps (`step`),
+    LLM tokens (`token`) and the answer (`final`) are sent as Server-Sent
+    Events as they are produced; failures and timeouts arrive as `error`.
+    Disconnecting cancels the agents.
+
     Args:
         request: {message, conversation_id, city_context}
-    
+        stream: Stream events instead of returning the final answer
+
     Returns:
-        Agent response with sources and trace
+        Agent response with sources and trace (or an SSE stream)
     """
-    logger.info(f"Chat request: {request.get('message')[:50]}...")
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Multi-agent chat not implemented yet"
+    message = request.get("message")
+    if not message:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="message is required"
+        )
+    logger.info(f"Chat request: {message[:50]}...")
+
+    orchestrator = get_orchestrator()
+    if orchestrator is None:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Multi-agent chat not implemented yet"
+        )
+
+    events = run_chat(
+        orchestrator.stream(message, request.get("conversation_id"), request.get("city_context")),
+        timeout=orchestrator.settings.timeout_seconds,
     )
 
+    if stream or SSE_MEDIA_TYPE in http_request.headers.get("accept", ""):
+        async def event_stream():
+            sequence = 0
+            try:
+                async for event in events:
+                    if event is None:
+                        if await http_request.is_disconnected():
+                            break
+                        yield sse_comment()
+                        continue
+                    sequence += 1
+                    yield format_sse(event.data, event=event.type, event_id=str(sequence))
+            finally:
+                await events.aclose()
+
+        return StreamingResponse(event_stream(), media_type=SSE_MEDIA_TYPE, headers=SSE_HEADERS)
+
+    # Stop the agents as soon as the client goes away, not at the next heartbeat
+    answer = asyncio.ensure_future(_answer(events))
+    disconnect = asyncio.ensure_future(_wait_for_disconnect(http_request))
+    try:
+        await asyncio.wait({answer, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        disconnect.cancel()
+        if not answer.done():
+            answer.cancel()
+            # Closing the events cancels the orchestrator; wait for it
+            await asyncio.gather(answer, return_exceptions=True)
+    if answer.cancelled():
+        logger.info("Chat client disconnected; stopping agents")
+        return None
+    return answer.result()
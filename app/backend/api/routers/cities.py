@@ -3,53 +3,49 @@
 from typing import List
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-# TODO: from app.backend.database.models import City
-import logging
+from api.models.database import City
+from api.models.session import get_db
+from api.utils.response_cache import response_cache
+
+import logging
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
 
-# Dependency for database session (to be implemented)
-def get_db():
-    """Get database session"""
-    # TODO: Implement database session
-    pass
+def _city_summary(city: City) -> dict:
+    return {
+        "id": str(city.id),
+        "name": city.name,
+        "country": city.country,
+        "population": city.population,
+        "area_km2": city.area_km2,
+    }
 
 
 @router.get("/", response_model=List[dict])
-async def list_cities(db: Session = Depends(get_db)):
+async def list_cities(request: Request, db: Session = Depends(get_db)):
     """
     List all available cities
     
     Returns list of cities with basic information
     """
     logger.info("Fetching all cities")
-    # TODO: Implement city listing
-    return [
-        {
-            "id": "550e8400-e29b-41d4-a716-446655440000",
-            "name": "Tunis",
-            "country": "Tunisia",
-            "population": 2700000,
-            "area_km2": 212.63,
-        },
-        {
-            "id": "550e8400-e29b-41d4-a716-446655440001",
-            "name": "Copenhagen",
-            "country": "Denmark",
-            "population": 1346000,
-            "area_km2": 179.8,
-        },
-    ]
+
+    async def load():
+        cities = await run_in_threadpool(lambda: db.query(City).order_by(City.name).all())
+        return [_city_summary(city) for city in cities]
+
+    return await response_cache.serve(request, "cities:list", ["city:*"], load)
 
 
 @router.get("/{city_id}", response_model=dict)
-async def get_city(city_id: UUID, db: Session = Depends(get_db)):
+async def get_city(city_id: UUID, request: Request, db: Session = Depends(get_db)):
     """
     Get detailed information about a specific city
     
@@ -60,11 +56,23 @@ async def get_city(city_id: UUID, db: Session = Depends(get_db)):
         City details including boundaries, demographics, and available data
     """
     logger.info(f"Fetching city: {city_id}")
-    # TODO: Implement city retrieval
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Not implemented yet"
-    )
+
+    async def load():
+        city = await run_in_threadpool(db.get, City, city_id)
+        if city is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"City not found: {city_id}"
+            )
+        return {
+            **_city_summary(city),
+            "master_bbox": city.master_bbox,
+            "expansion_zone_bbox": city.expansion_zone_bbox,
+            "created_at": city.created_at,
+            "updated_at": city.updated_at,
+        }
+
+    return await response_cache.serve(request, f"cities:{city_id}", [f"city:{city_id}"], load)
 
 
 @router.post("/", response_model=dict, status_code=status.HTTP_201_CREATED)
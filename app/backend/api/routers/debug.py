@@ -0,0 +1,119 @@
+"""Debug and Profiling API Router"""
+
+import hmac
+import logging
+import os
+import time
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+
+from api.utils import profiling
+from api.utils.profiling import MAX_PROFILE_SECONDS, ProfilerBusyError
+
+logger = logging.getLogger(__name__)
+
+# Off by default; mounted only with DEBUG_ENDPOINTS_ENABLED=true and a DEBUG_ADMIN_TOKEN
+DEBUG_ENDPOINTS_ENABLED = os.getenv("DEBUG_ENDPOINTS_ENABLED", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+DEBUG_ADMIN_TOKEN = os.getenv("DEBUG_ADMIN_TOKEN", "")
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Reject requests without the admin token"""
+    if (
+        not DEBUG_ADMIN_TOKEN
+        or not x_admin_token
+        or not hmac.compare_digest(x_admin_token, DEBUG_ADMIN_TOKEN)
+    ):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin token required")
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(10.0, gt=0, le=MAX_PROFILE_SECONDS),
+    mode: str = Query("sample", pattern="^(sample|cprofile)$"),
+    interval_ms: float = Query(5.0, ge=1.0, le=100.0),
+    include_idle: bool = False,
+):
+    """
+    Profile this worker for a bounded time
+
+    Args:
+        seconds: Profiling duration
+        mode: "sample" (all threads, collapsed stacks for flamegraph.pl /
+            speedscope) or "cprofile" (event loop thread, pstats report)
+        interval_ms: Sampling interval in "sample" mode
+        include_idle: Keep samples of threads waiting for work
+
+    Returns:
+        Collapsed stacks or pstats text
+    """
+    logger.info(f"Profiling worker for {seconds}s ({mode})")
+    try:
+        if mode == "cprofile":
+            return await profiling.profile_event_loop(seconds)
+        return await profiling.sample_stacks(seconds, interval_ms / 1000, include_idle)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+
+@router.post("/tracemalloc/start")
+async def start_tracemalloc(frames: int = Query(10, ge=1, le=100)):
+    """
+    Start tracing allocations and take the baseline snapshot
+
+    Tracing slows allocations down; stop it when done.
+    """
+    await run_in_threadpool(profiling.start_tracemalloc, frames)
+    return {"status": "tracing", "frames": frames}
+
+
+@router.get("/tracemalloc/diff")
+async def tracemalloc_diff(
+    limit: int = Query(25, ge=1, le=500),
+    group_by: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+):
+    """
+    Allocation growth since the baseline snapshot, largest first
+    """
+    try:
+        # Snapshots of a large heap take a while; keep them off the event loop
+        return await run_in_threadpool(profiling.tracemalloc_diff, limit, group_by)
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+
+@router.post("/tracemalloc/stop")
+async def stop_tracemalloc():
+    """Stop tracing allocations"""
+    profiling.stop_tracemalloc()
+    return {"status": "stopped"}
+
+
+@router.get("/slow-requests")
+async def get_slow_requests(
+    limit: int = Query(20, ge=1, le=200),
+    window_seconds: Optional[float] = Query(None, gt=0),
+):
+    """
+    Slowest recent requests with per-stage timings
+
+    Args:
+        limit: Requests returned
+        window_seconds: Only consider requests started within this window
+
+    Returns:
+        Requests with duration and time spent per stage (db, produce, encode,
+        compress, admission_wait, ...)
+    """
+    since = time.time() - window_seconds if window_seconds else None
+    return {"requests": profiling.slow_requests.slowest(limit, since)}
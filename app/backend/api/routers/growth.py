@@ -1,28 +1,165 @@
 """Growth Prediction API Router"""
 
-from fastapi import APIRouter, HTTPException, status
+from uuid import UUID
 
-import logging
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from api.models.database import GrowthPrediction
+from api.models.session import get_db
+from api.routers.jobs import submit_job
+from api.utils.geojson import GEOJSON_MEDIA_TYPE, encode_geojson
+from api.utils.response_cache import response_cache
+from api.utils.tiles import is_valid_tile
+from services.heatmap_tiles import COLORMAPS, TILE_FORMATS, heatmap_tile_service
+from services.job_handlers import GROWTH_PREDICTION
+from services.job_queue import job_manager
+
+import logging
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
 
-@router.post("/predict")
-async def predict_growth(request: dict):
+@router.post("/predict", status_code=status.HTTP_202_ACCEPTED)
+async def predict_growth(request: dict, http_request: Request):
     """
     Predict urban growth for a city
     
+    Runs as a background job; poll `status_url` or follow `events_url` (SSE)
+    for progress and the result. 501 until a growth prediction handler is
+    registered.
+    
     Args:
         request: {city_name, target_year, include_news}
     
     Returns:
-        Growth prediction with heatmap and population forecast
+        Job id with status and event stream URLs
     """
     logger.info(f"Predicting growth for: {request.get('city_name')}")
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Growth prediction not implemented yet"
+    if not job_manager.handles(GROWTH_PREDICTION):
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Growth prediction not implemented yet"
+        )
+    if not request.get("city_name"):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="city_name is required"
+        )
+    return await submit_job(http_request, GROWTH_PREDICTION, request)
+
+
+def load_heatmap_geojson(db: Session, prediction_id: UUID) -> bytes:
+    """Pre-encoded heatmap GeoJSON of a prediction (encoded now for older rows)"""
+    row = (
+        db.query(GrowthPrediction.heatmap_geojson_bytes)
+        .filter(GrowthPrediction.id == prediction_id)
+        .first()
+    )
+    if row is not None and row.heatmap_geojson_bytes is not None:
+        return row.heatmap_geojson_bytes
+    
+    geojson = (
+        db.query(GrowthPrediction.heatmap_geojson)
+        .filter(GrowthPrediction.id == prediction_id)
+        .scalar()
+    )
+    if geojson is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No heatmap GeoJSON for prediction: {prediction_id}"
+        )
+    return encode_geojson(geojson)
+
+
+@router.get(
+    "/{prediction_id}/heatmap.geojson",
+    response_class=Response,
+    responses={200: {"content": {GEOJSON_MEDIA_TYPE: {}}}},
+)
+async def get_heatmap_geojson(prediction_id: UUID, request: Request, db: Session = Depends(get_db)):
+    """
+    Get the growth heatmap of a prediction as GeoJSON polygons
+    
+    Served from the bytes encoded when the prediction was stored, without
+    parsing or re-serializing the document.
+    
+    Args:
+        prediction_id: GrowthPrediction UUID
+    
+    Returns:
+        GeoJSON FeatureCollection
+    """
+    async def produce():
+        return await run_in_threadpool(load_heatmap_geojson, db, prediction_id)
+    
+    return await response_cache.serve(
+        request,
+        key=f"growth:{prediction_id}:heatmap",
+        depends_on=[f"growth:{prediction_id}"],
+        producer=produce,
+        ttl=3600,
+        media_type=GEOJSON_MEDIA_TYPE,
     )
 
+
+@router.get(
+    "/{prediction_id}/tiles/{z}/{x}/{y}.{fmt}",
+    response_class=Response,
+    responses={200: {"content": {media_type: {} for media_type in TILE_FORMATS.values()}}},
+)
+async def get_heatmap_tile(
+    prediction_id: UUID,
+    z: int,
+    x: int,
+    y: int,
+    fmt: str,
+    colormap: str = Query("growth"),
+    vmin: float = Query(0.0),
+    vmax: float = Query(1.0),
+    db: Session = Depends(get_db),
+):
+    """
+    Get one XYZ tile of a growth prediction heatmap
+
+    Args:
+        prediction_id: GrowthPrediction UUID
+        z, x, y: Web Mercator tile address
+        fmt: 'png' or 'webp'
+        colormap: Colormap name
+        vmin, vmax: Value range mapped onto the colormap
+
+    Returns:
+        Colorized tile image (204 outside the heatmap extent)
+    """
+    if fmt not in TILE_FORMATS or colormap not in COLORMAPS or not is_valid_tile(z, x, y):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid tile request: {z}/{x}/{y}.{fmt} ({colormap})"
+        )
+
+    prediction = db.get(GrowthPrediction, prediction_id)
+    if prediction is None or not prediction.heatmap_path:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No heatmap for prediction: {prediction_id}"
+        )
+
+    try:
+        tile = await run_in_threadpool(
+            heatmap_tile_service.get_tile,
+            prediction.heatmap_path, z, x, y, fmt, colormap, vmin, vmax,
+        )
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Heatmap file missing for prediction: {prediction_id}"
+        )
+
+    headers = {"Cache-Control": "public, max-age=3600"}
+    if tile is None:
+        return Response(status_code=status.HTTP_204_NO_CONTENT, headers=headers)
+    return Response(content=tile, media_type=TILE_FORMATS[fmt], headers=headers)
@@ -0,0 +1,94 @@
+"""Background Jobs API Router"""
+
+import logging
+
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+
+from api.utils.sse import SSE_HEADERS, SSE_MEDIA_TYPE, format_sse, sse_comment
+from services.job_queue import QueueFullError, job_manager
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+async def submit_job(request: Request, kind: str, params: dict) -> dict:
+    """
+    Submit a background job and build the 202 response body
+
+    Identical submissions share one job; `reused` says whether this one
+    joined a running job ("in_flight") or a recent result ("memo").
+    Raises 503 with Retry-After when the queue is full.
+    """
+    try:
+        submission = await job_manager.submit(kind, params)
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Job queue is full: {e}",
+            headers={"Retry-After": "30"},
+        )
+    job_id = submission.job_id
+    return {
+        "job_id": job_id,
+        "status": submission.status,
+        "reused": submission.reused,
+        "status_url": str(request.url_for("get_job", job_id=job_id)),
+        "events_url": str(request.url_for("stream_job_events", job_id=job_id)),
+    }
+
+
+@router.get("/stats")
+async def get_job_stats():
+    """
+    Get queue and coalescing statistics
+
+    `coalescing.saved` counts submissions answered by an existing job instead
+    of a new model run.
+    """
+    return job_manager.stats()
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: str):
+    """
+    Get job status, progress and result
+
+    Args:
+        job_id: Job UUID
+
+    Returns:
+        Job snapshot
+    """
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"Job not found: {job_id}"
+        )
+    return job
+
+
+@router.get("/{job_id}/events")
+async def stream_job_events(job_id: str, request: Request):
+    """
+    Stream job progress as Server-Sent Events
+
+    Emits a `job` event on every change and closes once the job succeeds or
+    fails.
+    """
+    if await job_manager.get(job_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"Job not found: {job_id}"
+        )
+
+    async def event_stream():
+        async for state in job_manager.events(job_id):
+            if await request.is_disconnected():
+                break
+            if state is None:
+                yield sse_comment()
+            else:
+                yield format_sse(state, event="job")
+
+    return StreamingResponse(event_stream(), media_type=SSE_MEDIA_TYPE, headers=SSE_HEADERS)
@@ -0,0 +1,51 @@
+"""ML Models API Router"""
+
+import logging
+
+from fastapi import APIRouter, HTTPException, status
+from starlette.concurrency import run_in_threadpool
+
+from services.inference_pool import get_inference
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+async def _inference_status() -> dict:
+    try:
+        return await run_in_threadpool(get_inference().status)
+    except (ConnectionError, EOFError, OSError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Inference server unavailable: {e}",
+        )
+
+
+@router.get("")
+async def get_models_status():
+    """
+    Get model load state, load time and resident memory
+
+    Returns:
+        Inference mode ("local" or "remote"), process RSS and per-model status
+    """
+    return await _inference_status()
+
+
+@router.post("/{model_name}/warmup", status_code=status.HTTP_202_ACCEPTED)
+async def warm_up_model(model_name: str):
+    """
+    Start loading a model in the background
+
+    Args:
+        model_name: Model name (yolo, sam, lstm, xgboost)
+    """
+    current = await _inference_status()
+    if model_name not in {model["name"] for model in current["models"]}:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown model: {model_name}"
+        )
+    logger.info(f"Warming up model: {model_name}")
+    await run_in_threadpool(get_inference().warm_up, [model_name])
+    return {"model": model_name, "status": "warming_up"}
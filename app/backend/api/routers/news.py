@@ -1,28 +1,107 @@
 """Urban News API Router"""
 
-from fastapi import APIRouter, HTTPException, status
+import os
+from datetime import timedelta
+from typing import List
 
-import logging
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from api.models.database import NewsCache
+from api.models.session import get_db
+from api.routers.buildings import get_city_by_name
+from services.job_handlers import NEWS_REFRESH
+from services.job_queue import QueueFullError, job_manager
+from services.news_ingestion import news_article, news_ingestor
+
+import logging
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Feeds are re-fetched (conditionally) when older than this
+NEWS_MAX_AGE = timedelta(hours=float(os.getenv("NEWS_CACHE_HOURS", "24")))
+
+# Cities refreshed by one request
+MAX_REFRESH_CITIES = 20
 
 
 @router.get("/{city_name}")
-async def get_news(city_name: str):
+async def get_news(
+    city_name: str,
+    refresh: bool = False,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+):
     """
     Get urban development news for a city
-    
+
+    Cached articles are returned right away. Sources older than
+    NEWS_CACHE_HOURS (or all of them with `refresh=true`) are re-fetched by a
+    background job, shared by concurrent requests for the city; follow
+    `refresh_job_id` at /api/jobs/{id} and read the news again when it is done.
+
     Args:
         city_name: Name of the city
-    
+        refresh: Fetch sources now
+        limit: Maximum articles returned
+
     Returns:
         List of news articles with extracted projects
     """
     logger.info(f"Fetching news for: {city_name}")
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="News scraping not implemented yet"
-    )
+    city = await run_in_threadpool(get_city_by_name, db, city_name)
+
+    refresh_job_id = None
+    if refresh or await news_ingestor.is_stale(city.id, city.name, NEWS_MAX_AGE):
+        try:
+            submission = await job_manager.submit(NEWS_REFRESH, {"cities": [city.name]})
+            refresh_job_id = submission.job_id
+        except QueueFullError as e:
+            # Serve what is cached; the next request tries again
+            logger.warning(f"News refresh for {city.name} not queued: {e}")
+
+    def load():
+        rows = (
+            db.query(NewsCache)
+            .filter(NewsCache.city_id == city.id)
+            .order_by(NewsCache.published_at.desc().nullslast(), NewsCache.scraped_at.desc())
+            .limit(limit)
+            .all()
+        )
+        return [news_article(row) for row in rows]
 
+    return {
+        "city": city.name,
+        "refresh_job_id": refresh_job_id,
+        "articles": await run_in_threadpool(load),
+    }
+
+
+@router.post("/refresh")
+async def refresh_news(request: dict):
+    """
+    Refresh news for several cities in one concurrent pass
+
+    Args:
+        request: {cities: [city names]}
+
+    Returns:
+        Per city: new articles, feeds fetched / not modified, and fetch errors
+    """
+    cities: List[str] = request.get("cities") or []
+    if not cities or len(cities) > MAX_REFRESH_CITIES:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"cities must list 1 to {MAX_REFRESH_CITIES} city names"
+        )
+    report = await news_ingestor.refresh(cities)
+    missing = sorted(set(name.lower() for name in cities) - set(name.lower() for name in report))
+    return {
+        "cities": {
+            name: {**result, "new_articles": len(result["new_articles"])}
+            for name, result in report.items()
+        },
+        "not_found": missing,
+    }
@@ -1,28 +1,74 @@
 """Scenarios API Router"""
 
-from fastapi import APIRouter, HTTPException, status
+from typing import Optional
 
-import logging
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from starlette.concurrency import run_in_threadpool
+
+from api.routers.jobs import submit_job
+from services.generation_telemetry import get_generation_telemetry
+from services.job_handlers import SCENARIO_GENERATION
+
+import logging
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Prompts are not generated from the policy yet; callers supply them
+REQUIRED_FIELDS = ("source_city", "prompt", "source_image_path")
+
 
 
-@router.post("/generate")
-async def generate_scenario(request: dict):
+@router.post("/generate", status_code=status.HTTP_202_ACCEPTED)
+async def generate_scenario(request: dict, http_request: Request):
     """
     Generate future urban scenario with Gemini 2.5 Flash
     
+    Runs as a background job; poll `status_url` or follow `events_url` (SSE)
+    for progress and the generated image.
+    
     Args:
-        request: {source_city, target_policy, user_preferences}
+        request: {source_city, target_policy, prompt, source_image_path,
+                  edit_regions, reference_image_path, user_preferences}
     
     Returns:
-        Generated scenario with image and metadata
+        Job id with status and event stream URLs
     """
     logger.info(f"Generating scenario for: {request.get('source_city')}")
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Scenario generation not implemented yet"
-    )
+    # Checked here so a bad request is a 422, not a job that fails after the 202
+    missing = [field for field in REQUIRED_FIELDS if not request.get(field)]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"{', '.join(missing)} {'is' if len(missing) == 1 else 'are'} required"
+        )
+    return await submit_job(http_request, SCENARIO_GENERATION, request)
+
+
+@router.get("/telemetry")
+async def get_generation_telemetry_summary(
+    days: int = Query(7, ge=1, le=365),
+    policy: Optional[str] = None,
+):
+    """
+    Image generation cost and latency, aggregated over all workers
+    
+    Args:
+        days: Window in days (UTC, today included)
+        policy: Only generations for this target policy
+    
+    Returns:
+        Totals by outcome, latency and upload-size histograms with
+        percentiles, cost per policy and per day
+    """
+    telemetry = get_generation_telemetry()
+    if telemetry is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Generation telemetry is disabled"
+        )
+    # Write this worker's queued records, then pick up every worker's new lines
+    await run_in_threadpool(telemetry.flush)
+    await run_in_threadpool(telemetry.refresh)
+    return telemetry.summary(days=days, policy=policy)
 
@@ -0,0 +1,303 @@
+"""
+Admission control primitives
+
+- AdaptiveLimiter: concurrency limit with a bounded wait queue. The limit
+  adapts to observed latency (additive increase, multiplicative decrease),
+  so a saturated class sheds load early instead of queueing until timeouts.
+  Classes mixing fast and slow routes use a fixed limit instead (adaptive
+  off), so a few slow requests can't throttle the fast ones.
+- ClientRateLimiter: per-client token buckets, one per route class, so
+  heavy calls don't use up a client's budget for cheap reads.
+
+Both are per process and are only touched from the event loop.
+"""
+
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional
+
+from api.utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# Multiplicative decrease applied when latency exceeds the class target
+BACKOFF_FACTOR = 0.9
+
+
+class Overloaded(Exception):
+    """Request rejected by admission control"""
+
+    def __init__(self, status_code: int, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+@dataclass
+class RouteClassConfig:
+    """Limits for one class of routes"""
+
+    max_concurrency: int
+    max_queue: int
+    queue_timeout: float  # Seconds a request may wait for a slot
+    target_latency: float  # Seconds; slower completions shrink the limit
+    cost: float = 1.0  # Tokens taken from the client's bucket per request
+    min_concurrency: int = 1
+    adaptive: bool = True  # False: the limit stays at max_concurrency
+
+
+class AdaptiveLimiter:
+    """Concurrency limiter with a bounded FIFO queue and an AIMD-adjusted limit"""
+
+    def __init__(self, name: str, config: RouteClassConfig):
+        self.name = name
+        self.config = config
+        self.limit = float(config.max_concurrency)
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._latency = config.target_latency  # EWMA of completed requests
+        self._last_decrease = 0.0
+        self.admitted = 0
+        self.rejected = 0
+
+    async def acquire(self) -> None:
+        """
+        Wait for a slot
+
+        Raises:
+            Overloaded: If the queue is full or the wait exceeds queue_timeout
+        """
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+
+        if len(self._waiters) >= self.config.max_queue:
+            self.rejected += 1
+            raise Overloaded(503, "queue_full", self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout=self.config.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise Overloaded(503, "queue_timeout", self.retry_after())
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # A slot was handed over just as the client went away
+                self._release_slot()
+            raise
+        finally:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+        self.admitted += 1
+
+    def release(self, latency: float) -> None:
+        """Free a slot and adapt the limit to the request's latency"""
+        self._latency += 0.2 * (latency - self._latency)
+        if self.config.adaptive:
+            self._adapt(latency)
+        self._release_slot()
+
+    def _adapt(self, latency: float) -> None:
+        now = time.monotonic()
+        if latency > self.config.target_latency:
+            # Decrease at most once per target interval so one burst of slow
+            # requests doesn't collapse the limit
+            if now - self._last_decrease >= self.config.target_latency:
+                self.limit = max(float(self.config.min_concurrency), self.limit * BACKOFF_FACTOR)
+                self._last_decrease = now
+        else:
+            self.limit = min(float(self.config.max_concurrency), self.limit + 1.0 / self.limit)
+
+    def retry_after(self) -> float:
+        """Estimated seconds until the current queue drains"""
+        return self._latency * (len(self._waiters) + 1) / max(int(self.limit), 1)
+
+    def stats(self) -> Dict:
+        return {
+            "limit": int(self.limit),
+            "max_concurrency": self.config.max_concurrency,
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "latency_ewma": round(self._latency, 4),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+    def _release_slot(self) -> None:
+        self.in_flight -= 1
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+
+class TokenBucket:
+    """Refills `rate` tokens per second up to `capacity`"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self, cost: float) -> float:
+        """
+        Take tokens if available
+
+        Returns:
+            0 if taken, otherwise seconds until enough tokens accumulate
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+    async def acquire(self, cost: float = 1.0) -> None:
+        """Wait until `cost` tokens are available and take them"""
+        cost = min(cost, self.capacity)
+        while True:
+            wait = self.take(cost)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+
+class ClientRateLimiter:
+    """Token bucket per client and route class (least recently seen are forgotten)"""
+
+    def __init__(self, requests: int, period: float, max_clients: int = 10000):
+        """
+        Initialize rate limiter
+
+        Args:
+            requests: Requests (of cost 1) allowed per period and route class;
+                also the burst size
+            period: Period in seconds
+            max_clients: Buckets kept in memory
+        """
+        self.requests = requests
+        self.period = period
+        self._buckets = LRUCache(max_entries=max_clients)
+
+    def check(self, client: str, cost: float = 1.0, route_class: str = "default") -> None:
+        """
+        Take `cost` tokens from the client's bucket for the route class
+
+        Raises:
+            Overloaded: 429 when the client is over its rate
+        """
+        key = (route_class, client)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.requests / self.period, float(self.requests))
+            self._buckets.set(key, bucket)
+        wait = bucket.take(cost)
+        if wait:
+            raise Overloaded(429, "rate_limited", wait)
+
+
+def _env_config(prefix: str, **defaults) -> RouteClassConfig:
+    """RouteClassConfig with ADMISSION_<PREFIX>_<FIELD> environment overrides"""
+    values = {}
+    for field_name, default in defaults.items():
+        raw = os.getenv(f"ADMISSION_{prefix}_{field_name.upper()}")
+        if not raw:
+            values[field_name] = default
+        elif isinstance(default, bool):
+            values[field_name] = raw.lower() in ("1", "true", "yes")
+        else:
+            values[field_name] = type(default)(raw)
+    return RouteClassConfig(**values)
+
+
+class AdmissionController:
+    """Limiters per route class plus the shared client rate limiter"""
+
+    def __init__(
+        self, classes: Dict[str, RouteClassConfig], rate_limiter: Optional[ClientRateLimiter]
+    ):
+        self.limiters = {name: AdaptiveLimiter(name, config) for name, config in classes.items()}
+        self.rate_limiter = rate_limiter
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        classes = {
+            # Gemini scenario generation, growth prediction, model warm-up, news refresh
+            "heavy": _env_config(
+                "HEAVY",
+                max_concurrency=4,
+                max_queue=8,
+                queue_timeout=5.0,
+                target_latency=5.0,
+                cost=5.0,
+            ),
+            # Streamed agent runs hold a slot for minutes by design, so the
+            # target latency is the orchestrator timeout and only the cap applies
+            "chat": _env_config(
+                "CHAT",
+                max_concurrency=16,
+                max_queue=16,
+                queue_timeout=5.0,
+                target_latency=300.0,
+                cost=5.0,
+            ),
+            # Map tiles arrive in bursts of dozens per pan/zoom
+            "tiles": _env_config(
+                "TILES",
+                max_concurrency=32,
+                max_queue=128,
+                queue_timeout=2.0,
+                target_latency=0.25,
+                cost=0.1,
+            ),
+            # Whole-city GeoJSON documents: slow when not cached, so they
+            # adapt on their own instead of throttling the cheap reads
+            "bulk": _env_config(
+                "BULK",
+                max_concurrency=16,
+                max_queue=64,
+                queue_timeout=5.0,
+                target_latency=2.0,
+                cost=1.0,
+            ),
+            # Everything else; mixes fast and slow routes, so the limit is fixed
+            "default": _env_config(
+                "DEFAULT",
+                max_concurrency=64,
+                max_queue=128,
+                queue_timeout=2.0,
+                target_latency=0.5,
+                cost=1.0,
+                adaptive=False,
+            ),
+        }
+        requests = int(os.getenv("API_RATE_LIMIT_REQUESTS", "100"))
+        rate_limiter = (
+            ClientRateLimiter(requests, float(os.getenv("API_RATE_LIMIT_PERIOD", "60")))
+            if requests > 0
+            else None
+        )
+        return cls(classes, rate_limiter)
+
+    def stats(self) -> Dict:
+        return {name: limiter.stats() for name, limiter in self.limiters.items()}
+
+
+admission_controller = AdmissionController.from_env()
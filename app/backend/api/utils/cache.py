@@ -0,0 +1,142 @@
+"""In-process caching primitives"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+_MISSING = object()
+
+
+def _default_sizeof(value: Any) -> int:
+    if isinstance(value, (bytes, bytearray, memoryview, str)):
+        return len(value)
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache
+
+    Bounded by entry count and, optionally, by the total size of the stored
+    values (as measured by `sizeof`, which defaults to len() for bytes).
+    Entries may also expire after a time-to-live.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: Optional[int] = None,
+        sizeof: Callable[[Any], int] = _default_sizeof,
+        ttl: Optional[float] = None,
+    ):
+        """
+        Initialize cache
+
+        Args:
+            max_entries: Maximum number of entries kept
+            max_bytes: Optional cap on the summed size of values
+            sizeof: Function measuring the size of a value
+            ttl: Default time-to-live in seconds (None = never expires)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._expires: Dict[Hashable, float] = {}
+        self._lock = threading.Lock()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a value and mark it as recently used"""
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is _MISSING or self._expired(key):
+                if value is not _MISSING:
+                    self._remove(key)
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value, evicting least recently used entries if needed"""
+        size = self._sizeof(value)
+        ttl = ttl if ttl is not None else self.ttl
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._data[key] = value
+            self._sizes[key] = size
+            self.size_bytes += size
+            if ttl is not None:
+                self._expires[key] = time.monotonic() + ttl
+            self._evict()
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove a key and return its value"""
+        with self._lock:
+            if key not in self._data:
+                return default
+            return self._remove(key)
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self._expires.clear()
+            self.size_bytes = 0
+
+    def keys(self):
+        """Snapshot of the current keys, least recently used first"""
+        with self._lock:
+            return list(self._data.keys())
+
+    def stats(self) -> Dict:
+        """Get cache statistics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "size_bytes": self.size_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._data and not self._expired(key)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _expired(self, key: Hashable) -> bool:
+        expires = self._expires.get(key)
+        return expires is not None and expires <= time.monotonic()
+
+    def _remove(self, key: Hashable) -> Any:
+        value = self._data.pop(key)
+        self.size_bytes -= self._sizes.pop(key)
+        self._expires.pop(key, None)
+        return value
+
+    def _evict(self) -> None:
+        while self._data and (
+            len(self._data) > self.max_entries
+            or (self.max_bytes is not None and self.size_bytes > self.max_bytes)
+        ):
+            oldest = next(iter(self._data))
+            self._remove(oldest)
+            self.evictions += 1
@@ -0,0 +1,153 @@
+"""
+HTTP content-coding helpers: gzip, brotli and zstd
+
+brotli and zstandard are optional; without them only gzip is offered.
+"""
+
+import os
+import zlib
+from typing import Dict, Iterable, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Server preference when the client accepts several codings equally
+PREFERENCE = ("zstd", "br", "gzip")
+
+MINIMUM_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+# Streaming (per-request) levels favour speed; cached bodies are compressed
+# once and served many times, so they get denser levels
+STREAM_LEVELS = {"gzip": 6, "br": 4, "zstd": 3}
+CACHE_LEVELS = {"gzip": 9, "br": 6, "zstd": 9}
+
+# Media that is already compressed or must not be buffered
+_SKIP_PREFIXES = ("image/", "video/", "audio/", "font/woff2", "text/event-stream")
+_SKIP_TYPES = {
+    "application/zip",
+    "application/gzip",
+    "application/x-gzip",
+    "application/zstd",
+    "application/octet-stream",
+    "application/pdf",
+}
+
+
+def available_encodings() -> Tuple[str, ...]:
+    """Codings supported by the installed libraries, in preference order"""
+    installed = {"gzip": True, "br": brotli is not None, "zstd": zstandard is not None}
+    return tuple(name for name in PREFERENCE if installed[name])
+
+
+def negotiate(accept_encoding: Optional[str], available: Iterable[str] = None) -> Optional[str]:
+    """
+    Choose a content coding from an Accept-Encoding header
+
+    Args:
+        accept_encoding: Header value, e.g. "gzip, deflate, br;q=0.9"
+        available: Supported codings in preference order
+
+    Returns:
+        Coding name, or None for identity
+    """
+    if not accept_encoding:
+        return None
+    available = tuple(available) if available is not None else available_encodings()
+
+    qualities: Dict[str, float] = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        qualities[name.strip()] = q
+
+    wildcard = qualities.get("*")
+    best, best_q = None, 0.0
+    for name in available:
+        q = qualities.get(name, wildcard if wildcard is not None else 0.0)
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    """Whether a media type benefits from compression"""
+    if not content_type:
+        return False
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return not media_type.startswith(_SKIP_PREFIXES) and media_type not in _SKIP_TYPES
+
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """One-shot compression with the given coding"""
+    level = level if level is not None else CACHE_LEVELS[encoding]
+    if encoding == "gzip":
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        return compressor.compress(data) + compressor.flush()
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    raise ValueError(f"Unsupported content coding: {encoding}")
+
+
+class StreamCompressor:
+    """Incremental compressor; flush() emits everything fed so far"""
+
+    def __init__(self, encoding: str, level: Optional[int] = None):
+        level = level if level is not None else STREAM_LEVELS[encoding]
+        self.encoding = encoding
+        if encoding == "gzip":
+            self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+            self._compress = self._obj.compress
+            self._flush = lambda: self._obj.flush(zlib.Z_SYNC_FLUSH)
+            self._finish = self._obj.flush
+        elif encoding == "br":
+            self._obj = brotli.Compressor(quality=level)
+            self._compress = self._obj.process
+            self._flush = self._obj.flush
+            self._finish = self._obj.finish
+        elif encoding == "zstd":
+            self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+            self._compress = self._obj.compress
+            self._flush = lambda: self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+            self._finish = self._obj.flush
+        else:
+            raise ValueError(f"Unsupported content coding: {encoding}")
+
+    def compress(self, data: bytes, flush: bool = True) -> bytes:
+        """Compress a chunk, flushing so the client can decode it right away"""
+        out = self._compress(data) if data else b""
+        return out + self._flush() if flush else out
+
+    def finish(self) -> bytes:
+        """Terminate the stream"""
+        return self._finish()
+
+
+def variant_etag(etag: str, encoding: Optional[str]) -> str:
+    """Distinct ETag for an encoded representation (RFC 9110 8.8.3)"""
+    if not encoding:
+        return etag
+    return f'{etag[:-1]}-{encoding}"' if etag.endswith('"') else f"{etag}-{encoding}"
+
+
+def base_etag(etag: str) -> str:
+    """Strip a coding suffix added by variant_etag"""
+    for encoding in PREFERENCE:
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return etag[: -len(suffix)] + '"'
+    return etag
@@ -0,0 +1,216 @@
+"""
+Prometheus metrics
+
+Request metrics are recorded by MetricsMiddleware and inference latency by
+the inference client. DB pool, cache, job-queue and model gauges are read
+from their owners at scrape time, so they add no work to the request path.
+
+With several uvicorn workers, set PROMETHEUS_MULTIPROC_DIR to an empty
+directory so /metrics aggregates all worker processes.
+"""
+
+import logging
+import os
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+logger = logging.getLogger(__name__)
+
+METRICS_ENABLED = os.getenv("PROMETHEUS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Latency buckets from cached reads (ms) up to synchronous model runs (s)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+http_requests_total = Counter(
+    "http_requests_total",
+    "HTTP requests by route template and status code",
+    ["method", "endpoint", "status"],
+)
+http_request_duration_seconds = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "endpoint"],
+    buckets=LATENCY_BUCKETS,
+)
+http_requests_in_progress = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being served",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+http_request_errors_total = Counter(
+    "http_request_errors_total",
+    "HTTP requests that failed with a 5xx status or an unhandled exception",
+    ["method", "endpoint", "error"],
+)
+http_requests_shed_total = Counter(
+    "http_requests_shed",
+    "Requests rejected by admission control",
+    ["route_class", "reason"],
+)
+model_inference_duration_seconds = Histogram(
+    "model_inference_duration_seconds",
+    "Model inference latency",
+    ["model"],
+    buckets=LATENCY_BUCKETS,
+)
+
+
+class AppStatsCollector:
+    """Scrape-time gauges for the DB pool, caches, job queue, models and admission control"""
+
+    def __init__(self):
+        self._engine = None
+        self._caches: Dict[str, Callable[[], Dict]] = {}
+        self._job_stats: Optional[Callable[[], Dict]] = None
+        self._model_status: Optional[Callable[[], Dict]] = None
+        self._admission_stats: Optional[Callable[[], Dict]] = None
+
+    def set_db_engine(self, engine) -> None:
+        self._engine = engine
+
+    def add_cache(self, name: str, stats: Callable[[], Dict]) -> None:
+        """Register a cache whose stats() has hits, misses and optionally entries/size_bytes"""
+        self._caches[name] = stats
+
+    def set_job_queue(self, stats: Callable[[], Dict]) -> None:
+        self._job_stats = stats
+
+    def set_models(self, status: Callable[[], Dict]) -> None:
+        self._model_status = status
+
+    def set_admission(self, stats: Callable[[], Dict]) -> None:
+        self._admission_stats = stats
+
+    def collect(self) -> Iterable:
+        yield from self._collect_db_pool()
+        yield from self._collect_caches()
+        yield from self._collect_jobs()
+        yield from self._collect_models()
+        yield from self._collect_admission()
+
+    def _collect_db_pool(self) -> Iterable:
+        pool = getattr(self._engine, "pool", None)
+        for name, method, help_text in (
+            ("db_pool_size", "size", "Configured connection pool size"),
+            ("db_pool_checked_out", "checkedout", "Connections in use"),
+            ("db_pool_checked_in", "checkedin", "Idle connections in the pool"),
+            ("db_pool_overflow", "overflow", "Connections beyond pool size"),
+        ):
+            if pool is not None and hasattr(pool, method):
+                yield GaugeMetricFamily(name, help_text, value=getattr(pool, method)())
+
+    def _collect_caches(self) -> Iterable:
+        hits = CounterMetricFamily("cache_hits", "Cache hits", labels=["cache"])
+        misses = CounterMetricFamily("cache_misses", "Cache misses", labels=["cache"])
+        ratio = GaugeMetricFamily(
+            "cache_hit_ratio", "Cache hit ratio since start", labels=["cache"]
+        )
+        entries = GaugeMetricFamily("cache_entries", "Cached entries", labels=["cache"])
+        size = GaugeMetricFamily("cache_size_bytes", "Cached bytes", labels=["cache"])
+        for name, stats in self._caches.items():
+            values = _safe_stats(name, stats)
+            if values is None:
+                continue
+            hits.add_metric([name], values.get("hits", 0))
+            misses.add_metric([name], values.get("misses", 0))
+            ratio.add_metric([name], values.get("hit_rate", 0.0))
+            if "entries" in values:
+                entries.add_metric([name], values["entries"])
+            if "size_bytes" in values:
+                size.add_metric([name], values["size_bytes"])
+        yield from (hits, misses, ratio, entries, size)
+
+    def _collect_jobs(self) -> Iterable:
+        values = _safe_stats("job_queue", self._job_stats) if self._job_stats else None
+        if values is None:
+            return
+        yield GaugeMetricFamily(
+            "job_queue_depth", "Pending background jobs", value=values["queue_depth"]
+        )
+        yield GaugeMetricFamily(
+            "jobs_running", "Jobs running in this process", value=values["running"]
+        )
+        coalescing = values.get("coalescing", {})
+        submissions = CounterMetricFamily(
+            "job_submissions", "Job submissions by outcome", labels=["outcome"]
+        )
+        submissions.add_metric(["computed"], coalescing.get("computations", 0))
+        submissions.add_metric(["coalesced"], coalescing.get("coalesced", 0))
+        submissions.add_metric(["memo_hit"], coalescing.get("memo_hits", 0))
+        yield submissions
+
+    def _collect_models(self) -> Iterable:
+        values = _safe_stats("models", self._model_status) if self._model_status else None
+        if values is None:
+            return
+        loaded = GaugeMetricFamily("model_loaded", "1 if the model is loaded", labels=["model"])
+        load_seconds = GaugeMetricFamily(
+            "model_load_seconds", "Time taken to load the model", labels=["model"]
+        )
+        resident = GaugeMetricFamily(
+            "model_resident_bytes", "RSS growth caused by loading the model", labels=["model"]
+        )
+        for model in values.get("models", []):
+            loaded.add_metric([model["name"]], 1.0 if model["state"] == "loaded" else 0.0)
+            if model.get("load_seconds") is not None:
+                load_seconds.add_metric([model["name"]], model["load_seconds"])
+            if model.get("rss_bytes") is not None:
+                resident.add_metric([model["name"]], model["rss_bytes"])
+        yield from (loaded, load_seconds, resident)
+
+    def _collect_admission(self) -> Iterable:
+        values = _safe_stats("admission", self._admission_stats) if self._admission_stats else None
+        if values is None:
+            return
+        limit = GaugeMetricFamily(
+            "admission_concurrency_limit",
+            "Current adaptive concurrency limit",
+            labels=["route_class"],
+        )
+        in_flight = GaugeMetricFamily(
+            "admission_in_flight", "Admitted requests in progress", labels=["route_class"]
+        )
+        queued = GaugeMetricFamily(
+            "admission_queued", "Requests waiting for a slot", labels=["route_class"]
+        )
+        for route_class, stats in values.items():
+            limit.add_metric([route_class], stats["limit"])
+            in_flight.add_metric([route_class], stats["in_flight"])
+            queued.add_metric([route_class], stats["queued"])
+        yield from (limit, in_flight, queued)
+
+
+def _safe_stats(name: str, stats: Callable[[], Dict]) -> Optional[Dict]:
+    try:
+        return stats()
+    except Exception as e:
+        logger.warning(f"Metrics source {name} failed: {e}")
+        return None
+
+
+app_stats = AppStatsCollector()
+REGISTRY.register(app_stats)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Prometheus text exposition of all metrics (all workers in multiprocess mode)"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        # Scrape-time component stats are per process; report this worker's
+        registry.register(app_stats)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,203 @@
+"""
+Minimal Mapbox Vector Tile (MVT 2.1) encoder
+
+Encodes polygon layers already quantized to integer tile coordinates into the
+protobuf wire format described at https://github.com/mapbox/vector-tile-spec.
+Only what the building layer needs is implemented: polygon features with
+scalar properties.
+"""
+
+import struct
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+Ring = Sequence[Tuple[int, int]]
+Polygon = Sequence[Ring]  # Exterior ring first, then holes
+
+MVT_VERSION = 2
+DEFAULT_EXTENT = 4096
+
+# Protobuf wire types
+_VARINT = 0
+_FIXED64 = 1
+_LENGTH_DELIMITED = 2
+
+# Geometry commands
+_MOVE_TO = 1
+_LINE_TO = 2
+_CLOSE_PATH = 7
+
+_GEOM_POLYGON = 3
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        bits = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(bits | 0x80)
+        else:
+            out.append(bits)
+            return bytes(out)
+
+
+def _key(field: int, wire_type: int) -> bytes:
+    return _varint((field << 3) | wire_type)
+
+
+def _length_delimited(field: int, payload: bytes) -> bytes:
+    return _key(field, _LENGTH_DELIMITED) + _varint(len(payload)) + payload
+
+
+def _packed(field: int, values: Sequence[int]) -> bytes:
+    return _length_delimited(field, b"".join(_varint(v) for v in values))
+
+
+def _zigzag(value: int) -> int:
+    return (value << 1) ^ (value >> 63)
+
+
+def _command(command_id: int, count: int) -> int:
+    return (command_id & 0x7) | (count << 3)
+
+
+def _signed_area(ring: Ring) -> int:
+    """Twice the signed area of a ring in tile coordinates (y down)"""
+    area = 0
+    for i in range(len(ring)):
+        x1, y1 = ring[i]
+        x2, y2 = ring[(i + 1) % len(ring)]
+        area += x1 * y2 - x2 * y1
+    return area
+
+
+def _clean_ring(ring: Ring) -> List[Tuple[int, int]]:
+    """Drop the closing point and consecutive duplicates left by quantization"""
+    points: List[Tuple[int, int]] = []
+    for point in ring:
+        if not points or points[-1] != point:
+            points.append(point)
+    if len(points) > 1 and points[0] == points[-1]:
+        points.pop()
+    return points
+
+
+def encode_polygon(polygon: Polygon) -> List[int]:
+    """
+    Encode one polygon into MVT geometry commands
+
+    The exterior ring is oriented to positive area and holes to negative area,
+    as required by the spec. Degenerate rings are dropped.
+
+    Returns:
+        Command integers (empty if the exterior ring collapsed)
+    """
+    commands: List[int] = []
+    cursor = (0, 0)
+    for index, ring in enumerate(polygon):
+        points = _clean_ring(ring)
+        if len(points) < 3:
+            if index == 0:
+                return []
+            continue
+        area = _signed_area(points)
+        if area == 0:
+            if index == 0:
+                return []
+            continue
+        exterior = index == 0
+        if (area > 0) != exterior:
+            points.reverse()
+
+        x, y = points[0]
+        commands.append(_command(_MOVE_TO, 1))
+        commands.extend((_zigzag(x - cursor[0]), _zigzag(y - cursor[1])))
+        cursor = (x, y)
+
+        commands.append(_command(_LINE_TO, len(points) - 1))
+        for x, y in points[1:]:
+            commands.extend((_zigzag(x - cursor[0]), _zigzag(y - cursor[1])))
+            cursor = (x, y)
+
+        commands.append(_command(_CLOSE_PATH, 1))
+    return commands
+
+
+def _encode_value(value: Any) -> bytes:
+    if isinstance(value, bool):
+        return _key(7, _VARINT) + _varint(int(value))
+    if isinstance(value, int):
+        if value >= 0:
+            return _key(5, _VARINT) + _varint(value)
+        return _key(6, _VARINT) + _varint(_zigzag(value))
+    if isinstance(value, float):
+        return _key(3, _FIXED64) + struct.pack("<d", value)
+    return _length_delimited(1, str(value).encode("utf-8"))
+
+
+class LayerBuilder:
+    """Accumulates features for one MVT layer, interning keys and values"""
+
+    def __init__(self, name: str, extent: int = DEFAULT_EXTENT):
+        self.name = name
+        self.extent = extent
+        self._features: List[bytes] = []
+        self._keys: Dict[str, int] = {}
+        self._values: Dict[Tuple[type, Any], int] = {}
+
+    def add_polygons(
+        self,
+        polygons: Sequence[Polygon],
+        properties: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """
+        Add a (multi)polygon feature
+
+        Args:
+            polygons: Polygons in integer tile coordinates
+            properties: Scalar feature attributes (None values are skipped)
+
+        Returns:
+            True if the feature survived encoding
+        """
+        geometry: List[int] = []
+        for polygon in polygons:
+            geometry.extend(encode_polygon(polygon))
+        if not geometry:
+            return False
+
+        tags: List[int] = []
+        for key, value in (properties or {}).items():
+            if value is None:
+                continue
+            tags.append(self._keys.setdefault(key, len(self._keys)))
+            tags.append(self._values.setdefault((type(value), value), len(self._values)))
+
+        feature = b""
+        if tags:
+            feature += _packed(2, tags)
+        feature += _key(3, _VARINT) + _varint(_GEOM_POLYGON)
+        feature += _packed(4, geometry)
+        self._features.append(feature)
+        return True
+
+    def __len__(self) -> int:
+        return len(self._features)
+
+    def encode(self) -> bytes:
+        """Serialize the layer message"""
+        body = _key(15, _VARINT) + _varint(MVT_VERSION)
+        body += _length_delimited(1, self.name.encode("utf-8"))
+        for feature in self._features:
+            body += _length_delimited(2, feature)
+        for key in self._keys:
+            body += _length_delimited(3, key.encode("utf-8"))
+        for _, value in self._values:
+            body += _length_delimited(4, _encode_value(value))
+        body += _key(5, _VARINT) + _varint(self.extent)
+        return body
+
+
+def encode_tile(layers: Sequence[LayerBuilder]) -> bytes:
+    """Serialize layers into a tile; empty layers are omitted"""
+    return b"".join(_length_delimited(3, layer.encode()) for layer in layers if len(layer))
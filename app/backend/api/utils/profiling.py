@@ -0,0 +1,333 @@
+"""
+On-demand profiling for a live worker
+
+- StackSampler: samples every thread's Python stack at a fixed interval and
+  returns collapsed stacks ("frame;frame;frame count"), the input format of
+  flamegraph.pl, speedscope and inferno
+- cProfile of the event loop thread for a bounded time
+- tracemalloc snapshot diffs against a baseline
+- Per-request stage timings kept for the slowest recent requests
+
+Nothing here runs unless the debug endpoints are enabled: stage() is a
+no-op when no request is being timed.
+"""
+
+import asyncio
+import cProfile
+import io
+import logging
+import os
+import pstats
+import sys
+import sysconfig
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MAX_PROFILE_SECONDS = 60.0
+
+_BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Stripped from frame filenames, longest first, so stacks read "threading.py"
+_PATH_PREFIXES = sorted(
+    {_BACKEND_ROOT, *(sysconfig.get_paths()[key] for key in ("purelib", "platlib", "stdlib"))},
+    key=len,
+    reverse=True,
+)
+
+
+class ProfilerBusyError(RuntimeError):
+    """Another profiling session is already running in this process"""
+
+
+# Only one profiler at a time: concurrent sessions would distort each other
+_profile_lock = threading.Lock()
+
+
+# =============================================================================
+# Sampling and deterministic profilers
+# =============================================================================
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    for prefix in _PATH_PREFIXES:
+        if filename.startswith(prefix):
+            filename = filename[len(prefix) + 1 :]
+            break
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+def _collapse(frame, thread_name: str) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.append(thread_name)
+    return ";".join(reversed(labels))
+
+
+class StackSampler:
+    """Wall-clock stack sampler over all threads of this process"""
+
+    def __init__(self, interval: float = 0.005, include_idle: bool = False):
+        """
+        Initialize sampler
+
+        Args:
+            interval: Seconds between samples
+            include_idle: Keep samples of threads blocked waiting for work
+        """
+        self.interval = interval
+        self.include_idle = include_idle
+        self.counts: Counter = Counter()
+        self.samples = 0
+
+    def run(self, seconds: float) -> None:
+        """Sample for `seconds` in the calling thread"""
+        names = {}
+        own_id = threading.get_ident()
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if not self.include_idle and _is_idle(frame):
+                    continue
+                name = names.get(thread_id)
+                if name is None:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                    name = names.get(thread_id, f"thread-{thread_id}")
+                self.counts[_collapse(frame, name)] += 1
+            self.samples += 1
+            time.sleep(self.interval)
+
+    def collapsed(self) -> str:
+        """Collapsed stacks, one "stack count" line per distinct stack"""
+        return "\n".join(f"{stack} {count}" for stack, count in self.counts.most_common()) + "\n"
+
+
+# Innermost frames of threads parked waiting for work: (file suffix, function)
+_IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("concurrent/futures/thread.py", "_worker"),
+    ("multiprocessing/connection.py", "_recv"),
+    ("multiprocessing/connection.py", "_poll"),
+    ("socket.py", "accept"),
+}
+
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return any(
+        code.co_name == function and code.co_filename.endswith(suffix)
+        for suffix, function in _IDLE_FRAMES
+    )
+
+
+async def sample_stacks(seconds: float, interval: float = 0.005, include_idle: bool = False) -> str:
+    """
+    Sample all threads for a bounded time without blocking the event loop
+
+    Returns:
+        Collapsed stacks
+
+    Raises:
+        ProfilerBusyError: If another profile is running
+    """
+    seconds = min(seconds, MAX_PROFILE_SECONDS)
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusyError("A profile is already running")
+    try:
+        sampler = StackSampler(interval=interval, include_idle=include_idle)
+        # Sample from a worker thread so the event loop keeps serving (and gets sampled)
+        await asyncio.to_thread(sampler.run, seconds)
+        logger.info(
+            f"Stack sampling finished: {sampler.samples} samples, {len(sampler.counts)} stacks"
+        )
+        return sampler.collapsed()
+    finally:
+        _profile_lock.release()
+
+
+async def profile_event_loop(seconds: float, sort: str = "cumulative", limit: int = 50) -> str:
+    """
+    cProfile the event loop thread (all coroutines and callbacks) for a bounded time
+
+    Returns:
+        pstats report
+
+    Raises:
+        ProfilerBusyError: If another profile is running
+    """
+    seconds = min(seconds, MAX_PROFILE_SECONDS)
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusyError("A profile is already running")
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.disable()
+        _profile_lock.release()
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).sort_stats(sort).print_stats(limit)
+    return output.getvalue()
+
+
+# =============================================================================
+# tracemalloc
+# =============================================================================
+
+_baseline: Optional[tracemalloc.Snapshot] = None
+
+
+def start_tracemalloc(frames: int = 10) -> None:
+    """Start tracing allocations and take the baseline snapshot"""
+    global _baseline
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+    _baseline = tracemalloc.take_snapshot()
+
+
+def stop_tracemalloc() -> None:
+    """Stop tracing and drop the baseline (tracing costs memory and CPU)"""
+    global _baseline
+    _baseline = None
+    tracemalloc.stop()
+
+
+def tracemalloc_diff(limit: int = 25, group_by: str = "lineno") -> Dict:
+    """
+    Allocation growth since the baseline snapshot
+
+    Args:
+        limit: Entries returned, largest growth first
+        group_by: "lineno", "filename" or "traceback"
+
+    Raises:
+        RuntimeError: If tracing was not started
+    """
+    if _baseline is None or not tracemalloc.is_tracing():
+        raise RuntimeError("tracemalloc is not running; start it first")
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        )
+    )
+    current, peak = tracemalloc.get_traced_memory()
+    stats = snapshot.compare_to(_baseline, group_by)[:limit]
+    return {
+        "traced_bytes": current,
+        "peak_bytes": peak,
+        "top": [
+            {
+                "size_diff_bytes": stat.size_diff,
+                "size_bytes": stat.size,
+                "count_diff": stat.count_diff,
+                "traceback": [str(frame) for frame in stat.traceback],
+            }
+            for stat in stats
+        ],
+    }
+
+
+# =============================================================================
+# Request stage timings
+# =============================================================================
+
+
+@dataclass
+class RequestTimings:
+    """Timings of one request, broken down by stage"""
+
+    method: str
+    path: str
+    started_at: float
+    duration: float = 0.0
+    status: Optional[int] = None
+    stages: Dict[str, float] = field(default_factory=dict)
+    counts: Dict[str, int] = field(default_factory=dict)
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def as_dict(self) -> Dict:
+        return {
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 2),
+            "stages_ms": {name: round(seconds * 1000, 2) for name, seconds in self.stages.items()},
+            "stage_counts": self.counts,
+        }
+
+
+current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def stage(name: str):
+    """Attribute the time spent in the block to a stage of the current request"""
+    timings = current_timings.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+
+def record_stage(name: str, seconds: float) -> None:
+    """Add a stage duration measured elsewhere to the current request"""
+    timings = current_timings.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+class SlowRequestLog:
+    """Most recent completed requests, queried slowest first"""
+
+    def __init__(self, size: int = 1000):
+        self._recent: Deque[RequestTimings] = deque(maxlen=size)
+
+    def add(self, timings: RequestTimings) -> None:
+        self._recent.append(timings)
+
+    def slowest(self, limit: int = 20, since: Optional[float] = None) -> List[Dict]:
+        recent = [t for t in list(self._recent) if since is None or t.started_at >= since]
+        recent.sort(key=lambda t: t.duration, reverse=True)
+        return [t.as_dict() for t in recent[:limit]]
+
+
+slow_requests = SlowRequestLog(size=int(os.getenv("SLOW_REQUEST_LOG_SIZE", "1000")))
+
+
+def instrument_engine(engine) -> None:
+    """Record SQL execution time as the "db" stage of the current request"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("profiling_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("profiling_start")
+        if starts:
+            record_stage("db", time.perf_counter() - starts.pop())
@@ -0,0 +1,218 @@
+"""
+Resilience primitives for calls to external APIs
+
+- is_retryable: classifies errors as transient (timeouts, throttling, 5xx)
+  or permanent (bad input, malformed response).
+- backoff_delay: exponential backoff with full jitter, so clients that
+  failed together don't retry together.
+- CircuitBreaker: fails fast while the upstream is degraded and lets a
+  single probe through after a cool-down.
+- LatencyTracker: rolling latency percentiles (hedging threshold).
+"""
+
+import asyncio
+import logging
+import random
+import re
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Exception class names of transient upstream errors (google.api_core, httpx, grpc)
+_RETRYABLE_NAMES = {
+    "ServiceUnavailable",
+    "ResourceExhausted",
+    "TooManyRequests",
+    "DeadlineExceeded",
+    "InternalServerError",
+    "GatewayTimeout",
+    "BadGateway",
+    "Aborted",
+    "RetryError",
+    "ConnectTimeout",
+    "ReadTimeout",
+    "ConnectError",
+    "RemoteProtocolError",
+}
+
+# Transient errors that only carry a message
+_RETRYABLE_MESSAGE = re.compile(
+    r"\b(429|500|502|503|504)\b|overloaded|unavailable|rate limit|resource exhausted"
+    r"|deadline exceeded|timed out|try again",
+    re.IGNORECASE,
+)
+
+
+class CircuitOpenError(Exception):
+    """Call rejected because the circuit breaker is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} circuit open, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether an error is transient, i.e. the same call may succeed later"""
+    if isinstance(error, CircuitOpenError):
+        return False
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    if isinstance(error, (ValueError, TypeError, KeyError, FileNotFoundError, PermissionError)):
+        return False
+    if type(error).__name__ in _RETRYABLE_NAMES:
+        return True
+    status = getattr(error, "code", None) or getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    return _RETRYABLE_MESSAGE.search(str(error)) is not None
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0, rng=random) -> float:
+    """
+    Seconds to wait before retry `attempt` (0-based), full jitter
+
+    Uniform in [0, min(cap, base * 2**attempt)].
+    """
+    return rng.uniform(0, min(cap, base * 2**attempt))
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+
+    Closed: calls pass, failures are counted. After `failure_threshold`
+    consecutive failures it opens and calls are rejected for
+    `reset_timeout` seconds; then it is half-open and one probe call is let
+    through. The probe's success closes the circuit, its failure reopens it;
+    a probe that ends without a verdict (permanent error, cancelled) is
+    released so the next call probes instead.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Initialize breaker
+
+        Args:
+            name: Upstream name (for logs and errors)
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before a probe
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if (
+                self._state == self.OPEN
+                and time.monotonic() - self._opened_at >= self.reset_timeout
+            ):
+                return self.HALF_OPEN
+            return self._state
+
+    def check(self) -> None:
+        """
+        Fail fast without claiming the probe (before spending on a call)
+
+        Raises:
+            CircuitOpenError: while open, or while the half-open probe is running
+        """
+        with self._lock:
+            self._reject_if_open()
+
+    def before_call(self) -> bool:
+        """
+        Admit a call (in the half-open state, as the probe)
+
+        Returns:
+            True if the call is the half-open probe (settle it with
+            record_success, record_failure or release_probe)
+
+        Raises:
+            CircuitOpenError: while open, or while the half-open probe is running
+        """
+        with self._lock:
+            self._reject_if_open()
+            if self._state == self.OPEN:
+                self._probing = True
+                return True
+            return False
+
+    def _reject_if_open(self) -> None:
+        if self._state == self.OPEN:
+            elapsed = time.monotonic() - self._opened_at
+            if elapsed < self.reset_timeout or self._probing:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, max(0.0, self.reset_timeout - elapsed))
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info(f"{self.name} circuit closed")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or (
+                self._state == self.CLOSED and self._failures >= self.failure_threshold
+            ):
+                if self._state == self.CLOSED:
+                    self.opened += 1
+                    logger.warning(
+                        f"{self.name} circuit opened after {self._failures} consecutive failures"
+                    )
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+    def release_probe(self) -> None:
+        """Give up the probe without a verdict; the circuit stays half-open"""
+        with self._lock:
+            self._probing = False
+
+    def stats(self) -> Dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
+
+
+class LatencyTracker:
+    """Rolling window of call latencies"""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """q-th percentile (0-100), or None until `min_samples` calls were seen"""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
@@ -0,0 +1,419 @@
+"""
+Response cache for read-heavy GET routes
+
+Cached bodies are addressed by route key plus the current versions of the
+entities they depend on (e.g. "city:*", "buildings:<city_id>"). Writes to
+City, Building and GrowthPrediction rows bump those versions on commit, so
+stale entries simply become unreachable and age out of the backend.
+Async write paths commit through `await response_cache.commit(db)`, so the
+versions are bumped before the write's response is sent.
+Responses carry strong ETags and answer `If-None-Match` with 304.
+Compressed variants (per Accept-Encoding) are stored next to the identity
+body, so hot responses are compressed once per version, not per request.
+
+Versions only reach other processes through a shared backend (Redis): with
+the in-memory backend, a write invalidates the worker that made it and the
+other workers keep serving their copies until the TTL expires.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Set
+
+from fastapi import Request, Response, status
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from api.models.database import Building, City, GrowthPrediction
+from api.utils.cache import LRUCache
+from api.utils.compression import (
+    MINIMUM_SIZE,
+    base_etag,
+    compress,
+    is_compressible,
+    negotiate,
+    variant_etag,
+)
+from api.utils.profiling import stage
+from api.utils.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 300  # seconds
+_HEADER_SEPARATOR = b"\n"
+
+
+# =============================================================================
+# Backends
+# =============================================================================
+
+
+class CacheBackend(ABC):
+    """Minimal Redis-compatible key/value interface used by the cache"""
+
+    name = "base"
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """Get a value"""
+
+    @abstractmethod
+    async def mget(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        """Get several values in one round trip"""
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        """Set a value with an optional time-to-live in seconds"""
+
+    @abstractmethod
+    async def incr(self, key: str) -> int:
+        """Atomically increment an integer counter"""
+
+    async def close(self) -> None:
+        """Release backend resources"""
+
+    def stats(self) -> Dict:
+        """Get backend statistics"""
+        return {"backend": self.name}
+
+
+class MemoryBackend(CacheBackend):
+    """
+    In-process LRU + TTL backend (default, and the stand-in for tests)
+
+    Only correct with a single worker: invalidations don't reach other processes.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = 4096, max_bytes: int = 256 * 1024 * 1024):
+        self._entries = LRUCache(max_entries=max_entries, max_bytes=max_bytes)
+        # Version counters are never evicted: losing one could resurrect stale entries
+        self._counters: Dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        if key in self._counters:
+            return str(self._counters[key]).encode()
+        return self._entries.get(key)
+
+    async def mget(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        return [await self.get(key) for key in keys]
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        self._entries.set(key, value, ttl=ttl)
+
+    async def incr(self, key: str) -> int:
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+    def stats(self) -> Dict:
+        return {"backend": self.name, **self._entries.stats()}
+
+
+class RedisBackend(CacheBackend):
+    """Backend for any client exposing the redis.asyncio API"""
+
+    name = "redis"
+
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisBackend":
+        import redis.asyncio as redis
+
+        return cls(redis.from_url(url))
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(key)
+
+    async def mget(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        return await self.client.mget(list(keys)) if keys else []
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        await self.client.set(key, value, px=int(ttl * 1000) if ttl else None)
+
+    async def incr(self, key: str) -> int:
+        return await self.client.incr(key)
+
+    async def close(self) -> None:
+        await self.client.close()
+
+
+def worker_count() -> int:
+    """Server processes running this app (WEB_CONCURRENCY, read by uvicorn and gunicorn, or WORKERS)"""
+    for name in ("WEB_CONCURRENCY", "WORKERS"):
+        try:
+            return max(1, int(os.environ[name]))
+        except (KeyError, ValueError):
+            continue
+    return 1
+
+
+async def create_backend(
+    redis_url: Optional[str] = None, workers: Optional[int] = None
+) -> CacheBackend:
+    """
+    Create the cache backend: Redis if reachable, in-memory otherwise
+
+    Args:
+        redis_url: Redis URL (defaults to REDIS_URL; unset means in-memory)
+        workers: Server processes sharing the cache (defaults to worker_count())
+    """
+    redis_url = redis_url or os.getenv("REDIS_URL")
+    if redis_url:
+        try:
+            backend = RedisBackend.from_url(redis_url)
+            await backend.client.ping()
+            logger.info("Response cache using Redis backend")
+            return backend
+        except Exception as e:
+            logger.warning(f"Redis unavailable ({e}), falling back to in-memory response cache")
+    workers = worker_count() if workers is None else workers
+    if workers > 1:
+        logger.warning(
+            f"In-memory response cache with {workers} workers: a write only invalidates the "
+            f"worker that made it, others serve stale responses for up to {DEFAULT_TTL}s. "
+            "Set REDIS_URL to share the cache."
+        )
+    return MemoryBackend()
+
+
+# =============================================================================
+# Response cache
+# =============================================================================
+
+
+def compute_etag(body: bytes) -> str:
+    """Strong ETag for a response body"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [base_etag(tag.strip()) for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+class ResponseCache:
+    """Versioned GET response cache with ETag revalidation"""
+
+    def __init__(self, backend: Optional[CacheBackend] = None, prefix: str = "uea"):
+        """
+        Initialize response cache
+
+        Args:
+            backend: Storage backend (in-memory if None)
+            prefix: Key namespace
+        """
+        self.backend = backend or MemoryBackend()
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.compressions = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def configure(self, backend: CacheBackend) -> None:
+        """Swap in a backend and remember the app event loop for invalidations"""
+        previous = self.backend
+        self.backend = backend
+        self._loop = asyncio.get_running_loop()
+        if previous is not backend:
+            await previous.close()
+
+    async def versions(self, entities: Iterable[str]) -> List[int]:
+        """Current version of each entity"""
+        keys = [f"{self.prefix}:ver:{entity}" for entity in entities]
+        values = await self.backend.mget(keys)
+        return [int(value) if value else 0 for value in values]
+
+    async def invalidate(self, entities: Iterable[str]) -> None:
+        """Bump entity versions, orphaning every response that depends on them"""
+        for entity in set(entities):
+            await self.backend.incr(f"{self.prefix}:ver:{entity}")
+        logger.debug(f"Invalidated cached responses for: {sorted(set(entities))}")
+
+    async def wait_invalidations(self) -> None:
+        """Wait for the invalidations scheduled on this event loop so far"""
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    async def commit(self, db: Session) -> None:
+        """
+        Commit a session from async code, returning once the cached responses
+        depending on its changes are invalidated
+
+        A plain db.commit() on the event loop can only schedule the
+        invalidation; a read served before it runs would get the stale body.
+        """
+        db.commit()
+        await self.wait_invalidations()
+
+    def invalidate_nowait(self, entities: Iterable[str]) -> None:
+        """
+        Invalidate from synchronous code (e.g. ORM events)
+
+        Blocks until done, except on the event loop thread, where it is
+        scheduled (see commit() and wait_invalidations()).
+        """
+        entities = set(entities)
+        if not entities:
+            return
+        try:
+            task = asyncio.get_running_loop().create_task(self.invalidate(entities))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            return
+        except RuntimeError:
+            pass
+        if self._loop is not None and self._loop.is_running():
+            # Called from a threadpool worker: hand off to the app loop and wait
+            asyncio.run_coroutine_threadsafe(self.invalidate(entities), self._loop).result(5)
+        else:
+            asyncio.run(self.invalidate(entities))
+
+    async def serve(
+        self,
+        request: Request,
+        key: str,
+        depends_on: Sequence[str],
+        producer: Callable[[], Awaitable[Any]],
+        ttl: float = DEFAULT_TTL,
+        media_type: str = "application/json",
+    ) -> Response:
+        """
+        Serve a cached response, producing and storing it on miss
+
+        Args:
+            request: Incoming request (for If-None-Match)
+            key: Route-level cache key (should include all parameters)
+            depends_on: Entity names whose changes invalidate this response
+            producer: Coroutine returning JSON-serializable data (or bytes)
+            ttl: Time-to-live of the stored body in seconds
+            media_type: Response media type
+
+        Returns:
+            200 with body and ETag, or 304 if the client copy is current.
+            Bodies of at least MINIMUM_SIZE bytes are sent in the best coding
+            the client accepts.
+        """
+        # A commit on this loop may not have bumped its versions yet
+        await self.wait_invalidations()
+        versions = await self.versions(depends_on)
+        version_tag = ".".join(str(v) for v in versions)
+        cache_key = f"{self.prefix}:resp:{key}:{version_tag}"
+
+        encoding = None
+        if is_compressible(media_type):
+            encoding = negotiate(request.headers.get("accept-encoding"))
+        headers = {"Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+
+        # Hot path: the pre-compressed variant, without touching the identity body
+        entry = await self.backend.get(f"{cache_key}:{encoding}") if encoding else None
+        if entry is not None:
+            self.hits += 1
+            etag, body = entry.split(_HEADER_SEPARATOR, 1)
+            etag = etag.decode()
+            headers["Content-Encoding"] = encoding
+        else:
+            entry = await self.backend.get(cache_key)
+            if entry is not None:
+                self.hits += 1
+                etag, body = entry.split(_HEADER_SEPARATOR, 1)
+                etag = etag.decode()
+            else:
+                self.misses += 1
+                with stage("produce"):
+                    data = await producer()
+                with stage("encode"):
+                    body = data if isinstance(data, bytes) else self.encode(data)
+                etag = compute_etag(body)
+                await self.backend.set(cache_key, etag.encode() + _HEADER_SEPARATOR + body, ttl=ttl)
+
+            if encoding and len(body) >= MINIMUM_SIZE:
+                with stage("compress"):
+                    body = await run_in_threadpool(compress, body, encoding)
+                self.compressions += 1
+                await self.backend.set(
+                    f"{cache_key}:{encoding}", etag.encode() + _HEADER_SEPARATOR + body, ttl=ttl
+                )
+                headers["Content-Encoding"] = encoding
+
+        headers["ETag"] = variant_etag(etag, headers.get("Content-Encoding"))
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            self.not_modified += 1
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=body, media_type=media_type, headers=headers)
+
+    @staticmethod
+    def encode(data: Any) -> bytes:
+        """Serialize response data to JSON bytes"""
+        return dumps(data)
+
+    def stats(self) -> Dict:
+        """Get cache statistics"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "compressions": self.compressions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "backend": self.backend.stats(),
+        }
+
+
+response_cache = ResponseCache()
+
+
+# =============================================================================
+# Invalidation on commit
+# =============================================================================
+
+_PENDING_KEY = "response_cache_invalidations"
+
+
+def _city_ids(instance: Any) -> Set:
+    """City of a row before and after the flush (a row moved between cities changes both)"""
+    state = inspect(instance)
+    city_id = state.dict.get("city_id")  # Deleted rows can't be loaded any more
+    if city_id is None and "city_id" not in state.dict and not state.deleted:
+        city_id = instance.city_id
+    return {city_id, *(state.attrs.city_id.history.deleted or [])} - {None}
+
+
+def entities_for(instance: Any) -> Set[str]:
+    """Cache entities affected by a change to an ORM instance (call from after_flush)"""
+    if isinstance(instance, City):
+        return {"city:*", f"city:{instance.id}"}
+    if isinstance(instance, Building):
+        return {f"buildings:{city_id}" for city_id in _city_ids(instance)}
+    if isinstance(instance, GrowthPrediction):
+        return {f"growth:{city_id}" for city_id in _city_ids(instance)} | {f"growth:{instance.id}"}
+    return set()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_invalidations(session: Session, flush_context) -> None:
+    pending = session.info.setdefault(_PENDING_KEY, set())
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        pending.update(entities_for(instance))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_invalidations(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        response_cache.invalidate_nowait(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_invalidations(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
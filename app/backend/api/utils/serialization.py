@@ -0,0 +1,63 @@
+"""
+Fast JSON serialization
+
+Uses orjson when installed (several times faster than the stdlib encoder and
+serializes datetimes, UUIDs, enums and numpy arrays natively) and falls back
+to compact stdlib JSON otherwise.
+"""
+
+import enum
+import json
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_ORJSON_OPTIONS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+
+def json_default(value: Any) -> Any:
+    """Fallback for types neither encoder handles natively"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if hasattr(value, "tolist"):  # numpy arrays and scalars
+        return value.tolist()
+    return str(value)
+
+
+def dumps(data: Any) -> bytes:
+    """Serialize data to compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(data, default=json_default, option=_ORJSON_OPTIONS)
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False, default=json_default).encode(
+        "utf-8"
+    )
+
+
+def loads(data: Any) -> Any:
+    """Parse JSON bytes or str"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with the fast encoder (the app's default response class)"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,98 @@
+"""
+Single-flight call coalescing
+
+Concurrent calls with the same key share one execution: the first caller
+starts the function in its own task, and every caller (the first included)
+awaits that task instead of repeating the work. A caller going away only
+cancels the execution when no other caller is waiting for it.
+"""
+
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+def canonical_key(*parts: Any) -> str:
+    """
+    Stable hash of JSON-serializable parts (dict key order does not matter)
+
+    Args:
+        *parts: Values identifying a computation (inputs, model version, ...)
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent async calls by key"""
+
+    def __init__(self):
+        self._in_flight: Dict[str, _Flight] = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Run func once per key at a time
+
+        Args:
+            key: Coalescing key
+            func: Coroutine function to run if no call for key is in flight
+
+        Returns:
+            (result, shared) where shared is True if another caller's
+            execution was reused. Exceptions propagate to every waiter.
+        """
+        self.calls += 1
+        flight = self._in_flight.get(key)
+        shared = flight is not None
+        if shared:
+            self.coalesced += 1
+        else:
+            flight = _Flight(asyncio.ensure_future(func()))
+            self._in_flight[key] = flight
+            self.executions += 1
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+
+        flight.waiters += 1
+        try:
+            # shield: one waiter being cancelled must not cancel the shared call
+            return await asyncio.shield(flight.task), shared
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.task.done():
+                # Everyone went away: nobody needs the result any more
+                flight.task.cancel()
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        if self._in_flight.get(key) is flight:
+            del self._in_flight[key]
+        if not flight.task.cancelled():
+            # Mark a failure retrieved: its waiters may all have gone away
+            flight.task.exception()
+
+    def in_flight(self) -> int:
+        """Number of keys currently executing"""
+        return len(self._in_flight)
+
+    def stats(self) -> Dict:
+        """Get coalescing statistics"""
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight),
+        }
@@ -0,0 +1,36 @@
+"""Server-Sent Events helpers"""
+
+import json
+from typing import Any, Optional
+
+SSE_MEDIA_TYPE = "text/event-stream"
+
+# Disable proxy buffering so events reach the client as they are produced
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def format_sse(data: Any, event: Optional[str] = None, event_id: Optional[str] = None) -> str:
+    """
+    Format one SSE message
+
+    Args:
+        data: Payload (JSON-encoded unless already a string)
+        event: Optional event name
+        event_id: Optional event id
+
+    Returns:
+        Wire-format message terminated by a blank line
+    """
+    payload = data if isinstance(data, str) else json.dumps(data, default=str)
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    lines.extend(f"data: {line}" for line in payload.splitlines() or [""])
+    return "\n".join(lines) + "\n\n"
+
+
+def sse_comment(text: str = "keep-alive") -> str:
+    """SSE comment line, used as a heartbeat"""
+    return f": {text}\n\n"
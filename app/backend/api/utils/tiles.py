@@ -0,0 +1,69 @@
+"""XYZ tile and Web Mercator (EPSG:3857) helpers"""
+
+import math
+from typing import Iterator, Tuple
+
+EARTH_RADIUS = 6378137.0
+ORIGIN_SHIFT = math.pi * EARTH_RADIUS  # Half the world width in meters
+MAX_LATITUDE = 85.0511287798
+
+Bounds = Tuple[float, float, float, float]  # (minx, miny, maxx, maxy)
+
+
+def lonlat_to_mercator(lon: float, lat: float) -> Tuple[float, float]:
+    """Project WGS84 longitude/latitude to Web Mercator meters"""
+    lat = max(min(lat, MAX_LATITUDE), -MAX_LATITUDE)
+    x = math.radians(lon) * EARTH_RADIUS
+    y = math.log(math.tan(math.pi / 4 + math.radians(lat) / 2)) * EARTH_RADIUS
+    return x, y
+
+
+def tile_size_meters(z: int) -> float:
+    """Width of a single tile at zoom level z, in Web Mercator meters"""
+    return 2 * ORIGIN_SHIFT / (1 << z)
+
+
+def is_valid_tile(z: int, x: int, y: int, max_zoom: int = 24) -> bool:
+    """Check that (z, x, y) addresses an existing tile"""
+    if z < 0 or z > max_zoom:
+        return False
+    n = 1 << z
+    return 0 <= x < n and 0 <= y < n
+
+
+def tile_bounds(z: int, x: int, y: int) -> Bounds:
+    """
+    Get Web Mercator bounds of an XYZ tile
+
+    Args:
+        z: Zoom level
+        x: Tile column (west to east)
+        y: Tile row (north to south)
+
+    Returns:
+        (minx, miny, maxx, maxy) in meters
+    """
+    size = tile_size_meters(z)
+    minx = -ORIGIN_SHIFT + x * size
+    maxy = ORIGIN_SHIFT - y * size
+    return minx, maxy - size, minx + size, maxy
+
+
+def tiles_covering(bounds: Bounds, z: int) -> Iterator[Tuple[int, int]]:
+    """
+    Iterate over (x, y) of all tiles at zoom z intersecting Web Mercator bounds
+
+    Args:
+        bounds: (minx, miny, maxx, maxy) in meters
+        z: Zoom level
+    """
+    size = tile_size_meters(z)
+    n = 1 << z
+    minx, miny, maxx, maxy = bounds
+    x0 = max(int((minx + ORIGIN_SHIFT) // size), 0)
+    x1 = min(int((maxx + ORIGIN_SHIFT) // size), n - 1)
+    y0 = max(int((ORIGIN_SHIFT - maxy) // size), 0)
+    y1 = min(int((ORIGIN_SHIFT - miny) // size), n - 1)
+    for x in range(x0, x1 + 1):
+        for y in range(y0, y1 + 1):
+            yield x, y
@@ -0,0 +1,171 @@
+"""
+Gemini Batch Editing Benchmark
+
+Runs scenario edits over synthetic city tiles against the local image
+backend (fixed latency, optional failure rate, no API key or network) and
+compares:
+
+- a serial loop over edit_image_with_retry (one tile after another)
+- edit_images_batch (concurrent, rate limited, under a USD budget)
+
+With --crop, edits send only the cropped edit regions (region crop mode);
+the backend's latency grows with the pixels it receives, like the real model's
+upload and token cost, and the uploaded image bytes are reported.
+
+Each tile gets its own prompt, so the result cache never short-circuits a
+call; cache entries go to a temporary directory.
+
+Usage (from app/backend):
+    python -m benchmarks.bench_gemini_batch --tiles 40 --latency 0.5 --concurrency 8
+    python -m benchmarks.bench_gemini_batch --tiles 20 --tile-size 2048 --crop always
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from services.gemini_flash_service import GeminiFlashService
+from services.generation_cache import GenerationCache
+from services.image_backends import LocalImageBackend
+
+
+def make_tiles(directory: Path, count: int, size: int):
+    import numpy as np
+    from PIL import Image
+
+    rng = np.random.default_rng(7)
+    requests = []
+    for i in range(count):
+        path = directory / f"tile_{i:03d}.png"
+        # Noise compresses like imagery, unlike a flat color
+        Image.fromarray(rng.integers(0, 255, (size, size, 3), dtype=np.uint8)).save(path)
+        x, y = size // 3, size // 3
+        requests.append(
+            {
+                "source_image_path": str(path),
+                "prompt": f"Tile {i}: add a pocket park and 4-story housing",
+                "edit_regions": [
+                    {
+                        "x1": x,
+                        "y1": y,
+                        "x2": x + size // 8,
+                        "y2": y + size // 8,
+                        "action": "add_park",
+                    },
+                    {
+                        "x1": x + size // 6,
+                        "y1": y,
+                        "x2": x + size // 4,
+                        "y2": y + size // 10,
+                        "action": "add_building",
+                    },
+                ],
+            }
+        )
+    return requests
+
+
+def make_backend(args) -> LocalImageBackend:
+    # Latency per call plus the same again per megapixel received
+    return LocalImageBackend(
+        args.latency, megapixel_latency=args.latency, failure_rate=args.failure_rate
+    )
+
+
+def make_service(backend: LocalImageBackend, cache_dir: Path) -> GeminiFlashService:
+    return GeminiFlashService(backend=backend, cache=GenerationCache(str(cache_dir)))
+
+
+async def run_serial(service: GeminiFlashService, requests, output_dir: str, args):
+    results = []
+    for request in requests:
+        results.append(
+            await service.edit_image_with_retry(
+                request["source_image_path"],
+                request["prompt"],
+                request["edit_regions"],
+                output_dir=output_dir,
+                region_crop=args.crop,
+            )
+        )
+    return results
+
+
+async def run_batch(service: GeminiFlashService, requests, output_dir: str, args):
+    results, first = [], None
+    start = time.perf_counter()
+    async for result in service.edit_images_batch(
+        requests,
+        max_concurrency=args.concurrency,
+        requests_per_minute=args.rpm,
+        budget_usd=args.budget,
+        output_dir=output_dir,
+        region_crop=args.crop,
+    ):
+        first = first or time.perf_counter() - start
+        results.append(result)
+    return results, first
+
+
+def summarize(label: str, elapsed: float, results, service: GeminiFlashService, first=None):
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    first_text = f", first result {first:.2f}s" if first is not None else ""
+    print(
+        f"{label:<8} {elapsed:7.2f}s{first_text}  {counts}  "
+        f"calls {service.backend.calls}, upload {service.backend.upload_bytes / 1e6:.1f} MB, "
+        f"cost ${service.get_cost_summary()['total_cost_usd']}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--tiles", type=int, default=40)
+    parser.add_argument(
+        "--tile-size", type=int, default=512, help="Tile width and height in pixels"
+    )
+    parser.add_argument(
+        "--crop", choices=["auto", "always", "off"], default="off", help="Region crop mode"
+    )
+    parser.add_argument("--latency", type=float, default=0.5, help="Backend seconds per model call")
+    parser.add_argument("--failure-rate", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rpm", type=float, default=600)
+    parser.add_argument("--budget", type=float, default=5.0, help="USD limit of the batch")
+    parser.add_argument("--skip-serial", action="store_true")
+    args = parser.parse_args()
+    # Not recorded in the shared telemetry log
+    os.environ["GENERATION_TELEMETRY_ENABLED"] = "false"
+    # Injected failures and budget skips are expected; keep the table readable
+    logging.getLogger("services.gemini_flash_service").setLevel(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        requests = make_tiles(tmp, args.tiles, args.tile_size)
+        print(
+            f"{args.tiles} tiles of {args.tile_size}px, {args.latency:.2f}s per call, "
+            f"{args.failure_rate:.0%} failures, concurrency {args.concurrency}, {args.rpm:g} rpm, "
+            f"budget ${args.budget}, region crop {args.crop}"
+        )
+
+        if not args.skip_serial:
+            service = make_service(make_backend(args), tmp / "cache-serial")
+            start = time.perf_counter()
+            results = asyncio.run(run_serial(service, requests, str(tmp / "serial"), args))
+            summarize("serial", time.perf_counter() - start, results, service)
+
+        service = make_service(make_backend(args), tmp / "cache-batch")
+        start = time.perf_counter()
+        results, first = asyncio.run(run_batch(service, requests, str(tmp / "batch"), args))
+        summarize("batch", time.perf_counter() - start, results, service, first)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Gemini Tail-Latency and Fault Benchmark
+
+Runs batches of edits against the fault-injecting local image backend (no
+API key or network) and reports, per scenario:
+
+- tail:     a fraction of calls is much slower; without vs with hedging
+- outage:   a run of calls fails with 503; circuit breaker effectively off
+            vs on (calls spent and time until the batch drains)
+- bad:      a fraction of requests is permanently invalid; those are no
+            longer retried
+
+Usage (from app/backend):
+    python -m benchmarks.bench_gemini_resilience --tiles 100 --latency 0.2
+    python -m benchmarks.bench_gemini_resilience --scenario tail --slow-rate 0.08
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_gemini_batch import make_tiles
+from services.gemini_flash_service import GeminiFlashService
+from services.generation_cache import GenerationCache
+from services.image_backends import LocalImageBackend
+
+
+def make_service(
+    backend: LocalImageBackend, cache_dir: Path, hedge: bool = False, breaker_failures: int = 5
+) -> GeminiFlashService:
+    service = GeminiFlashService(
+        backend=backend, cache=GenerationCache(str(cache_dir)), hedge=hedge
+    )
+    service.breaker.failure_threshold = breaker_failures
+    service.breaker.reset_timeout = 2.0
+    return service
+
+
+async def run_batch(service: GeminiFlashService, requests, output_dir: str, args):
+    results = []
+    async for result in service.edit_images_batch(
+        requests,
+        max_concurrency=args.concurrency,
+        requests_per_minute=0,
+        budget_usd=1000.0,
+        output_dir=output_dir,
+        region_crop="off",
+        deadline=args.deadline,
+    ):
+        results.append(result)
+    return results
+
+
+def summarize(label: str, elapsed: float, results, service: GeminiFlashService):
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    latencies = sorted(r["generation_time"] for r in results if r["status"] == "success")
+    tail = ""
+    if len(latencies) >= 2:
+        quantiles = statistics.quantiles(latencies, n=100)
+        tail = f"p50 {quantiles[49]:.2f}s p95 {quantiles[94]:.2f}s p99 {quantiles[98]:.2f}s  "
+    summary = service.get_cost_summary()
+    print(
+        f"  {label:<14} {elapsed:6.2f}s  {tail}{counts}  calls {service.backend.calls}, "
+        f"hedged {summary['hedged_requests']}, circuit opened {summary['circuit']['opened']}x "
+        f"(rejected {summary['circuit']['rejected']})"
+    )
+
+
+def run(label: str, service: GeminiFlashService, requests, tmp: Path, args):
+    start = time.perf_counter()
+    results = asyncio.run(run_batch(service, requests, str(tmp / label.replace(" ", "_")), args))
+    summarize(label, time.perf_counter() - start, results, service)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--scenario", choices=["tail", "outage", "bad", "all"], default="all")
+    parser.add_argument("--tiles", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.2, help="Backend seconds per model call")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--slow-rate", type=float, default=0.04, help="Fraction of slow calls (tail)"
+    )
+    parser.add_argument("--slow-factor", type=float, default=10.0)
+    parser.add_argument(
+        "--bad-rate", type=float, default=0.2, help="Fraction of invalid requests (bad)"
+    )
+    parser.add_argument(
+        "--deadline", type=float, default=60.0, help="Seconds per edit, retries included"
+    )
+    args = parser.parse_args()
+    # Not recorded in the shared telemetry log
+    os.environ["GENERATION_TELEMETRY_ENABLED"] = "false"
+    # Injected failures are expected; keep the table readable
+    logging.getLogger("services.gemini_flash_service").setLevel(logging.CRITICAL)
+    logging.getLogger("api.utils.resilience").setLevel(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        requests = make_tiles(tmp, args.tiles, 256)
+        print(f"{args.tiles} edits, {args.latency:.2f}s per call, concurrency {args.concurrency}")
+
+        if args.scenario in ("tail", "all"):
+            print(f"tail: {args.slow_rate:.0%} of calls {args.slow_factor:g}x slower")
+            for hedge in (False, True):
+                backend = LocalImageBackend(
+                    args.latency, slow_rate=args.slow_rate, slow_factor=args.slow_factor
+                )
+                service = make_service(backend, tmp / f"cache-tail-{hedge}", hedge=hedge)
+                run("hedging " + ("on" if hedge else "off"), service, requests, tmp, args)
+
+        if args.scenario in ("outage", "all"):
+            outage = (args.tiles // 4, args.tiles // 4 + args.tiles)
+            print(f"outage: calls {outage[0]}-{outage[1]} fail with 503")
+            for failures in (10**6, 5):
+                backend = LocalImageBackend(args.latency, outage=outage)
+                service = make_service(
+                    backend, tmp / f"cache-outage-{failures}", breaker_failures=failures
+                )
+                run("breaker " + ("on" if failures == 5 else "off"), service, requests, tmp, args)
+
+        if args.scenario in ("bad", "all"):
+            print(f"bad: {args.bad_rate:.0%} of requests invalid (400)")
+            backend = LocalImageBackend(args.latency, bad_request_rate=args.bad_rate)
+            run("classified", make_service(backend, tmp / "cache-bad"), requests, tmp, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+GeoJSON Encoding Benchmark
+
+Compares encode time and payload size of a synthetic city's buildings
+FeatureCollection across the response paths:
+
+- FastAPI default: jsonable_encoder + stdlib json
+- stdlib json only
+- fast encoder (orjson if installed)
+- fast encoder + coordinate precision trimming
+- pre-encoded bytes (what cached/stored GeoJSON is served from)
+
+Usage (from app/backend):
+    python -m benchmarks.bench_geojson_encoding --buildings 100000
+"""
+
+import argparse
+import gzip
+import json
+import math
+import random
+import statistics
+import time
+import uuid
+from typing import Callable, Dict, List
+
+from api.utils.geojson import feature, feature_collection
+from api.utils.serialization import dumps, orjson
+
+# Tunis master bounding box (lon/lat)
+BBOX = (10.05, 36.70, 10.35, 36.95)
+
+
+def synthetic_buildings(count: int, seed: int = 42) -> List[Dict]:
+    """Rows shaped like Building records: full-precision polygon rings plus attributes"""
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        lon = rng.uniform(BBOX[0], BBOX[2])
+        lat = rng.uniform(BBOX[1], BBOX[3])
+        vertices = rng.randint(4, 8)
+        radius = rng.uniform(0.00005, 0.0003)
+        ring = [
+            [
+                lon + radius * math.cos(2 * math.pi * i / vertices),
+                lat + radius * math.sin(2 * math.pi * i / vertices),
+            ]
+            for i in range(vertices)
+        ]
+        ring.append(ring[0])
+        rows.append(
+            {
+                "id": uuid.UUID(int=rng.getrandbits(128)),
+                "geometry": {"type": "Polygon", "coordinates": [ring]},
+                "building_type": rng.choice(["residential", "commercial", "industrial", None]),
+                "estimated_height": rng.uniform(3, 40),
+                "num_floors": rng.randint(1, 12),
+                "building_area_sqm": rng.uniform(40, 2000),
+                "year_detected": 2024,
+            }
+        )
+    return rows
+
+
+def _properties(row: Dict) -> Dict:
+    return {
+        key: row[key]
+        for key in (
+            "building_type",
+            "estimated_height",
+            "num_floors",
+            "building_area_sqm",
+            "year_detected",
+        )
+    }
+
+
+def untrimmed_collection(rows: List[Dict]) -> Dict:
+    return feature_collection(
+        {
+            "type": "Feature",
+            "id": row["id"],
+            "geometry": row["geometry"],
+            "properties": _properties(row),
+        }
+        for row in rows
+    )
+
+
+def fastapi_default(rows: List[Dict]) -> bytes:
+    from fastapi.encoders import jsonable_encoder
+
+    content = jsonable_encoder(untrimmed_collection(rows))
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode(
+        "utf-8"
+    )
+
+
+def stdlib_json(rows: List[Dict]) -> bytes:
+    return json.dumps(untrimmed_collection(rows), separators=(",", ":"), default=str).encode(
+        "utf-8"
+    )
+
+
+def fast_encoder(rows: List[Dict]) -> bytes:
+    return dumps(untrimmed_collection(rows))
+
+
+def fast_encoder_trimmed(rows: List[Dict]) -> bytes:
+    return dumps(
+        feature_collection(
+            feature(row["geometry"], _properties(row), feature_id=str(row["id"])) for row in rows
+        )
+    )
+
+
+def time_it(func: Callable[[], bytes], repeat: int) -> Dict:
+    timings, payload = [], b""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        payload = func()
+        timings.append(time.perf_counter() - start)
+    return {"ms": statistics.median(timings) * 1000, "bytes": len(payload), "payload": payload}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GeoJSON encoding benchmark")
+    parser.add_argument("--buildings", type=int, default=100_000, help="Buildings in the city")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per method (median reported)")
+    parser.add_argument("--gzip", action="store_true", help="Also report gzip-compressed sizes")
+    args = parser.parse_args()
+
+    print(f"Generating {args.buildings:,} buildings...")
+    rows = synthetic_buildings(args.buildings)
+    encoder = f"orjson {orjson.__version__}" if orjson else "stdlib fallback (orjson not installed)"
+    print(f"Fast encoder: {encoder}")
+
+    methods = {
+        "FastAPI default (jsonable_encoder + json)": lambda: fastapi_default(rows),
+        "stdlib json": lambda: stdlib_json(rows),
+        "fast encoder": lambda: fast_encoder(rows),
+        "fast encoder + precision trim": lambda: fast_encoder_trimmed(rows),
+    }
+    results = {name: time_it(func, args.repeat) for name, func in methods.items()}
+
+    stored = results["fast encoder + precision trim"]["payload"]
+    results["pre-encoded bytes (stored)"] = time_it(lambda: bytes(memoryview(stored)), args.repeat)
+
+    baseline = results["FastAPI default (jsonable_encoder + json)"]
+    header = f"{'method':<44}{'encode ms':>12}{'speedup':>10}{'size MB':>10}"
+    if args.gzip:
+        header += f"{'gzip MB':>10}"
+    print("\n" + header)
+    print("-" * len(header))
+    for name, result in results.items():
+        speedup = baseline["ms"] / result["ms"] if result["ms"] else float("inf")
+        line = f"{name:<44}{result['ms']:>12.1f}{speedup:>9.1f}x{result['bytes'] / 1e6:>10.2f}"
+        if args.gzip:
+            line += f"{len(gzip.compress(result['payload'], 6)) / 1e6:>10.2f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Heatmap Tile Server Benchmark
+
+Simulates concurrent map clients panning and zooming over a growth heatmap
+and reports tile throughput and latency percentiles, cold and warm.
+
+Usage (from app/backend):
+    python -m benchmarks.bench_heatmap_tiles --clients 1 8 32 --views 20
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from api.utils.tiles import lonlat_to_mercator, tiles_covering
+from services.heatmap_tiles import HeatmapTileService
+
+# Tunis master bounding box (lon/lat)
+BBOX = (10.05, 36.70, 10.35, 36.95)
+
+
+def create_heatmap(path: Path, size: int = 4096) -> None:
+    """Write a smooth synthetic growth-probability GeoTIFF with overviews"""
+    import numpy as np
+    import rasterio
+    from rasterio.enums import Resampling
+    from rasterio.transform import from_bounds
+
+    yy, xx = np.mgrid[0:size, 0:size].astype(np.float32) / size
+    data = 0.5 + 0.5 * np.sin(xx * 12.0) * np.cos(yy * 9.0)
+    data[:, : size // 16] = np.nan  # A nodata strip
+
+    profile = {
+        "driver": "GTiff",
+        "height": size,
+        "width": size,
+        "count": 1,
+        "dtype": "float32",
+        "crs": "EPSG:4326",
+        "transform": from_bounds(*BBOX, size, size),
+        "nodata": float("nan"),
+        "tiled": True,
+        "blockxsize": 256,
+        "blockysize": 256,
+        "compress": "deflate",
+    }
+    with rasterio.open(path, "w", **profile) as dst:
+        dst.write(data, 1)
+        dst.build_overviews([2, 4, 8, 16], Resampling.average)
+
+
+def viewport_tiles(rng: random.Random) -> List[Tuple[int, int, int]]:
+    """Tiles of one random 4x3 map viewport inside the city"""
+    z = rng.randint(11, 15)
+    lon = rng.uniform(BBOX[0], BBOX[2])
+    lat = rng.uniform(BBOX[1], BBOX[3])
+    x, y = lonlat_to_mercator(lon, lat)
+    tiles = sorted(tiles_covering((x, y, x, y), z))
+    cx, cy = tiles[0]
+    return [(z, cx + dx, cy + dy) for dx in range(-2, 2) for dy in range(-1, 2)]
+
+
+async def run_clients(
+    service: HeatmapTileService,
+    path: str,
+    clients: int,
+    views: int,
+    fmt: str,
+    seed: int,
+) -> Dict:
+    """Run `clients` concurrent map clients, each loading `views` viewports"""
+    latencies: List[float] = []
+
+    async def fetch(z: int, x: int, y: int) -> None:
+        start = time.perf_counter()
+        await asyncio.to_thread(service.get_tile, path, z, x, y, fmt)
+        latencies.append(time.perf_counter() - start)
+
+    async def client(client_id: int) -> None:
+        rng = random.Random(seed + client_id)
+        for _ in range(views):
+            await asyncio.gather(*(fetch(*tile) for tile in viewport_tiles(rng)))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "tiles": len(latencies),
+        "tiles_per_second": len(latencies) / elapsed,
+        "p50_ms": quantiles[49] * 1000,
+        "p95_ms": quantiles[94] * 1000,
+        "p99_ms": quantiles[98] * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark heatmap tile rendering")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--views", type=int, default=20, help="Viewports per client")
+    parser.add_argument("--format", default="png", choices=["png", "webp"])
+    parser.add_argument("--size", type=int, default=4096, help="Synthetic raster size")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "heatmap.tif")
+        create_heatmap(Path(path), args.size)
+
+        print(
+            f"{'clients':>8} {'pass':>5} {'tiles':>7} {'tiles/s':>9} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'hit rate':>9}"
+        )
+        for clients in args.clients:
+            service = HeatmapTileService()
+            for label in ("cold", "warm"):
+                result = asyncio.run(
+                    run_clients(service, path, clients, args.views, args.format, 0)
+                )
+                print(
+                    f"{clients:>8} {label:>5} {result['tiles']:>7} "
+                    f"{result['tiles_per_second']:>9.1f} {result['p50_ms']:>8.2f} "
+                    f"{result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} "
+                    f"{service.stats()['hit_rate']:>9.2%}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+Structured Logging Overhead Benchmark
+
+Measures what a log call costs the caller, synchronous vs queued (LOG_ASYNC),
+for the two hot paths that log the most:
+
+- api:   one INFO line with request fields per request
+- tiles: a DEBUG line per tile (filtered out at INFO) plus an INFO line per
+         tile, unsampled and with sample_every
+
+"caller" is the time spent inside the log calls (what a request handler or
+tile loop pays); "drained" adds the wait until the writer thread has written
+everything. Console output goes to /dev/null, the JSON file to a temp dir.
+
+The pipeline section puts the same log lines into the real code paths and
+reports time per request or tile with and without them:
+
+- api:   requests to /health/live through the FastAPI app (in process, no
+         network), with an access-log line per request
+- tiles: cold heatmap tile renders (HeatmapTileService) of a synthetic
+         GeoTIFF, with the two tile lines per tile
+
+The writer thread still formats every line in the same process, so on a
+machine with few cores the async gain here is smaller than the caller column
+suggests; render times also vary by a few percent between runs.
+
+Usage (from app/backend):
+    python -m benchmarks.bench_logging --calls 20000 --requests 2000 --tiles 300
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# shared/ lives in the project root
+project_root = str(Path(__file__).resolve().parents[3])
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from loguru import logger as loguru_logger
+
+from shared.utils import logger as structured
+
+
+def api_calls(log, calls: int) -> float:
+    start = time.perf_counter()
+    for i in range(calls):
+        log.info(
+            "{} {} -> {} in {:.1f} ms",
+            "GET",
+            "/api/cities/tunis/growth",
+            200,
+            12.5,
+            request_id=i,
+            client="10.0.0.7",
+        )
+    return time.perf_counter() - start
+
+
+def tile_calls(log, calls: int, sample_every: int = 0) -> float:
+    start = time.perf_counter()
+    for i in range(calls):
+        tile = (14, 8650 + i % 64, 6280 + i // 64)
+        log.debug("tile {} cache miss", tile)
+        log.info(
+            "tile {} rendered in {:.2f} ms", tile, 3.25, sample_every=sample_every, layer="growth"
+        )
+    return time.perf_counter() - start
+
+
+class BindPerCall:
+    """The previous implementation: bind() and write on every call"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def info(self, message: str, *args, sample_every: int = 0, **kwargs):
+        loguru_logger.bind(name=self.name, **kwargs).info(message, *args)
+
+    def debug(self, message: str, *args, **kwargs):
+        loguru_logger.bind(name=self.name, **kwargs).debug(message, *args)
+
+
+def logged_app(app, log):
+    """ASGI wrapper writing an access-log line per request (none if log is None)"""
+
+    async def wrapper(scope, receive, send):
+        start = time.perf_counter()
+        status = 0
+
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        await app(scope, receive, send_status)
+        if log is not None and scope["type"] == "http":
+            log.info(
+                "{} {} -> {} in {:.1f} ms",
+                scope["method"],
+                scope["path"],
+                status,
+                (time.perf_counter() - start) * 1000,
+                client=scope["client"][0] if scope.get("client") else None,
+            )
+
+    return wrapper
+
+
+async def api_requests(app, log, requests: int) -> float:
+    import httpx
+
+    transport = httpx.ASGITransport(app=logged_app(app, log))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get("/health/live")
+        start = time.perf_counter()
+        for _ in range(requests):
+            await client.get("/health/live")
+        return time.perf_counter() - start
+
+
+def bench_tiles(count: int) -> list:
+    """Distinct tiles of random viewports, as a map client would load them"""
+    from benchmarks.bench_heatmap_tiles import viewport_tiles
+
+    rng, tiles = random.Random(0), {}
+    while len(tiles) < count:
+        for tile in viewport_tiles(rng):
+            tiles[tile] = None
+    return list(tiles)[:count]
+
+
+def tile_renders(path: str, tiles: list, log) -> float:
+    from services.heatmap_tiles import HeatmapTileService
+
+    service = HeatmapTileService()
+    service.get_tile(path, *tiles[0])  # Open the file outside the timing
+    start = time.perf_counter()
+    for z, x, y in tiles[1:]:
+        tile_start = time.perf_counter()
+        if log is not None:
+            log.debug("tile {} cache miss", (z, x, y))
+        service.get_tile(path, z, x, y)
+        if log is not None:
+            log.info(
+                "tile {} rendered in {:.2f} ms",
+                (z, x, y),
+                (time.perf_counter() - tile_start) * 1000,
+                layer="growth",
+            )
+    return time.perf_counter() - start
+
+
+def measure_pipeline(label: str, body, log, units: int, baseline: float, out) -> float:
+    elapsed = body(log)
+    structured.flush(timeout=120)
+    per_unit = elapsed / units * 1e6
+    if log is None:
+        print(f"  {label:<28} {per_unit:9.1f} us", file=out)
+    else:
+        print(
+            f"  {label:<28} {per_unit:9.1f} us   {per_unit - baseline:+8.1f} us "
+            f"({(per_unit - baseline) / baseline:+.1%})",
+            file=out,
+        )
+    return per_unit
+
+
+def measure(label: str, body, log, calls: int, out):
+    start = time.perf_counter()
+    elapsed = body(log)
+    structured.flush(timeout=120)
+    drained = time.perf_counter() - start
+    print(
+        f"  {label:<28} caller {elapsed / calls * 1e6:7.2f} us/call   "
+        f"drained {drained / calls * 1e6:7.2f} us/call",
+        file=out,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--sample-every", type=int, default=256)
+    parser.add_argument("--requests", type=int, default=2000, help="API requests (0: skip)")
+    parser.add_argument("--tiles", type=int, default=300, help="Tiles rendered (0: skip)")
+    parser.add_argument("--size", type=int, default=2048, help="Synthetic raster size")
+    args = parser.parse_args()
+    # Only the structured logger is measured (httpx logs every request at INFO)
+    logging.disable(logging.INFO)
+
+    out = sys.stdout
+    # Handlers bind sys.stdout when they are added (first log call)
+    sys.stdout = open(os.devnull, "w")
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            log_file = str(Path(tmp) / "bench.log")
+            loggers = {
+                "bind per call (previous)": BindPerCall("bench"),
+                "sync": structured.setup_logger("bench", log_file=log_file, enqueue=False),
+                "async": structured.setup_logger("bench", log_file=log_file, enqueue=True),
+            }
+            # Handlers are set up by the first call, outside the timings
+            loggers["sync"].info("warm-up")
+
+            print(f"{args.calls} calls per run, level INFO", file=out)
+            scenarios = [
+                ("api", lambda log: api_calls(log, args.calls)),
+                ("tiles", lambda log: tile_calls(log, args.calls)),
+                (
+                    f"tiles, sample_every={args.sample_every}",
+                    lambda log: tile_calls(log, args.calls, args.sample_every),
+                ),
+            ]
+            for scenario, body in scenarios:
+                print(f"{scenario}:", file=out)
+                for label, log in loggers.items():
+                    if label.startswith("bind") and "sample" in scenario:
+                        continue
+                    measure(label, body, log, args.calls, out)
+
+            pipelines = []
+            if args.requests:
+                from api.main import app
+
+                pipelines.append(
+                    (
+                        f"api pipeline, per request ({args.requests} requests)",
+                        lambda log: asyncio.run(api_requests(app, log, args.requests)),
+                        args.requests,
+                    )
+                )
+            if args.tiles:
+                from benchmarks.bench_heatmap_tiles import create_heatmap
+
+                heatmap = str(Path(tmp) / "heatmap.tif")
+                create_heatmap(Path(heatmap), args.size)
+                tiles = bench_tiles(args.tiles + 1)
+                pipelines.append(
+                    (
+                        f"tile pipeline, per cold tile ({args.tiles} tiles)",
+                        lambda log: tile_renders(heatmap, tiles, log),
+                        args.tiles,
+                    )
+                )
+            for scenario, body, units in pipelines:
+                print(f"{scenario}:", file=out)
+                body(None)  # Warm-up: imports, page cache, first connections
+                baseline = measure_pipeline("no logging", body, None, units, 0.0, out)
+                for label, log in loggers.items():
+                    measure_pipeline(label, body, log, units, baseline, out)
+    finally:
+        sys.stdout.close()
+        sys.stdout = out
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+News Ingestion Benchmark
+
+Serves synthetic RSS feeds from a local stand-in server (with ETag /
+Last-Modified support and artificial latency) and compares:
+
+- serial fetching, one feed after another (the naive scraper)
+- one concurrent pass over all cities' feeds (NewsIngestor.fetch_all)
+- a second concurrent pass with stored validators (every feed answers 304)
+
+No database is needed; persistence and dedup are not part of the timing.
+
+Usage (from app/backend):
+    python -m benchmarks.bench_news_ingestion --cities 4 --latency 0.3
+"""
+
+import argparse
+import asyncio
+import hashlib
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+from services.news_ingestion import NewsIngestor, NewsSource, url_hash
+
+CITIES = ["Tunis", "Sfax", "Sousse", "Kairouan", "Bizerte", "Gabes", "Ariana", "Gafsa"]
+NOW = int(time.time())
+LAST_MODIFIED = formatdate(NOW - 3600, usegmt=True)
+
+
+def make_feed(path: str, items: int) -> bytes:
+    entries = "".join(
+        f"<item><title>{path} project {i}</title>"
+        # Tracking parameters make the same article look different across feeds
+        f"<link>https://news.example.org/articles/{i}?utm_source=feed{hash(path) % 3}</link>"
+        f"<description>New housing in {path.strip('/').split('/')[0]}</description>"
+        f"<pubDate>{formatdate(NOW - i * 3600, usegmt=True)}</pubDate></item>"
+        for i in range(items)
+    )
+    return (
+        f'<?xml version="1.0"?><rss version="2.0"><channel><title>{path}</title>'
+        f"{entries}</channel></rss>"
+    ).encode()
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    latency = 0.2
+    items = 20
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        body = make_feed(self.path, self.items)
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/rss+xml")
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FeedServer(ThreadingHTTPServer):
+    # The default backlog of 5 drops concurrent connects (1 s SYN retry)
+    request_queue_size = 128
+
+
+def start_server(latency: float, items: int) -> ThreadingHTTPServer:
+    FeedHandler.latency = latency
+    FeedHandler.items = items
+    server = FeedServer(("127.0.0.1", 0), FeedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def run(args) -> None:
+    server = start_server(args.latency, args.items)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    sources = [
+        NewsSource("Local news", base + "/{city}/rss"),
+        NewsSource("Municipality", base + "/{city}/council"),
+        NewsSource("Planning blog", base + "/blog/feed"),
+    ]
+    cities = CITIES[: args.cities]
+    urls: List[str] = list(
+        dict.fromkeys(source.url_for(city) for city in cities for source in sources)
+    )
+    ingestor = NewsIngestor(sources=sources)
+    print(
+        f"{len(cities)} cities x {len(sources)} sources = {len(urls)} distinct feeds, "
+        f"{args.latency * 1000:.0f} ms server latency"
+    )
+
+    start = time.perf_counter()
+    for url in urls:
+        await ingestor.fetch_feed(url)
+    serial = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = await ingestor.fetch_all(urls)
+    concurrent = time.perf_counter() - start
+
+    states: Dict[str, Dict] = {
+        r.url: {"etag": r.etag, "last_modified": r.last_modified} for r in results.values()
+    }
+    start = time.perf_counter()
+    revalidated = await ingestor.fetch_all(urls, states)
+    conditional = time.perf_counter() - start
+    await ingestor.aclose()
+    server.shutdown()
+
+    entries = [entry for r in results.values() for entry in r.entries]
+    unique = {url_hash(entry["url"]) for entry in entries}
+    print(f"\n{'pass':<36}{'seconds':>10}")
+    print("-" * 46)
+    print(f"{'serial fetch':<36}{serial:>10.2f}")
+    print(f"{'concurrent fetch (one pass)':<36}{concurrent:>10.2f}")
+    print(f"{'concurrent conditional re-fetch':<36}{conditional:>10.2f}")
+    print(
+        f"\nspeedup: {serial / concurrent:.1f}x; "
+        f"{sum(r.not_modified for r in revalidated.values())}/{len(urls)} feeds "
+        "answered 304 on re-fetch"
+    )
+    print(f"{len(entries)} entries parsed, {len(unique)} distinct after URL normalization")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="News ingestion benchmark")
+    parser.add_argument(
+        "--cities", type=int, default=4, help=f"Cities to refresh (max {len(CITIES)})"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.3, help="Stand-in server latency per request (s)"
+    )
+    parser.add_argument("--items", type=int, default=20, help="Articles per feed")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Scenario Generation Harness
+
+Drives N scenario generations through the scenario job handler
+(generate_scenario_job -> GeminiFlashService) against the local image
+backend, for each of several concurrency limits (the JOB_ASYNC_WORKERS
+setting), and reports throughput, latency percentiles and cost. No API key
+or network is needed, so concurrency limits can be tuned offline.
+
+The backend's latency is lognormal (--sigma) with transient failures
+(--failure-rate); --provider-limit makes it reject calls beyond that many in
+flight with 429, like the API's concurrency quota.
+
+Usage (from app/backend):
+    python -m benchmarks.bench_scenarios --scenarios 64 --concurrency 1,4,8,16
+    python -m benchmarks.bench_scenarios --latency 1.0 --sigma 0.6 --provider-limit 6
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_gemini_batch import make_tiles
+from services import job_handlers
+from services.gemini_flash_service import GeminiFlashService
+from services.generation_cache import GenerationCache
+from services.image_backends import LocalImageBackend
+
+POLICIES = ("EU_GREEN_CITIES", "TRANSIT_ORIENTED", "HERITAGE_PRESERVATION")
+
+
+async def run_level(requests, concurrency: int):
+    """All scenarios submitted at once, `concurrency` running at a time"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, service_times, failures = [], [], 0
+
+    async def one(index: int, request):
+        nonlocal failures
+        submitted = time.perf_counter()
+        async with semaphore:
+            started = time.perf_counter()
+            params = {
+                "source_city": "Benchmark City",
+                "target_policy": POLICIES[index % len(POLICIES)],
+                "source_image_path": request["source_image_path"],
+                "prompt": request["prompt"],
+                "edit_regions": request["edit_regions"],
+            }
+            try:
+                await job_handlers.generate_scenario_job(params, lambda *args: None)
+            except RuntimeError:
+                failures += 1
+                return
+            finally:
+                service_times.append(time.perf_counter() - started)
+        latencies.append(time.perf_counter() - submitted)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i, request) for i, request in enumerate(requests)))
+    return time.perf_counter() - start, latencies, service_times, failures
+
+
+def percentiles(values):
+    if len(values) < 2:
+        return (values[0],) * 3 if values else (float("nan"),) * 3
+    quantiles = statistics.quantiles(values, n=100)
+    return quantiles[49], quantiles[94], quantiles[98]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--scenarios", type=int, default=64)
+    parser.add_argument(
+        "--concurrency", default="1,4,8,16", help="Comma-separated concurrency limits"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.5, help="Median backend seconds per call"
+    )
+    parser.add_argument("--sigma", type=float, default=0.4, help="Lognormal sigma of the latency")
+    parser.add_argument("--failure-rate", type=float, default=0.03, help="Transient 503s per call")
+    parser.add_argument(
+        "--provider-limit", type=int, default=0, help="Calls in flight before 429 (0 = none)"
+    )
+    parser.add_argument("--tile-size", type=int, default=256)
+    args = parser.parse_args()
+    # Not recorded in the shared telemetry log
+    os.environ["GENERATION_TELEMETRY_ENABLED"] = "false"
+    logging.getLogger("services.gemini_flash_service").setLevel(logging.CRITICAL)
+    logging.getLogger("api.utils.resilience").setLevel(logging.CRITICAL)
+
+    levels = [int(level) for level in args.concurrency.split(",")]
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        requests = make_tiles(tmp, args.scenarios, args.tile_size)
+        # Jobs write to outputs/scenarios under the working directory
+        os.chdir(tmp)
+        try:
+            sweep(requests, levels, tmp, args)
+        finally:
+            os.chdir(cwd)
+
+
+def sweep(requests, levels, tmp: Path, args):
+    print(
+        f"{args.scenarios} scenarios, backend {args.latency:.2f}s median (sigma {args.sigma}), "
+        f"{args.failure_rate:.0%} failures, provider limit {args.provider_limit or 'none'}"
+    )
+    print(
+        f"{'workers':>7} {'wall s':>7} {'per s':>6} {'p50 s':>6} {'p95 s':>6} {'p99 s':>6} "
+        f"{'svc p99':>7} {'failed':>6} {'calls':>5} {'peak':>4} {'cost $':>7}"
+    )
+    for concurrency in levels:
+        backend = LocalImageBackend(
+            args.latency,
+            latency_sigma=args.sigma,
+            failure_rate=args.failure_rate,
+            max_concurrent=args.provider_limit,
+        )
+        # The job handler's service, pointed at the local backend (fresh cache per level)
+        service = GeminiFlashService(
+            backend=backend, cache=GenerationCache(str(tmp / f"cache-{concurrency}"))
+        )
+        job_handlers._gemini_service = service
+        elapsed, latencies, service_times, failures = asyncio.run(run_level(requests, concurrency))
+        p50, p95, p99 = percentiles(latencies)
+        stats = backend.stats()
+        print(
+            f"{concurrency:>7} {elapsed:>7.2f} {len(latencies) / elapsed:>6.2f} "
+            f"{p50:>6.2f} {p95:>6.2f} {p99:>6.2f} {percentiles(service_times)[2]:>7.2f} "
+            f"{failures:>6} {stats['calls']:>5} "
+            f"{stats['peak_in_flight']:>4} {service.total_cost:>7.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+API Startup Time Check
+
+Measures how long `import api.main` takes in a fresh interpreter (what a
+cold-started or reloaded worker pays before serving), prints the most
+expensive modules from `-X importtime`, and exits non-zero when startup
+exceeds the budget or a heavy ML/geo library is imported eagerly. Run it
+in CI to catch startup regressions.
+
+Usage (from app/backend):
+    python -m benchmarks.bench_startup --budget 1.5 --runs 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Must only be imported inside the code paths that use them
+HEAVY_MODULES = [
+    "torch",
+    "tensorflow",
+    "tflite_runtime",
+    "onnxruntime",
+    "ultralytics",
+    "xgboost",
+    "sklearn",
+    "cv2",
+    "numpy",
+    "pandas",
+    "geopandas",
+    "shapely",
+    "rasterio",
+    "pyproj",
+    "PIL",
+    "google.generativeai",
+    "langchain",
+    "langgraph",
+    "groq",
+]
+
+_TIMED_IMPORT = """
+import json, sys, time
+start = time.perf_counter()
+import api.main
+elapsed = time.perf_counter() - start
+heavy = json.loads(sys.argv[1])
+print(json.dumps({"seconds": elapsed, "heavy": [m for m in heavy if m in sys.modules]}))
+"""
+
+
+def _run(args: List[str]) -> subprocess.CompletedProcess:
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def measure_startup(runs: int) -> Tuple[List[float], List[str]]:
+    """Import api.main in fresh interpreters; returns timings and eager heavy modules"""
+    timings, heavy = [], set()
+    for _ in range(runs):
+        output = (
+            _run(["-c", _TIMED_IMPORT, json.dumps(HEAVY_MODULES)]).stdout.strip().splitlines()[-1]
+        )
+        result = json.loads(output)
+        timings.append(result["seconds"])
+        heavy.update(result["heavy"])
+    return timings, sorted(heavy)
+
+
+def import_profile() -> List[Tuple[str, int, int]]:
+    """(module, self_us, cumulative_us) for every module imported by api.main"""
+    stderr = _run(["-X", "importtime", "-c", "import api.main"]).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def by_package(rows: List[Tuple[str, int, int]]) -> Dict[str, int]:
+    """Self time summed per top-level package"""
+    totals: Dict[str, int] = defaultdict(int)
+    for name, self_us, _ in rows:
+        totals[name.split(".")[0]] += self_us
+    return dict(totals)
+
+
+def print_report(timings: List[float], rows: List[Tuple[str, int, int]], top: int) -> None:
+    print(
+        f"\nStartup: median {statistics.median(timings) * 1000:.0f} ms, "
+        f"min {min(timings) * 1000:.0f} ms over {len(timings)} runs "
+        f"({len(rows)} modules imported)"
+    )
+
+    print(f"\nTop {top} packages by self time:")
+    for package, self_us in sorted(by_package(rows).items(), key=lambda kv: -kv[1])[:top]:
+        print(f"  {self_us / 1000:8.1f} ms  {package}")
+
+    print(f"\nTop {top} modules by cumulative time:")
+    for name, _, cumulative_us in sorted(rows, key=lambda r: -r[2])[:top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API startup time check")
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=float(os.getenv("STARTUP_BUDGET_SECONDS", "2.0")),
+        help="Maximum median import time of api.main in seconds",
+    )
+    parser.add_argument("--runs", type=int, default=5, help="Fresh-interpreter imports to time")
+    parser.add_argument("--top", type=int, default=15, help="Rows per report table")
+    args = parser.parse_args()
+
+    timings, heavy = measure_startup(args.runs)
+    print_report(timings, import_profile(), args.top)
+
+    failures = []
+    median = statistics.median(timings)
+    if median > args.budget:
+        failures.append(f"startup {median:.2f}s exceeds budget {args.budget:.2f}s")
+    if heavy:
+        failures.append(f"heavy modules imported at startup: {', '.join(heavy)}")
+
+    if failures:
+        print("\nFAIL: " + "; ".join(failures))
+        sys.exit(1)
+    print(f"\nOK: startup {median:.2f}s within {args.budget:.2f}s budget, no heavy imports")
+
+
+if __name__ == "__main__":
+    main()
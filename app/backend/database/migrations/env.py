@@ -0,0 +1,67 @@
+"""
+Alembic environment
+
+Migrates the database at DATABASE_URL (api.models.session). Runs from the
+CLI (`alembic upgrade head` in app/backend) and from API startup
+(api.models.schema.upgrade_database).
+"""
+
+from logging.config import fileConfig
+
+from alembic import context
+
+from api.models.database import Base
+from api.models.session import DATABASE_URL, engine
+
+config = context.config
+
+# The API keeps its own logging setup when it runs the migrations
+if config.config_file_name is not None and config.attributes.get("configure_logging", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+# Any constant works; it only has to be the same for every worker
+MIGRATION_LOCK_ID = 734_211_029
+
+
+def run_migrations_offline() -> None:
+    """Emit the migration SQL instead of running it (alembic upgrade head --sql)"""
+    context.configure(
+        url=DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=DATABASE_URL.startswith("sqlite"),
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Run the migrations against the database"""
+    with engine.connect() as connection:
+        postgres = connection.dialect.name == "postgresql"
+        if postgres:
+            # Several API workers start at once; one migrates, the others wait
+            connection.exec_driver_sql(f"SELECT pg_advisory_lock({MIGRATION_LOCK_ID})")
+            connection.commit()  # The lock is held by the session, not the transaction
+        try:
+            context.configure(
+                connection=connection,
+                target_metadata=target_metadata,
+                # SQLite can't ALTER constraints; batch mode copies the table instead
+                render_as_batch=connection.dialect.name == "sqlite",
+            )
+            with context.begin_transaction():
+                context.run_migrations()
+        finally:
+            if postgres:
+                connection.exec_driver_sql(f"SELECT pg_advisory_unlock({MIGRATION_LOCK_ID})")
+                connection.commit()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,171 @@
+"""Baseline schema: cities, tiles, buildings, growth predictions, scenarios, news
+
+Databases created before migrations existed already have some or all of
+these tables; existing tables are left as they are.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("cities", "tiles", "buildings", "growth_predictions", "scenarios", "news_cache")
+
+
+def _created_at() -> sa.Column:
+    return sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False)
+
+
+def upgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "cities" not in existing:
+        op.create_table(
+            "cities",
+            sa.Column("id", sa.Uuid(), primary_key=True),
+            sa.Column("name", sa.String(100), nullable=False),
+            sa.Column("country", sa.String(100), nullable=False),
+            sa.Column("master_bbox", sa.JSON(), nullable=False),
+            sa.Column("expansion_zone_bbox", sa.JSON(), nullable=True),
+            sa.Column("population", sa.Integer(), nullable=True),
+            sa.Column("area_km2", sa.Float(), nullable=True),
+            _created_at(),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        )
+        op.create_index("ix_cities_id", "cities", ["id"])
+        op.create_index("ix_cities_name", "cities", ["name"], unique=True)
+
+    if "tiles" not in existing:
+        op.create_table(
+            "tiles",
+            sa.Column("id", sa.Uuid(), primary_key=True),
+            sa.Column("city_id", sa.Uuid(), sa.ForeignKey("cities.id"), nullable=False),
+            sa.Column("tile_id", sa.String(100), nullable=False),
+            sa.Column("row", sa.Integer(), nullable=False),
+            sa.Column("col", sa.Integer(), nullable=False),
+            sa.Column("bbox", sa.JSON(), nullable=False),
+            sa.Column("zoom_level", sa.Integer(), nullable=False),
+            sa.Column(
+                "status",
+                sa.Enum("PENDING", "DOWNLOADING", "COMPLETED", "FAILED", "ALIGNMENT_ERROR", name="tilestatus"),
+                nullable=False,
+            ),
+            sa.Column("alignment_verified", sa.Boolean(), nullable=False),
+            sa.Column("data_sources", sa.JSON(), nullable=True),
+            _created_at(),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        )
+        op.create_index("ix_tiles_id", "tiles", ["id"])
+        op.create_index("ix_tiles_city_id", "tiles", ["city_id"])
+        op.create_index("ix_tiles_tile_id", "tiles", ["tile_id"], unique=True)
+        op.create_index("ix_tiles_status", "tiles", ["status"])
+
+    if "buildings" not in existing:
+        op.create_table(
+            "buildings",
+            sa.Column("id", sa.Uuid(), primary_key=True),
+            sa.Column("city_id", sa.Uuid(), sa.ForeignKey("cities.id"), nullable=False),
+            sa.Column("tile_id", sa.Uuid(), sa.ForeignKey("tiles.id"), nullable=True),
+            sa.Column("geometry", sa.JSON(), nullable=False),
+            sa.Column(
+                "building_type",
+                sa.Enum("RESIDENTIAL", "COMMERCIAL", "INDUSTRIAL", "GOVERNMENT", "OTHER", name="buildingtype"),
+                nullable=True,
+            ),
+            sa.Column("building_type_confidence", sa.Float(), nullable=True),
+            sa.Column("height_meters", sa.Float(), nullable=True),
+            sa.Column("estimated_height", sa.Float(), nullable=True),
+            sa.Column("num_floors", sa.Integer(), nullable=True),
+            sa.Column("building_area_sqm", sa.Float(), nullable=True),
+            sa.Column("capacity_people", sa.Integer(), nullable=True),
+            sa.Column("capacity_workers", sa.Integer(), nullable=True),
+            sa.Column("year_detected", sa.Integer(), nullable=False),
+            sa.Column("detection_confidence", sa.Float(), nullable=True),
+            sa.Column("detection_model", sa.String(50), nullable=True),
+            _created_at(),
+        )
+        op.create_index("ix_buildings_id", "buildings", ["id"])
+        op.create_index("ix_buildings_city_id", "buildings", ["city_id"])
+        op.create_index("ix_buildings_tile_id", "buildings", ["tile_id"])
+        op.create_index("ix_buildings_building_type", "buildings", ["building_type"])
+
+    if "growth_predictions" not in existing:
+        op.create_table(
+            "growth_predictions",
+            sa.Column("id", sa.Uuid(), primary_key=True),
+            sa.Column("city_id", sa.Uuid(), sa.ForeignKey("cities.id"), nullable=False),
+            sa.Column("target_year", sa.Integer(), nullable=False),
+            sa.Column("base_year", sa.Integer(), nullable=False),
+            sa.Column("heatmap_path", sa.String(500), nullable=True),
+            sa.Column("heatmap_geojson", sa.JSON(), nullable=True),
+            sa.Column("population_forecast", sa.Integer(), nullable=True),
+            sa.Column("confidence_interval_low", sa.Integer(), nullable=True),
+            sa.Column("confidence_interval_high", sa.Integer(), nullable=True),
+            sa.Column("announced_projects", sa.JSON(), nullable=True),
+            sa.Column("news_analysis_date", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("model_version", sa.String(50), nullable=True),
+            sa.Column("prediction_confidence", sa.Float(), nullable=True),
+            _created_at(),
+        )
+        op.create_index("ix_growth_predictions_id", "growth_predictions", ["id"])
+        op.create_index("ix_growth_predictions_city_id", "growth_predictions", ["city_id"])
+        op.create_index("ix_growth_predictions_target_year", "growth_predictions", ["target_year"])
+
+    if "scenarios" not in existing:
+        op.create_table(
+            "scenarios",
+            sa.Column("id", sa.Uuid(), primary_key=True),
+            sa.Column("source_city_id", sa.Uuid(), sa.ForeignKey("cities.id"), nullable=False),
+            sa.Column("target_policy", sa.String(100), nullable=False),
+            sa.Column("reference_city", sa.String(100), nullable=True),
+            sa.Column("prompt", sa.Text(), nullable=False),
+            sa.Column("tile_id", sa.String(100), nullable=True),
+            sa.Column("edit_regions", sa.JSON(), nullable=False),
+            sa.Column("image_path", sa.String(500), nullable=True),
+            sa.Column("generation_status", sa.String(50), nullable=False),
+            sa.Column("generation_cost", sa.Float(), nullable=True),
+            sa.Column("api_provider", sa.String(50), nullable=True),
+            sa.Column("user_preferences", sa.JSON(), nullable=True),
+            sa.Column("ethics_score", sa.Float(), nullable=True),
+            sa.Column("ethics_review", sa.JSON(), nullable=True),
+            sa.Column("human_approved", sa.Boolean(), nullable=False),
+            _created_at(),
+        )
+        op.create_index("ix_scenarios_id", "scenarios", ["id"])
+        op.create_index("ix_scenarios_source_city_id", "scenarios", ["source_city_id"])
+        op.create_index("ix_scenarios_target_policy", "scenarios", ["target_policy"])
+
+    if "news_cache" not in existing:
+        op.create_table(
+            "news_cache",
+            sa.Column("id", sa.Uuid(), primary_key=True),
+            sa.Column("city_id", sa.Uuid(), sa.ForeignKey("cities.id"), nullable=False),
+            sa.Column("title", sa.String(500), nullable=False),
+            sa.Column("summary", sa.Text(), nullable=True),
+            sa.Column("url", sa.String(1000), nullable=False),
+            sa.Column("source", sa.String(200), nullable=True),
+            sa.Column("sentiment_score", sa.Float(), nullable=True),
+            sa.Column("projects_extracted", sa.JSON(), nullable=True),
+            sa.Column("published_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("scraped_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        )
+        op.create_index("ix_news_cache_id", "news_cache", ["id"])
+        op.create_index("ix_news_cache_city_id", "news_cache", ["city_id"])
+
+
+def downgrade() -> None:
+    for table in reversed(TABLES):
+        op.drop_table(table)
+    sa.Enum(name="buildingtype").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="tilestatus").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,72 @@
+"""Unique dedupe key among active jobs
+
+Two processes submitting the same job could both miss the other's pending
+row and insert a duplicate. Duplicates left by that race are failed first
+(a running job, else the oldest pending one, is kept per key) so the index
+can be built.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ACTIVE = sa.text("status IN ('PENDING', 'RUNNING')")
+
+
+def upgrade() -> None:
+    jobs = sa.table(
+        "jobs",
+        sa.column("id", sa.Uuid()),
+        sa.column("dedupe_key", sa.String()),
+        sa.column("status", sa.String()),
+        sa.column("error", sa.Text()),
+        sa.column("created_at", sa.DateTime(timezone=True)),
+        sa.column("finished_at", sa.DateTime(timezone=True)),
+    )
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(jobs.c.id, jobs.c.dedupe_key)
+        .where(jobs.c.dedupe_key.isnot(None), ACTIVE)
+        .order_by(jobs.c.dedupe_key, jobs.c.status.desc(), jobs.c.created_at)
+    ).all()
+    seen = set()
+    duplicates = []
+    for job_id, key in rows:
+        if key in seen:
+            duplicates.append(job_id)
+        seen.add(key)
+    if duplicates:
+        bind.execute(
+            jobs.update()
+            .where(jobs.c.id.in_(duplicates))
+            .values(
+                status="FAILED",
+                error="Duplicate of an identical active job",
+                finished_at=sa.func.now(),
+            )
+        )
+
+    op.create_index(
+        "uq_jobs_active_dedupe_key",
+        "jobs",
+        ["dedupe_key"],
+        unique=True,
+        postgresql_where=ACTIVE,
+        sqlite_where=ACTIVE,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_jobs_active_dedupe_key", table_name="jobs")
@@ -0,0 +1,28 @@
+"""Pre-encoded growth heatmap GeoJSON
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Filled when a prediction is stored; older rows are encoded on read
+    op.add_column("growth_predictions", sa.Column("heatmap_geojson_bytes", sa.LargeBinary(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("growth_predictions") as batch_op:
+        batch_op.drop_column("heatmap_geojson_bytes")
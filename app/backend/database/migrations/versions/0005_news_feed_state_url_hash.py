@@ -0,0 +1,82 @@
+"""News feed validators and URL-hash dedup of cached articles
+
+Backfills news_cache.url_hash from the stored URLs. Articles that turn out
+to be the same story under differently decorated URLs are collapsed to the
+first one scraped, so the unique constraint can be added.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from services.news_ingestion import url_hash
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    op.create_table(
+        "news_feed_state",
+        sa.Column("url", sa.String(1000), primary_key=True),
+        sa.Column("etag", sa.String(500), nullable=True),
+        sa.Column("last_modified", sa.String(100), nullable=True),
+        sa.Column("last_status", sa.Integer(), nullable=True),
+        sa.Column("last_fetched_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+    op.add_column("news_cache", sa.Column("url_hash", sa.String(64), nullable=True))
+    news = sa.table(
+        "news_cache",
+        sa.column("id", sa.Uuid()),
+        sa.column("city_id", sa.Uuid()),
+        sa.column("url", sa.String()),
+        sa.column("url_hash", sa.String()),
+        sa.column("scraped_at", sa.DateTime(timezone=True)),
+    )
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(news.c.id, news.c.city_id, news.c.url).order_by(news.c.scraped_at, news.c.id)
+    ).all()
+    seen = set()
+    updates = []
+    duplicates = []
+    for row in rows:
+        digest = url_hash(row.url)
+        if (row.city_id, digest) in seen:
+            duplicates.append(row.id)
+            continue
+        seen.add((row.city_id, digest))
+        updates.append({"row_id": row.id, "hash": digest})
+
+    for start in range(0, len(duplicates), BATCH_SIZE):
+        bind.execute(news.delete().where(news.c.id.in_(duplicates[start:start + BATCH_SIZE])))
+    update = (
+        news.update()
+        .where(news.c.id == sa.bindparam("row_id"))
+        .values(url_hash=sa.bindparam("hash"))
+    )
+    for start in range(0, len(updates), BATCH_SIZE):
+        bind.execute(update, updates[start:start + BATCH_SIZE])
+
+    with op.batch_alter_table("news_cache") as batch_op:
+        batch_op.alter_column("url_hash", existing_type=sa.String(64), nullable=False)
+        batch_op.create_unique_constraint("uq_news_cache_city_url_hash", ["city_id", "url_hash"])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("news_cache") as batch_op:
+        batch_op.drop_constraint("uq_news_cache_city_url_hash", type_="unique")
+        batch_op.drop_column("url_hash")
+    op.drop_table("news_feed_state")
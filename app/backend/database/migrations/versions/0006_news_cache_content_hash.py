@@ -0,0 +1,30 @@
+"""Extraction cache key on cached news articles
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing rows have no key; their extractions are simply not reused
+    op.add_column("news_cache", sa.Column("content_hash", sa.String(64), nullable=True))
+    op.create_index("ix_news_cache_content_hash", "news_cache", ["content_hash"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_news_cache_content_hash", table_name="news_cache")
+    with op.batch_alter_table("news_cache") as batch_op:
+        batch_op.drop_column("content_hash")
@@ -0,0 +1,40 @@
+"""Geocoding cache
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "geocode_cache",
+        sa.Column(
+            "city_id", sa.Uuid(), sa.ForeignKey("cities.id", ondelete="CASCADE"), primary_key=True
+        ),
+        sa.Column("address_key", sa.String(500), primary_key=True),
+        sa.Column("query", sa.String(500), nullable=False),
+        sa.Column("found", sa.Boolean(), nullable=False),
+        sa.Column("lat", sa.Float(), nullable=True),
+        sa.Column("lon", sa.Float(), nullable=True),
+        sa.Column("confidence", sa.Float(), nullable=True),
+        sa.Column("source", sa.String(50), nullable=True),
+        sa.Column("display_name", sa.String(500), nullable=True),
+        sa.Column("resolved_at", sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("geocode_cache")
@@ -0,0 +1,52 @@
+"""News feed validators per city
+
+Shared feeds are filtered per city, so one city's validators can't stand
+in for another's. The stored validators are dropped; every feed is fetched
+in full once.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _validator_columns() -> list:
+    return [
+        sa.Column("etag", sa.String(500), nullable=True),
+        sa.Column("last_modified", sa.String(100), nullable=True),
+        sa.Column("last_status", sa.Integer(), nullable=True),
+        sa.Column("last_fetched_at", sa.DateTime(timezone=True), nullable=True),
+    ]
+
+
+def upgrade() -> None:
+    op.drop_table("news_feed_state")
+    op.create_table(
+        "news_feed_state",
+        sa.Column(
+            "city_id", sa.Uuid(), sa.ForeignKey("cities.id", ondelete="CASCADE"), primary_key=True
+        ),
+        sa.Column("url", sa.String(1000), primary_key=True),
+        *_validator_columns(),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("news_feed_state")
+    op.create_table(
+        "news_feed_state",
+        sa.Column("url", sa.String(1000), primary_key=True),
+        *_validator_columns(),
+    )
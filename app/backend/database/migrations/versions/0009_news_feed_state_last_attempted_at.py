@@ -0,0 +1,31 @@
+"""Time of the last news feed fetch attempt, failed or not
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "news_feed_state",
+        sa.Column("last_attempted_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.execute("UPDATE news_feed_state SET last_attempted_at = last_fetched_at")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("news_feed_state") as batch_op:
+        batch_op.drop_column("last_attempted_at")
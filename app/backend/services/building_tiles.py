@@ -0,0 +1,428 @@
+"""
+Building footprint vector tiles (MVT) with an invalidating tile cache
+
+Cached tiles are addressed by versions kept in the response cache backend
+(shared by all workers when it is Redis): every tile depends on the
+version of its region, the REGION_ZOOM tile containing it, plus a
+city-wide one. Building changes are collected per session and bump the
+versions of the regions they touch after commit, so a render racing the
+write caches under a version that is already outdated.
+"""
+
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from api.models.database import Building
+from api.utils.cache import LRUCache
+from api.utils.mvt import DEFAULT_EXTENT, LayerBuilder, encode_tile
+from api.utils.response_cache import response_cache
+from api.utils.tiles import (
+    EARTH_RADIUS,
+    MAX_LATITUDE,
+    Bounds,
+    lonlat_to_mercator,
+    tile_bounds,
+    tile_size_meters,
+    tiles_covering,
+)
+
+logger = logging.getLogger(__name__)
+
+LAYER_NAME = "buildings"
+MIN_ZOOM = 12  # Below this a tile would hold most of a city; serve empty tiles
+MAX_ZOOM = 20
+TILE_BUFFER = 64  # Tile-coordinate units of overlap so strokes don't seam at edges
+SIMPLIFY_PIXELS = 1.0  # Simplification tolerance in tile-coordinate units
+REGION_ZOOM = MIN_ZOOM  # Invalidation granularity: tiles of this zoom (~10 km)
+
+
+def tile_entities(city_id, z: int, x: int, y: int) -> List[str]:
+    """
+    Response cache entities a tile depends on
+
+    The city's buildings (for the spatial index), all of its tiles, and the
+    tile's region. Pass their versions to BuildingTileService.get_tile.
+    """
+    shift = max(0, z - REGION_ZOOM)
+    return [
+        f"buildings:{city_id}",
+        f"building_tiles:{city_id}",
+        f"building_tiles:{city_id}:{x >> shift}:{y >> shift}",
+    ]
+
+
+def _shapely():
+    # shapely is imported lazily to keep API startup light
+    import shapely
+    from shapely import geometry
+
+    return shapely, geometry
+
+
+def geometry_from_json(value: Any):
+    """
+    Build a shapely geometry from a Building.geometry JSON value
+
+    Accepts a GeoJSON geometry dict or bare Polygon coordinates.
+    """
+    _, geometry = _shapely()
+    if isinstance(value, dict):
+        if value.get("type") == "Feature":
+            value = value.get("geometry") or {}
+        return geometry.shape(value)
+    if value and isinstance(value[0][0], (int, float)):
+        return geometry.Polygon(value)
+    return geometry.Polygon(value[0], value[1:])
+
+
+def geometry_to_geojson(value: Any) -> Optional[Dict]:
+    """
+    GeoJSON geometry dict for a Building.geometry JSON value
+
+    Geometry dicts are returned as they are; bare coordinates go through
+    geometry_from_json.
+    """
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        if value.get("type") == "Feature":
+            return value.get("geometry")
+        return value
+    _, geometry = _shapely()
+    return geometry.mapping(geometry_from_json(value))
+
+
+def _to_mercator(geom):
+    shapely, _ = _shapely()
+    import numpy as np
+
+    def project(coords):
+        lon = np.radians(coords[:, 0])
+        lat = np.radians(np.clip(coords[:, 1], -MAX_LATITUDE, MAX_LATITUDE))
+        x = lon * EARTH_RADIUS
+        y = np.log(np.tan(np.pi / 4 + lat / 2)) * EARTH_RADIUS
+        return np.column_stack((x, y))
+
+    return shapely.transform(geom, project)
+
+
+def _geometry_bounds_mercator(value: Any) -> Optional[Bounds]:
+    """Web Mercator bounds of a Building.geometry JSON value"""
+    try:
+        minx, miny, maxx, maxy = geometry_from_json(value).bounds
+    except Exception:
+        return None
+    x0, y0 = lonlat_to_mercator(minx, miny)
+    x1, y1 = lonlat_to_mercator(maxx, maxy)
+    return x0, y0, x1, y1
+
+
+class _CityIndex:
+    """Projected building footprints of one city with a spatial index"""
+
+    def __init__(self, geometries: List[Any], properties: List[Dict]):
+        shapely, _ = _shapely()
+        self.geometries = geometries
+        self.properties = properties
+        self.tree = shapely.STRtree(geometries)
+
+    def query(self, bounds: Bounds) -> Iterable[int]:
+        _, geometry = _shapely()
+        return self.tree.query(geometry.box(*bounds))
+
+
+class BuildingTileService:
+    """
+    Renders building footprints as Mapbox Vector Tiles
+
+    Tiles are clipped to a buffered tile box, simplified to the tile
+    resolution and quantized to the tile extent. Rendered tiles are kept in
+    an in-memory LRU and, if `cache_dir` is set, on disk, keyed by the
+    versions of tile_entities(); entries of older versions age out.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_memory_bytes: int = 64 * 1024 * 1024,
+        extent: int = DEFAULT_EXTENT,
+    ):
+        """
+        Initialize tile service
+
+        Args:
+            cache_dir: Optional directory for the on-disk tile cache
+            max_memory_bytes: Size bound of the in-memory tile cache
+            extent: MVT tile extent
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.extent = extent
+        self._tiles = LRUCache(max_entries=100_000, max_bytes=max_memory_bytes)
+        self._indexes: Dict[str, Tuple[int, _CityIndex]] = {}
+        self._index_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def get_tile(
+        self, db: Session, city_id, z: int, x: int, y: int, versions: Sequence[int] = (0, 0, 0)
+    ) -> bytes:
+        """
+        Get an encoded MVT tile for a city, rendering it on cache miss
+
+        Args:
+            db: Database session
+            city_id: City UUID
+            z, x, y: Tile address
+            versions: Versions of tile_entities(city_id, z, x, y), read
+                before this call
+
+        Returns:
+            Protobuf tile bytes (empty for tiles without buildings)
+        """
+        if z < MIN_ZOOM:
+            return b""
+
+        index_version, *tile_version = versions
+        key = (str(city_id), z, x, y, ".".join(str(v) for v in tile_version))
+        tile = self._tiles.get(key)
+        if tile is not None:
+            return tile
+
+        tile = self._read_disk(key)
+        if tile is None:
+            tile = self.render_tile(self._get_index(db, city_id, index_version), z, x, y)
+            self._write_disk(key, tile)
+        self._tiles.set(key, tile)
+        return tile
+
+    def render_tile(self, index: Optional[_CityIndex], z: int, x: int, y: int) -> bytes:
+        """Clip, simplify, quantize and encode the buildings of one tile"""
+        layer = LayerBuilder(LAYER_NAME, self.extent)
+        if index is None:
+            return encode_tile([layer])
+
+        minx, miny, maxx, maxy = tile_bounds(z, x, y)
+        size = tile_size_meters(z)
+        scale = self.extent / size
+        buffer = TILE_BUFFER / scale
+        clip_bounds = (minx - buffer, miny - buffer, maxx + buffer, maxy + buffer)
+        tolerance = SIMPLIFY_PIXELS / scale
+
+        _, geometry = _shapely()
+        clip_box = geometry.box(*clip_bounds)
+
+        for i in sorted(index.query(clip_bounds)):
+            geom = index.geometries[i]
+            if not geom.within(clip_box):
+                geom = geom.intersection(clip_box)
+            if geom.is_empty:
+                continue
+            geom = geom.simplify(tolerance, preserve_topology=True)
+            polygons = [
+                [
+                    self._quantize(ring.coords, minx, maxy, scale)
+                    for ring in (p.exterior, *p.interiors)
+                ]
+                for p in _polygons_of(geom)
+            ]
+            layer.add_polygons(polygons, index.properties[i])
+
+        return encode_tile([layer])
+
+    def dirty_entities(self, city_id, geometries: Iterable[Any]) -> Set[str]:
+        """
+        Entities to bump when buildings with these geometries change
+
+        The regions intersecting each geometry, buffered by the widest tile
+        margin (tiles are clipped to a buffered box, so a tile also changes
+        when only its TILE_BUFFER margin intersects a building). A geometry
+        without bounds invalidates every tile of the city.
+        """
+        buffer = TILE_BUFFER * tile_size_meters(REGION_ZOOM) / self.extent
+        entities = set()
+        for value in geometries:
+            bounds = _geometry_bounds_mercator(value) if value is not None else None
+            if bounds is None:
+                entities.add(f"building_tiles:{city_id}")
+                continue
+            buffered = (
+                bounds[0] - buffer,
+                bounds[1] - buffer,
+                bounds[2] + buffer,
+                bounds[3] + buffer,
+            )
+            for x, y in tiles_covering(buffered, REGION_ZOOM):
+                entities.add(f"building_tiles:{city_id}:{x}:{y}")
+        return entities
+
+    def invalidate_city(self, city_id) -> None:
+        """Drop every cached tile of a city in this process (and on disk)"""
+        city_key = str(city_id)
+        with self._index_lock:
+            self._indexes.pop(city_key, None)
+        for key in self._tiles.keys():
+            if key[0] == city_key:
+                self._tiles.pop(key)
+        if self.cache_dir is not None:
+            import shutil
+
+            shutil.rmtree(self.cache_dir / LAYER_NAME / city_key, ignore_errors=True)
+
+    def stats(self) -> Dict:
+        """Get tile cache statistics"""
+        return {**self._tiles.stats(), "indexed_cities": len(self._indexes)}
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _get_index(self, db: Session, city_id, version: int = 0) -> Optional[_CityIndex]:
+        city_key = str(city_id)
+        cached = self._indexes.get(city_key)
+        # An index at least as new as the caller's view of the buildings will do
+        if cached is not None and cached[0] >= version:
+            return cached[1]
+
+        rows = (
+            db.query(
+                Building.id,
+                Building.geometry,
+                Building.building_type,
+                Building.estimated_height,
+                Building.num_floors,
+                Building.year_detected,
+            )
+            .filter(Building.city_id == city_id)
+            .all()
+        )
+        geometries, properties = [], []
+        for row in rows:
+            try:
+                geom = _to_mercator(geometry_from_json(row.geometry))
+            except Exception as e:
+                logger.warning(f"Skipping building {row.id} with invalid geometry: {e}")
+                continue
+            if geom.is_empty:
+                continue
+            geometries.append(geom)
+            properties.append(
+                {
+                    "id": str(row.id),
+                    "building_type": row.building_type.value if row.building_type else None,
+                    "height": row.estimated_height,
+                    "floors": row.num_floors,
+                    "year": row.year_detected,
+                }
+            )
+
+        index = _CityIndex(geometries, properties) if geometries else None
+        with self._index_lock:
+            self._indexes[city_key] = (version, index)
+        if index is not None:
+            logger.info(f"Indexed {len(geometries)} buildings for tiles of city {city_key}")
+        return index
+
+    def _quantize(self, coords, minx: float, maxy: float, scale: float) -> List[Tuple[int, int]]:
+        return [
+            (int(round((px - minx) * scale)), int(round((maxy - py) * scale))) for px, py in coords
+        ]
+
+    def _disk_path(self, key: Tuple) -> Optional[Path]:
+        if self.cache_dir is None:
+            return None
+        city_key, z, x, y, version = key
+        return self.cache_dir / LAYER_NAME / city_key / str(z) / str(x) / f"{y}.{version}.mvt"
+
+    def _read_disk(self, key: Tuple) -> Optional[bytes]:
+        path = self._disk_path(key)
+        if path is None or not path.exists():
+            return None
+        try:
+            return path.read_bytes()
+        except OSError:
+            return None
+
+    def _write_disk(self, key: Tuple, tile: bytes) -> None:
+        path = self._disk_path(key)
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(tile)
+            os.replace(tmp_path, path)
+            # Older versions of the tile can't be requested again
+            for stale in path.parent.glob(f"{key[3]}.*.mvt"):
+                if stale != path:
+                    stale.unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning(f"Could not write tile cache file {path}: {e}")
+
+
+def _polygons_of(geom) -> List[Any]:
+    """Flatten a clipped geometry to its polygon parts"""
+    if geom.geom_type == "Polygon":
+        return [geom]
+    if geom.geom_type in ("MultiPolygon", "GeometryCollection"):
+        parts = []
+        for part in geom.geoms:
+            parts.extend(_polygons_of(part))
+        return parts
+    return []
+
+
+# =============================================================================
+# Shared instance and cache invalidation
+# =============================================================================
+
+building_tile_service = BuildingTileService(cache_dir=os.getenv("TILE_CACHE_DIR"))
+
+_PENDING_KEY = "building_tile_invalidations"
+
+
+@event.listens_for(Building.geometry, "set", active_history=True)
+@event.listens_for(Building.city_id, "set", active_history=True)
+def _on_building_assigned(target: Building, value, oldvalue, initiator) -> None:
+    # active_history loads the previous value of an expired attribute on
+    # assignment, so the flush knows which tiles it used to cover
+    pass
+
+
+def _building_tile_entities(building: Building) -> Set[str]:
+    state = inspect(building)
+    loaded = state.dict  # Deleted rows can't be loaded any more; use what is there
+    geometries = [loaded.get("geometry"), *(state.attrs.geometry.history.deleted or [])]
+    city_ids = {loaded.get("city_id"), *(state.attrs.city_id.history.deleted or [])}
+    entities = set()
+    # Moved to another city: its tiles in the old city are stale too
+    for city_id in city_ids - {None}:
+        entities |= building_tile_service.dirty_entities(city_id, geometries)
+    return entities
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_dirty_tiles(session: Session, flush_context) -> None:
+    pending = session.info.setdefault(_PENDING_KEY, set())
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, Building):
+            pending.update(_building_tile_entities(instance))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_dirty_tiles(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        response_cache.invalidate_nowait(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_dirty_tiles(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
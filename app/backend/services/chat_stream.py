@@ -0,0 +1,88 @@
+"""
+Streaming runner for multi-agent chat
+
+The orchestrator runs in its own task and feeds a bounded queue that the
+response drains. When the client reads slowly the queue fills up and the
+orchestrator blocks on put(), so the agents pause rather than buffering
+without limit. When the consumer stops (client disconnected, overall
+timeout), the task is cancelled, which cancels the agent step and LLM call
+in flight.
+"""
+
+import asyncio
+import logging
+import os
+from typing import AsyncIterator, Optional
+
+from agents.orchestrator import EVENT_ERROR, ChatEvent
+
+logger = logging.getLogger(__name__)
+
+# Events buffered between the orchestrator and a slow client
+CHAT_STREAM_BUFFER = int(os.getenv("CHAT_STREAM_BUFFER", "64"))
+
+# Idle interval after which a heartbeat (None) is yielded
+HEARTBEAT_SECONDS = 15.0
+
+_DONE = object()
+
+
+async def run_chat(
+    events: AsyncIterator[ChatEvent],
+    timeout: float,
+    buffer: int = CHAT_STREAM_BUFFER,
+    heartbeat: float = HEARTBEAT_SECONDS,
+) -> AsyncIterator[Optional[ChatEvent]]:
+    """
+    Drive an orchestrator event stream with backpressure, timeout and cancellation
+
+    Args:
+        events: Orchestrator event stream
+        timeout: Overall deadline in seconds; an error event is emitted when hit
+        buffer: Maximum events queued ahead of the consumer
+        heartbeat: Seconds without events before yielding None
+
+    Yields:
+        Events, or None as a heartbeat while the agents are busy. Closing the
+        iterator early cancels the orchestrator.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=buffer)
+
+    async def produce() -> None:
+        try:
+            async for event in events:
+                await queue.put(event)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception(f"Chat orchestrator failed: {e}")
+            await queue.put(
+                ChatEvent(EVENT_ERROR, {"detail": f"Chat failed: {e}", "code": "failed"})
+            )
+        await queue.put(_DONE)
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                logger.warning(f"Chat run timed out after {timeout:g}s")
+                yield ChatEvent(
+                    EVENT_ERROR, {"detail": f"Chat timed out after {timeout:g}s", "code": "timeout"}
+                )
+                return
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=min(heartbeat, remaining))
+            except asyncio.TimeoutError:
+                yield None
+                continue
+            if event is _DONE:
+                return
+            yield event
+    finally:
+        if not producer.done():
+            # Client went away or deadline hit: stop the agents
+            producer.cancel()
+            logger.info("Cancelled chat run")
@@ -2,58 +2,255 @@
 
 import asyncio
 import base64
+import functools
 import os
+import threading
 import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Callable, Dict, List, Optional
 
-from PIL import Image
+from agents.orchestrator import load_agent_config
+from api.utils.admission import TokenBucket
+from api.utils.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    LatencyTracker,
+    backoff_delay,
+    is_retryable,
+)
+from services.generation_cache import (
+    GenerationCache,
+    create_generation_cache,
+    digest_bytes,
+    request_key,
+)
+from services.generation_telemetry import GenerationTelemetry, get_generation_telemetry
+from services.image_backends import ImageEditBackend, create_image_backend
+from services.region_crop import (
+    CROP_MARGIN,
+    REGION_CROP_MODE,
+    composite_bytes,
+    crop_bytes,
+    crop_prompt,
+    image_size,
+    plan_crop,
+)
+from services.reference_cache import ReferenceImageCache, create_reference_cache
 
-try:
-    import google.generativeai as genai
-except ImportError:
-    genai = None
+# PIL and google-generativeai (in services.image_backends) are imported on
+# first use: they take longer to import than the rest of the API combined and
+# most workers never need them.
+# Images are passed to the model as encoded bytes; PIL is only needed to
+# crop, composite or identify unusual formats.
 
 import logging
 logger = logging.getLogger(__name__)
 
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "4"))
+GEMINI_RPM = float(os.getenv("GEMINI_RPM", "60"))
+
+# Tail latency: per-call timeout, overall deadline of a retried edit, circuit
+# breaker, and hedging (a second call when the first outlasts the p95)
+GEMINI_CALL_TIMEOUT = float(os.getenv("GEMINI_CALL_TIMEOUT", "120"))
+GEMINI_DEADLINE = float(os.getenv("GEMINI_DEADLINE", "300"))
+GEMINI_BREAKER_FAILURES = int(os.getenv("GEMINI_BREAKER_FAILURES", "5"))
+GEMINI_BREAKER_RESET = float(os.getenv("GEMINI_BREAKER_RESET", "30"))
+GEMINI_HEDGE = os.getenv("GEMINI_HEDGE", "false").lower() in ("1", "true", "yes")
+GEMINI_HEDGE_PERCENTILE = float(os.getenv("GEMINI_HEDGE_PERCENTILE", "95"))
+# Threads for model calls; timed-out and hedged calls hold one until they return
+GEMINI_CALL_WORKERS = int(os.getenv("GEMINI_CALL_WORKERS", "32"))
+
+# Threads for image decode/encode and file I/O (kept off the event loop)
+GEMINI_IO_WORKERS = int(os.getenv("GEMINI_IO_WORKERS", "4"))
+
+# Written in chunks so large images don't go out in one huge syscall
+WRITE_CHUNK_SIZE = 1024 * 1024
+
+_IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF8", "image/gif"),
+)
+_EXTENSIONS = {
+    "image/png": ".png",
+    "image/jpeg": ".jpg",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+}
+
+
+def sniff_mime_type(data: bytes) -> Optional[str]:
+    """MIME type of encoded image bytes, from their signature"""
+    for signature, mime_type in _IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return mime_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def _to_png(data: bytes) -> bytes:
+    """Re-encode an image the model may not accept as PNG"""
+    import io
+
+    from PIL import Image
+
+    output = io.BytesIO()
+    with Image.open(io.BytesIO(data)) as image:
+        image.save(output, format="PNG")
+    return output.getvalue()
+
+
+def _image_part(data: bytes) -> Dict:
+    """Inline image part for generate_content (sync; may re-encode)"""
+    mime_type = sniff_mime_type(data)
+    if mime_type is None:
+        data, mime_type = _to_png(data), "image/png"
+    return {'mime_type': mime_type, 'data': data}
+
+
+def _write_file(path: Path, data: bytes) -> None:
+    """Write through a temporary file so readers never see a partial image"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    view = memoryview(data)
+    with open(tmp_path, 'wb') as f:
+        for offset in range(0, len(view), WRITE_CHUNK_SIZE):
+            f.write(view[offset:offset + WRITE_CHUNK_SIZE])
+    os.replace(tmp_path, path)
+
+
+class CostBudget:
+    """
+    Hard USD limit shared by concurrent requests
+
+    Cost is reserved before a request is sent and released if it fails, so
+    in-flight requests can never overshoot the limit together.
+    """
+    
+    def __init__(self, limit_usd: float):
+        self.limit_usd = limit_usd
+        self.spent_usd = 0.0
+        self.reserved_usd = 0.0
+        self._lock = threading.Lock()
+    
+    def reserve(self, amount: float) -> bool:
+        """Reserve `amount` if it fits in the remaining budget"""
+        with self._lock:
+            if self.spent_usd + self.reserved_usd + amount > self.limit_usd + 1e-9:
+                return False
+            self.reserved_usd += amount
+            return True
+    
+    def commit(self, amount: float) -> None:
+        """Turn a reservation into spending"""
+        with self._lock:
+            self.reserved_usd -= amount
+            self.spent_usd += amount
+    
+    def release(self, amount: float) -> None:
+        """Drop a reservation (the request was not billed)"""
+        with self._lock:
+            self.reserved_usd -= amount
+    
+    @property
+    def remaining_usd(self) -> float:
+        with self._lock:
+            return self.limit_usd - self.spent_usd - self.reserved_usd
+
+
+def default_batch_budget() -> float:
+    """USD limit of a batch: orchestrator cost_check.max_cost_auto_approve"""
+    try:
+        edges = load_agent_config().get("orchestrator", {}).get("conditional_edges", {})
+        return float(edges.get("cost_check", {}).get("max_cost_auto_approve", 5.0))
+    except (OSError, ImportError, ValueError) as e:
+        logger.warning(f"Using the default batch budget ({e})")
+        return 5.0
+
 
 class GeminiFlashService:
     """
     Google Gemini 2.5 Flash (NanoBanana) integration
     Supports pixel-precise regional image editing
     """
-    
-    def __init__(self, api_key: Optional[str] = None):
+
+    # Part of the cache key: changing them changes the output
+    GENERATION_SETTINGS = {
+        'temperature': 0.4,  # Lower for consistency
+        'candidate_count': 1,
+        'max_output_tokens': 2048,
+    }
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        cache: Optional[GenerationCache] = None,
+        backend: Optional[ImageEditBackend] = None,
+        reference_cache: Optional[ReferenceImageCache] = None,
+        hedge: bool = GEMINI_HEDGE,
+        telemetry: Optional[GenerationTelemetry] = None,
+    ):
         """
         Initialize Gemini Flash service
         
         Args:
             api_key: Gemini API key (if None, reads from environment)
+            cache: Result cache (configured from the environment if None)
+            backend: Image editing model (IMAGE_EDIT_BACKEND if None: Gemini,
+                or the local stand-in for benchmarks and offline runs)
+            reference_cache: Encoded reference images (configured from the
+                environment if None)
+            hedge: Send a second request when a call outlasts the p95 latency
+                (the hedge is billed too)
+            telemetry: Persistent per-call log (the process-wide one if None)
         """
-        self.api_key = api_key or os.getenv("GEMINI_API_KEY")
-        
-        if not self.api_key:
-            raise ValueError("GEMINI_API_KEY not provided")
-        
-        if genai is None:
-            raise ImportError("google-generativeai package not installed")
-        
-        # Configure Gemini
-        genai.configure(api_key=self.api_key)
-        
-        # Initialize model
-        self.model_name = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
-        self.model = genai.GenerativeModel(self.model_name)
-        
-        # Cost tracking
+        self.backend = backend if backend is not None else create_image_backend(api_key)
+        self.model_name = self.backend.model_name
+
+        # Cost tracking (this instance; telemetry persists across workers and restarts)
+        self.telemetry = telemetry if telemetry is not None else get_generation_telemetry()
         self.total_cost = 0.0
         self.request_count = 0
-        self.cost_per_request = 0.039  # USD (Gemini 2.5 Flash pricing)
-        
+        self.cost_per_request = self.backend.cost_per_request
+        self.cache_hits = 0
+        self.hedged_requests = 0
+
+        # Fail fast while Gemini is degraded; latencies set the hedge delay
+        self.breaker = CircuitBreaker("gemini", GEMINI_BREAKER_FAILURES, GEMINI_BREAKER_RESET)
+        self.latency = LatencyTracker()
+        self.hedge = hedge
+
+        # Identical requests are answered from disk at no cost
+        self.cache = cache if cache is not None else create_generation_cache()
+        # Reference cities are decoded and encoded once, not per request
+        self.reference_cache = (
+            reference_cache if reference_cache is not None else create_reference_cache()
+        )
+
+        self._io_executor = ThreadPoolExecutor(
+            max_workers=GEMINI_IO_WORKERS, thread_name_prefix="gemini-io"
+        )
+        # generate_content blocks; abandoned calls must not starve the default executor
+        self._call_executor = ThreadPoolExecutor(
+            max_workers=GEMINI_CALL_WORKERS, thread_name_prefix="gemini-call"
+        )
+
+        # Largest image sent to the model (image_editor.image_processing.max_input_size)
+        self.max_input_size = (2048, 2048)
+        try:
+            processing = load_agent_config().get("image_editor", {}).get("image_processing", {})
+            self.max_input_size = tuple(
+                int(v) for v in processing.get("max_input_size", self.max_input_size)
+            )
+        except (OSError, ImportError, ValueError) as e:
+            logger.warning(f"Using the default max input size ({e})")
+
         logger.info(f"Initialized Gemini Flash service with model: {self.model_name}")
-    
+
     async def edit_image(
         self,
         source_image_path: str,
@@ -61,151 +258,407 @@ class GeminiFlashService:
         edit_regions: List[Dict],
         reference_image_path: Optional[str] = None,
         output_dir: str = "outputs/scenarios",
+        budget: Optional[CostBudget] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        region_crop: str = REGION_CROP_MODE,
+        timeout: float = GEMINI_CALL_TIMEOUT,
+        tags: Optional[Dict] = None,
     ) -> Dict:
         """
         Edit specific regions of satellite image using Gemini 2.5 Flash
         
+        Results are cached by the content of the images and the request, so
+        repeating a request returns the stored image with cost 0.
+        
+        In region crop mode only the union of the edit regions plus a margin
+        is sent (downscaled to max_input_size), and the edited crop is
+        blended back into the full tile.
+        
         Args:
             source_image_path: Path to source city tile
             prompt: Detailed editing instructions with pixel coordinates
             edit_regions: List of {x1, y1, x2, y2, action, spec}
             reference_image_path: Optional reference city image
             output_dir: Directory to save generated images
+            budget: Cost limit to charge (the call is skipped if it doesn't fit)
+            rate_limiter: Token bucket taken from before the API call
+            region_crop: "auto" (crop when the regions cover at most half the
+                tile), "always" or "off" (default: GEMINI_REGION_CROP, off)
+            timeout: Seconds to wait for the model
+            tags: {policy, city} recorded with the call's telemetry
         
         Returns:
             {
                 'image_path': path to generated image,
                 'cost': API cost in USD,
                 'generation_time': seconds,
-                'status': 'success'|'failed',
-                'error': error message if failed
+                'status': 'success'|'failed'|'skipped',
+                'cached': whether the result came from the cache,
+                'crop': {box, scale, input_pixels, full_pixels} if cropped,
+                'error': error message if failed,
+                'retryable': whether a failed edit may succeed if retried
             }
         """
+        usage = {'calls': 0, 'upload_bytes': 0, 'output_bytes': 0}
+        result = await self._edit_image(
+            source_image_path, prompt, edit_regions, reference_image_path,
+            output_dir, budget, rate_limiter, region_crop, timeout, usage,
+        )
+        if self.telemetry is not None:
+            tags = tags or {}
+            self.telemetry.record(
+                outcome=result['status'],
+                cost_usd=usage['calls'] * self.cost_per_request,
+                latency_s=result['generation_time'],
+                cached=result.get('cached', False),
+                calls=usage['calls'],
+                upload_bytes=usage['upload_bytes'],
+                output_bytes=usage['output_bytes'],
+                model=self.model_name,
+                policy=tags.get('policy'),
+                city=tags.get('city'),
+            )
+        return result
+
+    async def _edit_image(
+        self,
+        source_image_path: str,
+        prompt: str,
+        edit_regions: List[Dict],
+        reference_image_path: Optional[str],
+        output_dir: str,
+        budget: Optional[CostBudget],
+        rate_limiter: Optional[TokenBucket],
+        region_crop: str,
+        timeout: float,
+        usage: Dict,
+    ) -> Dict:
+        """edit_image without telemetry; fills `usage` with billed calls and payload sizes"""
         logger.info(f"Starting image editing for: {source_image_path}")
         logger.info(f"Edit regions: {len(edit_regions)}")
-        
+
         start_time = time.time()
-        
+        reserved = False
+
         try:
-            # Load source image
-            source_image = Image.open(source_image_path)
-            logger.info(f"Loaded source image: {source_image.size}")
-            
+            source_bytes = await self._run_io(Path(source_image_path).read_bytes)
+            reference_digest = None
+            if reference_image_path:
+                reference_digest = await self._run_io(
+                    self.reference_cache.digest, reference_image_path
+                )
+
+            cache_key = await self._run_io(
+                self._cache_key, source_bytes, prompt, edit_regions, reference_digest, region_crop
+            )
+            cached = await self._cached_result(cache_key, output_dir, start_time)
+            if cached is not None:
+                return cached
+
+            # Don't spend budget or rate on a call the breaker would reject
+            self.breaker.check()
+
+            if budget is not None:
+                reserved = budget.reserve(self.cost_per_request)
+                if not reserved:
+                    logger.warning(
+                        f"Skipping {source_image_path}: "
+                        f"batch budget of ${budget.limit_usd} exhausted"
+                    )
+                    return {
+                        'status': 'skipped',
+                        'error': 'Budget exhausted',
+                        'generation_time': time.time() - start_time,
+                    }
+            if rate_limiter is not None:
+                await rate_limiter.acquire()
+
+            # Crop to the edit regions when that saves enough pixels
+            plan = None
+            if region_crop != "off" and edit_regions:
+                size = await self._run_io(image_size, source_bytes)
+                plan = plan_crop(edit_regions, size, self.max_input_size, CROP_MARGIN, region_crop)
+            model_prompt, model_image = prompt, source_bytes
+            if plan is not None:
+                model_prompt = crop_prompt(prompt, plan, edit_regions)
+                model_image = await self._run_io(crop_bytes, source_bytes, plan)
+                logger.info(
+                    f"Sending crop {plan.box} of {plan.full_size} at scale {plan.scale:.2f}"
+                )
+            logger.info(f"Source image: {len(model_image)} bytes")
+
             # Prepare inputs
-            inputs = [prompt, source_image]
-            
-            # Add reference image if provided
-            if reference_image_path and os.path.exists(reference_image_path):
-                reference_image = Image.open(reference_image_path)
-                logger.info(f"Loaded reference image: {reference_image.size}")
-                
+            inputs = [model_prompt, await self._run_io(_image_part, model_image)]
+
+            # Add reference image if provided (scaled to the image sent)
+            reference_bytes = None
+            if reference_digest is not None:
+                reference_size = plan.size if plan is not None else self.max_input_size
+                reference_bytes = await self._run_io(
+                    self.reference_cache.load, reference_image_path, reference_size
+                )
+            if reference_bytes is not None:
+                logger.info(f"Reference image: {len(reference_bytes)} bytes")
+
                 # Enhanced prompt with reference
-                enhanced_prompt = f"{prompt}\n\nReference image: Extract architectural style, color palette, and urban design features from this reference city to apply to the source image."
-                inputs = [enhanced_prompt, source_image, reference_image]
-            
-            # Configure generation
-            generation_config = genai.GenerationConfig(
-                temperature=0.4,  # Lower for consistency
-                candidate_count=1,
-                max_output_tokens=2048,
-            )
-            
-            # Call Gemini API (async wrapper for sync method)
-            logger.info("Calling Gemini API...")
-            response = await asyncio.to_thread(
-                self.model.generate_content,
-                inputs,
-                generation_config=generation_config,
+                enhanced_prompt = (
+                    f"{model_prompt}\n\nReference image: Extract architectural style, "
+                    "color palette, and urban design features from this reference city "
+                    "to apply to the source image."
+                )
+                inputs = [
+                    enhanced_prompt,
+                    inputs[1],
+                    await self._run_io(_image_part, reference_bytes),
+                ]
+
+            usage["upload_bytes"] = sum(
+                len(part["data"]) for part in inputs if isinstance(part, dict)
             )
-            
-            # Extract generated image
-            if not response.candidates or not response.candidates[0].content.parts:
-                raise ValueError("No image generated in response")
-            
-            # Get image data from response
-            generated_image_data = self._extract_image_data(response)
-            
+
+            # Call the model (the reservation is settled per call sent)
+            logger.info(f"Calling {self.model_name}...")
+            reserved = False
+            image_data, calls = await self._call_model(inputs, timeout, budget, usage)
+            generated_image_data = await self._run_io(self._decode_image_data, image_data)
+            if plan is not None:
+                # Feather within the context margin, clear of the edit regions
+                generated_image_data = await self._run_io(
+                    composite_bytes,
+                    source_bytes,
+                    generated_image_data,
+                    plan,
+                    min(32, CROP_MARGIN // 2),
+                )
+
+            usage['output_bytes'] = len(generated_image_data)
+
             # Save generated image
-            output_path = self._save_generated_image(generated_image_data, output_dir)
+            output_path = await self._run_io(
+                self._save_generated_image, generated_image_data, output_dir
+            )
             logger.info(f"Saved generated image to: {output_path}")
-            
-            # Update cost tracking
-            cost = self.cost_per_request
-            self.total_cost += cost
-            self.request_count += 1
-            
+            if self.cache is not None:
+                await self._run_io(
+                    self.cache.put, cache_key, generated_image_data, {"model": self.model_name}
+                )
+
+            cost = calls * self.cost_per_request
             generation_time = time.time() - start_time
-            
+
             logger.info(f"Image generation completed in {generation_time:.2f}s, cost: ${cost}")
-            
+
             return {
                 'image_path': output_path,
                 'cost': cost,
                 'generation_time': generation_time,
                 'status': 'success',
+                'cached': False,
+                'crop': plan.to_dict() if plan is not None else None,
                 'model': self.model_name,
             }
-        
+
         except Exception as e:
-            logger.exception(f"Gemini API error: {e}")
+            retryable = is_retryable(e)
+            if retryable or isinstance(e, CircuitOpenError):
+                logger.warning(f"{self.model_name} error ({type(e).__name__}): {e}")
+            else:
+                logger.exception(f"{self.model_name} error: {e}")
             return {
                 'status': 'failed',
-                'error': str(e),
+                'error': str(e) or type(e).__name__,
+                'retryable': retryable,
                 'generation_time': time.time() - start_time,
             }
-    
-    def _extract_image_data(self, response) -> bytes:
-        """Extract image bytes from Gemini response"""
-        try:
-            # Try to get inline data
-            part = response.candidates[0].content.parts[0]
-            if hasattr(part, 'inline_data') and part.inline_data:
-                return part.inline_data.data
-            
-            # Try to get as blob
-            if hasattr(part, 'blob') and part.blob:
-                return part.blob.data
-            
-            raise ValueError("No image data found in response")
-        
-        except Exception as e:
-            logger.error(f"Failed to extract image data: {e}")
-            raise
-    
-    def _save_generated_image(self, image_data: bytes, output_dir: str) -> str:
+
+        finally:
+            if reserved:
+                budget.release(self.cost_per_request)
+
+    async def _call_model(
+        self,
+        inputs: List,
+        timeout: float,
+        budget: Optional[CostBudget],
+        usage: Optional[Dict] = None,
+    ):
         """
-        Save generated image and return path
+        Call the backend under the circuit breaker, with a timeout and hedging
+        
+        If hedging is on and the call outlasts the recent p95 latency, a second
+        identical call is sent (when the budget allows) and the first response
+        wins. Calls that answered or were abandoned while running count as
+        billed; calls that raised or never started are not.
         
         Args:
-            image_data: Image bytes (could be base64 or raw)
-            output_dir: Output directory
+            inputs: Backend inputs
+            timeout: Seconds to wait for a response
+            budget: Budget holding a reservation for the first call
+            usage: Gets the number of billed calls, also when the call fails
         
         Returns:
-            Path to saved image
+            (image bytes, number of billed calls)
         """
-        # Create output directory
-        output_path = Path(output_dir)
-        output_path.mkdir(parents=True, exist_ok=True)
-        
-        # Generate filename with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"generated_{timestamp}.png"
-        file_path = output_path / filename
-        
-        # Try to decode if base64
         try:
-            decoded_data = base64.b64decode(image_data)
-            image_data = decoded_data
+            probe = self.breaker.before_call()
+        except CircuitOpenError:
+            if budget is not None:
+                budget.release(self.cost_per_request)
+            raise
+        start = time.monotonic()
+        deadline = start + timeout
+        send = functools.partial(
+            self._call_executor.submit,
+            self.backend.generate,
+            inputs,
+            dict(self.GENERATION_SETTINGS),
+        )
+        calls = [send()]
+        pending = {asyncio.wrap_future(calls[0])}
+        reserved = [budget is not None]
+        error = None
+
+        hedge_delay = self.latency.percentile(GEMINI_HEDGE_PERCENTILE) if self.hedge else None
+        try:
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError(f"Gemini call timed out after {timeout:.1f}s")
+                wait = remaining
+                if hedge_delay is not None and len(calls) == 1:
+                    wait = max(0.0, min(remaining, start + hedge_delay - time.monotonic()))
+                done, pending = await asyncio.wait(
+                    pending, timeout=wait, return_when=asyncio.FIRST_COMPLETED
+                )
+                for call in done:
+                    if call.exception() is None:
+                        self.latency.record(time.monotonic() - start)
+                        self.breaker.record_success()
+                        return call.result(), self._settle_calls(calls, reserved, budget, usage)
+                    error = error or call.exception()
+                if not done and hedge_delay is not None and len(calls) == 1 and wait < remaining:
+                    if budget is None or budget.reserve(self.cost_per_request):
+                        logger.info(f"Hedging Gemini call after {time.monotonic() - start:.1f}s")
+                        self.hedged_requests += 1
+                        calls.append(send())
+                        reserved.append(budget is not None)
+                        pending.add(asyncio.wrap_future(calls[-1]))
+                    hedge_delay = None
+            raise error
+        except BaseException as e:
+            if is_retryable(e):
+                self.breaker.record_failure()
+            elif probe:
+                # A rejected request or a cancelled call says nothing about the upstream
+                self.breaker.release_probe()
+            self._settle_calls(calls, reserved, budget, usage)
+            raise
+
+    def _settle_calls(
+        self,
+        calls: List[Future],
+        reserved: List[bool],
+        budget: Optional[CostBudget],
+        usage: Optional[Dict] = None,
+    ) -> int:
+        """Charge the calls that may be billed, abandon the rest; returns the billed count"""
+        billed = 0
+        for call, has_reservation in zip(calls, reserved):
+            # cancel() only succeeds for calls that never started
+            failed = call.cancel() or (call.done() and call.exception() is not None)
+            if not failed:
+                billed += 1
+            if has_reservation:
+                if failed:
+                    budget.release(self.cost_per_request)
+                else:
+                    budget.commit(self.cost_per_request)
+        self.total_cost += billed * self.cost_per_request
+        self.request_count += billed
+        if usage is not None:
+            usage['calls'] = billed
+        return billed
+
+    def _cache_key(
+        self,
+        source_bytes: bytes,
+        prompt: str,
+        edit_regions: List[Dict],
+        reference_digest: Optional[str],
+        region_crop: str,
+    ) -> str:
+        """Content hash of everything that determines the generated image"""
+        return request_key(
+            source=digest_bytes(source_bytes),
+            reference=reference_digest,
+            prompt=prompt.strip(),
+            edit_regions=edit_regions,
+            model=self.model_name,
+            settings=self.GENERATION_SETTINGS,
+            crop={'mode': region_crop, 'margin': CROP_MARGIN, 'max_input_size': self.max_input_size}
+            if region_crop != "off" else None,
+        )
+
+    async def _run_io(self, func: Callable, *args):
+        """Run blocking image or file work on the I/O executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._io_executor, functools.partial(func, *args))
+
+    async def _cached_result(
+        self, cache_key: str, output_dir: str, start_time: float
+    ) -> Optional[Dict]:
+        """Result for a cached image, copied to output_dir (None on a miss)"""
+        if self.cache is None:
+            return None
+        entry = await self._run_io(self.cache.get, cache_key)
+        if entry is None:
+            return None
+        output_path = self._output_path(output_dir)
+        await self._run_io(self.cache.copy_to, entry['path'], output_path)
+        self.cache_hits += 1
+        logger.info(f"Generation cache hit: {output_path}")
+        return {
+            'image_path': str(output_path),
+            'cost': 0.0,
+            'generation_time': time.time() - start_time,
+            'status': 'success',
+            'cached': True,
+            'model': entry['metadata'].get('model', self.model_name),
+        }
+
+    def _decode_image_data(self, image_data: bytes) -> bytes:
+        """Raw image bytes (the response may carry base64)"""
+        if sniff_mime_type(image_data) is not None:
+            return image_data
+        try:
+            # validate: raw PNG bytes must not be "decoded" into garbage
+            return base64.b64decode(image_data, validate=True)
         except Exception:
             # Not base64, use as is
-            pass
+            return image_data
+
+    def _output_path(self, output_dir: str, extension: str = ".png") -> Path:
+        """Unique path for a new generated image"""
+        # Timestamp for sorting, random suffix so concurrent calls never collide
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return Path(output_dir) / f"generated_{timestamp}_{uuid.uuid4().hex[:12]}{extension}"
+
+    def _save_generated_image(self, image_data: bytes, output_dir: str) -> str:
+        """
+        Save generated image and return path (blocking; run on the I/O executor)
         
-        # Save image
-        with open(file_path, 'wb') as f:
-            f.write(image_data)
+        Args:
+            image_data: Decoded image bytes
+            output_dir: Output directory (created if missing)
         
+        Returns:
+            Path to saved image
+        """
+        extension = _EXTENSIONS.get(sniff_mime_type(image_data), ".png")
+        file_path = self._output_path(output_dir, extension)
+        _write_file(file_path, image_data)
         return str(file_path)
-    
+
     async def edit_image_with_retry(
         self,
         source_image_path: str,
@@ -213,50 +666,147 @@ class GeminiFlashService:
         edit_regions: List[Dict],
         reference_image_path: Optional[str] = None,
         max_retries: int = 3,
+        deadline: float = GEMINI_DEADLINE,
+        **kwargs,
     ) -> Dict:
         """
-        Edit image with exponential backoff retry logic
+        Edit image, retrying transient failures with jittered exponential backoff
+        
+        Permanent failures (bad input, no image in the response, open circuit)
+        are returned at once. Each call's timeout is cut to what is left of
+        the deadline, and no retry starts that couldn't finish before it.
         
         Args:
             source_image_path: Path to source image
             prompt: Editing prompt
             edit_regions: Edit region specifications
             reference_image_path: Optional reference image
-            max_retries: Maximum retry attempts
+            max_retries: Maximum attempts
+            deadline: Seconds for all attempts together
+            **kwargs: Passed to edit_image (output_dir, budget, rate_limiter, timeout)
         
         Returns:
             Result dictionary
         """
+        call_timeout = kwargs.pop('timeout', GEMINI_CALL_TIMEOUT)
+        deadline_at = time.monotonic() + deadline
         for attempt in range(max_retries):
             result = await self.edit_image(
                 source_image_path,
                 prompt,
                 edit_regions,
                 reference_image_path,
+                timeout=min(call_timeout, max(0.0, deadline_at - time.monotonic())),
+                **kwargs,
             )
-            
-            if result['status'] == 'success':
+
+            if result['status'] in ('success', 'skipped') or not result.get('retryable'):
                 return result
-            
+
             if attempt < max_retries - 1:
-                wait_time = 2 ** attempt  # Exponential backoff
-                logger.warning(f"Attempt {attempt + 1} failed, retrying in {wait_time}s...")
+                wait_time = backoff_delay(attempt)
+                if time.monotonic() + wait_time >= deadline_at:
+                    logger.warning(
+                        f"Attempt {attempt + 1} failed, "
+                        f"no time left before the {deadline:.0f}s deadline"
+                    )
+                    break
+                logger.warning(f"Attempt {attempt + 1} failed, retrying in {wait_time:.1f}s...")
                 await asyncio.sleep(wait_time)
-        
+
         return result
-    
+
+    async def edit_images_batch(
+        self,
+        requests: List[Dict],
+        max_concurrency: int = GEMINI_MAX_CONCURRENCY,
+        requests_per_minute: float = GEMINI_RPM,
+        budget_usd: Optional[float] = None,
+        max_retries: int = 3,
+        output_dir: str = "outputs/scenarios",
+        region_crop: str = REGION_CROP_MODE,
+        deadline: float = GEMINI_DEADLINE,
+    ) -> AsyncIterator[Dict]:
+        """
+        Edit many images concurrently, yielding results as they finish
+        
+        Requests share a concurrency limit, a requests-per-minute limit and a
+        hard USD budget; once the budget is used up the remaining requests are
+        skipped. Cache hits cost nothing and take no rate or budget. Closing
+        the iterator cancels the requests still running.
+        
+        Args:
+            requests: {source_image_path, prompt, edit_regions, reference_image_path, tags}
+            max_concurrency: Requests in flight at once
+            requests_per_minute: API call rate limit (0 = unlimited)
+            budget_usd: Spending limit (default: orchestrator cost_check.max_cost_auto_approve)
+            max_retries: Attempts per request
+            output_dir: Directory to save generated images
+            region_crop: Region crop mode of every edit (see edit_image)
+            deadline: Seconds per request, retries included (queueing excluded)
+        
+        Yields:
+            edit_image results, in completion order, with 'index' into `requests`
+        """
+        budget = CostBudget(default_batch_budget() if budget_usd is None else budget_usd)
+        rate_limiter = (
+            TokenBucket(
+                requests_per_minute / 60, max(1.0, min(requests_per_minute, max_concurrency))
+            )
+            if requests_per_minute
+            else None
+        )
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run(index: int, request: Dict) -> Dict:
+            async with semaphore:
+                result = await self.edit_image_with_retry(
+                    request['source_image_path'],
+                    request['prompt'],
+                    request.get('edit_regions', []),
+                    request.get('reference_image_path'),
+                    max_retries=max_retries,
+                    deadline=deadline,
+                    output_dir=output_dir,
+                    budget=budget,
+                    rate_limiter=rate_limiter,
+                    region_crop=region_crop,
+                    tags=request.get('tags'),
+                )
+            return {**result, 'index': index}
+
+        logger.info(
+            f"Batch of {len(requests)} edits: concurrency {max_concurrency}, "
+            f"{requests_per_minute or 'unlimited'} rpm, budget ${budget.limit_usd}"
+        )
+        tasks = [asyncio.create_task(run(i, request)) for i, request in enumerate(requests)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            logger.info(f"Batch finished: ${budget.spent_usd:.3f} of ${budget.limit_usd} spent")
+
     def get_cost_summary(self) -> Dict:
         """Get cost tracking summary"""
         return {
             'total_cost_usd': round(self.total_cost, 2),
             'request_count': self.request_count,
             'average_cost_per_request': round(self.total_cost / max(self.request_count, 1), 4),
+            'cache_hits': self.cache_hits,
+            'saved_cost_usd': round(self.cache_hits * self.cost_per_request, 2),
+            'hedged_requests': self.hedged_requests,
+            'circuit': self.breaker.stats(),
         }
-    
+
     def reset_cost_tracking(self):
         """Reset cost tracking counters"""
         self.total_cost = 0.0
         self.request_count = 0
+        self.cache_hits = 0
+        self.hedged_requests = 0
         logger.info("Cost tracking reset")
 
 
@@ -0,0 +1,188 @@
+"""
+Content-addressed cache of generated images
+
+Entries are keyed by a SHA-256 of everything that determines the output
+(input image bytes, canonicalized request, model and generation settings),
+so identical requests are served from disk however the inputs were named.
+The directory is bounded by total size; least recently used entries are
+evicted first (hits refresh the file mtime).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+ENTRY_SUFFIX = ".png"
+META_SUFFIX = ".json"
+
+
+def _canonical(value: Any) -> Any:
+    """Integral floats as ints, so 100 and 100.0 give the same key"""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    return value
+
+
+def digest_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def request_key(**parts: Any) -> str:
+    """SHA-256 of the canonical JSON of the request parts"""
+    payload = json.dumps(
+        _canonical(parts), sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class GenerationCache:
+    """Size-bounded on-disk store of generated images"""
+
+    def __init__(self, cache_dir: str, max_bytes: int = 2 * 1024**3):
+        """
+        Initialize cache
+
+        Args:
+            cache_dir: Directory holding the entries (created if missing)
+            max_bytes: Size bound of the stored images
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._scan()
+
+    def _path(self, key: str, suffix: str = ENTRY_SUFFIX) -> Path:
+        return self.cache_dir / key[:2] / f"{key}{suffix}"
+
+    def _scan(self) -> None:
+        """Index existing entries, least recently used first"""
+        found = []
+        if self.cache_dir.exists():
+            for path in self.cache_dir.glob(f"*/*{ENTRY_SUFFIX}"):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                found.append((stat.st_mtime, path.stem, stat.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self.size_bytes += size
+        with self._lock:
+            self._evict()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Look up an entry
+
+        Returns:
+            {path, metadata}, or None on a miss
+        """
+        path = self._path(key)
+        try:
+            os.utime(path)
+            metadata = json.loads(self._path(key, META_SUFFIX).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+                if key in self._entries:
+                    self.size_bytes -= self._entries.pop(key)
+            return None
+        with self._lock:
+            self.hits += 1
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            else:
+                # Written by another process
+                self._entries[key] = path.stat().st_size
+                self.size_bytes += self._entries[key]
+        return {"path": str(path), "metadata": metadata}
+
+    def put(self, key: str, image_data: bytes, metadata: Optional[Dict] = None) -> None:
+        """Store an image (atomically; readers never see partial files)"""
+        if len(image_data) > self.max_bytes:
+            return
+        path = self._path(key)
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            meta_path = self._path(key, META_SUFFIX)
+            tmp_meta = meta_path.with_suffix(suffix)
+            tmp_meta.write_text(json.dumps(metadata or {}), encoding="utf-8")
+            os.replace(tmp_meta, meta_path)
+            tmp_path = path.with_suffix(suffix)
+            tmp_path.write_bytes(image_data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write generation cache entry {path}: {e}")
+            return
+        with self._lock:
+            if key in self._entries:
+                self.size_bytes -= self._entries.pop(key)
+            self._entries[key] = len(image_data)
+            self.size_bytes += len(image_data)
+            self._evict()
+
+    def copy_to(self, source: str, destination: Path) -> None:
+        """Materialize a cached image at `destination` (a copy callers may modify)"""
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(source, destination)
+
+    def _evict(self) -> None:
+        while self.size_bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self.size_bytes -= size
+            self.evictions += 1
+            for suffix in (ENTRY_SUFFIX, META_SUFFIX):
+                try:
+                    self._path(key, suffix).unlink()
+                except OSError:
+                    pass
+
+    def stats(self) -> Dict:
+        """Get cache statistics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self.size_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def create_generation_cache() -> Optional[GenerationCache]:
+    """Cache configured from the environment (None if GEMINI_CACHE_ENABLED is off)"""
+    if os.getenv("GEMINI_CACHE_ENABLED", "true").lower() not in ("1", "true", "yes"):
+        return None
+    cache_dir = os.getenv("GEMINI_CACHE_DIR") or os.path.join(
+        os.getenv("OUTPUTS_DIR", "outputs"), "cache", "gemini"
+    )
+    max_mb = float(os.getenv("GEMINI_CACHE_MAX_MB", "2048"))
+    start = time.perf_counter()
+    cache = GenerationCache(cache_dir, max_bytes=int(max_mb * 1024 * 1024))
+    stats = cache.stats()
+    logger.info(
+        f"Generation cache at {cache_dir}: {stats['entries']} entries, "
+        f"{stats['size_bytes'] / 1e6:.1f} MB (indexed in {time.perf_counter() - start:.2f}s)"
+    )
+    return cache
@@ -0,0 +1,373 @@
+"""
+Image generation telemetry
+
+Every edit_image call is appended as one compact JSON line (cost, latency,
+payload size, cache hit, outcome, policy) to a per-process daily file, so
+nothing is lost on restart and workers never interleave writes. A background
+thread writes the lines and folds all workers' files into per-day,
+per-policy aggregates (counts, cost, latency and payload histograms) that the
+API reads without touching the files. Files are read outside the aggregates'
+lock, so summary() never waits on disk.
+"""
+
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds; one more bucket counts everything above the last
+LATENCY_BUCKETS = (0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+PAYLOAD_BUCKETS = (64 * 1024, 256 * 1024, 1024**2, 4 * 1024**2, 16 * 1024**2)
+
+FILE_PREFIX = "gen-"
+FILE_SUFFIX = ".jsonl"
+
+
+def _day(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y%m%d")
+
+
+class _Bucket:
+    """Aggregates of one (day, policy, model)"""
+
+    __slots__ = (
+        "outcomes",
+        "cache_hits",
+        "calls",
+        "cost",
+        "latency_sum",
+        "latency_count",
+        "latency_hist",
+        "upload_sum",
+        "upload_hist",
+    )
+
+    def __init__(self):
+        self.outcomes: Dict[str, int] = {}
+        self.cache_hits = 0
+        self.calls = 0
+        self.cost = 0.0
+        self.latency_sum = 0.0
+        self.latency_count = 0
+        self.latency_hist = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.upload_sum = 0
+        self.upload_hist = [0] * (len(PAYLOAD_BUCKETS) + 1)
+
+    def add(self, record: Dict) -> None:
+        outcome = record.get("o", "unknown")
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        self.calls += record.get("n", 0)
+        self.cost += record.get("usd", 0.0)
+        if record.get("h"):
+            self.cache_hits += 1
+        elif outcome != "skipped":
+            # Model latency and payload: cache hits and skips would skew them
+            latency = record.get("s", 0.0)
+            self.latency_sum += latency
+            self.latency_count += 1
+            self.latency_hist[bisect_left(LATENCY_BUCKETS, latency)] += 1
+            if record.get("up"):
+                self.upload_sum += record["up"]
+                self.upload_hist[bisect_left(PAYLOAD_BUCKETS, record["up"])] += 1
+
+    def merge(self, other: "_Bucket") -> None:
+        for outcome, count in other.outcomes.items():
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + count
+        self.cache_hits += other.cache_hits
+        self.calls += other.calls
+        self.cost += other.cost
+        self.latency_sum += other.latency_sum
+        self.latency_count += other.latency_count
+        self.latency_hist = [a + b for a, b in zip(self.latency_hist, other.latency_hist)]
+        self.upload_sum += other.upload_sum
+        self.upload_hist = [a + b for a, b in zip(self.upload_hist, other.upload_hist)]
+
+    @property
+    def generations(self) -> int:
+        return sum(self.outcomes.values())
+
+
+def _quantile(hist: Sequence[int], bounds: Sequence[float], q: float) -> Optional[float]:
+    """Upper bound of the bucket holding the q-quantile (None above the last bound)"""
+    total = sum(hist)
+    if not total:
+        return None
+    rank = q * total
+    seen = 0
+    for i, count in enumerate(hist):
+        seen += count
+        if seen >= rank:
+            return bounds[i] if i < len(bounds) else None
+    return None
+
+
+def _histogram(hist: Sequence[int], bounds: Sequence[float]) -> List[Dict]:
+    return [{"le": bound, "count": count} for bound, count in zip(list(bounds) + ["+Inf"], hist)]
+
+
+class GenerationTelemetry:
+    """Append-only generation log with background aggregation"""
+
+    def __init__(
+        self,
+        directory: str,
+        flush_interval: float = 1.0,
+        aggregate_interval: float = 15.0,
+        retention_days: int = 30,
+    ):
+        """
+        Initialize telemetry
+
+        Args:
+            directory: Directory of the daily JSONL files (shared by workers)
+            flush_interval: Seconds between batched writes
+            aggregate_interval: Seconds between aggregation passes
+            retention_days: Days of files and aggregates kept
+        """
+        self.directory = Path(directory)
+        self.flush_interval = flush_interval
+        self.aggregate_interval = aggregate_interval
+        self.retention_days = retention_days
+        self._worker = f"{socket.gethostname()}-{os.getpid()}"
+        self._queue: "queue.SimpleQueue[Dict]" = queue.SimpleQueue()
+        self._lock = threading.Lock()  # Aggregates and thread start; never held during I/O
+        self._flush_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()  # File offsets
+        self._offsets: Dict[str, int] = {}
+        self._buckets: Dict[Tuple[str, str, str], _Bucket] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self.recorded = 0
+        self.write_errors = 0
+
+    def record(
+        self,
+        outcome: str,
+        cost_usd: float,
+        latency_s: float,
+        cached: bool = False,
+        calls: int = 0,
+        upload_bytes: int = 0,
+        output_bytes: int = 0,
+        model: str = "",
+        policy: Optional[str] = None,
+        city: Optional[str] = None,
+    ) -> None:
+        """Queue one generation (non-blocking; safe to call from the event loop)"""
+        record = {
+            "t": round(time.time(), 3),
+            "o": outcome,
+            "usd": round(cost_usd, 6),
+            "s": round(latency_s, 3),
+            "h": int(cached),
+            "n": calls,
+            "up": upload_bytes,
+            "out": output_bytes,
+            "m": model,
+        }
+        if policy:
+            record["p"] = str(policy)
+        if city:
+            record["c"] = str(city)
+        self._queue.put(record)
+        self.recorded += 1
+        if self._thread is None:
+            self.start()
+
+    def start(self) -> None:
+        """Start the writer/aggregator thread (idempotent)"""
+        with self._lock:
+            if self._thread is None:
+                self._stopped.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name="generation-telemetry", daemon=True
+                )
+                self._thread.start()
+
+    def stop(self) -> None:
+        """Flush queued records and stop the thread"""
+        thread = self._thread
+        if thread is not None:
+            self._stopped.set()
+            thread.join(timeout=5)
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        last_aggregate = 0.0
+        while not self._stopped.wait(self.flush_interval):
+            self.flush()
+            if time.monotonic() - last_aggregate >= self.aggregate_interval:
+                self.refresh()
+                last_aggregate = time.monotonic()
+
+    def flush(self) -> None:
+        """Write this process's queued records to its files (blocking)"""
+        with self._flush_lock:
+            lines: Dict[str, List[str]] = {}
+            while True:
+                try:
+                    record = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                lines.setdefault(_day(record["t"]), []).append(
+                    json.dumps(record, separators=(",", ":"))
+                )
+            for day, day_lines in lines.items():
+                path = self.directory / f"{FILE_PREFIX}{day}-{self._worker}{FILE_SUFFIX}"
+                try:
+                    self.directory.mkdir(parents=True, exist_ok=True)
+                    with open(path, "a", encoding="utf-8") as f:
+                        f.write("\n".join(day_lines) + "\n")
+                except OSError as e:
+                    self.write_errors += len(day_lines)
+                    logger.warning(f"Could not write generation telemetry to {path}: {e}")
+
+    def refresh(self) -> None:
+        """Fold new lines of every worker's files into the aggregates (blocking)"""
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=self.retention_days)).strftime(
+            "%Y%m%d"
+        )
+        new: Dict[Tuple[str, str, str], _Bucket] = {}
+        with self._refresh_lock:
+            if self.directory.exists():
+                for path in sorted(self.directory.glob(f"{FILE_PREFIX}*{FILE_SUFFIX}")):
+                    day = path.name[len(FILE_PREFIX) : len(FILE_PREFIX) + 8]
+                    if day < cutoff:
+                        self._expire(path)
+                        continue
+                    self._read_new(path, new)
+            with self._lock:
+                for key, bucket in new.items():
+                    current = self._buckets.get(key)
+                    if current is None:
+                        self._buckets[key] = bucket
+                    else:
+                        current.merge(bucket)
+                for key in [key for key in self._buckets if key[0] < cutoff]:
+                    del self._buckets[key]
+
+    def _expire(self, path: Path) -> None:
+        self._offsets.pop(path.name, None)
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+    def _read_new(self, path: Path, buckets: Dict[Tuple[str, str, str], _Bucket]) -> None:
+        offset = self._offsets.get(path.name, 0)
+        try:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+        except OSError:
+            return
+        # A worker may be mid-write; leave the partial last line for next time
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            key = (_day(record.get("t", 0)), record.get("p") or "unspecified", record.get("m", ""))
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = _Bucket()
+            bucket.add(record)
+        self._offsets[path.name] = offset + end
+
+    def summary(self, days: int = 7, policy: Optional[str] = None) -> Dict:
+        """
+        Aggregated telemetry of the last `days` days (UTC)
+
+        Args:
+            days: Window in days, today included
+            policy: Only this policy
+
+        Returns:
+            Totals, latency and payload histograms, per-policy and daily cost
+        """
+        since = (datetime.now(timezone.utc) - timedelta(days=days - 1)).strftime("%Y%m%d")
+        total = _Bucket()
+        policies: Dict[str, _Bucket] = {}
+        daily: Dict[str, _Bucket] = {}
+        with self._lock:
+            for (day, bucket_policy, _), bucket in self._buckets.items():
+                if day < since or (policy is not None and bucket_policy != policy):
+                    continue
+                total.merge(bucket)
+                policies.setdefault(bucket_policy, _Bucket()).merge(bucket)
+                daily.setdefault(day, _Bucket()).merge(bucket)
+
+        return {
+            "window_days": days,
+            "generations": total.generations,
+            "outcomes": total.outcomes,
+            "cache_hits": total.cache_hits,
+            "model_calls": total.calls,
+            "cost_usd": round(total.cost, 4),
+            "latency_seconds": {
+                "histogram": _histogram(total.latency_hist, LATENCY_BUCKETS),
+                "mean": (
+                    round(total.latency_sum / total.latency_count, 3)
+                    if total.latency_count
+                    else None
+                ),
+                "p50": _quantile(total.latency_hist, LATENCY_BUCKETS, 0.50),
+                "p95": _quantile(total.latency_hist, LATENCY_BUCKETS, 0.95),
+                "p99": _quantile(total.latency_hist, LATENCY_BUCKETS, 0.99),
+            },
+            "upload_bytes": {
+                "histogram": _histogram(total.upload_hist, PAYLOAD_BUCKETS),
+                "mean": round(total.upload_sum / max(sum(total.upload_hist), 1)),
+            },
+            "policies": [
+                {
+                    "policy": name,
+                    "generations": bucket.generations,
+                    "cost_usd": round(bucket.cost, 4),
+                    "average_cost_usd": round(bucket.cost / max(bucket.generations, 1), 4),
+                    "cache_hits": bucket.cache_hits,
+                    "p95_latency_seconds": _quantile(bucket.latency_hist, LATENCY_BUCKETS, 0.95),
+                }
+                for name, bucket in sorted(policies.items(), key=lambda item: -item[1].cost)
+            ],
+            "daily": [
+                {
+                    "date": f"{day[:4]}-{day[4:6]}-{day[6:]}",
+                    "generations": bucket.generations,
+                    "cost_usd": round(bucket.cost, 4),
+                }
+                for day, bucket in sorted(daily.items())
+            ],
+        }
+
+
+_telemetry: Optional[GenerationTelemetry] = None
+_telemetry_lock = threading.Lock()
+
+
+def get_generation_telemetry() -> Optional[GenerationTelemetry]:
+    """Process-wide telemetry (None if GENERATION_TELEMETRY_ENABLED is off)"""
+    global _telemetry
+    if os.getenv("GENERATION_TELEMETRY_ENABLED", "true").lower() not in ("1", "true", "yes"):
+        return None
+    with _telemetry_lock:
+        if _telemetry is None:
+            directory = os.getenv("GENERATION_TELEMETRY_DIR") or os.path.join(
+                os.getenv("OUTPUTS_DIR", "outputs"), "telemetry", "generation"
+            )
+            _telemetry = GenerationTelemetry(
+                directory,
+                retention_days=int(os.getenv("GENERATION_TELEMETRY_RETENTION_DAYS", "30")),
+            )
+        return _telemetry
@@ -0,0 +1,437 @@
+"""
+Geocoding of project locations
+
+Addresses are resolved in batches per city, cheapest source first:
+
+1. GeocodeCache: results and misses of earlier lookups, keyed by city and
+   normalized address (misses expire after GEOCODE_NEGATIVE_TTL_HOURS)
+2. Gazetteer: names and addresses of the OSM features already downloaded
+   for the city's tiles (Tile.data_sources["osm_buildings"] GeoJSON)
+3. Nominatim, at most `tools.geocoding.rate_limit` requests per second
+   across NOMINATIM_PROCESSES processes (each one gets an equal share)
+
+Duplicate addresses in a batch are looked up once. Only remote results are
+cached; network errors are not, so they are retried on the next batch.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from agents.orchestrator import load_agent_config
+from api.models.database import City, GeocodeCache, Tile
+from api.models.session import SessionLocal
+from api.utils.admission import TokenBucket
+from api.utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+NOMINATIM_URL = os.getenv("NOMINATIM_URL", "https://nominatim.openstreetmap.org")
+# Processes that may geocode at once (every API worker runs news refresh jobs);
+# the public Nominatim allows 1 request/s per application, not per process
+NOMINATIM_PROCESSES = max(1, int(os.getenv("NOMINATIM_PROCESSES", "1")))
+GEOCODE_NEGATIVE_TTL = timedelta(hours=float(os.getenv("GEOCODE_NEGATIVE_TTL_HOURS", "168")))
+
+_NON_WORD_RE = re.compile(r"[^\w]+")
+
+# Confidence by Nominatim place_rank: addresses and buildings are precise,
+# streets and neighbourhoods usable, anything coarser (a whole town) is not
+_RANK_CONFIDENCE = ((26, 0.95), (16, 0.8), (0, 0.4))
+
+
+def normalize_address(address: str) -> str:
+    """Lowercase, accent-free, punctuation-free form of an address"""
+    text = unicodedata.normalize("NFKD", address.casefold())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _NON_WORD_RE.sub(" ", text).strip()
+
+
+@dataclass
+class GeocodeResult:
+    """A resolved location"""
+
+    lat: float
+    lon: float
+    confidence: float
+    source: str
+    display_name: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+# =============================================================================
+# Gazetteer
+# =============================================================================
+
+
+def _centroid(geometry: Dict) -> Optional[Tuple[float, float]]:
+    """Mean of the outer ring vertices (lat, lon); good enough at street scale"""
+    kind, coords = geometry.get("type"), geometry.get("coordinates")
+    if not coords:
+        return None
+    if kind == "Point":
+        points = [coords]
+    elif kind in ("LineString", "MultiPoint"):
+        points = coords
+    elif kind == "Polygon":
+        points = coords[0]
+    elif kind == "MultiPolygon":
+        points = [p for polygon in coords for p in polygon[0]]
+    else:
+        return None
+    if not points:
+        return None
+    return (sum(p[1] for p in points) / len(points), sum(p[0] for p in points) / len(points))
+
+
+class Gazetteer:
+    """In-memory name and address index of a city's OSM features"""
+
+    def __init__(self):
+        self.names: Dict[str, Tuple[float, float]] = {}
+        self._streets: Dict[str, List[Tuple[float, float]]] = defaultdict(list)
+        self._tokens: Dict[str, set] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def add_feature(self, feature: Dict) -> None:
+        properties = feature.get("properties") or {}
+        point = _centroid(feature.get("geometry") or {})
+        if point is None:
+            return
+        street = properties.get("addr:street")
+        keys = [properties.get("name")]
+        if street:
+            self._streets[normalize_address(street)].append(point)
+            if properties.get("addr:housenumber"):
+                keys.append(f"{properties['addr:housenumber']} {street}")
+        for key in filter(None, keys):
+            key = normalize_address(key)
+            if key and key not in self.names:
+                self.names[key] = point
+                for token in key.split():
+                    self._tokens[token].add(key)
+
+    def add_geojson(self, path: Path) -> None:
+        with open(path, encoding="utf-8") as f:
+            for feature in json.load(f).get("features", []):
+                self.add_feature(feature)
+
+    def lookup(self, address: str) -> Optional[GeocodeResult]:
+        """
+        Match a normalized address
+
+        Exact names and addresses first, then a street (centroid of its
+        features), then the longest known name contained in the address.
+        """
+        if address in self.names:
+            lat, lon = self.names[address]
+            return GeocodeResult(lat, lon, 0.95, "gazetteer")
+        if address in self._streets:
+            points = self._streets[address]
+            return GeocodeResult(
+                sum(p[0] for p in points) / len(points),
+                sum(p[1] for p in points) / len(points),
+                0.75,
+                "gazetteer",
+            )
+        tokens = set(address.split())
+        candidates = set().union(*(self._tokens.get(t, ()) for t in tokens)) if tokens else set()
+        contained = [key for key in candidates if len(key) >= 6 and set(key.split()) <= tokens]
+        if not contained:
+            return None
+        key = max(contained, key=len)
+        lat, lon = self.names[key]
+        return GeocodeResult(lat, lon, 0.8, "gazetteer", display_name=key)
+
+
+def build_gazetteer(city_id) -> Gazetteer:
+    """Gazetteer from the city's downloaded OSM GeoJSON (sync; call from a thread)"""
+    with SessionLocal() as db:
+        sources = [
+            row.data_sources for row in db.query(Tile.data_sources).filter(Tile.city_id == city_id)
+        ]
+    gazetteer = Gazetteer()
+    for data_sources in sources:
+        path = (data_sources or {}).get("osm_buildings")
+        if not path:
+            continue
+        path = Path(path) if Path(path).is_absolute() else REPO_ROOT / path
+        try:
+            gazetteer.add_geojson(path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping OSM data {path}: {e}")
+    return gazetteer
+
+
+# =============================================================================
+# Geocoder
+# =============================================================================
+
+
+class NominatimClient:
+    """
+    Nominatim search within a city's bounding box, rate limited
+
+    The limit is enforced per process by a token bucket; it is not shared
+    between processes. Pass the process's share of the overall limit
+    (create_geocoder divides it by NOMINATIM_PROCESSES).
+    """
+
+    def __init__(
+        self,
+        base_url: str = NOMINATIM_URL,
+        user_agent: str = "urban-evolution-ai/0.1",
+        rate_limit: float = 1.0,
+        client: Optional[httpx.AsyncClient] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.user_agent = user_agent
+        self._bucket = TokenBucket(rate_limit, 1)
+        self._client = client
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=10, headers={"User-Agent": self.user_agent})
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def search(self, query: str, bbox: Optional[Dict] = None) -> Optional[GeocodeResult]:
+        """
+        Best match for a query
+
+        Returns:
+            Result, or None if nothing was found
+
+        Raises:
+            httpx.HTTPError: On network or server errors
+        """
+        params = {"q": query, "format": "jsonv2", "limit": 1}
+        if bbox and all(side in bbox for side in ("west", "south", "east", "north")):
+            params["viewbox"] = f"{bbox['west']},{bbox['north']},{bbox['east']},{bbox['south']}"
+            params["bounded"] = 1
+        await self._bucket.acquire()
+        response = await self.client.get(f"{self.base_url}/search", params=params)
+        response.raise_for_status()
+        matches = response.json()
+        if not matches:
+            return None
+        match = matches[0]
+        rank = int(match.get("place_rank", 0))
+        confidence = next(c for min_rank, c in _RANK_CONFIDENCE if rank >= min_rank)
+        return GeocodeResult(
+            float(match["lat"]),
+            float(match["lon"]),
+            confidence,
+            "nominatim",
+            match.get("display_name"),
+        )
+
+
+class Geocoder:
+    """Cached, batched address resolution"""
+
+    def __init__(
+        self,
+        remote: Optional[NominatimClient] = None,
+        confidence_threshold: float = 0.7,
+        max_gazetteers: int = 8,
+    ):
+        """
+        Initialize geocoder
+
+        Args:
+            remote: Remote geocoder (None = cache and gazetteer only)
+            confidence_threshold: Results below this count as not found
+            max_gazetteers: Cities whose gazetteer is kept in memory
+        """
+        self.remote = remote
+        self.confidence_threshold = confidence_threshold
+        # Rebuilt hourly so newly downloaded OSM data is picked up
+        self._gazetteers = LRUCache(max_gazetteers, ttl=3600)
+        self._gazetteer_lock = threading.Lock()
+        self.stats = {"cache_hits": 0, "gazetteer_hits": 0, "remote_calls": 0, "not_found": 0}
+
+    def gazetteer(self, city_id) -> Gazetteer:
+        """City gazetteer, built on first use (sync)"""
+        with self._gazetteer_lock:
+            gazetteer = self._gazetteers.get(city_id)
+            if gazetteer is None:
+                gazetteer = build_gazetteer(city_id)
+                self._gazetteers.set(city_id, gazetteer)
+                logger.info(f"Built gazetteer for city {city_id}: {len(gazetteer)} names")
+            return gazetteer
+
+    async def resolve_many(
+        self, city_id, city_name: str, addresses: Iterable[str]
+    ) -> Dict[str, Optional[GeocodeResult]]:
+        """
+        Resolve addresses within a city
+
+        Args:
+            city_id: City id
+            city_name: City name (appended to remote queries)
+            addresses: Free-form addresses (duplicates are resolved once)
+
+        Returns:
+            Address -> result (None when not found or below the threshold);
+            spellings that normalize alike share the first one's entry
+        """
+        queries: Dict[str, str] = {}
+        for address in addresses:
+            key = normalize_address(address or "")
+            if key:
+                queries.setdefault(key, address)
+        results: Dict[str, Optional[GeocodeResult]] = {}
+
+        cached, bbox = await asyncio.to_thread(_load_cached, city_id, list(queries))
+        results.update(cached)
+        self.stats["cache_hits"] += len(cached)
+
+        pending = [key for key in queries if key not in results]
+        if pending:
+            gazetteer = await asyncio.to_thread(self.gazetteer, city_id)
+            for key in pending:
+                result = gazetteer.lookup(key)
+                if result is not None and result.confidence >= self.confidence_threshold:
+                    results[key] = result
+                    self.stats["gazetteer_hits"] += 1
+
+        pending = [key for key in queries if key not in results]
+        if pending and self.remote is not None:
+            resolved = await asyncio.gather(
+                *(self._search(f"{queries[key]}, {city_name}", bbox) for key in pending)
+            )
+            fresh = {key: result for key, (ok, result) in zip(pending, resolved) if ok}
+            results.update(fresh)
+            await asyncio.to_thread(
+                _save_cached, city_id, {key: (queries[key], r) for key, r in fresh.items()}
+            )
+
+        for key in queries:
+            result = results.get(key)
+            if result is None or result.confidence < self.confidence_threshold:
+                self.stats["not_found"] += 1
+                results[key] = None
+        return {address: results[normalize_address(address)] for address in queries.values()}
+
+    async def _search(
+        self, query: str, bbox: Optional[Dict]
+    ) -> Tuple[bool, Optional[GeocodeResult]]:
+        self.stats["remote_calls"] += 1
+        try:
+            return True, await self.remote.search(query, bbox)
+        except (httpx.HTTPError, ValueError, KeyError) as e:
+            logger.warning(f"Geocoding '{query}' failed: {e}")
+            return False, None
+
+    async def aclose(self) -> None:
+        if self.remote is not None:
+            await self.remote.aclose()
+
+
+# =============================================================================
+# Persistence (sync; run in a thread)
+# =============================================================================
+
+
+def _load_cached(
+    city_id, keys: List[str]
+) -> Tuple[Dict[str, Optional[GeocodeResult]], Optional[Dict]]:
+    """Unexpired cache entries for the keys, and the city's bounding box"""
+    negative_since = datetime.now(timezone.utc) - GEOCODE_NEGATIVE_TTL
+    with SessionLocal() as db:
+        bbox = db.query(City.master_bbox).filter(City.id == city_id).scalar()
+        rows = (
+            db.query(GeocodeCache)
+            .filter(GeocodeCache.city_id == city_id, GeocodeCache.address_key.in_(keys))
+            .all()
+            if keys
+            else []
+        )
+        cached = {}
+        for row in rows:
+            if row.found:
+                cached[row.address_key] = GeocodeResult(
+                    row.lat, row.lon, row.confidence, row.source, row.display_name
+                )
+            else:
+                resolved_at = (
+                    row.resolved_at
+                    if row.resolved_at.tzinfo
+                    else row.resolved_at.replace(tzinfo=timezone.utc)
+                )
+                if resolved_at > negative_since:
+                    cached[row.address_key] = None
+    return cached, bbox
+
+
+def _save_cached(city_id, entries: Dict[str, Tuple[str, Optional[GeocodeResult]]]) -> None:
+    if not entries:
+        return
+    now = datetime.now(timezone.utc)
+    with SessionLocal() as db:
+        for key, (query, result) in entries.items():
+            db.merge(
+                GeocodeCache(
+                    city_id=city_id,
+                    address_key=key,
+                    query=query[:500],
+                    found=result is not None,
+                    lat=result.lat if result else None,
+                    lon=result.lon if result else None,
+                    confidence=result.confidence if result else None,
+                    source=result.source if result else None,
+                    display_name=(result.display_name or "")[:500] if result else None,
+                    resolved_at=now,
+                )
+            )
+        db.commit()
+
+
+def create_geocoder() -> Geocoder:
+    """
+    Geocoder configured from agent_config.yaml
+
+    GEOCODING_PROVIDER=none disables remote lookups.
+    """
+    try:
+        config = load_agent_config()
+    except (OSError, ImportError, ValueError) as e:
+        logger.warning(f"agent_config.yaml unavailable, using geocoding defaults: {e}")
+        config = {}
+    tool = config.get("tools", {}).get("geocoding", {})
+    provider = os.getenv("GEOCODING_PROVIDER", tool.get("provider", "nominatim"))
+    remote = None
+    if provider == "nominatim":
+        remote = NominatimClient(
+            user_agent=tool.get("user_agent", "urban-evolution-ai/0.1"),
+            rate_limit=float(tool.get("rate_limit", 1)) / NOMINATIM_PROCESSES,
+        )
+    elif provider != "none":
+        logger.warning(
+            f"Unsupported geocoding provider '{provider}'; using cache and gazetteer only"
+        )
+    threshold = (
+        config.get("news_analyzer", {}).get("geocoding", {}).get("confidence_threshold", 0.7)
+    )
+    return Geocoder(remote, confidence_threshold=float(threshold))
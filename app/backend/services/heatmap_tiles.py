@@ -0,0 +1,252 @@
+"""XYZ raster tiles rendered from growth prediction heatmap GeoTIFFs"""
+
+import io
+import logging
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+from api.utils.cache import LRUCache
+from api.utils.tiles import tile_bounds
+
+logger = logging.getLogger(__name__)
+
+TILE_SIZE = 256
+TILE_FORMATS = {"png": "image/png", "webp": "image/webp"}
+
+# Colormap anchors: (position, (r, g, b, a)); interpolated into a 256-entry LUT
+COLORMAPS: Dict[str, Tuple[Tuple[float, Tuple[int, int, int, int]], ...]] = {
+    "growth": (
+        (0.0, (255, 255, 178, 0)),
+        (0.25, (254, 204, 92, 120)),
+        (0.5, (253, 141, 60, 170)),
+        (0.75, (240, 59, 32, 200)),
+        (1.0, (189, 0, 38, 230)),
+    ),
+    "viridis": (
+        (0.0, (68, 1, 84, 200)),
+        (0.25, (59, 82, 139, 200)),
+        (0.5, (33, 145, 140, 200)),
+        (0.75, (94, 201, 98, 200)),
+        (1.0, (253, 231, 37, 200)),
+    ),
+}
+
+
+def build_colormap_lut(name: str):
+    """Build a (256, 4) uint8 RGBA lookup table for a named colormap"""
+    import numpy as np
+
+    if name not in COLORMAPS:
+        raise ValueError(f"Unknown colormap: {name}")
+    anchors = COLORMAPS[name]
+    positions = np.array([p for p, _ in anchors])
+    colors = np.array([c for _, c in anchors], dtype=np.float64)
+    steps = np.linspace(0.0, 1.0, 256)
+    lut = np.empty((256, 4), dtype=np.uint8)
+    for channel in range(4):
+        lut[:, channel] = np.round(np.interp(steps, positions, colors[:, channel]))
+    return lut
+
+
+def apply_colormap(values, lut, vmin: float, vmax: float):
+    """
+    Map a masked 2D array to RGBA through a LUT
+
+    Masked or non-finite cells become fully transparent.
+    """
+    import numpy as np
+
+    data = np.ma.masked_invalid(values)
+    scale = 255.0 / (vmax - vmin) if vmax > vmin else 0.0
+    indices = np.clip((data.filled(vmin) - vmin) * scale, 0, 255).astype(np.uint8)
+    rgba = lut[indices]
+    rgba[np.ma.getmaskarray(data), 3] = 0
+    return rgba
+
+
+class _OpenHeatmap:
+    """
+    A GeoTIFF reprojected on the fly to Web Mercator
+
+    GDAL handles are not thread-safe, so the file is opened up to
+    `max_handles` times (on demand) and each read borrows a handle: tile
+    renders of the same heatmap run in parallel on the threadpool.
+    """
+
+    def __init__(self, path: str, max_handles: int):
+        self.path = path
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_handles)
+        # Opened eagerly so a bad file fails here
+        vrt = self._open()
+        self.bounds = vrt.bounds
+        self.transform = vrt.transform
+        self._idle.put(vrt)
+
+    def _open(self):
+        import rasterio
+        from rasterio.enums import Resampling
+        from rasterio.vrt import WarpedVRT
+
+        return WarpedVRT(rasterio.open(self.path), crs="EPSG:3857", resampling=Resampling.bilinear)
+
+    @contextmanager
+    def vrt(self) -> Iterator:
+        """Borrow a handle, waiting while all `max_handles` are in use"""
+        with self._slots:
+            try:
+                vrt = self._idle.get_nowait()
+            except queue.Empty:
+                vrt = self._open()
+            try:
+                yield vrt
+            finally:
+                self._idle.put(vrt)
+
+
+class HeatmapTileService:
+    """
+    Renders heatmap GeoTIFFs as XYZ PNG/WebP tiles
+
+    Each tile is a windowed, decimated read of the Web Mercator view of the
+    raster, so GDAL reads only the blocks (or overview levels) it needs.
+    Values are colorized through a NumPy LUT and the encoded images are kept
+    in an LRU keyed by file path and modification time.
+    """
+
+    def __init__(
+        self,
+        max_cache_bytes: int = 128 * 1024 * 1024,
+        max_open_files: int = 16,
+        handles_per_file: Optional[int] = None,
+    ):
+        """
+        Initialize heatmap tile service
+
+        Args:
+            max_cache_bytes: Size bound of the rendered tile cache
+            max_open_files: Number of GeoTIFFs kept open
+            handles_per_file: Concurrent reads per GeoTIFF (one GDAL handle
+                each; default: number of CPUs, at most 8)
+        """
+        self._tiles = LRUCache(max_entries=100_000, max_bytes=max_cache_bytes)
+        # Evicted handles are closed by rasterio when garbage collected
+        self._datasets = LRUCache(max_entries=max_open_files, sizeof=lambda _: 0)
+        self._luts: Dict[str, object] = {}
+        self._open_lock = threading.Lock()
+        self.handles_per_file = handles_per_file or min(8, os.cpu_count() or 1)
+
+    def get_tile(
+        self,
+        path: str,
+        z: int,
+        x: int,
+        y: int,
+        fmt: str = "png",
+        colormap: str = "growth",
+        vmin: float = 0.0,
+        vmax: float = 1.0,
+    ) -> Optional[bytes]:
+        """
+        Get an encoded heatmap tile, rendering it on cache miss
+
+        Args:
+            path: Path to the heatmap GeoTIFF
+            z, x, y: Tile address
+            fmt: 'png' or 'webp'
+            colormap: Colormap name
+            vmin, vmax: Value range mapped onto the colormap
+
+        Returns:
+            Image bytes, or None if the tile does not overlap the raster
+        """
+        if fmt not in TILE_FORMATS:
+            raise ValueError(f"Unsupported tile format: {fmt}")
+        mtime = os.stat(path).st_mtime_ns
+        key = (path, mtime, z, x, y, fmt, colormap, vmin, vmax)
+        tile = self._tiles.get(key)
+        if tile is not None:
+            return tile or None
+
+        tile = self._render(path, mtime, z, x, y, fmt, colormap, vmin, vmax)
+        self._tiles.set(key, tile or b"")
+        return tile
+
+    def stats(self) -> Dict:
+        """Get tile cache statistics"""
+        return {**self._tiles.stats(), "open_files": len(self._datasets)}
+
+    def _open(self, path: str, mtime: int) -> _OpenHeatmap:
+        key = (path, mtime)
+        handle = self._datasets.get(key)
+        if handle is not None:
+            return handle
+        with self._open_lock:
+            handle = self._datasets.get(key)
+            if handle is None:
+                handle = _OpenHeatmap(path, self.handles_per_file)
+                self._datasets.set(key, handle)
+                logger.info(f"Opened heatmap for tiling: {path}")
+        return handle
+
+    def _lut(self, name: str):
+        lut = self._luts.get(name)
+        if lut is None:
+            lut = self._luts[name] = build_colormap_lut(name)
+        return lut
+
+    def _render(self, path, mtime, z, x, y, fmt, colormap, vmin, vmax) -> Optional[bytes]:
+        import numpy as np
+        from rasterio.enums import Resampling
+        from rasterio.windows import from_bounds
+
+        lut = self._lut(colormap)
+        minx, miny, maxx, maxy = tile_bounds(z, x, y)
+        handle = self._open(path, mtime)
+
+        # Intersect the tile with the raster so reads never go out of bounds
+        left, bottom, right, top = handle.bounds
+        ix0, iy0 = max(minx, left), max(miny, bottom)
+        ix1, iy1 = min(maxx, right), min(maxy, top)
+        if ix0 >= ix1 or iy0 >= iy1:
+            return None
+
+        pixels_per_meter = TILE_SIZE / (maxx - minx)
+        col0 = int(round((ix0 - minx) * pixels_per_meter))
+        col1 = int(round((ix1 - minx) * pixels_per_meter))
+        row0 = int(round((maxy - iy1) * pixels_per_meter))
+        row1 = int(round((maxy - iy0) * pixels_per_meter))
+        if col1 <= col0 or row1 <= row0:
+            return None
+
+        window = from_bounds(ix0, iy0, ix1, iy1, transform=handle.transform)
+        with handle.vrt() as vrt:
+            data = vrt.read(
+                1,
+                window=window,
+                out_shape=(row1 - row0, col1 - col0),
+                resampling=Resampling.bilinear,
+                masked=True,
+            )
+
+        values = np.ma.masked_all((TILE_SIZE, TILE_SIZE), dtype=np.float32)
+        values[row0:row1, col0:col1] = data
+        rgba = apply_colormap(values, lut, vmin, vmax)
+        return self._encode(rgba, fmt)
+
+    def _encode(self, rgba, fmt: str) -> bytes:
+        from PIL import Image
+
+        image = Image.fromarray(rgba, "RGBA")
+        buffer = io.BytesIO()
+        if fmt == "webp":
+            image.save(buffer, format="WEBP", quality=80, method=4)
+        else:
+            image.save(buffer, format="PNG", compress_level=6)
+        return buffer.getvalue()
+
+
+heatmap_tile_service = HeatmapTileService()
@@ -0,0 +1,211 @@
+"""
+Image editing backends for GeminiFlashService
+
+- GeminiImageBackend: Gemini 2.5 Flash through google-generativeai.
+- LocalImageBackend: deterministic stand-in with configurable latency and
+  error distributions, so the scenario pipeline, benchmarks and concurrency
+  tuning run without an API key or network.
+
+Backends are called from worker threads and must be thread-safe.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ImageEditBackend(ABC):
+    """Image editing model"""
+
+    model_name: str = "unknown"
+    cost_per_request: float = 0.0  # USD per call
+
+    @abstractmethod
+    def generate(self, inputs: List, settings: Dict) -> bytes:
+        """
+        Edit an image (blocking)
+
+        Args:
+            inputs: [prompt, image part, optional reference image part]; image
+                parts are {mime_type, data} dicts of encoded bytes
+            settings: Generation settings (temperature, candidate_count, ...)
+
+        Returns:
+            Encoded (possibly base64) image bytes
+
+        Raises:
+            ValueError: The response carried no image
+        """
+
+
+class GeminiImageBackend(ImageEditBackend):
+    """Gemini image editing via google-generativeai"""
+
+    cost_per_request = 0.039  # USD (Gemini 2.5 Flash pricing)
+
+    def __init__(self, api_key: Optional[str] = None, model_name: Optional[str] = None):
+        api_key = api_key or os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY not provided")
+
+        try:
+            import google.generativeai as genai
+        except ImportError:
+            raise ImportError("google-generativeai package not installed")
+        self._genai = genai
+
+        genai.configure(api_key=api_key)
+        self.model_name = model_name or os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+        self._model = genai.GenerativeModel(self.model_name)
+
+    def generate(self, inputs: List, settings: Dict) -> bytes:
+        response = self._model.generate_content(
+            inputs, generation_config=self._genai.GenerationConfig(**settings)
+        )
+        if not response.candidates or not response.candidates[0].content.parts:
+            raise ValueError("No image generated in response")
+
+        part = response.candidates[0].content.parts[0]
+        if getattr(part, "inline_data", None):
+            return part.inline_data.data
+        if getattr(part, "blob", None):
+            return part.blob.data
+        raise ValueError("No image data found in response")
+
+
+class BackendUnavailable(Exception):
+    """Transient upstream error (like a 503 from the API)"""
+
+    code = 503
+
+
+class QuotaExceeded(Exception):
+    """Too many concurrent requests (like a 429 from the API)"""
+
+    code = 429
+
+
+class InvalidRequest(Exception):
+    """Permanent request error (like a 400 from the API)"""
+
+    code = 400
+
+
+class LocalImageBackend(ImageEditBackend):
+    """
+    Deterministic stand-in: returns the input image tinted by a color derived
+    from the prompt, after a simulated latency
+
+    Latency is lognormal around `latency` (sigma 0 = fixed) plus
+    `megapixel_latency` per megapixel received; `slow_rate` of calls take
+    `slow_factor` times longer. Errors: `failure_rate` of calls raise a
+    transient 503, `bad_request_rate` a permanent 400, calls numbered in
+    `outage` (start, end) all fail with 503, and calls beyond
+    `max_concurrent` in flight are rejected with 429.
+    """
+
+    model_name = "local-tint-v1"
+
+    def __init__(
+        self,
+        latency: float = 0.5,
+        latency_sigma: float = 0.0,
+        megapixel_latency: float = 0.0,
+        failure_rate: float = 0.0,
+        bad_request_rate: float = 0.0,
+        slow_rate: float = 0.0,
+        slow_factor: float = 10.0,
+        outage: Optional[Tuple[int, int]] = None,
+        max_concurrent: int = 0,
+        cost_per_request: float = GeminiImageBackend.cost_per_request,
+        seed: int = 7,
+    ):
+        self.latency = latency
+        self.latency_sigma = latency_sigma
+        self.megapixel_latency = megapixel_latency
+        self.failure_rate = failure_rate
+        self.bad_request_rate = bad_request_rate
+        self.slow_rate = slow_rate
+        self.slow_factor = slow_factor
+        self.outage = outage
+        self.max_concurrent = max_concurrent
+        self.cost_per_request = cost_per_request
+        self.calls = 0
+        self.upload_bytes = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def generate(self, inputs: List, settings: Dict) -> bytes:
+        from PIL import Image
+
+        blobs = [item["data"] for item in inputs if isinstance(item, dict)]
+        if not blobs:
+            raise InvalidRequest("400 Request contains no image")
+        with self._lock:
+            self.calls += 1
+            self.upload_bytes += sum(len(blob) for blob in blobs)
+            call = self.calls
+            fail = self._rng.random() < self.failure_rate
+            bad_request = self._rng.random() < self.bad_request_rate
+            slow = self._rng.random() < self.slow_rate
+            jitter = (
+                self._rng.lognormvariate(0.0, self.latency_sigma) if self.latency_sigma else 1.0
+            )
+            if self.max_concurrent and self.in_flight >= self.max_concurrent:
+                raise QuotaExceeded("429 Resource has been exhausted (concurrent requests)")
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            with Image.open(io.BytesIO(blobs[0])) as source:
+                image = source.convert("RGB")
+            delay = (
+                self.latency * jitter + self.megapixel_latency * image.width * image.height / 1e6
+            )
+            time.sleep(delay * (self.slow_factor if slow else 1))
+            if bad_request:
+                raise InvalidRequest("400 Request contains an invalid argument")
+            if fail or (self.outage and self.outage[0] <= call < self.outage[1]):
+                raise BackendUnavailable("503 The model is overloaded")
+
+            # Same prompt and image, same output
+            digest = hashlib.sha256(str(inputs[0]).encode("utf-8")).digest()
+            tint = Image.new("RGB", image.size, tuple(64 + b % 128 for b in digest[:3]))
+            output = io.BytesIO()
+            Image.blend(image, tint, 0.35).save(output, format="PNG")
+            return output.getvalue()
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "upload_bytes": self.upload_bytes,
+                "peak_in_flight": self.peak_in_flight,
+            }
+
+
+def create_image_backend(api_key: Optional[str] = None) -> ImageEditBackend:
+    """Backend per IMAGE_EDIT_BACKEND ("gemini", the default, or "local")"""
+    backend = os.getenv("IMAGE_EDIT_BACKEND", "gemini").lower()
+    if backend == "local":
+        logger.warning("Using the local image editing stand-in (IMAGE_EDIT_BACKEND=local)")
+        return LocalImageBackend(
+            latency=float(os.getenv("LOCAL_IMAGE_LATENCY", "0.5")),
+            latency_sigma=float(os.getenv("LOCAL_IMAGE_LATENCY_SIGMA", "0")),
+            failure_rate=float(os.getenv("LOCAL_IMAGE_FAILURE_RATE", "0")),
+        )
+    if backend != "gemini":
+        raise ValueError(f"Unknown IMAGE_EDIT_BACKEND '{backend}' (expected 'gemini' or 'local')")
+    return GeminiImageBackend(api_key=api_key)
@@ -0,0 +1,260 @@
+"""
+Shared inference server for ML models
+
+Loading YOLO, SAM, LSTM and XGBoost in every uvicorn worker (and every job
+process) multiplies memory use and cold-start time. Instead, one dedicated
+inference process owns a ModelRegistry and serves predictions to all
+workers over a multiprocessing manager connection:
+
+    python -m services.inference_pool --address 127.0.0.1:50055 --warmup all
+
+Workers use it when INFERENCE_POOL_ADDRESS is set; otherwise they fall back
+to a lazily loaded in-process registry (convenient for development).
+
+Connections are authenticated with INFERENCE_POOL_AUTHKEY, which is
+required when the server listens on a non-loopback address. On loopback or
+a Unix socket it may be left unset: the server then generates a random key
+into INFERENCE_POOL_AUTHKEY_FILE (by default in a per-user 0700 directory
+under the temp dir) and workers running as the same user read it from
+there. A key file owned by another user or readable by others is refused.
+"""
+
+import argparse
+import ipaddress
+import logging
+import os
+import secrets
+import tempfile
+import threading
+from multiprocessing.managers import BaseManager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+from api.utils.metrics import model_inference_duration_seconds
+from services.model_registry import ModelRegistry, create_default_registry, warmup_model_names
+
+logger = logging.getLogger(__name__)
+
+Address = Union[Tuple[str, int], str]
+
+
+def parse_address(value: str) -> Address:
+    """'host:port' for TCP, anything else is a Unix socket path"""
+    host, sep, port = value.rpartition(":")
+    if sep and port.isdigit():
+        return (host or "127.0.0.1", int(port))
+    return value
+
+
+def _default_authkey_file() -> Path:
+    user = os.getuid() if hasattr(os, "getuid") else os.getenv("USERNAME", "default")
+    return Path(tempfile.gettempdir()) / f"urban-evolution-{user}" / "inference.key"
+
+
+AUTHKEY_FILE = Path(os.getenv("INFERENCE_POOL_AUTHKEY_FILE", str(_default_authkey_file())))
+
+
+def is_loopback(address: Address) -> bool:
+    """Whether only this host can reach the address (Unix sockets count)"""
+    if isinstance(address, str):
+        return True
+    host = address[0]
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _authkey(address: Address, create: bool = False) -> bytes:
+    """
+    Key for connections to the inference server at address
+
+    Args:
+        address: Server address
+        create: Generate the key file if it does not exist yet (server side)
+
+    Returns:
+        INFERENCE_POOL_AUTHKEY, or the per-deployment key from AUTHKEY_FILE
+        for loopback addresses
+    """
+    key = os.getenv("INFERENCE_POOL_AUTHKEY")
+    if key:
+        return key.encode()
+    if not is_loopback(address):
+        raise RuntimeError(
+            f"INFERENCE_POOL_AUTHKEY must be set for the non-loopback inference address {address}"
+        )
+    if create:
+        AUTHKEY_FILE.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        try:
+            fd = os.open(AUTHKEY_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            pass
+        else:
+            with os.fdopen(fd, "w") as f:
+                f.write(secrets.token_hex(32))
+            logger.info(f"Generated inference server key in {AUTHKEY_FILE}")
+    try:
+        fd = os.open(AUTHKEY_FILE, os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0))
+    except FileNotFoundError:
+        raise RuntimeError(
+            f"INFERENCE_POOL_AUTHKEY is not set and {AUTHKEY_FILE} does not exist; "
+            "start the inference server first or set the key"
+        ) from None
+    with os.fdopen(fd) as f:
+        # Checked on the open file: a key planted by another local user would
+        # let them connect and send pickles
+        info = os.fstat(f.fileno())
+        if hasattr(os, "getuid") and (info.st_uid != os.getuid() or info.st_mode & 0o077):
+            raise RuntimeError(
+                f"Refusing inference key {AUTHKEY_FILE}: it must be owned by this user "
+                "and not accessible to others (chmod 600)"
+            )
+        return f.read().strip().encode()
+
+
+class InferenceService:
+    """Server-side facade over the registry with bounded concurrency"""
+
+    def __init__(self, registry: ModelRegistry, max_concurrency: int = 2):
+        self.registry = registry
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+    def predict(self, name: str, inputs: Any) -> Any:
+        with self._slots:
+            return self.registry.predict(name, inputs)
+
+    def warm_up(self, names: Optional[Iterable[str]] = None) -> None:
+        self.registry.warm_up_in_background(names)
+
+    def status(self) -> Dict:
+        return self.registry.status()
+
+
+class _InferenceManager(BaseManager):
+    pass
+
+
+class LocalInference:
+    """In-process inference (models load lazily in this process)"""
+
+    mode = "local"
+
+    def __init__(self, registry: Optional[ModelRegistry] = None):
+        self.registry = registry or create_default_registry()
+
+    def predict(self, name: str, inputs: Any) -> Any:
+        with model_inference_duration_seconds.labels(name).time():
+            return self.registry.predict(name, inputs)
+
+    def warm_up(self, names: Optional[Iterable[str]] = None) -> None:
+        self.registry.warm_up_in_background(names)
+
+    def status(self) -> Dict:
+        return {"mode": self.mode, **self.registry.status()}
+
+
+class RemoteInference:
+    """Client for the shared inference server"""
+
+    mode = "remote"
+
+    def __init__(self, address: Address, authkey: Optional[bytes] = None):
+        self.address = address
+        self.authkey = authkey
+        self._local = threading.local()
+
+    def _service(self):
+        # Manager connections are not thread-safe; keep one per thread
+        service = getattr(self._local, "service", None)
+        if service is None:
+            if self.authkey is None:
+                self.authkey = _authkey(self.address)
+            _InferenceManager.register("inference")
+            manager = _InferenceManager(address=self.address, authkey=self.authkey)
+            manager.connect()
+            service = manager.inference()
+            self._local.service = service
+        return service
+
+    def _call(self, method: str, *args) -> Any:
+        try:
+            return getattr(self._service(), method)(*args)
+        except (ConnectionError, EOFError, BrokenPipeError):
+            # Server restarted: reconnect once
+            self._local.service = None
+            return getattr(self._service(), method)(*args)
+
+    def predict(self, name: str, inputs: Any) -> Any:
+        # Includes the round trip to the server, which is what callers wait for
+        with model_inference_duration_seconds.labels(name).time():
+            return self._call("predict", name, inputs)
+
+    def warm_up(self, names: Optional[Iterable[str]] = None) -> None:
+        self._call("warm_up", list(names) if names is not None else None)
+
+    def status(self) -> Dict:
+        return {"mode": self.mode, "address": str(self.address), **self._call("status")}
+
+
+_inference = None
+_inference_lock = threading.Lock()
+
+
+def get_inference():
+    """
+    Inference client for this process
+
+    RemoteInference if INFERENCE_POOL_ADDRESS is set, LocalInference otherwise.
+    """
+    global _inference
+    if _inference is None:
+        with _inference_lock:
+            if _inference is None:
+                address = os.getenv("INFERENCE_POOL_ADDRESS")
+                if address:
+                    _inference = RemoteInference(parse_address(address))
+                else:
+                    _inference = LocalInference()
+    return _inference
+
+
+def serve(address: Address, warmup: Iterable[str] = (), max_concurrency: int = 2) -> None:
+    """Run the inference server until interrupted"""
+    registry = create_default_registry()
+    service = InferenceService(registry, max_concurrency=max_concurrency)
+    _InferenceManager.register("inference", callable=lambda: service)
+    server = _InferenceManager(address=address, authkey=_authkey(address, create=True)).get_server()
+    registry.warm_up_in_background(list(warmup))
+    logger.info(f"Inference server listening on {address} (pid {os.getpid()})")
+    server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared ML inference server")
+    parser.add_argument(
+        "--address",
+        default=os.getenv("INFERENCE_POOL_ADDRESS", "127.0.0.1:50055"),
+        help="host:port or Unix socket path",
+    )
+    parser.add_argument(
+        "--warmup",
+        default=os.getenv("MODEL_WARMUP", "all"),
+        help='Models to load at startup: "all", "none" or a comma-separated list',
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=int(os.getenv("INFERENCE_MAX_CONCURRENCY", "2")),
+        help="Predictions run at the same time",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    serve(parse_address(args.address), warmup_model_names(args.warmup), args.max_concurrency)
+
+
+if __name__ == "__main__":
+    main()
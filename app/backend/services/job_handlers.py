@@ -0,0 +1,117 @@
+"""
+Job handlers for growth prediction, scenario generation and news refreshes
+
+Growth prediction has no handler until the LSTM is exported from
+ml-pipeline; POST /api/growth/predict answers 501 while none is registered.
+"""
+
+import logging
+import os
+from typing import Dict, Optional
+
+from services.job_queue import EXECUTOR_ASYNC, JobManager, ProgressCallback
+
+logger = logging.getLogger(__name__)
+
+GROWTH_PREDICTION = "growth_prediction"
+SCENARIO_GENERATION = "scenario_generation"
+NEWS_REFRESH = "news_refresh"
+
+# Part of the coalescing key: results from another model version are never reused
+SCENARIO_MODEL_VERSION = (
+    "local"
+    if os.getenv("IMAGE_EDIT_BACKEND", "gemini").lower() == "local"
+    else os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+)
+
+_gemini_service = None
+
+
+async def generate_scenario_job(params: Dict, progress: ProgressCallback) -> Dict:
+    """
+    Generate a scenario image with Gemini (API-bound; runs on the event loop)
+
+    Args:
+        params: {source_city, target_policy, user_preferences, prompt,
+                 source_image_path, edit_regions, reference_image_path};
+                prompt and source_image_path are checked by the router
+        progress: Progress callback
+
+    Returns:
+        Result dictionary from GeminiFlashService
+    """
+    progress(0.1, "Calling Gemini")
+    result = await _get_gemini_service().edit_image_with_retry(
+        params["source_image_path"],
+        params["prompt"],
+        params.get("edit_regions", []),
+        params.get("reference_image_path"),
+        tags={"policy": params.get("target_policy"), "city": params.get("source_city")},
+    )
+    if result["status"] != "success":
+        raise RuntimeError(result.get("error", "Scenario generation failed"))
+    progress(1.0, "Image generated")
+    return result
+
+
+def _get_gemini_service():
+    global _gemini_service
+    if _gemini_service is None:
+        from services.gemini_flash_service import GeminiFlashService
+
+        _gemini_service = GeminiFlashService()
+    return _gemini_service
+
+
+async def refresh_news_job(params: Dict, progress: ProgressCallback) -> Dict:
+    """
+    Fetch a city's news feeds and store new articles (I/O-bound)
+
+    Args:
+        params: {cities: [city names]}
+        progress: Progress callback
+
+    Returns:
+        Per city: new article count, feeds fetched / not modified, and errors
+    """
+    from services.news_ingestion import news_ingestor
+
+    progress(0.1, "Fetching feeds")
+    report = await news_ingestor.refresh(params["cities"])
+    progress(1.0, "News refreshed")
+    return {
+        name: {**result, "new_articles": len(result["new_articles"])}
+        for name, result in report.items()
+    }
+
+
+def news_key_params(params: Dict) -> Dict:
+    """Cities to refresh, case and order insensitive"""
+    return {"cities": sorted({str(name).strip().casefold() for name in params.get("cities", [])})}
+
+
+def scenario_key_params(params: Dict) -> Dict:
+    """Inputs that determine a generated scenario (prompt included)"""
+    return {**params, "source_city": str(params.get("source_city", "")).strip().casefold()}
+
+
+def register_job_handlers(manager: JobManager) -> None:
+    """Register the default job handlers"""
+    manager.register(
+        SCENARIO_GENERATION,
+        generate_scenario_job,
+        executor=EXECUTOR_ASYNC,
+        version=SCENARIO_MODEL_VERSION,
+        key_params=scenario_key_params,
+        memo_ttl=float(os.getenv("SCENARIO_RESULT_TTL", "86400")),
+    )
+    # Staleness is checked against the feed state, so finished refreshes are not reused;
+    # concurrent requests for a stale city still share one running refresh
+    manager.register(
+        NEWS_REFRESH,
+        refresh_news_job,
+        executor=EXECUTOR_ASYNC,
+        max_attempts=1,
+        key_params=news_key_params,
+        memo_ttl=0,
+    )
@@ -0,0 +1,735 @@
+"""
+Background job system backed by the `jobs` table
+
+Requests submit a job and get its id back immediately; a per-process
+dispatcher claims pending jobs from the database and runs them on bounded
+executors: a process pool for CPU-bound ML inference and asyncio tasks for
+API-bound work (Gemini calls). Because the database is the queue, jobs
+outlive the process that accepted them. Jobs whose worker died (stale
+heartbeat or dead pid) are requeued if they have attempts left and
+otherwise failed with a clear error.
+
+Identical submissions are coalesced: each job carries a dedupe key hashed
+from its kind, handler version and (normalized) params. A submission whose
+key matches a pending or running job joins it, and one matching a job that
+succeeded within the handler's memo TTL reuses its result. A partial unique
+index on the key of active jobs keeps this true across processes: the
+loser of an insert race joins the winner's job.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from api.models.database import Job, JobStatus
+from api.models.session import SessionLocal
+from api.utils.singleflight import SingleFlight, canonical_key
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_PROCESS = "process"  # CPU-bound: runs in the process pool
+EXECUTOR_ASYNC = "async"  # I/O-bound: runs as a task on the event loop
+
+TERMINAL_STATUSES = {JobStatus.SUCCEEDED, JobStatus.FAILED}
+
+ProgressCallback = Callable[..., None]  # progress(fraction, message=None)
+
+
+class QueueFullError(Exception):
+    """Raised when too many jobs are already pending"""
+
+
+@dataclass
+class JobHandler:
+    """Registered job implementation"""
+
+    kind: str
+    func: Callable  # func(params, progress) -> dict; a coroutine function for async jobs
+    executor: str = EXECUTOR_ASYNC
+    max_attempts: int = 2  # Total runs allowed, including resumes after restarts
+    version: str = "1"  # Model/implementation version; part of the dedupe key
+    key_params: Optional[Callable[[Dict], Dict]] = None  # Params that identify the result
+    memo_ttl: Optional[float] = 3600.0  # Reuse succeeded results this long (None: never)
+    coalesce: bool = True
+
+    def dedupe_key(self, params: Dict) -> Optional[str]:
+        if not self.coalesce:
+            return None
+        identity = self.key_params(params) if self.key_params else params
+        return canonical_key(self.kind, self.version, identity)
+
+
+@dataclass
+class Submission:
+    """Outcome of JobManager.submit"""
+
+    job_id: str
+    status: str
+    reused: Optional[str] = None  # None (new job), "in_flight" or "memo"
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# =============================================================================
+# Process pool side
+# =============================================================================
+
+_progress_queue = None
+
+
+def _init_process_worker(progress_queue) -> None:
+    global _progress_queue
+    _progress_queue = progress_queue
+
+
+def _run_in_process(job_func: Callable, job_id: str, params: Dict) -> Any:
+    """Entry point of a job inside a pool process"""
+
+    def progress(fraction: float, message: Optional[str] = None) -> None:
+        if _progress_queue is not None:
+            _progress_queue.put((job_id, float(fraction), message))
+
+    return job_func(params, progress)
+
+
+# =============================================================================
+# Job manager
+# =============================================================================
+
+
+class JobManager:
+    """Submits, runs, tracks and recovers background jobs"""
+
+    def __init__(
+        self,
+        session_factory: Callable = SessionLocal,
+        process_workers: int = 2,
+        async_workers: int = 8,
+        max_pending: int = 100,
+        poll_interval: float = 2.0,
+        heartbeat_interval: float = 15.0,
+        stale_after: float = 60.0,
+    ):
+        """
+        Initialize job manager
+
+        Args:
+            session_factory: Callable returning a database session
+            process_workers: Size of the process pool for CPU-bound jobs
+            async_workers: Concurrent API-bound jobs per process
+            max_pending: Pending jobs allowed before submissions are refused
+            poll_interval: Seconds between database polls for new work
+            heartbeat_interval: Seconds between heartbeats of running jobs
+            stale_after: Heartbeat age after which a running job is orphaned
+        """
+        self._session_factory = session_factory
+        self.process_workers = process_workers
+        self.async_workers = async_workers
+        self.max_pending = max_pending
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.queue_depth = 0
+        self.submissions = 0
+        self.created = 0
+        self.coalesced = 0
+        self.memo_hits = 0
+
+        self._handlers: Dict[str, JobHandler] = {}
+        self._free_slots = {EXECUTOR_PROCESS: process_workers, EXECUTOR_ASYNC: async_workers}
+        self._running: Dict[str, asyncio.Task] = {}
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._progress_persisted: Dict[str, float] = {}
+        self._background: List[asyncio.Task] = []
+        self._tasks: Set[asyncio.Task] = set()
+        self._flights = SingleFlight()
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._progress_queue = None
+        self._progress_thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._started = False
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def register(
+        self,
+        kind: str,
+        func: Callable,
+        executor: str = EXECUTOR_ASYNC,
+        max_attempts: int = 2,
+        version: str = "1",
+        key_params: Optional[Callable[[Dict], Dict]] = None,
+        memo_ttl: Optional[float] = 3600.0,
+        coalesce: bool = True,
+    ) -> None:
+        """
+        Register a job handler
+
+        Args:
+            kind: Job kind name
+            func: func(params, progress) returning a JSON-serializable dict.
+                Process jobs must be picklable module-level functions.
+            executor: EXECUTOR_PROCESS or EXECUTOR_ASYNC
+            max_attempts: Total runs allowed across restarts
+            version: Model/implementation version; bumping it stops reuse
+                of results computed by the previous version
+            key_params: Maps params to the normalized subset that determines
+                the result (all params if None)
+            memo_ttl: Seconds a succeeded result is reused for identical
+                submissions (0 disables memoization, None never expires)
+            coalesce: Whether identical submissions share one job at all
+        """
+        if executor not in self._free_slots:
+            raise ValueError(f"Unknown executor: {executor}")
+        self._handlers[kind] = JobHandler(
+            kind, func, executor, max_attempts, version, key_params, memo_ttl, coalesce
+        )
+
+    def handles(self, kind: str) -> bool:
+        """Whether a handler is registered for a job kind"""
+        return kind in self._handlers
+
+    async def start(self) -> None:
+        """Recover orphaned jobs and start dispatching"""
+        if self._started:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+
+        if any(h.executor == EXECUTOR_PROCESS for h in self._handlers.values()):
+            self._progress_queue = multiprocessing.get_context("spawn").Queue()
+            self._process_pool = self._create_process_pool()
+            self._progress_thread = threading.Thread(
+                target=self._drain_progress, name="job-progress", daemon=True
+            )
+            self._progress_thread.start()
+
+        self._started = True
+        await asyncio.to_thread(self._recover_orphans, True)
+        self._background = [
+            asyncio.create_task(self._dispatch_loop()),
+            asyncio.create_task(self._reaper_loop()),
+        ]
+        logger.info(f"Job manager started ({self.worker_id}, handlers: {sorted(self._handlers)})")
+
+    def _create_process_pool(self) -> ProcessPoolExecutor:
+        # spawn, not fork: the parent runs an event loop and helper threads
+        return ProcessPoolExecutor(
+            max_workers=self.process_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_process_worker,
+            initargs=(self._progress_queue,),
+        )
+
+    async def stop(self) -> None:
+        """Stop dispatching; interrupted jobs are requeued or failed"""
+        if not self._started:
+            return
+        self._started = False
+        for task in self._background:
+            task.cancel()
+        running = list(self._running.values())
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*self._background, *running, return_exceptions=True)
+
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+        if self._progress_queue is not None:
+            self._progress_queue.put(None)
+            self._progress_queue = None
+        logger.info("Job manager stopped")
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def submit(self, kind: str, params: Dict) -> Submission:
+        """
+        Submit a job, reusing an identical in-flight or recent one
+
+        Args:
+            kind: Registered job kind
+            params: JSON-serializable job parameters
+
+        Returns:
+            Submission with the job id and whether an existing job was reused
+
+        Raises:
+            QueueFullError: If max_pending jobs are already waiting
+        """
+        handler = self._handlers.get(kind)
+        if handler is None:
+            raise ValueError(f"Unknown job kind: {kind}")
+
+        self.submissions += 1
+        key = handler.dedupe_key(params)
+        if key is None:
+            submission = await asyncio.to_thread(self._insert_job, handler, params, None)
+        else:
+            # Concurrent identical submits in this process share one lookup/insert
+            submission, shared = await self._flights.do(
+                key, lambda: asyncio.to_thread(self._find_or_insert, handler, params, key)
+            )
+            if shared and submission.reused is None:
+                submission = Submission(submission.job_id, submission.status, "in_flight")
+
+        if submission.reused == "memo":
+            self.memo_hits += 1
+            logger.info(f"Reusing result of {kind} job {submission.job_id}")
+        elif submission.reused == "in_flight":
+            self.coalesced += 1
+            logger.info(f"Coalesced {kind} submission into job {submission.job_id}")
+        else:
+            self.created += 1
+            logger.info(f"Submitted {kind} job {submission.job_id}")
+            if self._wakeup is not None:
+                self._wakeup.set()
+        return submission
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        """Get a job snapshot, or None if it does not exist"""
+        return await asyncio.to_thread(self._load_snapshot, job_id)
+
+    async def events(self, job_id: str) -> AsyncIterator[Optional[Dict]]:
+        """
+        Stream job snapshots until the job reaches a terminal state
+
+        Yields a snapshot on every change, and None when nothing changed for
+        a poll interval (so callers can send heartbeats). Jobs running in
+        other processes are followed by polling the database.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=100)
+        self._subscribers.setdefault(job_id, set()).add(queue)
+        try:
+            state = await self.get(job_id)
+            if state is None:
+                return
+            yield state
+            while state["status"] not in {s.value for s in TERMINAL_STATUSES}:
+                try:
+                    latest = await asyncio.wait_for(queue.get(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    latest = await self.get(job_id)
+                if latest is None:
+                    return
+                latest = {**state, **latest}
+                if latest == state:
+                    yield None
+                    continue
+                state = latest
+                yield state
+        finally:
+            subscribers = self._subscribers.get(job_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[job_id]
+
+    @property
+    def started(self) -> bool:
+        return self._started
+
+    def stats(self) -> Dict:
+        """Get queue statistics"""
+        return {
+            "worker_id": self.worker_id,
+            "queue_depth": self.queue_depth,
+            "running": len(self._running),
+            "free_process_slots": self._free_slots[EXECUTOR_PROCESS],
+            "free_async_slots": self._free_slots[EXECUTOR_ASYNC],
+            "coalescing": self.coalescing_stats(),
+        }
+
+    def coalescing_stats(self) -> Dict:
+        """Submissions served by an existing job instead of a new computation"""
+        saved = self.coalesced + self.memo_hits
+        return {
+            "submissions": self.submissions,
+            "computations": self.created,
+            "coalesced": self.coalesced,
+            "memo_hits": self.memo_hits,
+            "saved": saved,
+            "saved_rate": round(saved / self.submissions, 4) if self.submissions else 0.0,
+        }
+
+    # ------------------------------------------------------------------
+    # Dispatching
+    # ------------------------------------------------------------------
+
+    async def _dispatch_loop(self) -> None:
+        while True:
+            for executor in (EXECUTOR_PROCESS, EXECUTOR_ASYNC):
+                kinds = [h.kind for h in self._handlers.values() if h.executor == executor]
+                while kinds and self._free_slots[executor] > 0:
+                    job = await asyncio.to_thread(self._claim_next, kinds)
+                    if job is None:
+                        break
+                    self._free_slots[executor] -= 1
+                    task = asyncio.create_task(self._execute(job))
+                    self._running[job["id"]] = task
+
+            self.queue_depth = await asyncio.to_thread(self._count_pending)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _execute(self, job: Dict) -> None:
+        job_id = job["id"]
+        handler = self._handlers[job["kind"]]
+        heartbeat = asyncio.create_task(self._heartbeat_loop(job_id))
+        self._publish(job_id)
+        try:
+            if handler.executor == EXECUTOR_PROCESS:
+                result = await self._loop.run_in_executor(
+                    self._process_pool, _run_in_process, handler.func, job_id, job["params"]
+                )
+            else:
+                progress = lambda fraction, message=None: self._set_progress(
+                    job_id, fraction, message
+                )
+                result = await handler.func(job["params"], progress)
+            await asyncio.to_thread(self._finish, job_id, JobStatus.SUCCEEDED, result, None)
+            logger.info(f"Job {job_id} ({job['kind']}) succeeded")
+        except asyncio.CancelledError:
+            await asyncio.to_thread(self._release_interrupted, job_id, "Interrupted by shutdown")
+            raise
+        except BrokenProcessPool as e:
+            # A pool process died (e.g. OOM-killed); replace the pool for later jobs
+            logger.error(f"Process pool broken while running job {job_id}; recreating it")
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = self._create_process_pool()
+            await asyncio.to_thread(
+                self._finish, job_id, JobStatus.FAILED, None, f"Worker process crashed: {e}"
+            )
+        except Exception as e:
+            logger.exception(f"Job {job_id} ({job['kind']}) failed: {e}")
+            await asyncio.to_thread(
+                self._finish, job_id, JobStatus.FAILED, None, f"{type(e).__name__}: {e}"
+            )
+        finally:
+            heartbeat.cancel()
+            self._running.pop(job_id, None)
+            self._progress_persisted.pop(job_id, None)
+            self._free_slots[handler.executor] += 1
+            self._publish(job_id)
+            if self._wakeup is not None:
+                self._wakeup.set()
+
+    async def _heartbeat_loop(self, job_id: str) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            await asyncio.to_thread(self._update_job, job_id, {Job.heartbeat_at: _utcnow()})
+
+    async def _reaper_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.stale_after / 2)
+            try:
+                await asyncio.to_thread(self._recover_orphans, False)
+            except Exception as e:
+                logger.warning(f"Job recovery pass failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Progress and notifications
+    # ------------------------------------------------------------------
+
+    def _drain_progress(self) -> None:
+        """Forward progress reports from pool processes to the event loop"""
+        queue = self._progress_queue
+        while True:
+            item = queue.get()
+            if item is None:
+                return
+            job_id, fraction, message = item
+            self._loop.call_soon_threadsafe(self._set_progress, job_id, fraction, message)
+
+    def _set_progress(self, job_id: str, fraction: float, message: Optional[str] = None) -> None:
+        fraction = min(max(fraction, 0.0), 1.0)
+        values = {Job.progress: fraction, Job.heartbeat_at: _utcnow()}
+        if message is not None:
+            values[Job.message] = message[:500]
+
+        # Persist at most twice per second; subscribers in this process get every update
+        now = self._loop.time()
+        if now - self._progress_persisted.get(job_id, 0.0) >= 0.5 or fraction >= 1.0:
+            self._progress_persisted[job_id] = now
+            self._spawn(asyncio.to_thread(self._update_job, job_id, values))
+
+        for queue in self._subscribers.get(job_id, ()):
+            snapshot = {
+                "id": job_id,
+                "status": JobStatus.RUNNING.value,
+                "progress": fraction,
+                "message": message,
+            }
+            if not queue.full():
+                queue.put_nowait(snapshot)
+
+    def _publish(self, job_id: str) -> None:
+        if job_id not in self._subscribers:
+            return
+
+        async def push():
+            snapshot = await self.get(job_id)
+            for queue in self._subscribers.get(job_id, ()):
+                if snapshot is not None and not queue.full():
+                    queue.put_nowait(snapshot)
+
+        self._spawn(push())
+
+    def _spawn(self, coro) -> None:
+        """Run a fire-and-forget coroutine, keeping a reference and logging failures"""
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+
+        def done(t: asyncio.Task) -> None:
+            self._tasks.discard(t)
+            if not t.cancelled() and t.exception() is not None:
+                logger.warning(f"Job bookkeeping task failed: {t.exception()}")
+
+        task.add_done_callback(done)
+
+    # ------------------------------------------------------------------
+    # Database operations (run in worker threads)
+    # ------------------------------------------------------------------
+
+    def _insert_job(
+        self, handler: JobHandler, params: Dict, key: Optional[str], db=None
+    ) -> Submission:
+        if db is None:
+            with self._session_factory() as db:
+                return self._insert_job(handler, params, key, db)
+        pending = db.query(func.count(Job.id)).filter(Job.status == JobStatus.PENDING).scalar()
+        if pending >= self.max_pending:
+            raise QueueFullError(f"{pending} jobs already pending")
+        job = Job(
+            kind=handler.kind,
+            params=params,
+            dedupe_key=key,
+            status=JobStatus.PENDING,
+            max_attempts=handler.max_attempts,
+        )
+        db.add(job)
+        db.commit()
+        return Submission(str(job.id), JobStatus.PENDING.value)
+
+    def _find_or_insert(self, handler: JobHandler, params: Dict, key: str) -> Submission:
+        """Return an active or still-fresh succeeded job with this key, else insert one"""
+        with self._session_factory() as db:
+            active = self._find_active(db, key)
+            if active is not None:
+                return active
+
+            if handler.memo_ttl is None or handler.memo_ttl > 0:
+                query = db.query(Job.id).filter(
+                    Job.dedupe_key == key, Job.status == JobStatus.SUCCEEDED
+                )
+                if handler.memo_ttl is not None:
+                    query = query.filter(
+                        Job.finished_at >= _utcnow() - timedelta(seconds=handler.memo_ttl)
+                    )
+                done = query.order_by(Job.finished_at.desc()).first()
+                if done is not None:
+                    return Submission(str(done.id), JobStatus.SUCCEEDED.value, "memo")
+
+            try:
+                return self._insert_job(handler, params, key, db)
+            except IntegrityError:
+                # Another process inserted the same job since the lookup
+                # (uq_jobs_active_dedupe_key); join it instead
+                db.rollback()
+                active = self._find_active(db, key)
+                if active is None:
+                    raise
+                return active
+
+    @staticmethod
+    def _find_active(db, key: str) -> Optional[Submission]:
+        active = (
+            db.query(Job.id, Job.status)
+            .filter(Job.dedupe_key == key, Job.status.in_([JobStatus.PENDING, JobStatus.RUNNING]))
+            .order_by(Job.created_at.desc())
+            .first()
+        )
+        if active is None:
+            return None
+        return Submission(str(active.id), active.status.value, "in_flight")
+
+    def _claim_next(self, kinds: List[str]) -> Optional[Dict]:
+        """Atomically move the oldest pending job of the given kinds to running"""
+        with self._session_factory() as db:
+            candidates = (
+                db.query(Job.id)
+                .filter(Job.status == JobStatus.PENDING, Job.kind.in_(kinds))
+                .order_by(Job.created_at)
+                .limit(5)
+                .all()
+            )
+            for (job_id,) in candidates:
+                now = _utcnow()
+                claimed = (
+                    db.query(Job)
+                    .filter(Job.id == job_id, Job.status == JobStatus.PENDING)
+                    .update(
+                        {
+                            Job.status: JobStatus.RUNNING,
+                            Job.attempts: Job.attempts + 1,
+                            Job.worker_id: self.worker_id,
+                            Job.started_at: now,
+                            Job.heartbeat_at: now,
+                            Job.message: "Running",
+                        },
+                        synchronize_session=False,
+                    )
+                )
+                db.commit()
+                if claimed:
+                    job = db.get(Job, job_id)
+                    return {"id": str(job.id), "kind": job.kind, "params": job.params}
+        return None
+
+    def _count_pending(self) -> int:
+        with self._session_factory() as db:
+            return db.query(func.count(Job.id)).filter(Job.status == JobStatus.PENDING).scalar()
+
+    def _update_job(self, job_id: str, values: Dict) -> None:
+        with self._session_factory() as db:
+            db.query(Job).filter(
+                Job.id == _as_uuid(job_id), Job.status == JobStatus.RUNNING
+            ).update(values, synchronize_session=False)
+            db.commit()
+
+    def _finish(
+        self, job_id: str, job_status: JobStatus, result: Any, error: Optional[str]
+    ) -> None:
+        values = {
+            Job.status: job_status,
+            Job.result: result,
+            Job.error: error,
+            Job.finished_at: _utcnow(),
+            Job.message: "Completed" if job_status == JobStatus.SUCCEEDED else "Failed",
+        }
+        if job_status == JobStatus.SUCCEEDED:
+            values[Job.progress] = 1.0
+        self._update_job(job_id, values)
+
+    def _release_interrupted(self, job_id: str, reason: str) -> None:
+        with self._session_factory() as db:
+            job = db.get(Job, _as_uuid(job_id))
+            if job is not None and job.status == JobStatus.RUNNING:
+                self._requeue_or_fail(job, reason)
+                db.commit()
+
+    def _recover_orphans(self, startup: bool) -> None:
+        """Requeue or fail running jobs whose worker is gone"""
+        cutoff = _utcnow() - timedelta(seconds=self.stale_after)
+        with self._session_factory() as db:
+            running = db.query(Job).filter(Job.status == JobStatus.RUNNING).all()
+            recovered = 0
+            for job in running:
+                if job.worker_id == self.worker_id:
+                    # Only a previous process with our host:pid can own these at startup
+                    orphaned = startup
+                else:
+                    heartbeat = job.heartbeat_at
+                    if heartbeat is not None and heartbeat.tzinfo is None:
+                        heartbeat = heartbeat.replace(tzinfo=timezone.utc)
+                    stale = heartbeat is None or heartbeat < cutoff
+                    orphaned = stale or not _worker_alive(job.worker_id)
+                if orphaned:
+                    reason = (
+                        "Interrupted by server restart" if startup else "Worker stopped responding"
+                    )
+                    self._requeue_or_fail(job, reason)
+                    recovered += 1
+            db.commit()
+        if recovered:
+            logger.warning(f"Recovered {recovered} orphaned job(s)")
+
+    def _requeue_or_fail(self, job: Job, reason: str) -> None:
+        if job.attempts < job.max_attempts:
+            job.status = JobStatus.PENDING
+            job.message = f"{reason}; requeued"
+            job.worker_id = None
+        else:
+            job.status = JobStatus.FAILED
+            job.error = f"{reason} after {job.attempts} attempt(s)"
+            job.message = "Failed"
+            job.finished_at = _utcnow()
+
+    def _load_snapshot(self, job_id: str) -> Optional[Dict]:
+        uuid_value = _as_uuid(job_id)
+        if uuid_value is None:
+            return None
+        with self._session_factory() as db:
+            job = db.get(Job, uuid_value)
+            return job_snapshot(job) if job is not None else None
+
+
+def job_snapshot(job: Job) -> Dict:
+    """Serializable view of a job"""
+    return {
+        "id": str(job.id),
+        "kind": job.kind,
+        "status": job.status.value,
+        "progress": job.progress,
+        "message": job.message,
+        "result": job.result,
+        "error": job.error,
+        "attempts": job.attempts,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+def _as_uuid(job_id: str):
+    import uuid
+
+    try:
+        return uuid.UUID(str(job_id))
+    except ValueError:
+        return None
+
+
+def _worker_alive(worker_id: Optional[str]) -> bool:
+    """Best-effort liveness check for workers on this host"""
+    if not worker_id or ":" not in worker_id:
+        return False
+    host, _, pid = worker_id.rpartition(":")
+    if host != socket.gethostname():
+        return True  # Can't tell; rely on the heartbeat
+    try:
+        os.kill(int(pid), 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+job_manager = JobManager(
+    process_workers=int(os.getenv("JOB_PROCESS_WORKERS", "2")),
+    async_workers=int(os.getenv("JOB_ASYNC_WORKERS", "8")),
+)
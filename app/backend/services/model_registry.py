@@ -0,0 +1,339 @@
+"""
+Model registry with lazy loading and background warm-up
+
+Models are registered by name with a loader and only loaded on first use
+(or by an explicit warm-up), so startup stays fast and workers that never
+run inference never pay for the weights. Each load is timed and the growth
+in resident memory it caused is recorded per model.
+"""
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+
+STATE_UNLOADED = "unloaded"
+STATE_LOADING = "loading"
+STATE_LOADED = "loaded"
+STATE_FAILED = "failed"
+
+
+class ModelNotFoundError(KeyError):
+    """Raised for a model name that is not registered"""
+
+
+class ModelLoadError(RuntimeError):
+    """Raised when a model file is missing or cannot be loaded"""
+
+
+def current_rss_bytes() -> Optional[int]:
+    """Resident set size of this process, if it can be measured"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import psutil
+
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return None
+
+
+# =============================================================================
+# Runtime wrappers (one uniform predict() per model file format)
+# =============================================================================
+
+
+class OnnxModel:
+    """ONNX Runtime session (YOLO, SAM exports)"""
+
+    def __init__(self, path: Path):
+        import onnxruntime
+
+        self.session = onnxruntime.InferenceSession(str(path), providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def predict(self, inputs: Any) -> List[Any]:
+        if not isinstance(inputs, dict):
+            inputs = {self.input_names[0]: inputs}
+        return self.session.run(None, inputs)
+
+
+class TFLiteModel:
+    """TensorFlow Lite interpreter (LSTM export)"""
+
+    def __init__(self, path: Path):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            from tensorflow.lite import Interpreter
+
+        self.interpreter = Interpreter(model_path=str(path))
+        self.interpreter.allocate_tensors()
+        self._lock = threading.Lock()  # Interpreters hold per-call tensor state
+
+    def predict(self, inputs: Any) -> List[Any]:
+        with self._lock:
+            input_details = self.interpreter.get_input_details()
+            self.interpreter.set_tensor(input_details[0]["index"], inputs)
+            self.interpreter.invoke()
+            return [
+                self.interpreter.get_tensor(o["index"])
+                for o in self.interpreter.get_output_details()
+            ]
+
+
+class PickledModel:
+    """Pickled estimator with a scikit-learn style predict() (XGBoost)"""
+
+    def __init__(self, path: Path):
+        import pickle
+
+        with open(path, "rb") as f:
+            self.estimator = pickle.load(f)
+
+    def predict(self, inputs: Any) -> Any:
+        return self.estimator.predict(inputs)
+
+
+MODEL_FORMATS: Dict[str, Callable[[Path], Any]] = {
+    ".onnx": OnnxModel,
+    ".tflite": TFLiteModel,
+    ".pkl": PickledModel,
+    ".joblib": PickledModel,
+}
+
+
+def load_model_file(path: str) -> Any:
+    """
+    Load a model file with the runtime matching its extension
+
+    Args:
+        path: Model path (relative paths resolve against app/backend)
+
+    Returns:
+        Model wrapper exposing predict(inputs)
+    """
+    resolved = Path(path)
+    if not resolved.is_absolute():
+        resolved = BACKEND_ROOT / resolved
+    if not resolved.exists():
+        raise ModelLoadError(f"Model file not found: {resolved}")
+    runtime = MODEL_FORMATS.get(resolved.suffix.lower())
+    if runtime is None:
+        raise ModelLoadError(
+            f"Unsupported model format '{resolved.suffix}' for {resolved.name}; "
+            f"export to one of {sorted(MODEL_FORMATS)}"
+        )
+    return runtime(resolved)
+
+
+# =============================================================================
+# Registry
+# =============================================================================
+
+
+@dataclass
+class ModelEntry:
+    """Registered model and its load state"""
+
+    name: str
+    loader: Callable[[], Any]
+    path: Optional[str] = None
+    state: str = STATE_UNLOADED
+    model: Any = None
+    error: Optional[str] = None
+    load_seconds: Optional[float] = None
+    rss_bytes: Optional[int] = None  # Resident memory growth caused by the load
+    loaded_at: Optional[float] = None
+    uses: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def snapshot(self) -> Dict:
+        return {
+            "name": self.name,
+            "path": self.path,
+            "state": self.state,
+            "error": self.error,
+            "load_seconds": round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            "rss_bytes": self.rss_bytes,
+            "loaded_at": self.loaded_at,
+            "uses": self.uses,
+        }
+
+
+class ModelRegistry:
+    """Loads models on first use and keeps them for the life of the process"""
+
+    def __init__(self):
+        self._models: Dict[str, ModelEntry] = {}
+        self._warmup_thread: Optional[threading.Thread] = None
+
+    def register(self, name: str, loader: Callable[[], Any], path: Optional[str] = None) -> None:
+        """
+        Register a model
+
+        Args:
+            name: Model name (e.g. "yolo")
+            loader: Zero-argument callable returning the loaded model
+            path: Model file path, for status reporting
+        """
+        self._models[name] = ModelEntry(name=name, loader=loader, path=path)
+
+    def register_file(self, name: str, path: str) -> None:
+        """Register a model loaded from a file by load_model_file"""
+        self.register(name, lambda: load_model_file(path), path=path)
+
+    def names(self) -> List[str]:
+        """Registered model names"""
+        return list(self._models)
+
+    def get(self, name: str) -> Any:
+        """
+        Get a model, loading it on first use
+
+        Concurrent callers for an unloaded model wait for a single load.
+
+        Raises:
+            ModelNotFoundError: If the model is not registered
+            ModelLoadError: If loading fails (retried on the next call)
+        """
+        entry = self._entry(name)
+        if entry.state == STATE_LOADED:
+            entry.uses += 1
+            return entry.model
+        with entry.lock:
+            if entry.state != STATE_LOADED:
+                self._load(entry)
+            entry.uses += 1
+            return entry.model
+
+    def predict(self, name: str, inputs: Any) -> Any:
+        """Run inference with a model, loading it if needed"""
+        return self.get(name).predict(inputs)
+
+    def is_loaded(self, name: str) -> bool:
+        return self._entry(name).state == STATE_LOADED
+
+    def unload(self, name: str) -> None:
+        """Drop a loaded model (memory is returned once nothing references it)"""
+        entry = self._entry(name)
+        with entry.lock:
+            entry.model = None
+            entry.state = STATE_UNLOADED
+            entry.rss_bytes = None
+            entry.loaded_at = None
+
+    def warm_up(self, names: Optional[Iterable[str]] = None) -> Dict[str, str]:
+        """
+        Load models now (blocking); failures are logged, not raised
+
+        Args:
+            names: Models to load (all registered models if None)
+
+        Returns:
+            Resulting state per model
+        """
+        states = {}
+        for name in names if names is not None else self.names():
+            try:
+                self.get(name)
+            except (ModelNotFoundError, ModelLoadError) as e:
+                logger.warning(f"Warm-up of model '{name}' failed: {e}")
+            states[name] = self._models[name].state if name in self._models else STATE_FAILED
+        return states
+
+    def warm_up_in_background(self, names: Optional[Iterable[str]] = None) -> None:
+        """Load models in a daemon thread so startup isn't delayed"""
+        names = list(names) if names is not None else self.names()
+        if not names:
+            return
+        if self._warmup_thread is not None and self._warmup_thread.is_alive():
+            logger.info("Model warm-up already running")
+            return
+        self._warmup_thread = threading.Thread(
+            target=self.warm_up, args=(names,), name="model-warmup", daemon=True
+        )
+        self._warmup_thread.start()
+        logger.info(f"Warming up models in background: {', '.join(names)}")
+
+    def status(self) -> Dict:
+        """Load state, load time and memory per model"""
+        return {
+            "pid": os.getpid(),
+            "rss_bytes": current_rss_bytes(),
+            "models": [entry.snapshot() for entry in self._models.values()],
+        }
+
+    def _entry(self, name: str) -> ModelEntry:
+        entry = self._models.get(name)
+        if entry is None:
+            raise ModelNotFoundError(f"Unknown model: {name}")
+        return entry
+
+    def _load(self, entry: ModelEntry) -> None:
+        entry.state = STATE_LOADING
+        rss_before = current_rss_bytes()
+        start = time.perf_counter()
+        try:
+            entry.model = entry.loader()
+        except Exception as e:
+            entry.state = STATE_FAILED
+            entry.error = str(e)
+            logger.error(f"Failed to load model '{entry.name}': {e}")
+            if isinstance(e, ModelLoadError):
+                raise
+            raise ModelLoadError(f"Failed to load model '{entry.name}': {e}") from e
+
+        entry.load_seconds = time.perf_counter() - start
+        rss_after = current_rss_bytes()
+        if rss_before is not None and rss_after is not None:
+            entry.rss_bytes = max(rss_after - rss_before, 0)
+        entry.state = STATE_LOADED
+        entry.error = None
+        entry.loaded_at = time.time()
+        logger.info(
+            f"Loaded model '{entry.name}' in {entry.load_seconds:.2f}s"
+            + (f" (+{entry.rss_bytes / 1e6:.0f} MB RSS)" if entry.rss_bytes is not None else "")
+        )
+
+
+# Default model files, overridable through the environment (see .env.example)
+DEFAULT_MODEL_PATHS = {
+    "yolo": ("YOLO_MODEL_PATH", "models/yolo/best.onnx"),
+    "sam": ("SAM_MODEL_PATH", "models/sam/sam_vit_h.onnx"),
+    "lstm": ("LSTM_MODEL_PATH", "models/growth/lstm_spatial.tflite"),
+    "xgboost": ("XGBOOST_MODEL_PATH", "models/growth/xgboost_building_type.pkl"),
+}
+
+
+def create_default_registry() -> ModelRegistry:
+    """Registry with the YOLO, SAM, LSTM and XGBoost models"""
+    registry = ModelRegistry()
+    for name, (env_var, default_path) in DEFAULT_MODEL_PATHS.items():
+        registry.register_file(name, os.getenv(env_var, default_path))
+    return registry
+
+
+def warmup_model_names(value: Optional[str] = None) -> List[str]:
+    """
+    Parse the MODEL_WARMUP setting
+
+    "all" warms every default model, "" or "none" disables warm-up, anything
+    else is a comma-separated list of model names.
+    """
+    value = (value if value is not None else os.getenv("MODEL_WARMUP", "")).strip().lower()
+    if value in ("", "none", "false", "0"):
+        return []
+    if value == "all":
+        return list(DEFAULT_MODEL_PATHS)
+    return [name.strip() for name in value.split(",") if name.strip()]
@@ -0,0 +1,422 @@
+"""
+LLM extraction of urban development projects from news articles
+
+- Results are cached by content hash (prompt, model, title and text), stored
+  in NewsCache.content_hash, so an article seen again (re-scrape, another
+  city, a syndicated copy) never pays for extraction twice
+- Short articles are packed into one call up to a prompt token budget
+- Calls run concurrently under request- and token-per-minute limits
+
+The LLM client is pluggable: Groq in production, LocalLLMClient (a
+deterministic keyword extractor) for tests and benchmarks. The stand-in is
+only used when asked for (NEWS_LLM_PROVIDER=local); without a provider,
+extraction is off.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy.orm import load_only
+
+from agents.orchestrator import load_agent_config
+from api.models.database import NewsCache
+from api.models.session import SessionLocal
+from api.utils.admission import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROMPT = (
+    "Extract urban development projects from the following news article.\n"
+    "Return as structured JSON."
+)
+
+# Instructions appended to the configured prompt for batched calls
+BATCH_INSTRUCTIONS = (
+    "Several articles follow, each starting with '### Article <id>'. Return a single "
+    'JSON object {"articles": [{"id": "<id>", "projects": [...]}]} with one entry '
+    "per article (an empty projects list when it describes none)."
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token for English text)"""
+    return len(text) // 4 + 1
+
+
+def _parse_json_object(text: str) -> Dict:
+    """JSON object in an LLM reply, tolerating code fences and surrounding prose"""
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end < start:
+        raise ValueError("No JSON object in LLM response")
+    return json.loads(text[start : end + 1])
+
+
+# =============================================================================
+# LLM clients
+# =============================================================================
+
+
+class LLMClient(ABC):
+    """Chat completion backend"""
+
+    model: str = "unknown"
+
+    @abstractmethod
+    async def complete(self, prompt: str, max_tokens: int) -> str:
+        """Return the completion text for a prompt"""
+
+
+class GroqLLMClient(LLMClient):
+    """Groq chat completions (JSON mode)"""
+
+    def __init__(self, model: str, temperature: float = 0.3, api_key: Optional[str] = None):
+        from groq import AsyncGroq
+
+        self.model = model
+        self.temperature = temperature
+        self._client = AsyncGroq(api_key=api_key or os.getenv("GROQ_API_KEY"))
+
+    async def complete(self, prompt: str, max_tokens: int) -> str:
+        response = await self._client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=self.temperature,
+            max_tokens=max_tokens,
+            response_format={"type": "json_object"},
+        )
+        return response.choices[0].message.content
+
+
+class LocalLLMClient(LLMClient):
+    """
+    Deterministic stand-in: keyword-based project extraction
+
+    Understands the batched prompt format and answers in the same JSON
+    shape as the real model, optionally after a simulated latency.
+    """
+
+    model = "local-keywords-v1"
+
+    KEYWORDS = {
+        "housing": "residential",
+        "apartment": "residential",
+        "residential": "residential",
+        "mall": "commercial",
+        "office": "commercial",
+        "market": "commercial",
+        "park": "park",
+        "garden": "park",
+        "metro": "infrastructure",
+        "tram": "infrastructure",
+        "bridge": "infrastructure",
+        "road": "infrastructure",
+        "mixed-use": "mixed-use",
+    }
+    _ARTICLE_RE = re.compile(r"^### Article (\S+)\n(.*?)(?=^### Article |\Z)", re.S | re.M)
+    _LOCATION_RE = re.compile(r"\b(?:in|near|at|on) ((?:the )?[A-Z][\w'-]*(?: [A-Z][\w'-]*)*)")
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+        self.prompt_tokens = 0
+
+    async def complete(self, prompt: str, max_tokens: int) -> str:
+        self.calls += 1
+        self.prompt_tokens += estimate_tokens(prompt)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        articles = []
+        for article_id, text in self._ARTICLE_RE.findall(prompt):
+            lowered = text.lower()
+            location = self._LOCATION_RE.search(text)
+            projects = [
+                {
+                    "name": f"{keyword.title()} project",
+                    "type": project_type,
+                    "location": location.group(1) if location else None,
+                }
+                for keyword, project_type in self.KEYWORDS.items()
+                if keyword in lowered
+            ]
+            articles.append({"id": article_id, "projects": projects})
+        return json.dumps({"articles": articles})
+
+
+def create_llm_client(config: Optional[Dict] = None) -> Optional[LLMClient]:
+    """
+    LLM client per NEWS_LLM_PROVIDER ("groq" or "local")
+
+    Defaults to Groq when GROQ_API_KEY is set. The local stand-in writes
+    keyword guesses, not real extractions, so it must be asked for
+    explicitly.
+
+    Returns:
+        The client, or None if no provider is configured
+    """
+    config = config or {}
+    provider = os.getenv("NEWS_LLM_PROVIDER") or ("groq" if os.getenv("GROQ_API_KEY") else "")
+    if provider == "groq":
+        return GroqLLMClient(
+            model=os.getenv("GROQ_MODEL") or config.get("llm_model", "llama-3.1-70b-versatile"),
+            temperature=float(config.get("temperature", 0.3)),
+        )
+    if provider == "local":
+        return LocalLLMClient()
+    if provider:
+        logger.warning(f"Unknown NEWS_LLM_PROVIDER '{provider}'")
+    return None
+
+
+# =============================================================================
+# Extraction
+# =============================================================================
+
+
+class NewsExtractor:
+    """Batched, cached, rate-limited project extraction"""
+
+    def __init__(
+        self,
+        client: LLMClient,
+        prompt: str = DEFAULT_PROMPT,
+        batch_token_budget: int = 3000,
+        max_batch_articles: int = 8,
+        max_output_tokens: int = 2000,
+        max_concurrency: int = 4,
+        requests_per_minute: float = 30,
+        tokens_per_minute: float = 0,
+    ):
+        """
+        Initialize extractor
+
+        Args:
+            client: LLM backend
+            prompt: Extraction instructions (agent_config.yaml extraction_prompt)
+            batch_token_budget: Maximum prompt tokens per call
+            max_batch_articles: Maximum articles per call (bounds the output size)
+            max_output_tokens: Completion token limit per call
+            max_concurrency: Calls in flight at once
+            requests_per_minute: Call rate limit (0 = unlimited)
+            tokens_per_minute: Prompt token rate limit (0 = unlimited)
+        """
+        self.client = client
+        self.prompt = prompt.strip()
+        self.batch_token_budget = batch_token_budget
+        self.max_batch_articles = max_batch_articles
+        self.max_output_tokens = max_output_tokens
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._requests = (
+            TokenBucket(
+                requests_per_minute / 60, max(1.0, min(requests_per_minute, max_concurrency))
+            )
+            if requests_per_minute
+            else None
+        )
+        self._tokens = (
+            TokenBucket(tokens_per_minute / 60, tokens_per_minute) if tokens_per_minute else None
+        )
+        self._header = f"{self.prompt}\n\n{BATCH_INSTRUCTIONS}\n\n"
+        self._prompt_key = hashlib.sha256(
+            f"{client.model}\n{self.prompt}".encode("utf-8")
+        ).hexdigest()
+        self.calls = 0
+        self.failed_calls = 0
+        self.extracted = 0
+        self.cache_hits = 0
+
+    def content_hash(self, article: Dict) -> str:
+        """Cache key: model, prompt and article text"""
+        payload = json.dumps(
+            [self._prompt_key, article["title"].strip(), (article.get("summary") or "").strip()],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _article_text(self, article_id: str, article: Dict) -> str:
+        text = f"### Article {article_id}\nTitle: {article['title'].strip()}\n"
+        if article.get("summary"):
+            text += article["summary"].strip() + "\n"
+        return text
+
+    def make_batches(self, articles: List[Dict]) -> List[List[Dict]]:
+        """
+        Pack articles into calls, first-fit by prompt tokens
+
+        Articles longer than the budget on their own get a call each (their
+        text is truncated to fit).
+        """
+        available = self.batch_token_budget - estimate_tokens(self._header)
+        sized = sorted(
+            ((min(estimate_tokens(self._article_text("00", a)), available), a) for a in articles),
+            key=lambda item: item[0],
+            reverse=True,
+        )
+        batches: List[List[Dict]] = []
+        room: List[int] = []
+        for tokens, article in sized:
+            for i, batch in enumerate(batches):
+                if tokens <= room[i] and len(batch) < self.max_batch_articles:
+                    batch.append(article)
+                    room[i] -= tokens
+                    break
+            else:
+                batches.append([article])
+                room.append(available - tokens)
+        return batches
+
+    async def extract(self, articles: Iterable[Dict]) -> Dict[str, Optional[List]]:
+        """
+        Extract projects, one LLM call per batch
+
+        Args:
+            articles: {title, summary} dicts (duplicates by content are sent once)
+
+        Returns:
+            Content hash -> projects (None when the call failed or the model
+            skipped the article; such articles are retried on the next run)
+        """
+        unique = {}
+        for article in articles:
+            unique.setdefault(self.content_hash(article), article)
+        batches = self.make_batches(list(unique.values()))
+        results = await asyncio.gather(*(self._run_batch(batch) for batch in batches))
+        merged: Dict[str, Optional[List]] = {key: None for key in unique}
+        for result in results:
+            merged.update(result)
+        return merged
+
+    async def _run_batch(self, batch: List[Dict]) -> Dict[str, Optional[List]]:
+        ids = {str(i + 1): article for i, article in enumerate(batch)}
+        budget_chars = (self.batch_token_budget - estimate_tokens(self._header)) * 4
+        prompt = (
+            self._header + "".join(self._article_text(i, a) for i, a in ids.items())[:budget_chars]
+        )
+
+        async with self._semaphore:
+            if self._requests is not None:
+                await self._requests.acquire()
+            if self._tokens is not None:
+                await self._tokens.acquire(estimate_tokens(prompt))
+            self.calls += 1
+            try:
+                reply = await self.client.complete(prompt, self.max_output_tokens)
+                entries = _parse_json_object(reply).get("articles", [])
+            except Exception as e:
+                self.failed_calls += 1
+                logger.warning(f"Project extraction failed for {len(batch)} articles: {e}")
+                return {}
+
+        results = {}
+        for entry in entries:
+            article = ids.get(str(entry.get("id")))
+            projects = entry.get("projects")
+            if article is not None and isinstance(projects, list):
+                results[self.content_hash(article)] = projects
+        self.extracted += len(results)
+        return results
+
+    async def process(self, article_ids: Iterable) -> Dict[str, Optional[List]]:
+        """
+        Fill NewsCache.projects_extracted for stored articles
+
+        Cached results (any row with the same content hash) are reused; only
+        the rest go to the LLM.
+
+        Args:
+            article_ids: NewsCache ids
+
+        Returns:
+            Article id -> projects
+        """
+        article_ids = list(article_ids)
+        if not article_ids:
+            return {}
+        articles = await asyncio.to_thread(_load_articles, article_ids)
+        hashes = {article_id: self.content_hash(a) for article_id, a in articles.items()}
+        cached = await asyncio.to_thread(_cached_projects, set(hashes.values()))
+        self.cache_hits += sum(1 for h in hashes.values() if h in cached)
+
+        misses = [articles[article_id] for article_id, h in hashes.items() if h not in cached]
+        extracted = await self.extract(misses) if misses else {}
+        projects_by_hash = {**cached, **extracted}
+
+        projects = {article_id: projects_by_hash.get(h) for article_id, h in hashes.items()}
+        await asyncio.to_thread(_save_projects, hashes, projects)
+        logger.info(
+            f"Extracted projects for {len(articles)} articles: "
+            f"{len(articles) - len(misses)} cached, "
+            f"{len(misses)} sent to {self.client.model}"
+        )
+        return projects
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model": self.client.model,
+            "calls": self.calls,
+            "failed_calls": self.failed_calls,
+            "extracted": self.extracted,
+            "cache_hits": self.cache_hits,
+        }
+
+
+def _load_articles(article_ids: List) -> Dict:
+    with SessionLocal() as db:
+        rows = (
+            db.query(NewsCache)
+            .options(load_only(NewsCache.id, NewsCache.title, NewsCache.summary))
+            .filter(NewsCache.id.in_(article_ids))
+            .all()
+        )
+        return {row.id: {"title": row.title, "summary": row.summary} for row in rows}
+
+
+def _cached_projects(hashes: set) -> Dict[str, List]:
+    with SessionLocal() as db:
+        rows = (
+            db.query(NewsCache.content_hash, NewsCache.projects_extracted)
+            .filter(
+                NewsCache.content_hash.in_(hashes),
+                NewsCache.projects_extracted.isnot(None),
+            )
+            .all()
+        )
+    return {row.content_hash: row.projects_extracted for row in rows}
+
+
+def _save_projects(hashes: Dict, projects: Dict) -> None:
+    with SessionLocal() as db:
+        for row in db.query(NewsCache).filter(NewsCache.id.in_(list(hashes))):
+            row.content_hash = hashes[row.id]
+            if projects.get(row.id) is not None:
+                row.projects_extracted = projects[row.id]
+        db.commit()
+
+
+def create_news_extractor() -> Optional[NewsExtractor]:
+    """Extractor configured from agent_config.yaml and the environment (None if off)"""
+    if os.getenv("NEWS_EXTRACTION_ENABLED", "true").lower() not in ("1", "true", "yes"):
+        return None
+    try:
+        config = load_agent_config().get("news_analyzer", {})
+    except (OSError, ImportError, ValueError) as e:
+        logger.warning(f"agent_config.yaml unavailable, using extraction defaults: {e}")
+        config = {}
+    client = create_llm_client(config)
+    if client is None:
+        logger.info("No news LLM provider configured, project extraction is off")
+        return None
+    return NewsExtractor(
+        client,
+        prompt=config.get("extraction_prompt", DEFAULT_PROMPT),
+        batch_token_budget=int(os.getenv("NEWS_EXTRACTION_BATCH_TOKENS", "3000")),
+        max_output_tokens=int(config.get("max_tokens", 2000)),
+        max_concurrency=int(os.getenv("NEWS_LLM_MAX_CONCURRENCY", "4")),
+        requests_per_minute=float(os.getenv("NEWS_LLM_RPM", "30")),
+        tokens_per_minute=float(os.getenv("NEWS_LLM_TPM", "0")),
+    )
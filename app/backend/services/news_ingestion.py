@@ -0,0 +1,570 @@
+"""
+Concurrent news ingestion
+
+Refreshing any number of cities is one pass over a pooled HTTP client:
+
+- Every source URL of every city is fetched concurrently; feeds shared by
+  several cities (planning blogs) are fetched once
+- Requests are conditional (If-None-Match / If-Modified-Since from the
+  stored NewsFeedState), so unchanged feeds cost a 304 and no parsing.
+  Validators are kept per city and feed, and saved only once the city's
+  articles are stored: a shared feed is filtered per city, so a 304 may
+  only skip entries the city has already seen. A shared feed is fetched
+  conditionally when every city in the pass holds the same validators
+- Articles are deduplicated by the SHA-256 of their normalized URL, backed
+  by the unique (city_id, url_hash) constraint on NewsCache; only articles
+  not seen before are stored and returned for further processing
+- New articles of all cities go through one batched, cached project
+  extraction pass (services.news_extraction), and the project locations of
+  each city are geocoded in one batch (services.geocoding)
+"""
+
+import asyncio
+import copy
+import hashlib
+import logging
+import os
+import re
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, quote_plus, urlencode, urlsplit, urlunsplit
+
+import httpx
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from agents.orchestrator import AGENT_CONFIG_PATH, load_agent_config
+from api.models.database import City, NewsCache, NewsFeedState
+from api.models.session import SessionLocal
+from services.geocoding import Geocoder, create_geocoder
+from services.news_extraction import NewsExtractor, create_news_extractor
+
+logger = logging.getLogger(__name__)
+
+NEWS_FETCH_TIMEOUT = float(os.getenv("NEWS_FETCH_TIMEOUT", "10"))
+NEWS_MAX_CONNECTIONS = int(os.getenv("NEWS_MAX_CONNECTIONS", "20"))
+USER_AGENT = "urban-evolution-ai/0.1 (news ingestion)"
+
+# Query parameters that identify a campaign or click, not the article
+_TRACKING_PREFIXES = ("utm_",)
+_TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ocid", "cmpid", "ref", "src"}
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of an article URL
+
+    Lowercases scheme and host, drops default ports, fragments, tracking
+    parameters and trailing slashes, and sorts the query.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "http"
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    netloc = host
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        netloc = f"{host}:{parts.port}"
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(_TRACKING_PREFIXES) and key.lower() not in _TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((scheme, netloc, path, urlencode(query), ""))
+
+
+def url_hash(url: str) -> str:
+    """SHA-256 hex digest of the normalized URL"""
+    return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+
+
+# =============================================================================
+# Sources
+# =============================================================================
+
+
+@dataclass
+class NewsSource:
+    """A feed URL, either per city ({city} template) or shared by all cities"""
+
+    name: str
+    url: str
+
+    @property
+    def city_specific(self) -> bool:
+        return "{city}" in self.url
+
+    def url_for(self, city_name: str) -> str:
+        if not self.city_specific:
+            return self.url
+        scheme, sep, rest = self.url.partition("://")
+        host, slash, path = rest.partition("/")
+        slug = re.sub(r"[^a-z0-9]+", "-", city_name.lower()).strip("-")
+        host = host.replace("{city}", slug)
+        path = path.replace("{city}", quote_plus(city_name))
+        return f"{scheme}{sep}{host}{slash}{path}"
+
+
+def load_news_sources(path=AGENT_CONFIG_PATH) -> List[NewsSource]:
+    """Enabled sources from agent_config.yaml (news_analyzer.news_sources)"""
+    config = load_agent_config(path)
+    sources = []
+    for entry in config.get("news_analyzer", {}).get("news_sources", []):
+        if not entry.get("enabled", True):
+            continue
+        if entry.get("url_template"):
+            sources.append(NewsSource(entry["name"], entry["url_template"]))
+        for url in entry.get("urls", []):
+            sources.append(NewsSource(entry["name"], url))
+    return sources
+
+
+# =============================================================================
+# Fetching
+# =============================================================================
+
+
+@dataclass
+class FeedResult:
+    """Outcome of one conditional fetch"""
+
+    url: str
+    status: Optional[int] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    entries: List[Dict] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status == 304
+
+
+def parse_feed(content: bytes) -> List[Dict]:
+    """Articles of an RSS/Atom document (CPU-bound; call from a thread)"""
+    import feedparser
+
+    entries = []
+    for entry in feedparser.parse(content).entries:
+        link = entry.get("link")
+        title = entry.get("title")
+        if not link or not title:
+            continue
+        published = entry.get("published_parsed") or entry.get("updated_parsed")
+        summary = _TAG_RE.sub("", entry.get("summary", "")).strip()
+        entries.append(
+            {
+                "title": title.strip(),
+                "url": link,
+                "summary": summary or None,
+                "published_at": (
+                    datetime(*published[:6], tzinfo=timezone.utc) if published else None
+                ),
+            }
+        )
+    return entries
+
+
+class NewsIngestor:
+    """Fetches news sources concurrently and stores new articles"""
+
+    def __init__(
+        self,
+        sources: Optional[List[NewsSource]] = None,
+        client: Optional[httpx.AsyncClient] = None,
+        max_articles_per_city: int = 50,
+        extractor: Optional[NewsExtractor] = None,
+        extract_projects: bool = True,
+        geocoder: Optional[Geocoder] = None,
+    ):
+        """
+        Initialize ingestor
+
+        Args:
+            sources: Sources to fetch (agent_config.yaml sources if None)
+            client: HTTP client (a pooled client is created on first use)
+            max_articles_per_city: New articles stored per city and refresh
+            extractor: Project extractor (configured from the environment if None)
+            extract_projects: Extract projects from new articles
+            geocoder: Project location geocoder (configured from agent_config.yaml if None)
+        """
+        self._sources = sources
+        self._client = client
+        self._extractor = extractor
+        self._geocoder = geocoder
+        self.max_articles_per_city = max_articles_per_city
+        self.extract_projects = extract_projects
+
+    @property
+    def sources(self) -> List[NewsSource]:
+        if self._sources is None:
+            self._sources = load_news_sources()
+        return self._sources
+
+    @property
+    def extractor(self) -> Optional[NewsExtractor]:
+        if self._extractor is None and self.extract_projects:
+            self._extractor = create_news_extractor()
+            self.extract_projects = self._extractor is not None
+        return self._extractor
+
+    @property
+    def geocoder(self) -> Geocoder:
+        if self._geocoder is None:
+            self._geocoder = create_geocoder()
+        return self._geocoder
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=NEWS_FETCH_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=NEWS_MAX_CONNECTIONS,
+                    max_keepalive_connections=NEWS_MAX_CONNECTIONS,
+                ),
+                follow_redirects=True,
+                headers={"User-Agent": USER_AGENT},
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self._geocoder is not None:
+            await self._geocoder.aclose()
+
+    async def fetch_feed(self, url: str, state: Optional[Dict] = None) -> FeedResult:
+        """
+        Conditionally fetch and parse one feed
+
+        Args:
+            url: Feed URL
+            state: Stored validators {etag, last_modified}
+
+        Returns:
+            FeedResult (entries are empty on 304 or error)
+        """
+        headers = {}
+        if state and state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state and state.get("last_modified"):
+            headers["If-Modified-Since"] = state["last_modified"]
+
+        try:
+            response = await self.client.get(url, headers=headers)
+        except httpx.HTTPError as e:
+            logger.warning(f"Fetching {url} failed: {e}")
+            return FeedResult(url, error=str(e) or type(e).__name__)
+
+        result = FeedResult(
+            url,
+            status=response.status_code,
+            etag=response.headers.get("etag"),
+            last_modified=response.headers.get("last-modified"),
+        )
+        if response.status_code == 304:
+            # Validators may be omitted on 304; keep the stored ones
+            result.etag = result.etag or (state or {}).get("etag")
+            result.last_modified = result.last_modified or (state or {}).get("last_modified")
+        elif response.status_code >= 400:
+            result.error = f"HTTP {response.status_code}"
+        else:
+            result.entries = await asyncio.to_thread(parse_feed, response.content)
+        return result
+
+    async def fetch_all(
+        self, urls: Iterable[str], states: Optional[Dict[str, Dict]] = None
+    ) -> Dict[str, FeedResult]:
+        """Fetch feeds concurrently (bounded by the client's connection pool)"""
+        urls = list(dict.fromkeys(urls))
+        states = states or {}
+        results = await asyncio.gather(*(self.fetch_feed(url, states.get(url)) for url in urls))
+        return dict(zip(urls, results))
+
+    async def is_stale(self, city_id, city_name: str, max_age: timedelta) -> bool:
+        """
+        Whether any of the city's feeds was last tried longer than max_age ago
+
+        Failed fetches count as tries, so a dead source is retried once per
+        max_age rather than on every request.
+        """
+        urls = [source.url_for(city_name) for source in self.sources]
+        oldest = await asyncio.to_thread(_oldest_attempt, city_id, urls)
+        return oldest is None or datetime.now(timezone.utc) - oldest > max_age
+
+    async def refresh(self, city_names: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Refresh news for several cities in one concurrent pass
+
+        Args:
+            city_names: City names (case-insensitive)
+
+        Returns:
+            Per city: new articles, feeds fetched / not modified, and errors
+        """
+        cities = await asyncio.to_thread(_load_cities, list(city_names))
+        plan = {
+            name: [(source, source.url_for(name)) for source in self.sources] for name in cities
+        }
+        feeds = [(url, cities[name]) for name, sources in plan.items() for _, url in sources]
+        states = await asyncio.to_thread(_load_feed_states, feeds)
+
+        start = asyncio.get_running_loop().time()
+        results = await self.fetch_all([url for url, _ in feeds], _common_states(feeds, states))
+        elapsed = asyncio.get_running_loop().time() - start
+
+        report = {}
+        for name, city_id in cities.items():
+            articles = []
+            for source, url in plan[name]:
+                for entry in results[url].entries:
+                    # Shared feeds cover many places; keep what mentions the city
+                    if not source.city_specific and not _mentions(entry, name):
+                        continue
+                    articles.append({**entry, "source": source.name})
+            new = await asyncio.to_thread(
+                _store_new_articles, city_id, articles, self.max_articles_per_city
+            )
+            city_results = [results[url] for _, url in plan[name]]
+            # At the limit, articles may have been left out: re-fetch in full next time
+            complete = len(new) < self.max_articles_per_city
+            await asyncio.to_thread(_save_feed_states, city_id, city_results, complete)
+            report[name] = {
+                "new_articles": new,
+                "feeds": len(city_results),
+                "not_modified": sum(1 for r in city_results if r.not_modified),
+                "errors": {r.url: r.error for r in city_results if r.error},
+            }
+        if await self._extract_projects(report):
+            await self._geocode_projects(report, cities)
+        logger.info(
+            f"Refreshed news for {len(cities)} cities: {len(results)} feeds in {elapsed:.2f}s, "
+            f"{sum(len(r['new_articles']) for r in report.values())} new articles"
+        )
+        return report
+
+    async def _extract_projects(self, report: Dict[str, Dict]) -> bool:
+        """Extract projects for the new articles of all cities in one pass"""
+        articles = [a for result in report.values() for a in result["new_articles"]]
+        if not articles:
+            return False
+        try:
+            extractor = self.extractor
+            if extractor is None:
+                return False
+            projects = await extractor.process(uuid.UUID(a["id"]) for a in articles)
+        except Exception as e:
+            logger.error(f"Project extraction failed: {e}")
+            return False
+        for article in articles:
+            # Copies: articles with the same content share one cached result
+            article["projects"] = copy.deepcopy(projects.get(uuid.UUID(article["id"])))
+        return True
+
+    async def _geocode_projects(self, report: Dict[str, Dict], cities: Dict[str, object]) -> None:
+        """Add coordinates to extracted project locations, one batch per city"""
+        updated = {}
+        for name, city_id in cities.items():
+            articles = [a for a in report[name]["new_articles"] if a.get("projects")]
+            projects = [p for a in articles for p in a["projects"] if isinstance(p, dict)]
+            locations = [p["location"] for p in projects if isinstance(p.get("location"), str)]
+            if not locations:
+                continue
+            try:
+                resolved = await self.geocoder.resolve_many(city_id, name, locations)
+            except Exception as e:
+                logger.error(f"Geocoding projects for {name} failed: {e}")
+                continue
+            for project in projects:
+                result = resolved.get(project.get("location"))
+                project["coordinates"] = result.to_dict() if result else None
+            updated.update({uuid.UUID(a["id"]): a["projects"] for a in articles})
+        if updated:
+            await asyncio.to_thread(_update_projects, updated)
+
+
+def _mentions(entry: Dict, city_name: str) -> bool:
+    text = f"{entry['title']} {entry.get('summary') or ''}".casefold()
+    return city_name.casefold() in text
+
+
+def _common_states(feeds: List[Tuple[str, object]], states: Dict[Tuple, Dict]) -> Dict[str, Dict]:
+    """Validators to send per URL: those held by every city the feed is fetched for"""
+    by_url: Dict[str, List[Optional[Dict]]] = {}
+    for url, city_id in feeds:
+        by_url.setdefault(url, []).append(states.get((url, city_id)))
+    return {
+        url: held[0] for url, held in by_url.items() if held[0] and all(s == held[0] for s in held)
+    }
+
+
+# =============================================================================
+# Persistence (sync; run in a thread)
+# =============================================================================
+
+
+def _load_cities(names: List[str]) -> Dict[str, object]:
+    """Canonical city name -> id for the names that exist"""
+    with SessionLocal() as db:
+        rows = (
+            db.query(City.name, City.id)
+            .filter(func.lower(City.name).in_([name.lower() for name in names]))
+            .all()
+        )
+    return {row.name: row.id for row in rows}
+
+
+def _load_feed_states(feeds: List[Tuple[str, object]]) -> Dict[Tuple, Dict]:
+    """Stored validators per (url, city_id)"""
+    wanted = set(feeds)
+    with SessionLocal() as db:
+        rows = (
+            db.query(NewsFeedState)
+            .filter(
+                NewsFeedState.url.in_({url for url, _ in wanted}),
+                NewsFeedState.city_id.in_({city_id for _, city_id in wanted}),
+            )
+            .all()
+        )
+        return {
+            (row.url, row.city_id): {"etag": row.etag, "last_modified": row.last_modified}
+            for row in rows
+            if (row.url, row.city_id) in wanted
+        }
+
+
+def _save_feed_states(
+    city_id, results: Iterable[FeedResult], keep_validators: bool = True
+) -> None:
+    """
+    Record the city's fetches; call once the articles they carried are stored
+
+    Without keep_validators the feeds are fetched unconditionally next time.
+    """
+    now = datetime.now(timezone.utc)
+    with SessionLocal() as db:
+        for result in results:
+            if result.error is not None:
+                # Keep the validators and fetch time of the last good fetch,
+                # so the feed is still fetched conditionally
+                state = db.get(NewsFeedState, (city_id, result.url))
+                if state is None:
+                    state = NewsFeedState(city_id=city_id, url=result.url)
+                    db.add(state)
+                state.last_status = result.status
+                state.last_attempted_at = now
+                continue
+            db.merge(
+                NewsFeedState(
+                    city_id=city_id,
+                    url=result.url,
+                    etag=result.etag if keep_validators else None,
+                    last_modified=result.last_modified if keep_validators else None,
+                    last_status=result.status,
+                    last_fetched_at=now,
+                    last_attempted_at=now,
+                )
+            )
+        db.commit()
+
+
+def _store_new_articles(city_id, articles: List[Dict], limit: int) -> List[Dict]:
+    """Insert articles not already stored for the city; returns the inserted ones"""
+    by_hash = {}
+    for article in articles:
+        by_hash.setdefault(url_hash(article["url"]), article)
+    if not by_hash:
+        return []
+
+    with SessionLocal(expire_on_commit=False) as db:
+        existing = {
+            h
+            for (h,) in db.query(NewsCache.url_hash).filter(
+                NewsCache.city_id == city_id, NewsCache.url_hash.in_(list(by_hash))
+            )
+        }
+        fresh = [(h, a) for h, a in by_hash.items() if h not in existing]
+        oldest = datetime.min.replace(tzinfo=timezone.utc)
+        fresh.sort(key=lambda item: item[1]["published_at"] or oldest, reverse=True)
+        rows = [_news_row(city_id, h, a) for h, a in fresh[:limit]]
+
+        db.add_all(rows)
+        try:
+            db.commit()
+        except IntegrityError:
+            # A concurrent refresh stored some of them first: insert one by one
+            db.rollback()
+            rows = [_news_row(city_id, h, a) for h, a in fresh[:limit]]
+            inserted = []
+            for row in rows:
+                try:
+                    with db.begin_nested():
+                        db.add(row)
+                    inserted.append(row)
+                except IntegrityError:
+                    pass
+            db.commit()
+            rows = inserted
+        return [news_article(row) for row in rows]
+
+
+def _update_projects(projects: Dict) -> None:
+    with SessionLocal() as db:
+        for row in db.query(NewsCache).filter(NewsCache.id.in_(list(projects))):
+            row.projects_extracted = projects[row.id]
+        db.commit()
+
+
+def _news_row(city_id, digest: str, article: Dict) -> NewsCache:
+    return NewsCache(
+        city_id=city_id,
+        title=article["title"][:500],
+        summary=article.get("summary"),
+        url=article["url"][:1000],
+        url_hash=digest,
+        source=article.get("source"),
+        published_at=article.get("published_at"),
+        scraped_at=datetime.now(timezone.utc),
+    )
+
+
+def news_article(row: NewsCache) -> Dict:
+    """API representation of a stored article"""
+    return {
+        "id": str(row.id),
+        "title": row.title,
+        "summary": row.summary,
+        "url": row.url,
+        "source": row.source,
+        "sentiment_score": row.sentiment_score,
+        "projects": row.projects_extracted,
+        "published_at": row.published_at.isoformat() if row.published_at else None,
+        "scraped_at": row.scraped_at.isoformat() if row.scraped_at else None,
+    }
+
+
+def _oldest_attempt(city_id, urls: List[str]) -> Optional[datetime]:
+    """Least recent fetch attempt of the city's feeds, None if any was never tried"""
+    with SessionLocal() as db:
+        rows = (
+            db.query(NewsFeedState.url, NewsFeedState.last_attempted_at)
+            .filter(NewsFeedState.city_id == city_id, NewsFeedState.url.in_(set(urls)))
+            .all()
+        )
+    attempted = {row.url: row.last_attempted_at for row in rows}
+    if set(urls) - attempted.keys() or None in attempted.values():
+        return None
+    oldest = min(attempted.values())
+    return oldest if oldest.tzinfo else oldest.replace(tzinfo=timezone.utc)
+
+
+news_ingestor = NewsIngestor(
+    max_articles_per_city=int(os.getenv("NEWS_MAX_ARTICLES_PER_CITY", "50"))
+)
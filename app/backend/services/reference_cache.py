@@ -0,0 +1,157 @@
+"""
+Pre-encoded reference images
+
+Scenario edits reuse a handful of reference city images (the policy's
+reference city or the configured fallback city). Each is decoded, scaled to
+fit the size sent to the model, converted to RGB and encoded as PNG once per
+(file, mtime, target size); the result is kept in a bounded in-memory LRU
+backed by a disk cache, so restarts and other workers skip the work too.
+
+All methods block; GeminiFlashService calls them from its I/O executor.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from api.utils.cache import LRUCache
+from services.generation_cache import GenerationCache, request_key
+
+logger = logging.getLogger(__name__)
+
+FileKey = Tuple[str, int, int]  # real path, mtime (ns), size
+
+
+def file_key(path: str) -> Optional[FileKey]:
+    """Identity of the current version of a file (None if it doesn't exist)"""
+    real_path = os.path.realpath(path)
+    try:
+        stat = os.stat(real_path)
+    except OSError:
+        return None
+    return (real_path, stat.st_mtime_ns, stat.st_size)
+
+
+def normalize_reference(data: bytes, size: Tuple[int, int]) -> bytes:
+    """Reference image as RGB PNG no larger than `size` (aspect ratio kept)"""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        reference = image.convert("RGB")
+    if reference.width > size[0] or reference.height > size[1]:
+        reference.thumbnail(size, Image.LANCZOS)
+    output = io.BytesIO()
+    reference.save(output, format="PNG")
+    return output.getvalue()
+
+
+class ReferenceImageCache:
+    """Normalized, encoded reference images keyed by path, mtime and target size"""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, disk: Optional[GenerationCache] = None):
+        """
+        Initialize cache
+
+        Args:
+            max_bytes: Size bound of the encoded images kept in memory
+            disk: Optional on-disk store shared across processes
+        """
+        self.memory = LRUCache(max_entries=256, max_bytes=max_bytes)
+        self.disk = disk
+        self._digests = LRUCache(max_entries=1024)
+        self._lock = threading.Lock()
+        self._building: Dict[Tuple, threading.Lock] = {}
+        self.encodes = 0
+        self.encode_seconds = 0.0
+
+    def digest(self, path: str) -> Optional[str]:
+        """SHA-256 of a reference file, hashed once per version (None if missing)"""
+        key = file_key(path)
+        if key is None:
+            return None
+        digest = self._digests.get(key)
+        if digest is None:
+            with open(key[0], "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+            self._digests.set(key, digest)
+        return digest
+
+    def load(self, path: str, size: Tuple[int, int]) -> Optional[bytes]:
+        """
+        Reference image ready to send to the model
+
+        Args:
+            path: Reference image file
+            size: Largest (width, height) of the encoded image
+
+        Returns:
+            PNG bytes, or None if the file doesn't exist
+        """
+        key = file_key(path)
+        if key is None:
+            return None
+        cache_key = (key, tuple(size))
+        data = self.memory.get(cache_key)
+        if data is not None:
+            return data
+
+        # One thread encodes a given version; concurrent requests wait for it
+        with self._lock:
+            building = self._building.setdefault(cache_key, threading.Lock())
+        with building:
+            data = self.memory.get(cache_key)
+            if data is None:
+                data = self._load_uncached(key, tuple(size))
+                self.memory.set(cache_key, data)
+        with self._lock:
+            self._building.pop(cache_key, None)
+        return data
+
+    def _load_uncached(self, key: FileKey, size: Tuple[int, int]) -> bytes:
+        disk_key = request_key(path=key[0], mtime_ns=key[1], file_size=key[2], size=list(size))
+        if self.disk is not None:
+            entry = self.disk.get(disk_key)
+            if entry is not None:
+                try:
+                    with open(entry["path"], "rb") as f:
+                        return f.read()
+                except OSError:
+                    pass
+
+        start = time.perf_counter()
+        with open(key[0], "rb") as f:
+            data = normalize_reference(f.read(), size)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.encodes += 1
+            self.encode_seconds += elapsed
+        logger.info(f"Encoded reference image {key[0]} at {size[0]}x{size[1]} in {elapsed:.2f}s")
+
+        if self.disk is not None:
+            self.disk.put(disk_key, data, {"path": key[0], "size": list(size)})
+        return data
+
+    def stats(self) -> Dict:
+        """Get cache statistics"""
+        return {
+            "memory": self.memory.stats(),
+            "disk": self.disk.stats() if self.disk is not None else None,
+            "encodes": self.encodes,
+            "encode_seconds": round(self.encode_seconds, 3),
+        }
+
+
+def create_reference_cache() -> ReferenceImageCache:
+    """Cache configured from the environment (disk store follows GEMINI_CACHE_ENABLED)"""
+    max_mb = float(os.getenv("GEMINI_REFERENCE_CACHE_MB", "64"))
+    disk = None
+    if os.getenv("GEMINI_CACHE_ENABLED", "true").lower() in ("1", "true", "yes"):
+        cache_dir = os.getenv("GEMINI_REFERENCE_CACHE_DIR") or os.path.join(
+            os.getenv("OUTPUTS_DIR", "outputs"), "cache", "references"
+        )
+        disk = GenerationCache(cache_dir, max_bytes=int(4 * max_mb * 1024 * 1024))
+    return ReferenceImageCache(max_bytes=int(max_mb * 1024 * 1024), disk=disk)
@@ -0,0 +1,216 @@
+"""
+Region-cropped image editing
+
+Edit regions usually cover a small part of a tile. Instead of sending the
+whole tile, the union of the regions plus a context margin is cropped,
+downscaled to fit the model's input size, edited, and composited back into
+the original with a feathered mask so the seam doesn't show.
+
+PIL and numpy are imported by the functions that need them.
+"""
+
+import io
+import logging
+import os
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+Box = Tuple[int, int, int, int]  # left, top, right, bottom (right/bottom exclusive)
+
+# Off unless enabled: cropping changes the prompt and the pixels the model sees.
+# "auto" crops when the crop is at most CROP_MAX_AREA_RATIO of the tile
+REGION_CROP_MODE = os.getenv("GEMINI_REGION_CROP", "off")
+CROP_MARGIN = int(os.getenv("GEMINI_CROP_MARGIN", "64"))
+CROP_MAX_AREA_RATIO = 0.5
+
+
+@dataclass
+class CropPlan:
+    """Where an edit is cropped from and how it is scaled"""
+
+    box: Box
+    scale: float  # crop pixels per source pixel (<= 1)
+    full_size: Tuple[int, int]
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """Size of the image sent to the model"""
+        left, top, right, bottom = self.box
+        return (
+            max(1, round((right - left) * self.scale)),
+            max(1, round((bottom - top) * self.scale)),
+        )
+
+    def to_dict(self) -> Dict:
+        return {
+            "box": list(self.box),
+            "scale": round(self.scale, 4),
+            "input_pixels": self.size[0] * self.size[1],
+            "full_pixels": self.full_size[0] * self.full_size[1],
+        }
+
+
+def region_box(region) -> Box:
+    """(left, top, right, bottom) of an edit region: {x1, y1, x2, y2} or [x1, y1, x2, y2]"""
+    if isinstance(region, dict):
+        x1, y1, x2, y2 = region["x1"], region["y1"], region["x2"], region["y2"]
+    else:
+        x1, y1, x2, y2 = region[:4]
+    return (int(min(x1, x2)), int(min(y1, y2)), int(max(x1, x2)), int(max(y1, y2)))
+
+
+def plan_crop(
+    edit_regions: Sequence,
+    image_size: Tuple[int, int],
+    max_input_size: Tuple[int, int] = (2048, 2048),
+    margin: int = CROP_MARGIN,
+    mode: str = REGION_CROP_MODE,
+) -> Optional[CropPlan]:
+    """
+    Crop for a set of edit regions
+
+    Args:
+        edit_regions: Regions in source pixel coordinates
+        image_size: Source (width, height)
+        max_input_size: Largest (width, height) sent to the model
+        margin: Context pixels kept around the regions
+        mode: "auto" (crop when it saves enough), "always" or "off"
+
+    Returns:
+        CropPlan, or None to send the full image
+    """
+    if mode == "off" or not edit_regions:
+        return None
+    width, height = image_size
+    boxes = [region_box(region) for region in edit_regions]
+    box = (
+        max(0, min(b[0] for b in boxes) - margin),
+        max(0, min(b[1] for b in boxes) - margin),
+        min(width, max(b[2] for b in boxes) + margin),
+        min(height, max(b[3] for b in boxes) + margin),
+    )
+    crop_w, crop_h = box[2] - box[0], box[3] - box[1]
+    if crop_w <= 0 or crop_h <= 0:
+        return None
+    if mode == "auto" and crop_w * crop_h > CROP_MAX_AREA_RATIO * width * height:
+        return None
+    scale = min(1.0, max_input_size[0] / crop_w, max_input_size[1] / crop_h)
+    return CropPlan(box, scale, (width, height))
+
+
+def crop_prompt(prompt: str, plan: CropPlan, edit_regions: Sequence) -> str:
+    """Prompt with the edit regions restated in crop coordinates"""
+    left, top = plan.box[:2]
+    lines = []
+    for i, region in enumerate(edit_regions, 1):
+        x1, y1, x2, y2 = region_box(region)
+        lines.append(
+            f"- Region {i}: x {round((x1 - left) * plan.scale)}-{round((x2 - left) * plan.scale)}, "
+            f"y {round((y1 - top) * plan.scale)}-{round((y2 - top) * plan.scale)}"
+        )
+    width, height = plan.size
+    return (
+        f"{prompt}\n\n"
+        f"Note: this image is a {width}x{height} crop of the tile. A source pixel (x, y) is at "
+        f"((x - {left}) * {plan.scale:.4f}, (y - {top}) * {plan.scale:.4f}) here. "
+        f"Edit regions in this image's pixels:\n"
+        + "\n".join(lines)
+        + "\nReturn the whole crop at the same size, unchanged outside the regions."
+    )
+
+
+def image_size(data: bytes) -> Tuple[int, int]:
+    """(width, height) of an encoded image (reads the header only)"""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        return image.size
+
+
+def _encode_png(image) -> bytes:
+    output = io.BytesIO()
+    image.save(output, format="PNG")
+    return output.getvalue()
+
+
+def crop_image(image, plan: CropPlan):
+    """The part of the source image sent to the model"""
+    from PIL import Image
+
+    crop = image.crop(plan.box)
+    if plan.scale < 1.0:
+        crop = crop.resize(plan.size, Image.LANCZOS)
+    return crop
+
+
+def crop_bytes(source: bytes, plan: CropPlan) -> bytes:
+    """crop_image() from and to encoded images (PNG out; CPU-bound, call from a thread)"""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(source)) as image:
+        return _encode_png(crop_image(image, plan))
+
+
+def _feather_mask(size: Tuple[int, int], feather: Tuple[int, int, int, int]):
+    """Alpha mask ramping from 0 to 255 over `feather` pixels at (left, top, right, bottom)"""
+    import numpy as np
+    from PIL import Image
+
+    width, height = size
+
+    def ramp(length: int, start: int, end: int):
+        values = np.ones(length, dtype=np.float32)
+        if start:
+            values[:start] = np.minimum(values[:start], (np.arange(start) + 0.5) / start)
+        if end:
+            values[length - end :] = np.minimum(
+                values[length - end :], (np.arange(end)[::-1] + 0.5) / end
+            )
+        return values
+
+    left, right = (min(f, width // 2) for f in feather[::2])
+    top, bottom = (min(f, height // 2) for f in feather[1::2])
+    mask = np.outer(ramp(height, top, bottom), ramp(width, left, right))
+    return Image.fromarray((mask * 255).astype(np.uint8), mode="L")
+
+
+def composite(original, edited, plan: CropPlan, feather: int = 32):
+    """
+    Paste an edited crop back into the original image
+
+    The crop is resized to its source box and blended in over `feather`
+    pixels on every side that isn't the image border.
+
+    Returns:
+        New image the size of the original
+    """
+    from PIL import Image
+
+    left, top, right, bottom = plan.box
+    size = (right - left, bottom - top)
+    edited = edited.convert(original.mode)
+    if edited.size != size:
+        edited = edited.resize(size, Image.LANCZOS)
+    width, height = original.size
+    mask = _feather_mask(
+        size,
+        (
+            feather if left > 0 else 0,
+            feather if top > 0 else 0,
+            feather if right < width else 0,
+            feather if bottom < height else 0,
+        ),
+    )
+    result = original.copy()
+    result.paste(edited, (left, top), mask)
+    return result
+
+
+def composite_bytes(original: bytes, edited: bytes, plan: CropPlan, feather: int = 32) -> bytes:
+    """composite() from and to encoded images (PNG out; CPU-bound, call from a thread)"""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(original)) as source, Image.open(io.BytesIO(edited)) as crop:
+        return _encode_png(composite(source, crop, plan, feather))
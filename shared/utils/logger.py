@@ -1,97 +1,368 @@
-"""Structured logging setup for Urban Evolution AI"""
+"""
+Structured logging setup for Urban Evolution AI
 
-import json
-import logging
+Handlers (colored console, JSON file) are added on first use, once per sink,
+and other loguru handlers are left alone. In async mode (LOG_ASYNC, on by
+default) a log call only checks the level and queues the message, its
+arguments and fields; a writer thread formats and writes them, so request
+handlers and tile loops never wait on stdout or disk. Messages take
+str.format placeholders and are only formatted when written:
+
+    logger.debug("tile {} rendered in {:.1f} ms", key, ms, sample_every=1000)
+
+Because formatting happens later, lists, dicts, sets and bytearrays passed as
+arguments or fields are copied (shallowly) at call time; any other object is
+formatted with whatever state it has when the writer gets to it, so pass
+values rather than objects that keep changing. The queue holds at most
+LOG_QUEUE_SIZE calls: when it is full (a log storm, or a sink that stalls)
+new calls are dropped and counted, and the writer logs how many were lost
+once it catches up.
+"""
+
+import atexit
+import copy
+import os
+import queue
 import sys
-from datetime import datetime
+import threading
+import time
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple
 
 from loguru import logger as loguru_logger
 
+CONSOLE_FORMAT = (
+    "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | "
+    "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
+)
+FILE_FORMAT = "{time:YYYY-MM-DD HH:mm:ss} | {level} | {name}:{function}:{line} - {message}"
 
-class StructuredLogger:
-    """Structured logging with JSON format support"""
-    
-    def __init__(self, name: str, log_file: str = None, level: str = "INFO"):
-        self.name = name
-        self.level = level
-        self.log_file = log_file
-        
-        # Configure loguru
-        self._configure_loguru()
-    
-    def _configure_loguru(self):
-        """Configure loguru logger"""
-        # Remove default handler
-        loguru_logger.remove()
-        
-        # Add console handler with colored output
-        loguru_logger.add(
-            sys.stdout,
-            format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
-            level=self.level,
-            colorize=True,
-        )
-        
-        # Add file handler with JSON format if specified
-        if self.log_file:
-            log_path = Path(self.log_file)
-            log_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            loguru_logger.add(
-                self.log_file,
-                format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {name}:{function}:{line} - {message}",
-                level=self.level,
+LEVELS = {
+    "TRACE": 5,
+    "DEBUG": 10,
+    "INFO": 20,
+    "SUCCESS": 25,
+    "WARNING": 30,
+    "ERROR": 40,
+    "CRITICAL": 50,
+}
+
+LOG_ASYNC = os.getenv("LOG_ASYNC", "true").lower() in ("1", "true", "yes")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# Arguments copied at call time in async mode (formatting happens later)
+_MUTABLE = (list, dict, set, bytearray)
+
+_handlers: Dict[str, Tuple[int, int]] = {}  # sink -> (loguru handler id, level)
+_handlers_lock = threading.Lock()
+_default_removed = False
+
+
+def _ensure_handler(sink: str, level_no: int) -> None:
+    """Add the "console" or a file handler, or lower its level (idempotent)"""
+    global _default_removed
+    current = _handlers.get(sink)
+    if current is not None and current[1] <= level_no:
+        return
+    with _handlers_lock:
+        current = _handlers.get(sink)
+        if current is not None:
+            if current[1] <= level_no:
+                return
+            loguru_logger.remove(current[0])
+        if not _default_removed:
+            # loguru's own stderr handler would print every line twice
+            try:
+                loguru_logger.remove(0)
+            except ValueError:
+                pass
+            _default_removed = True
+
+        if sink == "console":
+            handler_id = loguru_logger.add(
+                sys.stdout, format=CONSOLE_FORMAT, level=level_no, colorize=True
+            )
+        else:
+            Path(sink).parent.mkdir(parents=True, exist_ok=True)
+            handler_id = loguru_logger.add(
+                sink,
+                format=FILE_FORMAT,
+                level=level_no,
                 rotation="100 MB",
                 retention="30 days",
                 compression="zip",
                 serialize=True,  # JSON format
             )
+        _handlers[sink] = (handler_id, level_no)
+
+
+class _Writer:
+    """Background thread writing queued log calls through loguru"""
     
-    def info(self, message: str, **kwargs):
-        """Log info message"""
-        loguru_logger.bind(name=self.name, **kwargs).info(message)
+    def __init__(self, maxsize: int = LOG_QUEUE_SIZE):
+        self.maxsize = maxsize
+        self._queue: "queue.Queue" = queue.Queue(maxsize)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.errors = 0
+        self.dropped = 0  # Unlocked: approximate with several producer threads
+        self._reported = 0
+        self._item: Optional[Tuple] = None
+        self._logger = loguru_logger.opt(depth=1).patch(self._restore)
     
-    def debug(self, message: str, **kwargs):
-        """Log debug message"""
-        loguru_logger.bind(name=self.name, **kwargs).debug(message)
+    def put(self, item: Tuple) -> None:
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+        if self._thread is None:
+            self._start()
     
-    def warning(self, message: str, **kwargs):
-        """Log warning message"""
-        loguru_logger.bind(name=self.name, **kwargs).warning(message)
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self._thread.start()
     
-    def error(self, message: str, **kwargs):
-        """Log error message"""
-        loguru_logger.bind(name=self.name, **kwargs).error(message)
+    def _reset(self) -> None:
+        # In a forked child: the parent's thread and queued lines are not ours
+        self._queue = queue.Queue(self.maxsize)
+        self._thread = None
+        self._lock = threading.Lock()
     
-    def exception(self, message: str, **kwargs):
-        """Log exception with traceback"""
-        loguru_logger.bind(name=self.name, **kwargs).exception(message)
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything queued so far is written"""
+        if self._thread is None:
+            return True
+        deadline = time.monotonic() + timeout
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(max(0.0, deadline - time.monotonic()))
+    
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if self.dropped != self._reported:
+                self._report_dropped()
+            if isinstance(item, threading.Event):
+                item.set()
+            else:
+                try:
+                    self._write(*item)
+                except Exception:
+                    self.errors += 1
     
-    def critical(self, message: str, **kwargs):
+    def _report_dropped(self) -> None:
+        dropped = self.dropped
+        try:
+            loguru_logger.warning("Log queue full: dropped {} log calls", dropped - self._reported)
+        except Exception:
+            self.errors += 1
+        self._reported = dropped
+    
+    def _write(self, level, name, message, args, fields, exc_info, timestamp, site, thread) -> None:
+        self._item = (name, fields, timestamp, site, thread)
+        logger = self._logger if exc_info is None else self._logger.opt(exception=exc_info)
+        try:
+            logger.log(level, message, *args)
+        except Exception:
+            # Placeholders that don't match the arguments: keep the line anyway
+            self.errors += 1
+            logger.log(level, f"{message} {args!r}")
+    
+    def _restore(self, record) -> None:
+        """Where and when the call was made, not the writer thread's"""
+        name, fields, timestamp, (module, function, line, path), thread = self._item
+        filename = os.path.basename(path)
+        record["time"] = type(record["time"]).fromtimestamp(timestamp).astimezone()
+        record["name"] = module
+        record["function"] = function
+        record["line"] = line
+        record["file"] = type(record["file"])(filename, path)
+        record["module"] = os.path.splitext(filename)[0]
+        record["thread"] = type(record["thread"])(*thread)
+        record["extra"]["name"] = name
+        record["extra"].update(fields)
+
+
+_writer = _Writer()
+atexit.register(_writer.flush)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_writer._reset)
+
+
+def flush(timeout: float = 5.0) -> bool:
+    """Wait until queued log calls are written (True if done within timeout)"""
+    return _writer.flush(timeout)
+
+
+class StructuredLogger:
+    """Structured logging with JSON format support"""
+
+    def __init__(
+        self, name: str, log_file: str = None, level: str = "INFO", enqueue: Optional[bool] = None
+    ):
+        self.name = name
+        self.level = level.upper()
+        self.log_file = log_file
+        self.enqueue = LOG_ASYNC if enqueue is None else enqueue
+        self._level_no = LEVELS[self.level]
+        self._configured = False
+        self._sites: Dict[Tuple[Any, int], List] = {}
+
+        # Synchronous mode: depth 2 reports the caller of info()/debug()/...
+        self._logger = loguru_logger.bind(name=name).opt(depth=2)
+        self._exception_logger = loguru_logger.bind(name=name).opt(depth=2, exception=True)
+
+    def _configure(self):
+        """Add the console and file handlers (first log call)"""
+        _ensure_handler("console", self._level_no)
+        if self.log_file:
+            _ensure_handler(str(Path(self.log_file).resolve()), self._level_no)
+        self._configured = True
+
+    def _sample(self, frame, every: int, interval: float) -> Optional[int]:
+        """Calls skipped at this call site since it last logged, or None to skip this one"""
+        # Unlocked: with several threads on one call site the counts are approximate
+        key = (frame.f_code, frame.f_lineno)
+        site = self._sites.get(key)
+        now = time.monotonic()
+        if site is None:
+            self._sites[key] = [0, now]
+            return 0
+        if (every and site[0] < every - 1) or (interval and now - site[1] < interval):
+            site[0] += 1
+            return None
+        skipped = site[0]
+        site[0], site[1] = 0, now
+        return skipped
+
+    def _log(
+        self,
+        level: str,
+        message: str,
+        args: Tuple,
+        fields: Dict,
+        sample_every: int,
+        sample_interval: float,
+        exception: bool = False,
+    ):
+        if not self._configured:
+            self._configure()
+
+        frame = sys._getframe(2)
+        if sample_every > 1 or sample_interval > 0:
+            skipped = self._sample(frame, sample_every, sample_interval)
+            if skipped is None:
+                return
+            if skipped:
+                fields["sampled_out"] = skipped
+
+        if self.enqueue:
+            for value in args:
+                if isinstance(value, _MUTABLE):
+                    args = tuple(copy.copy(v) if isinstance(v, _MUTABLE) else v for v in args)
+                    break
+            for key, value in fields.items():
+                if isinstance(value, _MUTABLE):
+                    fields[key] = copy.copy(value)
+            code = frame.f_code
+            thread = threading.current_thread()
+            _writer.put((
+                level, self.name, message, args, fields,
+                sys.exc_info() if exception else None,
+                time.time(),
+                (frame.f_globals.get("__name__"), code.co_name, frame.f_lineno, code.co_filename),
+                (thread.ident, thread.name),
+            ))
+            return
+
+        bound = self._exception_logger if exception else self._logger
+        if fields:
+            bound = bound.bind(**fields)
+        try:
+            bound.log(level, message, *args)
+        except (IndexError, KeyError, ValueError):
+            bound.log(level, f"{message} {args!r}")
+
+    def info(
+        self, message: str, *args, sample_every: int = 0, sample_interval: float = 0.0, **kwargs
+    ):
+        """
+        Log info message
+        
+        Args:
+            message: Message, with {} placeholders for args (formatted only if written)
+            args: Placeholder values
+            sample_every: Log only every Nth call from this call site
+            sample_interval: Log at most once per this many seconds from this call site
+            kwargs: Structured fields
+        """
+        if self._level_no <= 20:
+            self._log("INFO", message, args, kwargs, sample_every, sample_interval)
+
+    def debug(
+        self, message: str, *args, sample_every: int = 0, sample_interval: float = 0.0, **kwargs
+    ):
+        """Log debug message"""
+        if self._level_no <= 10:
+            self._log("DEBUG", message, args, kwargs, sample_every, sample_interval)
+
+    def warning(
+        self, message: str, *args, sample_every: int = 0, sample_interval: float = 0.0, **kwargs
+    ):
+        """Log warning message"""
+        if self._level_no <= 30:
+            self._log("WARNING", message, args, kwargs, sample_every, sample_interval)
+
+    def error(
+        self, message: str, *args, sample_every: int = 0, sample_interval: float = 0.0, **kwargs
+    ):
+        """Log error message"""
+        if self._level_no <= 40:
+            self._log("ERROR", message, args, kwargs, sample_every, sample_interval)
+
+    def exception(
+        self, message: str, *args, sample_every: int = 0, sample_interval: float = 0.0, **kwargs
+    ):
+        """Log exception with traceback"""
+        if self._level_no <= 40:
+            self._log("ERROR", message, args, kwargs, sample_every, sample_interval, exception=True)
+
+    def critical(
+        self, message: str, *args, sample_every: int = 0, sample_interval: float = 0.0, **kwargs
+    ):
         """Log critical message"""
-        loguru_logger.bind(name=self.name, **kwargs).critical(message)
+        if self._level_no <= 50:
+            self._log("CRITICAL", message, args, kwargs, sample_every, sample_interval)
 
 
-def setup_logger(name: str, log_file: str = None, level: str = "INFO") -> StructuredLogger:
+def setup_logger(
+    name: str, log_file: str = None, level: str = "INFO", enqueue: Optional[bool] = None
+) -> StructuredLogger:
     """
     Set up a structured logger
     
+    Handlers are added on the first log call, not here.
+    
     Args:
         name: Logger name (usually __name__)
         log_file: Optional log file path
         level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+        enqueue: Write from a background thread (default: LOG_ASYNC)
     
     Returns:
         StructuredLogger instance
     """
-    return StructuredLogger(name=name, log_file=log_file, level=level)
+    return StructuredLogger(name=name, log_file=log_file, level=level, enqueue=enqueue)
 
 
 # Default application logger
 app_logger = setup_logger(
     name="urban_evolution_ai",
-    log_file="logs/urban_evolution.log",
-    level="INFO",
+    log_file=os.getenv("LOG_FILE", "logs/urban_evolution.log"),
+    level=os.getenv("LOG_LEVEL", "INFO"),
 )
@@ -0,0 +1,52 @@
+"""Shared test setup: import paths and an isolated database"""
+
+import os
+import sys
+import tempfile
+import uuid
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+BACKEND_DIR = PROJECT_ROOT / "app" / "backend"
+
+# The backend imports as top-level packages (api, services, ...); shared/ lives in the project root
+for path in (str(BACKEND_DIR), str(PROJECT_ROOT)):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# Never touch a configured database; set before anything imports api.models.session
+_db_dir = tempfile.mkdtemp(prefix="urban-evolution-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(_db_dir) / 'test.db'}"
+
+
+@pytest.fixture(scope="session")
+def database():
+    """Test database migrated to the latest schema"""
+    from api.models.schema import upgrade_database
+
+    upgrade_database()
+
+
+def _new_city(prefix: str):
+    from api.models.database import City
+    from api.models.session import SessionLocal
+
+    with SessionLocal() as db:
+        row = City(name=f"{prefix} {uuid.uuid4().hex[:8]}", country="TN", master_bbox={})
+        db.add(row)
+        db.commit()
+        return row.name, row.id
+
+
+@pytest.fixture
+def city(database):
+    """A fresh city: (name, id)"""
+    return _new_city("Testville")
+
+
+@pytest.fixture
+def other_city(database):
+    """A second fresh city: (name, id)"""
+    return _new_city("Otherton")
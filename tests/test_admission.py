@@ -0,0 +1,59 @@
+"""Route classes, client rate limits and shed responses"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.middleware.rate_limit import classify
+from api.utils.admission import (
+    AdaptiveLimiter,
+    ClientRateLimiter,
+    Overloaded,
+    RouteClassConfig,
+)
+
+
+def test_slow_reads_have_their_own_class():
+    assert classify("GET", "/api/buildings/tunis") == "bulk"
+    assert classify("GET", "/api/growth/8b1c/heatmap.geojson") == "bulk"
+    assert classify("GET", "/api/buildings/tunis/tiles/14/1/2.mvt") == "tiles"
+    assert classify("GET", "/api/cities/") == "default"
+
+
+def test_fixed_limit_ignores_slow_requests():
+    config = RouteClassConfig(
+        max_concurrency=8, max_queue=0, queue_timeout=1.0, target_latency=0.01, adaptive=False
+    )
+    limiter = AdaptiveLimiter("default", config)
+    limiter.in_flight = 1
+
+    limiter.release(5.0)
+
+    assert limiter.limit == 8
+
+
+def test_heavy_calls_leave_cheap_reads_alone():
+    limiter = ClientRateLimiter(requests=10, period=60)
+
+    limiter.check("10.0.0.7", cost=5.0, route_class="heavy")
+    limiter.check("10.0.0.7", cost=5.0, route_class="heavy")
+    with pytest.raises(Overloaded) as shed:
+        limiter.check("10.0.0.7", cost=5.0, route_class="heavy")
+    limiter.check("10.0.0.7", cost=1.0, route_class="default")
+
+    assert shed.value.status_code == 429
+
+
+def test_shed_responses_carry_cors_headers(monkeypatch):
+    import api.main
+
+    controller = api.main.admission_controller
+    monkeypatch.setattr(controller, "rate_limiter", ClientRateLimiter(requests=1, period=3600))
+    origin = {"Origin": "http://localhost:3000"}
+
+    client = TestClient(api.main.app)  # No lifespan: the request is shed before routing
+    controller.rate_limiter.check("testclient", cost=1.0, route_class="default")
+    response = client.get("/api/cities/", headers=origin)
+
+    assert response.status_code == 429
+    assert response.headers["access-control-allow-origin"] == "http://localhost:3000"
+    assert "retry-after" in response.headers
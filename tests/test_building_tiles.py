@@ -0,0 +1,80 @@
+"""Building tile invalidation: commit-ordered, per region"""
+
+import pytest
+
+from api.models.database import Building
+from api.models.session import SessionLocal
+from api.utils.response_cache import response_cache
+from api.utils.tiles import lonlat_to_mercator, tiles_covering
+from services.building_tiles import BuildingTileService, tile_entities
+
+Z = 14
+
+
+def square(lon, lat, size=0.0005):
+    return {
+        "type": "Polygon",
+        "coordinates": [
+            [[lon, lat], [lon + size, lat], [lon + size, lat + size], [lon, lat + size], [lon, lat]]
+        ],
+    }
+
+
+def tile_at(lon, lat):
+    x, y = lonlat_to_mercator(lon, lat)
+    return next(iter(tiles_covering((x, y, x, y), Z)))
+
+
+async def versions(city_id, x, y):
+    await response_cache.wait_invalidations()
+    return await response_cache.versions(tile_entities(city_id, Z, x, y))
+
+
+@pytest.fixture
+def building(city):
+    _, city_id = city
+    with SessionLocal() as db:
+        row = Building(city_id=city_id, geometry=square(10.2, 36.8), year_detected=2024)
+        db.add(row)
+        db.commit()
+        return row.id
+
+
+async def test_write_is_visible_once_committed(city, building):
+    _, city_id = city
+    service = BuildingTileService()
+    x, y = tile_at(10.2, 36.8)
+    far_x, far_y = tile_at(10.9, 37.2)  # Another region
+    far_before = await versions(city_id, far_x, far_y)
+
+    with SessionLocal() as db:
+        before = service.get_tile(db, city_id, Z, x, y, await versions(city_id, x, y))
+        row = db.get(Building, building)
+        row.geometry = square(10.25, 36.85)
+        db.flush()
+        # A render between flush and commit sees the old rows and versions
+        racing = await versions(city_id, x, y)
+        with SessionLocal() as other:
+            assert service.get_tile(other, city_id, Z, x, y, racing) == before
+        db.commit()
+
+    after = await versions(city_id, x, y)
+    with SessionLocal() as db:
+        moved = service.get_tile(db, city_id, Z, x, y, after)
+
+    assert after != racing
+    assert len(moved) < len(before)  # The building left the tile
+    assert (await versions(city_id, far_x, far_y))[1:] == far_before[1:]
+
+
+async def test_rolled_back_write_invalidates_nothing(city, building):
+    _, city_id = city
+    x, y = tile_at(10.2, 36.8)
+    start = await versions(city_id, x, y)
+
+    with SessionLocal() as db:
+        db.get(Building, building).geometry = square(10.25, 36.85)
+        db.flush()
+        db.rollback()
+
+    assert await versions(city_id, x, y) == start
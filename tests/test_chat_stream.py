@@ -0,0 +1,111 @@
+"""Cancellation of the chat orchestrator by run_chat and the chat endpoint"""
+
+import asyncio
+
+from starlette.requests import Request
+
+from agents.orchestrator import (
+    EVENT_ERROR,
+    EVENT_FINAL,
+    EVENT_STEP,
+    ChatEvent,
+    ChatOrchestrator,
+    OrchestratorSettings,
+)
+from api.routers import chat
+from services.chat_stream import run_chat
+
+
+class FakeOrchestrator(ChatOrchestrator):
+    """Emits one step, then waits on a slow "LLM call" until cancelled"""
+
+    def __init__(self):
+        super().__init__(OrchestratorSettings(timeout_seconds=0.2))
+        self.started = asyncio.Event()
+        self.cancelled = asyncio.Event()
+
+    async def stream(self, message, conversation_id=None, city_context=None):
+        yield ChatEvent(EVENT_STEP, {"agent": "planner", "status": "started"})
+        self.started.set()
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            self.cancelled.set()
+            raise
+        yield ChatEvent(EVENT_STEP, {"agent": "planner", "status": "finished"})
+
+
+async def test_client_disconnect_cancels_orchestrator():
+    orchestrator = FakeOrchestrator()
+    stream = run_chat(orchestrator.stream("hi"), timeout=30)
+
+    first = await stream.__anext__()
+    await orchestrator.started.wait()
+    # The response closes the iterator when the client goes away
+    await stream.aclose()
+
+    assert first.type == EVENT_STEP
+    await asyncio.wait_for(orchestrator.cancelled.wait(), timeout=1)
+
+
+async def test_timeout_emits_error_and_cancels_orchestrator():
+    orchestrator = FakeOrchestrator()
+    events = [
+        event
+        async for event in run_chat(
+            orchestrator.stream("hi"), timeout=orchestrator.settings.timeout_seconds, heartbeat=0.05
+        )
+    ]
+
+    real = [event for event in events if event is not None]
+    assert [event.type for event in real] == [EVENT_STEP, EVENT_ERROR]
+    assert real[-1].data["code"] == "timeout"
+    assert None in events  # heartbeats while the agent was busy
+    await asyncio.wait_for(orchestrator.cancelled.wait(), timeout=1)
+
+
+class AnsweringOrchestrator(ChatOrchestrator):
+    def __init__(self):
+        super().__init__(OrchestratorSettings(timeout_seconds=5))
+
+    async def stream(self, message, conversation_id=None, city_context=None):
+        yield ChatEvent(EVENT_STEP, {"agent": "planner", "status": "started"})
+        yield ChatEvent(EVENT_FINAL, {"response": f"re: {message}", "sources": [], "trace": []})
+
+
+def chat_request(disconnected: asyncio.Event) -> Request:
+    """A non-streaming request whose client leaves when `disconnected` is set"""
+
+    async def receive():
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    scope = {"type": "http", "method": "POST", "path": "/api/chat/", "headers": []}
+    return Request(scope, receive)
+
+
+async def test_endpoint_disconnect_cancels_orchestrator_without_waiting_for_heartbeat(
+    monkeypatch,
+):
+    orchestrator = FakeOrchestrator()
+    orchestrator.settings.timeout_seconds = 30
+    monkeypatch.setattr(chat, "get_orchestrator", lambda: orchestrator)
+    disconnected = asyncio.Event()
+
+    response = asyncio.create_task(chat.chat({"message": "hi"}, chat_request(disconnected)))
+    await orchestrator.started.wait()
+    disconnected.set()
+
+    assert await asyncio.wait_for(response, timeout=1) is None
+    assert orchestrator.cancelled.is_set()
+
+
+async def test_endpoint_returns_the_answer_while_the_client_waits(monkeypatch):
+    monkeypatch.setattr(chat, "get_orchestrator", AnsweringOrchestrator)
+
+    answer = await asyncio.wait_for(
+        chat.chat({"message": "hi"}, chat_request(asyncio.Event())), timeout=1
+    )
+
+    assert answer["response"] == "re: hi"
+    assert answer["steps"] == [{"agent": "planner", "status": "started"}]
@@ -0,0 +1,174 @@
+"""Retries, circuit breaker and budget settlement under injected faults (LocalImageBackend)"""
+
+import asyncio
+
+import pytest
+
+import services.gemini_flash_service as gemini
+from benchmarks.bench_gemini_batch import make_tiles
+from services.gemini_flash_service import CostBudget, GeminiFlashService
+from services.image_backends import LocalImageBackend
+
+
+@pytest.fixture
+def tiles(tmp_path):
+    return make_tiles(tmp_path, 4, 64)
+
+
+@pytest.fixture
+def make_service(tmp_path, monkeypatch):
+    monkeypatch.setenv("GENERATION_TELEMETRY_ENABLED", "false")
+    monkeypatch.setenv("GEMINI_CACHE_ENABLED", "false")
+    monkeypatch.setenv("OUTPUTS_DIR", str(tmp_path))
+    # Retry immediately
+    monkeypatch.setattr(gemini, "backoff_delay", lambda attempt: 0.0)
+
+    def make(**faults) -> GeminiFlashService:
+        backend = LocalImageBackend(latency=faults.pop("latency", 0.0), **faults)
+        return GeminiFlashService(backend=backend, cache=None)
+
+    return make
+
+
+async def edit(service, tile, tmp_path, **kwargs):
+    return await service.edit_image_with_retry(
+        tile["source_image_path"],
+        tile["prompt"],
+        tile["edit_regions"],
+        output_dir=str(tmp_path / "out"),
+        region_crop="off",
+        **kwargs,
+    )
+
+
+async def test_transient_errors_are_retried(make_service, tiles, tmp_path):
+    service = make_service(outage=(1, 3))  # calls 1 and 2 answer 503
+
+    result = await edit(service, tiles[0], tmp_path, max_retries=3)
+
+    assert result["status"] == "success"
+    assert service.backend.calls == 3
+    assert service.request_count == 1  # failed calls are not billed
+
+
+async def test_retries_stop_after_max_attempts(make_service, tiles, tmp_path):
+    service = make_service(failure_rate=1.0)
+
+    result = await edit(service, tiles[0], tmp_path, max_retries=3)
+
+    assert result["status"] == "failed" and result["retryable"]
+    assert service.backend.calls == 3
+
+
+async def test_bad_requests_are_not_retried(make_service, tiles, tmp_path):
+    service = make_service(bad_request_rate=1.0)
+
+    result = await edit(service, tiles[0], tmp_path, max_retries=3)
+
+    assert result["status"] == "failed" and not result["retryable"]
+    assert service.backend.calls == 1
+    assert service.breaker.stats()["opened"] == 0  # the API is healthy; the request is wrong
+
+
+async def test_breaker_opens_on_outage_and_recovers(make_service, tiles, tmp_path):
+    service = make_service(outage=(1, 4))  # calls 1-3 answer 503
+    service.breaker.failure_threshold = 3
+    service.breaker.reset_timeout = 0.2
+
+    failures = [await edit(service, tile, tmp_path, max_retries=1) for tile in tiles[:3]]
+    rejected = await edit(service, tiles[3], tmp_path, max_retries=1)
+
+    assert [r["status"] for r in failures] == ["failed"] * 3
+    assert rejected["status"] == "failed" and not rejected["retryable"]
+    assert service.backend.calls == 3  # the rejected edit never reached the backend
+    assert service.breaker.stats()["opened"] == 1
+
+    await asyncio.sleep(0.25)
+    probe = await edit(service, tiles[3], tmp_path, max_retries=1)
+
+    assert probe["status"] == "success"
+    assert service.breaker.state == "closed"
+
+
+async def open_breaker(service, tiles, tmp_path):
+    service.breaker.failure_threshold = 3
+    service.breaker.reset_timeout = 0.2
+    for tile in tiles[:3]:
+        await edit(service, tile, tmp_path, max_retries=1)
+    assert service.breaker.state == "open"
+    await asyncio.sleep(0.25)
+
+
+async def test_breaker_recovers_after_a_rejected_probe(make_service, tiles, tmp_path):
+    service = make_service(outage=(1, 4))
+    await open_breaker(service, tiles, tmp_path)
+
+    service.backend.bad_request_rate = 1.0
+    probe = await edit(service, tiles[3], tmp_path, max_retries=1)
+    service.backend.bad_request_rate = 0.0
+    retry = await edit(service, tiles[3], tmp_path, max_retries=1)
+
+    assert probe["status"] == "failed" and not probe["retryable"]
+    assert retry["status"] == "success"  # the 400 released the probe
+    assert service.breaker.state == "closed"
+
+
+async def test_breaker_recovers_after_a_cancelled_probe(make_service, tiles, tmp_path):
+    service = make_service(outage=(1, 4))
+    await open_breaker(service, tiles, tmp_path)
+
+    service.backend.latency = 0.5
+    probe = asyncio.create_task(edit(service, tiles[3], tmp_path, max_retries=1))
+    await asyncio.sleep(0.05)
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+    service.backend.latency = 0.0
+    retry = await edit(service, tiles[3], tmp_path, max_retries=1)
+
+    assert retry["status"] == "success"
+    assert service.breaker.state == "closed"
+
+
+@pytest.mark.parametrize(
+    "faults, timeout, spent_calls",
+    [
+        ({}, 10.0, 1),  # answered: charged
+        ({"failure_rate": 1.0}, 10.0, 0),  # 503: released
+        ({"bad_request_rate": 1.0}, 10.0, 0),  # 400: released
+        ({"latency": 0.5}, 0.05, 1),  # abandoned while running: may be billed, charged
+    ],
+)
+async def test_budget_settles_each_call(
+    make_service, tiles, tmp_path, faults, timeout, spent_calls
+):
+    service = make_service(**faults)
+    budget = CostBudget(1.0)
+
+    result = await edit(service, tiles[0], tmp_path, max_retries=1, budget=budget, timeout=timeout)
+
+    assert result["status"] == ("success" if spent_calls and timeout > 1 else "failed")
+    assert budget.reserved_usd == pytest.approx(0.0)
+    assert budget.spent_usd == pytest.approx(spent_calls * service.cost_per_request)
+    assert service.total_cost == pytest.approx(budget.spent_usd)
+
+
+async def test_batch_stops_at_the_budget(make_service, tiles, tmp_path):
+    service = make_service()
+
+    results = [
+        result
+        async for result in service.edit_images_batch(
+            tiles,
+            max_concurrency=2,
+            requests_per_minute=0,
+            budget_usd=2 * service.cost_per_request,
+            output_dir=str(tmp_path / "out"),
+            region_crop="off",
+        )
+    ]
+
+    statuses = sorted(result["status"] for result in results)
+    assert statuses == ["skipped", "skipped", "success", "success"]
+    assert service.backend.calls == 2
+    assert service.total_cost == pytest.approx(2 * service.cost_per_request)
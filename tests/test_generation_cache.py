@@ -0,0 +1,113 @@
+"""Request keys, size-bounded storage and cached edits"""
+
+from pathlib import Path
+
+import pytest
+
+from benchmarks.bench_gemini_batch import make_tiles
+from services.gemini_flash_service import CostBudget, GeminiFlashService
+from services.generation_cache import GenerationCache, request_key
+from services.image_backends import LocalImageBackend
+
+
+def test_request_key_is_canonical():
+    key = request_key(prompt="Add a park", regions=[{"x1": 10, "y1": 20}], size=(512, 512))
+
+    assert key == request_key(
+        size=[512.0, 512], regions=[{"y1": 20.0, "x1": 10}], prompt="Add a park"
+    )
+    assert key != request_key(prompt="Add a park", regions=[{"x1": 10, "y1": 21}], size=(512, 512))
+    assert key != request_key(
+        prompt="Add a park", regions=[{"x1": 10.5, "y1": 20}], size=(512, 512)
+    )
+
+
+def test_entries_round_trip(tmp_path):
+    cache = GenerationCache(str(tmp_path))
+    key = request_key(prompt="one")
+
+    assert cache.get(key) is None
+    cache.put(key, b"image", {"model": "m"})
+    entry = cache.get(key)
+
+    assert Path(entry["path"]).read_bytes() == b"image"
+    assert entry["metadata"] == {"model": "m"}
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_entries_are_evicted_by_size(tmp_path):
+    cache = GenerationCache(str(tmp_path), max_bytes=300)
+    first, second, third = (request_key(n=n) for n in range(3))
+
+    cache.put(first, b"a" * 100)
+    cache.put(second, b"b" * 100)
+    cache.get(first)  # Now the most recently used
+    cache.put(third, b"c" * 150)
+
+    assert cache.get(second) is None
+    assert cache.get(first) is not None and cache.get(third) is not None
+    assert cache.stats()["size_bytes"] == 250
+    assert cache.stats()["evictions"] == 1
+    assert not list(tmp_path.glob(f"*/{second}.*"))
+
+    cache.put(request_key(n=3), b"d" * 301)  # Larger than the whole cache: not stored
+    assert cache.stats()["entries"] == 2
+
+
+def test_existing_entries_are_indexed_and_bounded_on_start(tmp_path):
+    cache = GenerationCache(str(tmp_path))
+    for n in range(4):
+        cache.put(request_key(n=n), b"x" * 100)
+
+    reopened = GenerationCache(str(tmp_path), max_bytes=250)
+
+    assert reopened.stats()["entries"] == 2
+    assert reopened.stats()["size_bytes"] == 200
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setenv("GENERATION_TELEMETRY_ENABLED", "false")
+    monkeypatch.setenv("GEMINI_CACHE_ENABLED", "false")
+    monkeypatch.setenv("OUTPUTS_DIR", str(tmp_path))
+    return GeminiFlashService(
+        backend=LocalImageBackend(latency=0.0), cache=GenerationCache(str(tmp_path / "cache"))
+    )
+
+
+async def edit(service, tile, tmp_path, prompt=None, **kwargs):
+    return await service.edit_image(
+        tile["source_image_path"],
+        prompt or tile["prompt"],
+        tile["edit_regions"],
+        output_dir=str(tmp_path / "out"),
+        region_crop="off",
+        **kwargs,
+    )
+
+
+async def test_repeated_edit_is_served_from_the_cache_for_free(service, tmp_path):
+    (tile,) = make_tiles(tmp_path, 1, 64)
+    budget = CostBudget(1.0)
+
+    first = await edit(service, tile, tmp_path, budget=budget)
+    # Same request, differently spelled: surrounding whitespace in the prompt
+    second = await edit(service, tile, tmp_path, prompt=f"  {tile['prompt']}\n", budget=budget)
+
+    assert first["status"] == second["status"] == "success"
+    assert not first["cached"] and second["cached"]
+    assert second["cost"] == 0.0
+    assert service.backend.calls == 1
+    assert budget.spent_usd == pytest.approx(service.cost_per_request)
+    assert second["image_path"] != first["image_path"]
+    assert Path(second["image_path"]).read_bytes() == Path(first["image_path"]).read_bytes()
+
+
+async def test_different_request_is_not_served_from_the_cache(service, tmp_path):
+    (tile,) = make_tiles(tmp_path, 1, 64)
+
+    await edit(service, tile, tmp_path)
+    other = await edit(service, tile, tmp_path, prompt=tile["prompt"] + " with trees")
+
+    assert not other["cached"]
+    assert service.backend.calls == 2
@@ -0,0 +1,138 @@
+"""Recording, aggregating and summarizing generation telemetry"""
+
+import threading
+
+import pytest
+
+from services.generation_telemetry import GenerationTelemetry
+
+
+@pytest.fixture
+def telemetry(tmp_path):
+    # The background thread never gets to flush on its own during a test
+    telemetry = GenerationTelemetry(str(tmp_path / "telemetry"), flush_interval=3600)
+    yield telemetry
+    telemetry.stop()
+
+
+def record_some(telemetry):
+    telemetry.record("success", 0.04, 3.2, calls=1, upload_bytes=300_000, policy="green_belt")
+    telemetry.record("success", 0.04, 7.5, calls=2, upload_bytes=2_000_000, policy="green_belt")
+    telemetry.record("success", 0.0, 0.01, cached=True, policy="green_belt")
+    telemetry.record("error", 0.0, 0.8, calls=1, policy="densify")
+    telemetry.record("skipped", 0.0, 0.0)
+
+
+def test_record_refresh_summary(telemetry):
+    record_some(telemetry)
+    telemetry.flush()
+    telemetry.refresh()
+
+    summary = telemetry.summary(days=1)
+
+    assert summary["generations"] == 5
+    assert summary["outcomes"] == {"success": 3, "error": 1, "skipped": 1}
+    assert summary["cache_hits"] == 1
+    assert summary["model_calls"] == 4
+    assert summary["cost_usd"] == 0.08
+    # Cache hits and skips are left out of latency and payload
+    latency = summary["latency_seconds"]
+    assert sum(bucket["count"] for bucket in latency["histogram"]) == 3
+    assert latency["mean"] == round((3.2 + 7.5 + 0.8) / 3, 3)
+    assert latency["p50"] == 5.0
+    assert latency["p95"] == 10.0
+    assert summary["upload_bytes"]["mean"] == 1_150_000
+    assert [(p["policy"], p["generations"]) for p in summary["policies"]] == [
+        ("green_belt", 3),
+        ("densify", 1),
+        ("unspecified", 1),
+    ]
+    assert [day["generations"] for day in summary["daily"]] == [5]
+
+    assert telemetry.summary(days=1, policy="densify")["generations"] == 1
+
+
+def test_refresh_reads_every_worker_once(telemetry):
+    other = GenerationTelemetry(str(telemetry.directory), flush_interval=3600)
+    other._worker = "other-host-1"
+    try:
+        telemetry.record("success", 0.04, 2.0, calls=1)
+        other.record("success", 0.04, 4.0, calls=1)
+        telemetry.flush()
+        other.flush()
+
+        telemetry.refresh()
+        telemetry.refresh()
+        assert telemetry.summary()["generations"] == 2
+
+        other.record("error", 0.0, 1.0, calls=1)
+        other.flush()
+        telemetry.refresh()
+        assert telemetry.summary()["generations"] == 3
+    finally:
+        other.stop()
+
+
+def test_partial_last_line_waits_for_the_rest(telemetry):
+    telemetry.directory.mkdir(parents=True)
+    path = telemetry.directory / "gen-20990101-writer.jsonl"
+    line = b'{"t":4070908800,"o":"success","usd":0.04,"s":2.0,"n":1}\n'
+    path.write_bytes(line + line[:20])
+
+    telemetry.refresh()
+    assert telemetry.summary(days=100_000)["generations"] == 1
+
+    with open(path, "ab") as f:
+        f.write(line[20:])
+    telemetry.refresh()
+    assert telemetry.summary(days=100_000)["generations"] == 2
+
+
+def test_expired_files_are_removed(telemetry):
+    telemetry.directory.mkdir(parents=True)
+    old = telemetry.directory / "gen-20000101-writer.jsonl"
+    old.write_text('{"t":946684800,"o":"success"}\n')
+
+    telemetry.refresh()
+
+    assert not old.exists()
+    assert telemetry.summary(days=365)["generations"] == 0
+
+
+def test_summary_does_not_wait_for_file_reads(telemetry, monkeypatch):
+    record_some(telemetry)
+    telemetry.flush()
+    reading, release = threading.Event(), threading.Event()
+    read_new = telemetry._read_new
+
+    def slow_read(path, buckets):
+        reading.set()
+        release.wait(5)
+        read_new(path, buckets)
+
+    monkeypatch.setattr(telemetry, "_read_new", slow_read)
+    refresh = threading.Thread(target=telemetry.refresh)
+    refresh.start()
+    try:
+        assert reading.wait(5)
+        summaries = []
+        summary = threading.Thread(target=lambda: summaries.append(telemetry.summary()))
+        summary.start()
+        summary.join(timeout=2)
+        assert summaries and summaries[0]["generations"] == 0
+    finally:
+        release.set()
+        refresh.join()
+
+    assert telemetry.summary()["generations"] == 5
+
+
+async def test_endpoint_includes_this_workers_queued_records(telemetry, monkeypatch):
+    from api.routers import scenarios
+
+    monkeypatch.setattr(scenarios, "get_generation_telemetry", lambda: telemetry)
+    record_some(telemetry)
+
+    summary = await scenarios.get_generation_telemetry_summary(days=1, policy=None)
+
+    assert summary["generations"] == 5
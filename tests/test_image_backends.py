@@ -0,0 +1,123 @@
+"""Local image editing backend and the scenario job running on it"""
+
+import io
+import threading
+from pathlib import Path
+
+import pytest
+
+from benchmarks.bench_gemini_batch import make_tiles
+from services import job_handlers
+from services.gemini_flash_service import GeminiFlashService
+from services.image_backends import (
+    InvalidRequest,
+    LocalImageBackend,
+    QuotaExceeded,
+    create_image_backend,
+)
+
+
+@pytest.fixture
+def tile(tmp_path):
+    return make_tiles(tmp_path, 1, 64)[0]
+
+
+def image_inputs(tile, prompt=None):
+    data = Path(tile["source_image_path"]).read_bytes()
+    return [prompt or tile["prompt"], {"mime_type": "image/png", "data": data}]
+
+
+def test_output_is_deterministic_per_prompt_and_image(tile):
+    from PIL import Image
+
+    backend = LocalImageBackend(latency=0)
+
+    first = backend.generate(image_inputs(tile), {})
+    again = backend.generate(image_inputs(tile), {})
+    other = backend.generate(image_inputs(tile, "Add a tram line"), {})
+
+    assert first == again != other
+    with Image.open(io.BytesIO(first)) as image:
+        assert image.size == (64, 64)
+
+
+def test_request_without_image_is_invalid():
+    with pytest.raises(InvalidRequest):
+        LocalImageBackend(latency=0).generate(["prompt only"], {})
+
+
+def test_calls_beyond_provider_limit_get_429(tile):
+    backend = LocalImageBackend(latency=0.2, max_concurrent=2)
+    errors = []
+
+    def call():
+        try:
+            backend.generate(image_inputs(tile), {})
+        except QuotaExceeded as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(errors) == 2 and errors[0].code == 429
+    assert backend.stats()["peak_in_flight"] == 2
+
+
+def test_backend_selection(monkeypatch):
+    monkeypatch.setenv("IMAGE_EDIT_BACKEND", "local")
+    assert isinstance(create_image_backend(), LocalImageBackend)
+
+    monkeypatch.setenv("IMAGE_EDIT_BACKEND", "dall-e")
+    with pytest.raises(ValueError):
+        create_image_backend()
+
+
+@pytest.fixture
+def local_scenarios(tmp_path, monkeypatch):
+    """Scenario jobs run against a local backend"""
+    monkeypatch.setenv("GENERATION_TELEMETRY_ENABLED", "false")
+    monkeypatch.setenv("GEMINI_CACHE_ENABLED", "false")
+    monkeypatch.setenv("OUTPUTS_DIR", str(tmp_path))
+    # Scenario images are written to outputs/scenarios under the working directory
+    monkeypatch.chdir(tmp_path)
+
+    def install(**faults):
+        service = GeminiFlashService(backend=LocalImageBackend(latency=0, **faults), cache=None)
+        monkeypatch.setattr(job_handlers, "_gemini_service", service)
+        return service
+
+    return install
+
+
+def scenario_params(tile):
+    return {
+        "source_city": "Testville",
+        "target_policy": "EU_GREEN_CITIES",
+        "source_image_path": tile["source_image_path"],
+        "prompt": tile["prompt"],
+        "edit_regions": tile["edit_regions"],
+    }
+
+
+async def test_scenario_job_generates_an_image(local_scenarios, tile):
+    service = local_scenarios()
+    progress = []
+
+    result = await job_handlers.generate_scenario_job(
+        scenario_params(tile), lambda *args: progress.append(args)
+    )
+
+    assert result["status"] == "success"
+    assert Path(result["image_path"]).is_file()
+    assert result["cost"] == pytest.approx(service.cost_per_request)
+    assert progress[-1][0] == 1.0
+
+
+async def test_scenario_job_fails_on_invalid_request(local_scenarios, tile):
+    local_scenarios(bad_request_rate=1.0)
+
+    with pytest.raises(RuntimeError):
+        await job_handlers.generate_scenario_job(scenario_params(tile), lambda *args: None)
@@ -0,0 +1,126 @@
+"""Call sites, sampling, queueing and handler setup of the structured logger"""
+
+import inspect
+import json
+import threading
+import time
+
+import pytest
+from loguru import logger as loguru_logger
+
+from shared.utils import logger as structured
+
+
+@pytest.fixture
+def records():
+    """Records written through loguru during the test"""
+    written = []
+    handler_id = loguru_logger.add(lambda message: written.append(message.record), level=0)
+    yield written
+    structured.flush()
+    loguru_logger.remove(handler_id)
+
+
+def named(records, name):
+    return [record for record in records if record["extra"].get("name") == name]
+
+
+@pytest.mark.parametrize("enqueue", [True, False])
+def test_records_keep_the_call_site(records, enqueue):
+    log = structured.StructuredLogger(f"site-{enqueue}", enqueue=enqueue)
+
+    line = inspect.currentframe().f_lineno + 1
+    log.info("tile {} rendered", (14, 1, 2), layer="growth")
+    assert structured.flush()
+
+    (record,) = named(records, f"site-{enqueue}")
+    assert record["message"] == "tile (14, 1, 2) rendered"
+    assert record["function"] == "test_records_keep_the_call_site"
+    assert record["line"] == line
+    assert record["file"].name == "test_logger.py"
+    assert record["thread"].name == threading.current_thread().name
+    assert record["extra"]["layer"] == "growth"
+
+
+def test_sampling_keeps_every_nth_call_per_site(records):
+    log = structured.StructuredLogger("sampled", enqueue=True)
+
+    for i in range(10):
+        log.info("call {}", i, sample_every=4)
+    log.info("other site")
+    assert structured.flush()
+
+    messages = [(r["message"], r["extra"].get("sampled_out")) for r in named(records, "sampled")]
+    assert messages == [("call 0", None), ("call 4", 3), ("call 8", 3), ("other site", None)]
+
+
+def test_mutable_arguments_are_logged_as_they_were_at_call_time(records):
+    log = structured.StructuredLogger("mutable", enqueue=True)
+    tiles, counts = [(14, 1, 2)], {"hits": 1}
+
+    log.info("tiles {}", tiles, counts=counts)
+    tiles.append((14, 1, 3))
+    counts["hits"] = 2
+    assert structured.flush()
+
+    (record,) = named(records, "mutable")
+    assert record["message"] == "tiles [(14, 1, 2)]"
+    assert record["extra"]["counts"] == {"hits": 1}
+
+
+def test_full_queue_drops_and_reports_the_count(records, monkeypatch):
+    writer = structured._Writer(maxsize=2)
+    start = writer._start
+    monkeypatch.setattr(writer, "_start", lambda: None)  # Nothing drains the queue yet
+    thread = threading.current_thread()
+    for i in range(5):
+        writer.put(
+            (
+                "INFO",
+                "dropping",
+                "line {}",
+                (i,),
+                {},
+                None,
+                time.time(),
+                (__name__, "test", 1, __file__),
+                (thread.ident, thread.name),
+            )
+        )
+    assert writer.dropped == 3
+
+    monkeypatch.setattr(writer, "_start", start)
+    writer._start()
+    assert writer.flush()
+
+    assert [r["message"] for r in named(records, "dropping")] == ["line 0", "line 1"]
+    assert any(r["message"] == "Log queue full: dropped 3 log calls" for r in records)
+    assert writer.dropped == 3
+
+
+def test_flush_without_a_writer_thread_returns_at_once():
+    assert structured._Writer().flush(timeout=0)
+
+
+def test_handlers_are_added_once_per_sink(tmp_path):
+    log_file = tmp_path / "app.log"
+    first = structured.StructuredLogger("first", log_file=str(log_file), enqueue=False)
+    second = structured.StructuredLogger("second", log_file=str(log_file), enqueue=False)
+    sink = str(log_file.resolve())
+    try:
+        first.info("one")
+        handler = structured._handlers[sink]
+        second.info("two")
+        assert structured._handlers[sink] == handler
+
+        # A more verbose logger lowers the level of the existing handler instead of adding one
+        verbose = structured.StructuredLogger(
+            "verbose", log_file=str(log_file), level="DEBUG", enqueue=False
+        )
+        verbose.debug("three")
+        assert structured._handlers[sink][1] == structured.LEVELS["DEBUG"]
+    finally:
+        loguru_logger.remove(structured._handlers.pop(sink)[0])
+
+    lines = [json.loads(line) for line in log_file.read_text().splitlines()]
+    assert [line["record"]["message"] for line in lines] == ["one", "two", "three"]
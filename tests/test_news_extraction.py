@@ -0,0 +1,117 @@
+"""Batched, content-hash cached project extraction (with the LocalLLMClient stand-in)"""
+
+import uuid
+
+from services.news_extraction import (
+    LocalLLMClient,
+    NewsExtractor,
+    create_news_extractor,
+    estimate_tokens,
+)
+from services.news_ingestion import url_hash
+
+
+def make_extractor(client=None, **kwargs) -> NewsExtractor:
+    return NewsExtractor(client or LocalLLMClient(), requests_per_minute=0, **kwargs)
+
+
+def short_articles(count: int):
+    return [
+        {"title": f"Article {i}", "summary": f"New housing near the Old Port ({i})."}
+        for i in range(count)
+    ]
+
+
+def store_articles(city_id, articles):
+    from api.models.database import NewsCache
+    from api.models.session import SessionLocal
+
+    with SessionLocal() as db:
+        rows = []
+        for article in articles:
+            url = f"https://news.example.org/{uuid.uuid4().hex}"
+            rows.append(NewsCache(city_id=city_id, url=url, url_hash=url_hash(url), **article))
+        db.add_all(rows)
+        db.commit()
+        return [row.id for row in rows]
+
+
+async def test_short_articles_share_calls():
+    client = LocalLLMClient()
+    extractor = make_extractor(client, max_batch_articles=8)
+    articles = short_articles(20)
+
+    results = await extractor.extract(articles)
+
+    assert client.calls == 3  # 8 + 8 + 4
+    assert len(results) == 20
+    assert all(projects and projects[0]["type"] == "residential" for projects in results.values())
+
+
+async def test_duplicate_articles_are_sent_once():
+    client = LocalLLMClient()
+    extractor = make_extractor(client)
+    article = short_articles(1)[0]
+
+    results = await extractor.extract([article, dict(article), article])
+
+    assert client.calls == 1
+    assert list(results) == [extractor.content_hash(article)]
+
+
+def test_batches_fit_the_token_budget():
+    extractor = make_extractor(batch_token_budget=300, max_batch_articles=50)
+    long_article = {"title": "Long read", "summary": "The tram depot. " * 200}
+    articles = short_articles(30) + [long_article]
+
+    batches = extractor.make_batches(articles)
+
+    assert sum(len(batch) for batch in batches) == 31
+    assert [long_article] in batches
+    header = estimate_tokens(extractor._header)
+    for batch in batches:
+        if len(batch) > 1:
+            assert (
+                header + sum(estimate_tokens(extractor._article_text("00", a)) for a in batch)
+                <= 300
+            )
+
+
+def test_cache_key_depends_on_model_and_prompt():
+    article = short_articles(1)[0]
+    base = make_extractor().content_hash(article)
+
+    other_prompt = make_extractor(prompt="List the buildings.").content_hash(article)
+    other_model = LocalLLMClient()
+    other_model.model = "local-keywords-v2"
+
+    assert make_extractor().content_hash(dict(article)) == base
+    assert other_prompt != base
+    assert make_extractor(other_model).content_hash(article) != base
+
+
+async def test_process_reuses_stored_extractions(city):
+    _, city_id = city
+    articles = short_articles(3)
+    first_ids = store_articles(city_id, articles)
+    client = LocalLLMClient()
+    extractor = make_extractor(client)
+
+    first = await extractor.process(first_ids)
+    calls = client.calls
+    # The same stories stored again (re-scrape, syndicated copy) are not sent to the LLM
+    again = await make_extractor(client).process(store_articles(city_id, articles))
+
+    assert calls == 1 and client.calls == calls
+    assert sorted(map(str, again.values())) == sorted(map(str, first.values()))
+    assert all(projects for projects in again.values())
+
+
+def test_local_stand_in_is_opt_in(monkeypatch):
+    monkeypatch.setenv("NEWS_EXTRACTION_ENABLED", "true")
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+    monkeypatch.delenv("NEWS_LLM_PROVIDER", raising=False)
+    assert create_news_extractor() is None
+
+    monkeypatch.setenv("NEWS_LLM_PROVIDER", "local")
+    assert isinstance(create_news_extractor().client, LocalLLMClient)
@@ -0,0 +1,209 @@
+"""Conditional feed fetching and URL dedup (stand-in feed server from bench_news_ingestion)"""
+
+import uuid
+from datetime import timedelta
+
+import httpx
+import pytest
+
+import services.news_ingestion as news_ingestion
+from benchmarks.bench_news_ingestion import start_server
+from services.news_ingestion import (
+    FeedResult,
+    NewsIngestor,
+    NewsSource,
+    _load_feed_states,
+    _oldest_attempt,
+    _save_feed_states,
+    _store_new_articles,
+    normalize_url,
+    url_hash,
+)
+
+
+@pytest.fixture
+def feed_server():
+    server = start_server(latency=0, items=5)
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+@pytest.fixture
+async def ingestor(feed_server):
+    ingestor = NewsIngestor(
+        sources=[
+            NewsSource("Local news", feed_server + "/{city}/rss"),
+            NewsSource("Municipality", feed_server + "/{city}/council"),
+        ],
+        extract_projects=False,
+    )
+    yield ingestor
+    await ingestor.aclose()
+
+
+def test_normalize_url_drops_decoration():
+    assert normalize_url("HTTPS://www.Example.org:443/a/b/?utm_source=x&b=2&a=1#top") == (
+        "https://example.org/a/b?a=1&b=2"
+    )
+    assert url_hash("https://example.org/a?fbclid=1") == url_hash("https://example.org/a")
+    assert url_hash("https://example.org/a?id=1") != url_hash("https://example.org/a?id=2")
+
+
+async def test_refetch_with_validators_is_not_modified(ingestor, feed_server):
+    url = feed_server + "/Tunis/rss"
+
+    first = await ingestor.fetch_feed(url)
+    again = await ingestor.fetch_feed(
+        url, {"etag": first.etag, "last_modified": first.last_modified}
+    )
+
+    assert first.status == 200 and len(first.entries) == 5 and first.etag
+    assert again.not_modified and again.entries == []
+    # Validators survive a 304 that omits some of them
+    assert (again.etag, again.last_modified) == (first.etag, first.last_modified)
+
+
+async def test_refresh_stores_each_article_once(ingestor, city):
+    name, city_id = city
+
+    # Both feeds carry the same five articles under different tracking parameters
+    report = await ingestor.refresh([name])
+    again = await ingestor.refresh([name])
+
+    assert len(report[name]["new_articles"]) == 5
+    assert report[name]["errors"] == {}
+    assert again[name]["not_modified"] == 2 and again[name]["new_articles"] == []
+
+
+def test_store_skips_articles_already_stored(city):
+    name, city_id = city
+    article = {
+        "title": "Tram line",
+        "url": "https://news.example.org/tram",
+        "summary": None,
+        "published_at": None,
+        "source": "Local news",
+    }
+
+    first = _store_new_articles(city_id, [article], limit=10)
+    decorated = {**article, "url": "https://www.news.example.org/tram/?utm_campaign=x"}
+    second = _store_new_articles(city_id, [decorated, article], limit=10)
+
+    assert len(first) == 1
+    assert second == []
+
+
+def test_failed_fetch_keeps_validators(city):
+    name, city_id = city
+    url = f"https://feeds.example.org/{uuid.uuid4().hex}"
+    _save_feed_states(
+        city_id, [FeedResult(url, status=200, etag='"v1"', last_modified="Mon, 01 Jan 2024")]
+    )
+    fetched_at = _oldest_attempt(city_id, [url])
+
+    _save_feed_states(city_id, [FeedResult(url, status=503, error="HTTP 503")])
+
+    assert _load_feed_states([(url, city_id)])[(url, city_id)] == {
+        "etag": '"v1"',
+        "last_modified": "Mon, 01 Jan 2024",
+    }
+    # The failure counts as a try: the city is not stale until max_age passes again
+    assert _oldest_attempt(city_id, [url]) > fetched_at
+
+
+async def test_failing_source_does_not_keep_the_city_stale(city):
+    name, city_id = city
+
+    def handler(request):
+        raise httpx.ConnectError("name does not resolve")
+
+    ingestor = NewsIngestor(
+        sources=[NewsSource("Municipality", "https://{city}.gov/news")],
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        extract_projects=False,
+    )
+
+    assert await ingestor.is_stale(city_id, name, timedelta(hours=1))
+    report = await ingestor.refresh([name])
+    stale = await ingestor.is_stale(city_id, name, timedelta(hours=1))
+    await ingestor.aclose()
+
+    assert report[name]["errors"]
+    assert not stale
+
+
+def shared_feed(titles):
+    """Mock transport serving one RSS feed with an ETag; counts conditional hits"""
+    body = (
+        '<?xml version="1.0"?><rss version="2.0"><channel><title>Planning</title>'
+        + "".join(
+            f"<item><title>{title}</title><link>https://blog.example.org/{i}</link></item>"
+            for i, title in enumerate(titles)
+        )
+        + "</channel></rss>"
+    ).encode()
+
+    def handler(request):
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"'})
+        return httpx.Response(200, content=body, headers={"ETag": '"v1"'})
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+async def test_shared_feed_serves_each_city(city, other_city):
+    name, _ = city
+    other, _ = other_city
+    ingestor = NewsIngestor(
+        sources=[NewsSource("Planning blog", "https://blog.example.org/feed")],
+        client=shared_feed([f"Tram for {name}", f"Park in {other}"]),
+        extract_projects=False,
+    )
+
+    first = await ingestor.refresh([name])
+    # The feed is unchanged, but this city has never seen it
+    second = await ingestor.refresh([other])
+    again = await ingestor.refresh([name, other])
+    await ingestor.aclose()
+
+    assert [a["title"] for a in first[name]["new_articles"]] == [f"Tram for {name}"]
+    assert [a["title"] for a in second[other]["new_articles"]] == [f"Park in {other}"]
+    assert again[name]["not_modified"] == again[other]["not_modified"] == 1
+
+
+async def test_articles_over_the_limit_are_stored_later(city):
+    name, _ = city
+    ingestor = NewsIngestor(
+        sources=[NewsSource("Planning blog", "https://blog.example.org/feed")],
+        client=shared_feed([f"Tram for {name}", f"Park in {name}"]),
+        max_articles_per_city=1,
+        extract_projects=False,
+    )
+
+    first = await ingestor.refresh([name])
+    second = await ingestor.refresh([name])
+    await ingestor.aclose()
+
+    stored = first[name]["new_articles"] + second[name]["new_articles"]
+    assert len(stored) == 2 and second[name]["not_modified"] == 0
+
+
+async def test_validators_wait_for_stored_articles(city, monkeypatch):
+    name, city_id = city
+    ingestor = NewsIngestor(
+        sources=[NewsSource("Planning blog", "https://blog.example.org/feed")],
+        client=shared_feed([f"Tram for {name}"]),
+        extract_projects=False,
+    )
+
+    def fail(*args):
+        raise RuntimeError("database unavailable")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(news_ingestion, "_store_new_articles", fail)
+        with pytest.raises(RuntimeError):
+            await ingestor.refresh([name])
+    retry = await ingestor.refresh([name])
+    await ingestor.aclose()
+
+    assert len(retry[name]["new_articles"]) == 1
@@ -0,0 +1,104 @@
+"""Encoding once per file version, concurrently and across processes"""
+
+import io
+import os
+import threading
+import time
+
+from PIL import Image
+
+from services import reference_cache
+from services.generation_cache import GenerationCache
+from services.reference_cache import ReferenceImageCache
+
+
+def write_image(path, size=(640, 480), color=(10, 120, 60), mode="RGBA", mtime_ns=None):
+    Image.new(mode, size, color + (255,) if mode == "RGBA" else color).save(path, format="PNG")
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def decoded(data: bytes) -> Image.Image:
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    return image
+
+
+def test_reference_is_normalized_and_encoded_once(tmp_path):
+    path = tmp_path / "tunis.png"
+    write_image(path)
+    cache = ReferenceImageCache()
+
+    first = cache.load(str(path), (320, 320))
+    second = cache.load(str(path), (320, 320))
+
+    assert second == first
+    assert cache.encodes == 1
+    image = decoded(first)
+    assert (image.mode, image.size) == ("RGB", (320, 240))
+    assert cache.load(str(tmp_path / "missing.png"), (320, 320)) is None
+
+
+def test_new_file_version_or_size_is_encoded_again(tmp_path):
+    path = tmp_path / "tunis.png"
+    write_image(path, color=(10, 120, 60), mtime_ns=1_000_000_000)
+    cache = ReferenceImageCache()
+    old = cache.load(str(path), (320, 320))
+    old_digest = cache.digest(str(path))
+
+    # Same name and size, new content and mtime
+    write_image(path, color=(200, 30, 30), mtime_ns=2_000_000_000)
+    new = cache.load(str(path), (320, 320))
+
+    assert cache.encodes == 2
+    assert decoded(old).getpixel((0, 0)) == (10, 120, 60)
+    assert decoded(new).getpixel((0, 0)) == (200, 30, 30)
+    assert cache.digest(str(path)) != old_digest
+
+    assert decoded(cache.load(str(path), (64, 64))).size == (64, 48)
+    assert cache.encodes == 3
+
+
+def test_concurrent_loads_encode_once(tmp_path, monkeypatch):
+    path = tmp_path / "tunis.png"
+    write_image(path)
+    normalize = reference_cache.normalize_reference
+
+    def slow_normalize(data, size):
+        time.sleep(0.05)
+        return normalize(data, size)
+
+    monkeypatch.setattr(reference_cache, "normalize_reference", slow_normalize)
+    cache = ReferenceImageCache()
+    start = threading.Barrier(8)
+    results = []
+
+    def load():
+        start.wait()
+        results.append(cache.load(str(path), (320, 320)))
+
+    threads = [threading.Thread(target=load) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert cache.encodes == 1
+    assert len(results) == 8 and len(set(results)) == 1
+    assert cache._building == {}
+
+
+def test_disk_cache_is_shared_across_instances(tmp_path):
+    path = tmp_path / "tunis.png"
+    write_image(path)
+    disk_dir = tmp_path / "references"
+
+    first = ReferenceImageCache(disk=GenerationCache(str(disk_dir)))
+    encoded = first.load(str(path), (320, 320))
+    assert first.encodes == 1
+
+    # Another worker, or this one after a restart
+    second = ReferenceImageCache(disk=GenerationCache(str(disk_dir)))
+    assert second.load(str(path), (320, 320)) == encoded
+    assert second.encodes == 0
+    assert second.stats()["disk"]["hits"] == 1
@@ -0,0 +1,92 @@
+"""Crop planning, prompts and compositing of region-cropped edits"""
+
+import io
+
+from PIL import Image
+
+from services.region_crop import CropPlan, composite_bytes, crop_bytes, crop_prompt, plan_crop
+
+ORIGINAL, EDITED = (90, 90, 90), (200, 40, 40)
+
+
+def png(size, color) -> bytes:
+    output = io.BytesIO()
+    Image.new("RGB", size, color).save(output, format="PNG")
+    return output.getvalue()
+
+
+def test_crop_covers_the_regions_plus_margin_clipped_to_the_tile():
+    regions = [{"x1": 300, "y1": 200, "x2": 400, "y2": 260}, [20, 250, 80, 330]]
+
+    plan = plan_crop(regions, (1024, 1024), margin=64, mode="always")
+
+    assert plan.box == (0, 136, 464, 394)
+    assert plan.scale == 1.0
+    assert plan.size == (464, 258)
+
+
+def test_crop_is_scaled_down_to_the_model_input_size():
+    plan = plan_crop([(0, 0, 4000, 1000)], (4096, 4096), (2048, 2048), margin=0, mode="always")
+
+    assert plan.box == (0, 0, 4000, 1000)
+    assert plan.scale == 2048 / 4000
+    assert plan.size == (2048, 512)
+
+
+def test_auto_sends_the_full_tile_when_the_crop_saves_little():
+    small, large = [(100, 100, 200, 200)], [(0, 0, 700, 700)]
+
+    assert plan_crop(small, (1024, 1024), margin=64, mode="auto") is not None
+    assert plan_crop(large, (1024, 1024), margin=64, mode="auto") is None
+    assert plan_crop(large, (1024, 1024), margin=64, mode="always") is not None
+    assert plan_crop(small, (1024, 1024), margin=64, mode="off") is None
+    assert plan_crop([], (1024, 1024), margin=64, mode="always") is None
+
+
+def test_crop_prompt_restates_regions_in_crop_pixels():
+    plan = CropPlan(box=(100, 200, 500, 600), scale=0.5, full_size=(1024, 1024))
+
+    prompt = crop_prompt("Add a park", plan, [{"x1": 164, "y1": 264, "x2": 436, "y2": 536}])
+
+    assert prompt.startswith("Add a park\n\n")
+    assert "200x200 crop" in prompt
+    assert "- Region 1: x 32-168, y 32-168" in prompt
+
+
+def test_crop_bytes_sends_the_scaled_box():
+    plan = CropPlan(box=(100, 100, 300, 300), scale=0.5, full_size=(512, 512))
+
+    with Image.open(io.BytesIO(crop_bytes(png((512, 512), ORIGINAL), plan))) as crop:
+        assert crop.size == (100, 100)
+
+
+def test_composite_blends_inside_the_margin_and_keeps_the_rest():
+    margin, feather = 64, 32
+    plan = plan_crop([(164, 164, 236, 236)], (512, 512), margin=margin, mode="always")
+    assert plan.box == (100, 100, 300, 300)
+
+    result = Image.open(
+        io.BytesIO(composite_bytes(png((512, 512), ORIGINAL), png((200, 200), EDITED), plan))
+    )
+
+    assert result.size == (512, 512)
+    # Outside the crop: untouched
+    assert result.getpixel((99, 200)) == ORIGINAL
+    assert result.getpixel((300, 200)) == ORIGINAL
+    # The feather ramps up within the margin and the edit regions get the edit as is
+    assert result.getpixel((100, 200)) not in (ORIGINAL, EDITED)
+    assert result.getpixel((100 + feather, 200)) == EDITED
+    assert result.getpixel((164, 164)) == EDITED
+    assert result.getpixel((235, 235)) == EDITED
+
+
+def test_composite_does_not_feather_at_the_tile_border():
+    plan = plan_crop([(0, 0, 50, 50)], (512, 512), margin=64, mode="always")
+    assert plan.box == (0, 0, 114, 114)
+
+    result = Image.open(
+        io.BytesIO(composite_bytes(png((512, 512), ORIGINAL), png((114, 114), EDITED), plan))
+    )
+
+    assert result.getpixel((0, 0)) == EDITED
+    assert result.getpixel((113, 0)) not in (ORIGINAL, EDITED)
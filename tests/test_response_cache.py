@@ -0,0 +1,77 @@
+"""Commit-time invalidation and backend selection of the response cache"""
+
+import logging
+
+import pytest
+
+from api.models.database import Building
+from api.models.session import SessionLocal
+from api.utils.response_cache import MemoryBackend, create_backend, response_cache, worker_count
+
+POLYGON = {
+    "type": "Polygon",
+    "coordinates": [[[10.2, 36.8], [10.21, 36.8], [10.21, 36.81], [10.2, 36.8]]],
+}
+
+
+async def building_versions(*city_ids):
+    await response_cache.wait_invalidations()
+    return await response_cache.versions(f"buildings:{city_id}" for city_id in city_ids)
+
+
+@pytest.fixture
+def building(city):
+    _, city_id = city
+    with SessionLocal() as db:
+        row = Building(city_id=city_id, geometry=POLYGON, year_detected=2024)
+        db.add(row)
+        db.commit()
+        return row.id
+
+
+async def test_building_moved_between_cities_invalidates_both(city, other_city, building):
+    (_, old_city), (_, new_city) = city, other_city
+    before = await building_versions(old_city, new_city)
+
+    with SessionLocal() as db:
+        db.get(Building, building).city_id = new_city
+        db.commit()
+
+    after = await building_versions(old_city, new_city)
+    assert after[0] > before[0] and after[1] > before[1]
+
+
+async def test_deleted_building_invalidates_its_city(city, building):
+    _, city_id = city
+    (before,) = await building_versions(city_id)
+
+    with SessionLocal() as db:
+        db.delete(db.get(Building, building))
+        db.commit()
+
+    (after,) = await building_versions(city_id)
+    assert after > before
+
+
+async def test_memory_backend_with_several_workers_warns(monkeypatch, caplog):
+    monkeypatch.delenv("REDIS_URL", raising=False)
+
+    with caplog.at_level(logging.WARNING, logger="api.utils.response_cache"):
+        single = await create_backend(workers=1)
+        assert not caplog.records
+        several = await create_backend(workers=4)
+
+    assert isinstance(single, MemoryBackend) and isinstance(several, MemoryBackend)
+    assert "4 workers" in caplog.text and "REDIS_URL" in caplog.text
+
+
+def test_worker_count_follows_the_server_settings(monkeypatch):
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    monkeypatch.delenv("WORKERS", raising=False)
+    assert worker_count() == 1
+
+    monkeypatch.setenv("WORKERS", "4")
+    assert worker_count() == 4
+
+    monkeypatch.setenv("WEB_CONCURRENCY", "2")
+    assert worker_count() == 2
@@ -0,0 +1,78 @@
+"""Coalescing and cancellation of single-flight calls"""
+
+import asyncio
+
+from api.utils.singleflight import SingleFlight
+
+
+class SlowCall:
+    def __init__(self):
+        self.runs = 0
+        self.cancelled = False
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.runs += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return "result"
+
+
+async def test_concurrent_calls_share_one_execution():
+    flights, call = SingleFlight(), SlowCall()
+
+    tasks = [asyncio.create_task(flights.do("key", call)) for _ in range(3)]
+    await asyncio.sleep(0)
+    call.release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert call.runs == 1
+    assert sorted(shared for _, shared in results) == [False, True, True]
+    assert flights.in_flight() == 0
+
+
+async def test_leader_cancellation_leaves_followers_running():
+    flights, call = SingleFlight(), SlowCall()
+    leader = asyncio.create_task(flights.do("key", call))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flights.do("key", call))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    await asyncio.sleep(0)
+    call.release.set()
+
+    assert await follower == ("result", True)
+    assert leader.cancelled() and not call.cancelled
+
+
+async def test_execution_is_cancelled_when_every_caller_leaves():
+    flights, call = SingleFlight(), SlowCall()
+    callers = [asyncio.create_task(flights.do("key", call)) for _ in range(2)]
+    await asyncio.sleep(0)
+
+    for caller in callers:
+        caller.cancel()
+    await asyncio.gather(*callers, return_exceptions=True)
+    await asyncio.sleep(0)
+
+    assert call.cancelled
+    assert flights.in_flight() == 0
+
+
+async def test_failures_reach_every_caller():
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(
+        flights.do("key", fail), flights.do("key", fail), return_exceptions=True
+    )
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flights.executions == 1
@@ -0,0 +1,17 @@
+"""API startup time (see benchmarks/bench_startup.py)"""
+
+import os
+
+import pytest
+
+from benchmarks.bench_startup import measure_startup
+
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "2.0"))
+
+
+@pytest.mark.slow
+def test_api_imports_within_budget_without_heavy_modules():
+    timings, heavy = measure_startup(runs=1)
+
+    assert heavy == [], f"heavy modules imported at startup: {', '.join(heavy)}"
+    assert timings[0] < STARTUP_BUDGET_SECONDS